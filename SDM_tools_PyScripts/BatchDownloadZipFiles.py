@@ -2,16 +2,22 @@
 # BatchDownloadZipFiles.py
 # Version:  Python 2.7.5
 # Creation Date: 2015-07-14
-# Last Edit: 2015-08-05
+# Last Edit: 2026-10-18
 # Creator:  Kirsten R. Hazler
 # Credits:  I adapted the FTP-related procedures from code provided by Adam Thom, here:  
 # https://gis.stackexchange.com/questions/59047/downloading-multiple-files-from-tiger-ftp-site/
 #
 # Summary:
-#     Downloads a set of zip files from an FTP site.  
+#     Downloads a set of zip files from an FTP site or HTTP(S) server.  
 #     The file set is determined by a list in a user-provided table.
+#     Files are downloaded concurrently over a pool of reusable connections (see DownloadEngine.py).
+#     Interrupted downloads are resumed, and finished files are verified against the server before being kept.
+#     Rerunning the tool skips files that were already downloaded and verified, and resumes any partial (.part) files.
 #
 # Usage Tips:
+# ftpHOST may be an FTP host name, or an HTTP(S) base URL such as 'https://prd-tnm.s3.amazonaws.com'; ftpDIR is then the path below it.
+# nThreads (optional, default 4) is the number of files downloaded at once.
+# The work is done by the BatchDownloadZipFiles function, which can also be imported and called from Python.
 # Recommended default parameters to attach to tools in ArcGIS toolbox are below.  This single script can be added to multiple script tools with different defaults.
 #
 # TIGER/Line Roads data
@@ -40,8 +46,8 @@
 # ----------------------------------------------------------------------------------------
 
 # Import required modules
-import ftplib # needed to connect to the FTP server and download files
-import socket # needed to test FTP connection (or something; I dunno)
+import arcpy # provides access to geoprocessing tools
+import DownloadEngine # needed to connect to the FTP/HTTP server and download files
 import csv # needed to read/write CSV files
 import os # provides access to operating system funtionality such as file and directory paths
 import sys # provides access to Python system functions
@@ -50,86 +56,92 @@ import gc # garbage collection
 import datetime # for time stamps
 from datetime import datetime
 
-# Script arguments to be input by user
-in_tab = arcpy.GetParameterAsText(0) # Table containing unique ID field for the files to retrieve
-in_fld = arcpy.GetParameterAsText(1) # Field containing the unique ID
-pre = arcpy.GetParameterAsText(2) # Filename prefix; optional
-suf = arcpy.GetParameterAsText(3) # Filename suffix; optional
-out_dir = arcpy.GetParameterAsText(4) # Output directory to store downloaded files
-ftpHOST = arcpy.GetParameterAsText(5) # FTP site
-ftpDIR = arcpy.GetParameterAsText(6) # FTP directory
+# Define function to download the files listed in a table.  Returns the list of processing results.
+def BatchDownloadZipFiles(in_tab, in_fld, pre, suf, out_dir, ftpHOST, ftpDIR, nThreads=4):
+   # Derived variables
+   if not pre:
+      pre = ''
+   if not suf:
+      suf = ''
 
-# Derived variables
-if not pre:
-   pre = ''
-if not suf:
-   suf = ''
+   # Create and open a log file.
+   # If this log file already exists, it will be overwritten.  If it does not exist, it will be created.
+   ProcLogFile = out_dir + os.sep + 'README.txt'
+   Log = open(ProcLogFile, 'w+') 
+   FORMAT = '%Y-%m-%d %H:%M:%S'
+   timestamp = datetime.now().strftime(FORMAT)
+   Log.write("Process logging started %s" % timestamp)
 
-# Create and open a log file.
-# If this log file already exists, it will be overwritten.  If it does not exist, it will be created.
-ProcLogFile = out_dir + os.sep + 'README.txt'
-Log = open(ProcLogFile, 'w+') 
-FORMAT = '%Y-%m-%d %H:%M:%S'
-timestamp = datetime.now().strftime(FORMAT)
-Log.write("Process logging started %s" % timestamp)
-                                    
-try:
-   ftp = ftplib.FTP(ftpHOST)
-   arcpy.AddMessage("CONNECTED TO HOST '%s'" % ftpHOST)
-   Log.write("CONNECTED TO HOST '%s' \n" % ftpHOST)
-except (socket.error, socket.gaierror) as e:
-   arcpy.AddError('Error: cannot reach "%s" \n' % ftpHOST)
-   Log.write('Error: cannot reach "%s"' % ftpHOST)
-
-try:
-   ftp.login()
-except ftplib.error_perm:
-   arcpy.AddError('Error: cannot login annonymously')
-   Log.write('Error: cannot login annonymously \n')
-   ftp.quit()
-print 'Logged in'
-
-try:
-    ftp.cwd(ftpDIR)
-except ftplib.error_perm:
-   arcpy.AddError('Error: cannot CD to "%s"' %ftpDIR)
-   Log.write ('Error: cannot CD to "%s" \n' %ftpDIR)
-   ftp.quit()
-print 'Changed to "%s" folder' %ftpDIR
+   # Open a pool of connections to the host.  Connections are made as they are needed, and
+   # each is tested (logged in and changed to the download directory) when it is opened.
+   pool = DownloadEngine.OpenPool(ftpHOST, ftpDIR, nThreads)
+   try:
+      pool.Put(pool.Get())
+      arcpy.AddMessage("CONNECTED TO '%s'" % pool.Url())
+      Log.write("CONNECTED TO '%s' \n" % pool.Url())
+   except Exception as e:
+      arcpy.AddError('Error: cannot connect to "%s": %s' % (pool.Url(), e))
+      Log.write('Error: cannot connect to "%s": %s \n' % (pool.Url(), e))
+      Log.close()
+      return None
 
-nhdList = list() # List to hold NHD filenames
-ProcList = list() # List to hold processing results
+   nhdList = list() # List to hold NHD filenames
+   ProcList = list() # List to hold processing results
 
-# Make a list of the files to download, from the input table                                     
-try:
-   sc = arcpy.da.SearchCursor(in_tab, in_fld)
-   for row in sc:
-      fname = pre + row[0] + suf
-      nhdList.append(fname)
-except:
-   arcpy.AddError('Unable to parse input table.  Exiting...')
-   Log.write('Unable to parse input table.  Exiting...')
-   quit()
-         
-# Download the files and save to the output directory, while keeping track of success/failure
-for fileName in nhdList:
+   # Make a list of the files to download, from the input table                                     
    try:
-      arcpy.AddMessage('Downloading %s ...' % fileName)
-      with open(os.path.join(out_dir, fileName), 'wb') as local_file:
-         ftp.retrbinary('RETR '+ fileName, local_file.write)
-      ProcList.append('Successfully downloaded %s' % fileName)
+      sc = arcpy.da.SearchCursor(in_tab, in_fld)
+      for row in sc:
+         fname = pre + row[0] + suf
+         nhdList.append(fname)
    except:
-      arcpy.AddWarning('Failed to download %s ...' % fileName)
-      ProcList.append('Failed to download %s' % fileName)
+      arcpy.AddError('Unable to parse input table.  Exiting...')
+      Log.write('Unable to parse input table.  Exiting...')
+      Log.close()
+      return None
+
+   # Download the files and save to the output directory, while keeping track of success/failure
+   def Progress(result):
+      if result.skipped:
+         arcpy.AddMessage('%s is already downloaded and verified' % result.fileName)
+      elif result.ok and result.resumedAt:
+         arcpy.AddMessage('Downloaded %s (resumed at %.1f MB; %.1f MB in %.1f s)' % (result.fileName, result.resumedAt / 1048576.0, result.nbytes / 1048576.0, result.seconds))
+      elif result.ok:
+         arcpy.AddMessage('Downloaded %s (%.1f MB in %.1f s)' % (result.fileName, result.nbytes / 1048576.0, result.seconds))
+      else:
+         arcpy.AddWarning('Failed to download %s: %s' % (result.fileName, result.message))
+   arcpy.AddMessage('Downloading %s files, %s at a time...' % (len(nhdList), nThreads))
+   for result in DownloadEngine.Downloader(pool, out_dir).Run(nhdList, nThreads, Progress):
+      if result.skipped:
+         ProcList.append('Already downloaded %s' % result.fileName)
+      elif result.ok:
+         ProcList.append('Successfully downloaded %s' % result.fileName)
+      else:
+         ProcList.append('Failed to download %s (%s)' % (result.fileName, result.message))
 
-# Write download results to log.
-for item in ProcList:
-   Log.write("%s\n" % item)
- 
-timestamp = datetime.now().strftime(FORMAT)
-Log.write("\nProcess logging ended %s" % timestamp)   
-Log.close()
+   # Write download results to log.
+   for item in ProcList:
+      Log.write("%s\n" % item)
 
+   timestamp = datetime.now().strftime(FORMAT)
+   Log.write("\nProcess logging ended %s" % timestamp)   
+   Log.close()
 
+   return ProcList
 
+# The script tool reads its parameters and runs the function
+if __name__ == '__main__':
+   # Script arguments to be input by user
+   in_tab = arcpy.GetParameterAsText(0) # Table containing unique ID field for the files to retrieve
+   in_fld = arcpy.GetParameterAsText(1) # Field containing the unique ID
+   pre = arcpy.GetParameterAsText(2) # Filename prefix; optional
+   suf = arcpy.GetParameterAsText(3) # Filename suffix; optional
+   out_dir = arcpy.GetParameterAsText(4) # Output directory to store downloaded files
+   ftpHOST = arcpy.GetParameterAsText(5) # FTP site, or HTTP(S) base URL
+   ftpDIR = arcpy.GetParameterAsText(6) # FTP directory
+   if arcpy.GetArgumentCount() > 7 and arcpy.GetParameterAsText(7):
+      nThreads = int(arcpy.GetParameterAsText(7)) # Number of files to download at once
+   else:
+      nThreads = 4
 
+   BatchDownloadZipFiles(in_tab, in_fld, pre, suf, out_dir, ftpHOST, ftpDIR, nThreads)
@@ -2,82 +2,108 @@
 # BatchExtractZipfiles.py
 # Version:  Python 2.7.5
 # Creation Date: 2015-04-15
-# Last Edit: 2015-04-15
+# Last Edit: 2026-10-18
 # Creator:  Kirsten R. Hazler
 #
 # Summary:
 #     Extracts all zip files within a specified directory, and saves the output to another specified directory.
+#     Several zip files are extracted at once, by a pool of processes.
+#     Only the members matching the include patterns (and not the exclude patterns) are extracted.
+#     Members that have already been extracted (same size and CRC) are skipped, so the tool can be rerun after an interruption.
 #
 # Usage Tips:
-#     This is intended to be run as an ArcGIS tool.
+#     This is intended to be run as an ArcGIS tool.  The work is done by the BatchExtractZipfiles function, which can
+#     also be imported and called from Python (under "if __name__ == '__main__':", see ProcessPool.py).
+#     Patterns are file name wildcards separated by semicolons; a pattern matches a member if it matches the member's path or
+#     any folder leading to it.  For example, for NED ArcGrid archives, Include = 'grd*;info' extracts only the GRID and its
+#     info folder, leaving out the metadata and documents.
+#     A file geodatabase stores all its tables in one folder, so patterns cannot select a single feature dataset from an NHD archive.
 #
 # Required Arguments (input by user):
 #  ZipDir:  The directory containing the zip files to be extracted
 #  OutDir:  The directory in which extracted files will be stored
+#
+# Optional Arguments:
+#  Include:  Patterns of members to extract (default: all)
+#  Exclude:  Patterns of members not to extract (default: none)
+#  nProcs:  Number of zip files to extract at once (default: 4)
 # -------------------------------------------------------------------------------------------------------
 
 # Import required modules
 import arcpy # to get ArcGIS functionality
 import zipfile # for handling zipfiles
+import ZipTools # for extracting zipfiles in parallel
 import os # provides access to operating system funtionality such as file and directory paths
 import sys # provides access to Python system functions
 import traceback # used for error handling
 import gc # garbage collection
 
-# Script arguments to be input by user
-ZipDir = arcpy.GetParameterAsText(0) # input directory containing zip files to be extracted
-OutDir = arcpy.GetParameterAsText(1) # output directory to store extracted files
+# Define function to extract the zip files in a directory.  Returns the extraction report of each zip file.
+def BatchExtractZipfiles(ZipDir, OutDir, Include='', Exclude='', nProcs=4):
+   # If the output directory does not already exist, create it
+   if not os.path.exists(OutDir):
+      os.makedirs(OutDir)
+
+   # Set up the processing log
+   ProcLog = OutDir + os.sep + "ZipLog.txt"
+   log = open(ProcLog, 'w+')
+
+   reports = list() # extraction report of each zip file
+   try:
+      flist = os.listdir (ZipDir) # Get a list of all items in the input directory
+      zfiles = [f for f in flist if '.zip' in f] # This limits the list to zip files
+      zpaths = list()
+      for zfile in zfiles:
+         if zipfile.is_zipfile (ZipDir + os.sep + zfile):
+            zpaths.append(ZipDir + os.sep + zfile)
+         else:
+            arcpy.AddWarning('%s is not a valid zip file' % zfile)
+            log.write('\nWarning: %s is not a valid zip file' % zfile)
 
-# If the output directory does not already exist, create it
-if not os.path.exists(OutDir):
-   os.makedirs(OutDir)
-                                   
-# Set up the processing log                                   
-ProcLog = OutDir + os.sep + "ZipLog.txt"
-log = open(ProcLog, 'w+')
+      arcpy.AddMessage('Extracting %s zip files, %s at a time...' % (len(zpaths), nProcs))
+      totalBytes = 0
+      for report in ZipTools.ExtractArchives(zpaths, OutDir, Include, Exclude, nProcs):
+         reports.append(report)
+         zfile = os.path.basename(report.zipPath)
+         if report.ok:
+            msg = '%s extracted: %s members written (%.1f MB at %.1f MB/s), %s already present, %s filtered out' % (
+               zfile, report.extracted, report.nbytes / 1048576.0, report.Throughput(), report.skipped, report.filtered)
+            arcpy.AddMessage(msg)
+            log.write('\n' + msg)
+            totalBytes += report.nbytes
+         else:
+            arcpy.AddWarning('Failed to extract %s: %s' % (zfile, report.error))
+            log.write('\nWarning: Failed to extract %s: %s' % (zfile, report.error))
+      log.write('\n%.1f MB extracted in total' % (totalBytes / 1048576.0))
+      arcpy.AddMessage('Your files have been extracted to %s.' % OutDir)
 
-try:
-   flist = os.listdir (ZipDir) # Get a list of all items in the input directory
-   zfiles = [f for f in flist if '.zip' in f] # This limits the list to zip files
-   for zfile in zfiles:
-      if zipfile.is_zipfile (ZipDir + os.sep + zfile):
-         arcpy.AddMessage('Extracting %s' % zfile)
-         try:
-            zf = zipfile.ZipFile(ZipDir + os.sep + zfile)
-            zf.extractall(OutDir)
-            arcpy.AddMessage(zfile + ' extracted')
-            log.write('\n' + zfile + ' extracted')
+   except:
+      # Error handling code swiped from "A Python Primer for ArcGIS"
+      tb = sys.exc_info()[2]
+      tbinfo = traceback.format_tb(tb)[0]
+      pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
+      msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
 
-         except:
-            arcpy.AddWarning('Failed to extract %s' % zfile)
-            log.write('\nWarning: Failed to extract %s' % zfile)
-            # Error handling code swiped from "A Python Primer for ArcGIS"
-            tb = sys.exc_info()[2]
-            tbinfo = traceback.format_tb(tb)[0]
-            pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
-            msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+      arcpy.AddError(msgs)
+      arcpy.AddError(pymsg)
+      arcpy.AddMessage(arcpy.GetMessages(1))
 
-            arcpy.AddWarning(msgs)
-            arcpy.AddWarning(pymsg)
-            arcpy.AddMessage(arcpy.GetMessages(1))
-      else: 
-         arcpy.AddWarning('%s is not a valid zip file' % zfile)
-         log.write('\nWarning: %s is not a valid zip file' % zfile)
-   arcpy.AddMessage('Your files have been extracted to %s.' % OutDir)
-         
-except:
-   # Error handling code swiped from "A Python Primer for ArcGIS"
-   tb = sys.exc_info()[2]
-   tbinfo = traceback.format_tb(tb)[0]
-   pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
-   msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+   finally:
+      log.close()
 
-   arcpy.AddError(msgs)
-   arcpy.AddError(pymsg)
-   arcpy.AddMessage(arcpy.GetMessages(1))
-   
-finally:
-   log.close()
-   
+   return reports
 
+# The script tool reads its parameters and runs the function.  The extraction processes import this
+# script, so processing must only happen when it is run
+if __name__ == '__main__':
+   # Script arguments to be input by user
+   ZipDir = arcpy.GetParameterAsText(0) # input directory containing zip files to be extracted
+   OutDir = arcpy.GetParameterAsText(1) # output directory to store extracted files
+   Include = arcpy.GetParameterAsText(2) if arcpy.GetArgumentCount() > 2 else '' # patterns of members to extract; optional
+   Exclude = arcpy.GetParameterAsText(3) if arcpy.GetArgumentCount() > 3 else '' # patterns of members not to extract; optional
+   if arcpy.GetArgumentCount() > 4 and arcpy.GetParameterAsText(4):
+      nProcs = int(arcpy.GetParameterAsText(4)) # number of zip files to extract at once
+   else:
+      nProcs = 4
 
+   BatchExtractZipfiles(ZipDir, OutDir, Include, Exclude, nProcs)
@@ -0,0 +1,222 @@
+# ----------------------------------------------------------------------------------------
+# BatchIngestZipFiles.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Downloads a set of zip files from an FTP site or HTTP(S) server, extracts them, and
+#     (optionally) imports the extracted GRID rasters into a file geodatabase, all in one run.
+#     This combines the work of BatchDownloadZipFiles, BatchExtractZipfiles, and ImportNED.
+#     The three steps run as a pipeline (see IngestPipeline.py): while one file is being imported,
+#     the next is being extracted and the ones after it are being downloaded, so the whole run
+#     takes about as long as its slowest step rather than the sum of all three.
+#     The following processes are performed:
+#     - Downloads the files (several at once), resuming and verifying as in BatchDownloadZipFiles.
+#     - Extracts each zip file into its own folder in the output directory.
+#     - If a geodatabase is given, copies the GRID rasters in each extracted folder into it, then
+#       deletes the extracted folder (as ImportNED does).
+#     - Deletes each zip file once its data are ingested (extracted, and imported if a geodatabase
+#       is given), and records it in a list of ingested files (ingested.txt in the output directory).
+#     - Writes processing results to a log file.
+#
+# Usage Tips:
+#     The file set is determined by a list in a user-provided table, as in BatchDownloadZipFiles;
+#     see that script for recommended parameters for NHD and NED data.
+#     Zip archives keep their table of contents at the end of the file, so each zip is downloaded
+#     in full before it is extracted.  It is kept until its data are ingested, so if a step fails,
+#     a rerun finds the zip (and any members already extracted) in place rather than downloading
+#     it again.  Files in the list of ingested files are skipped by later runs; delete the list
+#     (or remove their names from it) to ingest them again, e.g. into a new geodatabase.
+#     Leave the geodatabase blank for data that are not GRIDs (e.g. NHD file geodatabases); the
+#     extracted folders are then the final output.
+#     The number of files waiting between steps is limited, so disk use stays bounded however
+#     many files are requested.
+#     The work is done by the BatchIngestZipFiles function, which can also be imported and called
+#     from Python.
+#
+# Syntax:
+# BatchIngestZipFiles (in_tab, in_fld, pre, suf, out_dir, ftpHOST, ftpDIR, {outGDB}, {nThreads})
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import arcpy # provides access to geoprocessing tools
+import DownloadEngine # for downloading the zip files
+import ZipTools # for extracting the zip files
+import IngestPipeline # for overlapping the download, extract, and import steps
+import os # provides access to operating system funtionality such as file and directory paths
+import shutil # for removing extracted folders
+import sys # provides access to Python system functions
+import traceback # used for error handling
+from datetime import datetime # for time stamps
+
+# Define function to download, extract and import the files listed in a table.  Returns the list of processing results.
+def BatchIngestZipFiles(in_tab, in_fld, pre, suf, out_dir, ftpHOST, ftpDIR, outGDB=None, nThreads=4):
+   # Derived variables
+   if not pre:
+      pre = ''
+   if not suf:
+      suf = ''
+   zipDir = out_dir + os.sep + 'zips' # Directory where zip files are downloaded
+   ingestedFile = out_dir + os.sep + 'ingested.txt' # List of the files already ingested
+   arcpy.env.overwriteOutput = True # Set overwrite option so that existing data may be overwritten
+
+   # Create and open a log file.
+   # If this log file already exists, it will be overwritten.  If it does not exist, it will be created.
+   if not os.path.exists(out_dir):
+      os.makedirs(out_dir)
+   ProcLogFile = out_dir + os.sep + 'README.txt'
+   Log = open(ProcLogFile, 'w+')
+   FORMAT = '%Y-%m-%d %H:%M:%S'
+   timestamp = datetime.now().strftime(FORMAT)
+   Log.write("Process logging started %s \n" % timestamp)
+
+   # Make a list of the files to download, from the input table
+   fileList = list()
+   try:
+      sc = arcpy.da.SearchCursor(in_tab, in_fld)
+      for row in sc:
+         fileList.append(pre + row[0] + suf)
+      del sc
+   except:
+      arcpy.AddError('Unable to parse input table.  Exiting...')
+      Log.write('Unable to parse input table.  Exiting...')
+      Log.close()
+      return None
+
+   # Skip the files ingested by earlier runs
+   ingested = set()
+   if os.path.exists(ingestedFile):
+      with open(ingestedFile) as f:
+         ingested = set(line.strip() for line in f if line.strip())
+   ProcList = list() # List to hold processing results
+   for fileName in fileList:
+      if fileName in ingested:
+         ProcList.append('Skipped %s (already ingested)' % fileName)
+   if ProcList:
+      arcpy.AddMessage('Skipping %s files already ingested (listed in %s)' % (len(ProcList), ingestedFile))
+   fileList = [fileName for fileName in fileList if fileName not in ingested]
+
+   # Open a pool of connections to the host, testing the first connection
+   pool = DownloadEngine.OpenPool(ftpHOST, ftpDIR, nThreads)
+   try:
+      pool.Put(pool.Get())
+      arcpy.AddMessage("CONNECTED TO '%s'" % pool.Url())
+      Log.write("CONNECTED TO '%s' \n" % pool.Url())
+   except Exception as e:
+      arcpy.AddError('Error: cannot connect to "%s": %s' % (pool.Url(), e))
+      Log.write('Error: cannot connect to "%s": %s \n' % (pool.Url(), e))
+      Log.close()
+      return None
+   downloader = DownloadEngine.Downloader(pool, zipDir)
+   downloader.Prepare()
+
+   # Define function for the download step: download one file, returning the path of the zip file
+   def Download(fileName):
+      result = downloader.Download(fileName)
+      if not result.ok:
+         raise IOError('download failed: %s' % result.message)
+      return result.path
+
+   # Define function for the extract step: extract one zip file into its own folder.  Members
+   # already extracted by an earlier run are skipped.  Returns the zip file and the folder.
+   def Extract(zipPath):
+      folder = ZipTools.ArchiveFolder(zipPath, out_dir)
+      ZipTools.ExtractZip(zipPath, folder)
+      return (zipPath, folder)
+
+   # Define function to finish a file once its data are ingested: delete its zip file and add it
+   # to the list of ingested files.  This runs in the main thread only.
+   def Ingested(fileName, zipPath):
+      if os.path.exists(zipPath):
+         os.remove(zipPath)
+      with open(ingestedFile, 'a') as f:
+         f.write('%s\n' % fileName)
+
+   # Define function for the import step: copy the GRID rasters in an extracted folder into the
+   # geodatabase, then delete the folder.  This runs in the main thread, because arcpy must.
+   # Returns the names of the rasters imported.
+   def Import(folder):
+      arcpy.env.workspace = folder
+      grids = arcpy.ListRasters("*", "GRID")
+      for gname in grids:
+         arcpy.CopyRaster_management(folder + os.sep + gname, outGDB + os.sep + gname)
+      arcpy.env.workspace = out_dir
+      shutil.rmtree(folder, True)
+      return grids
+
+   # Run the download and extract steps as a pipeline, importing each extracted folder as it arrives.
+   # At most nThreads downloaded zip files wait to be extracted, and at most nThreads extracted
+   # folders wait to be imported.
+   stages = [IngestPipeline.Stage('download', Download, nThreads, 1),
+             IngestPipeline.Stage('extract', Extract, 2, nThreads)]
+   pipeline = IngestPipeline.Pipeline(stages)
+   importSecs = 0.0
+   arcpy.AddMessage('Ingesting %s files...' % len(fileList))
+   for job in pipeline.Run(fileList):
+      if not job.ok:
+         arcpy.AddWarning('Failed to %s %s: %s' % (job.stage, job.key, job.error))
+         ProcList.append('Failed to %s %s (%s)' % (job.stage, job.key, job.error))
+         continue
+      zipPath, folder = job.value
+      if not outGDB:
+         Ingested(job.key, zipPath)
+         arcpy.AddMessage('Extracted %s to %s' % (job.key, folder))
+         ProcList.append('Extracted %s to %s' % (job.key, folder))
+         continue
+      try:
+         start = datetime.now()
+         grids = Import(folder)
+         importSecs += (datetime.now() - start).total_seconds()
+         Ingested(job.key, zipPath)
+         arcpy.AddMessage('Imported %s from %s' % (', '.join(grids), job.key))
+         ProcList.append('Imported %s from %s' % (', '.join(grids), job.key))
+      except:
+         arcpy.AddWarning('Failed to import %s' % job.key)
+         ProcList.append('Failed to import %s' % job.key)
+         # Error handling code swiped from "A Python Primer for ArcGIS"
+         tb = sys.exc_info()[2]
+         tbinfo = traceback.format_tb(tb)[0]
+         pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
+         msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+         arcpy.AddWarning(msgs)
+         arcpy.AddWarning(pymsg)
+
+   pool.CloseAll()
+
+   # Write processing results to log, with the time spent in each step
+   for item in ProcList:
+      Log.write("%s\n" % item)
+   Log.write('\nTime spent per step (seconds, per worker):\n')
+   for name, count, secs in pipeline.Summary():
+      Log.write('%s: %s files, %.1f\n' % (name, count, secs))
+   if outGDB:
+      Log.write('import: %.1f\n' % importSecs)
+   timestamp = datetime.now().strftime(FORMAT)
+   Log.write("\nProcess logging ended %s" % timestamp)
+   Log.close()
+   arcpy.AddMessage('Processing results can be viewed in %s' % ProcLogFile)
+
+   return ProcList
+
+# The script tool reads its parameters and runs the function
+if __name__ == '__main__':
+   # Script arguments to be input by user
+   in_tab = arcpy.GetParameterAsText(0) # Table containing unique ID field for the files to retrieve
+   in_fld = arcpy.GetParameterAsText(1) # Field containing the unique ID
+   pre = arcpy.GetParameterAsText(2) # Filename prefix; optional
+   suf = arcpy.GetParameterAsText(3) # Filename suffix; optional
+   out_dir = arcpy.GetParameterAsText(4) # Output directory to store extracted files
+   ftpHOST = arcpy.GetParameterAsText(5) # FTP site, or HTTP(S) base URL
+   ftpDIR = arcpy.GetParameterAsText(6) # FTP directory
+   if arcpy.GetArgumentCount() > 7 and arcpy.GetParameterAsText(7):
+      outGDB = arcpy.GetParameterAsText(7) # Geodatabase to import GRID rasters into; optional
+   else:
+      outGDB = None
+   if arcpy.GetArgumentCount() > 8 and arcpy.GetParameterAsText(8):
+      nThreads = int(arcpy.GetParameterAsText(8)) # Number of files to download at once
+   else:
+      nThreads = 4
+
+   BatchIngestZipFiles(in_tab, in_fld, pre, suf, out_dir, ftpHOST, ftpDIR, outGDB, nThreads)
@@ -2,7 +2,7 @@
 # BatchSolarRad.py
 # Version:  Python 2.7.5
 # Creation Date: 2015-04-06
-# Last Edit: 2016-05-17
+# Last Edit: 2026-10-18
 # Creator:  Kirsten R. Hazler and Roy Gilb
 #
 # Summary:
@@ -11,6 +11,22 @@
 #     system to match the DEM.
 #
 # Usage Tips:
+#     The DEM may be a virtual mosaic of DEM tiles (<name>.vmos.json, see BuildVirtualDEM); each
+#     footprint's buffered window is then read from just the tiles it overlaps.  When several
+#     processes on a machine run tiles of the same DEM, it may also be a shared raster
+#     (<name>.shared.json, see SharedRaster.py), decoded once and read by all of them as memory-mapped views.
+#     The time, CPU, memory and I/O of each tile and step are traced to <ProcLog>_trace.jsonl
+#     (see ProcTrace.py); run "python ProcTrace.py <trace>" to see which steps dominate.
+#     Steps named in the optional profile parameter (e.g. 'AreaSolarRadiation') are also
+#     profiled with cProfile.
+#     Progress, throughput and the estimated time remaining are reported as each tile finishes,
+#     and written every minute to <ProcLog>_status.json; run "python ProgressReport.py <status file>"
+#     from another shell to watch the run (see ProgressReport.py).
+#     The work is done by the BatchSolarRad function, which can also be imported and called from Python.
+#     Given a list of tile IDs, it processes only those tiles, so the tiles can be spread over
+#     several machines (see TileQueue.py).  Jobs running at once on one machine should each be
+#     given their own work tag (e.g. "workTag": "{worker}" in the job file's kwargs), which is
+#     added to the names of the temporary GDBs in E:\Defaults; those GDBs are reused by later jobs.
 #
 # Syntax:
 # ----------------------------------------------------------------------------------------
@@ -20,201 +36,251 @@ import arcpy
 from arcpy.sa import *
 arcpy.CheckOutExtension("Spatial")
 import os # provides access to operating system funtionality such as file and directory paths
+import re # for making GDB names from work tags
 import sys # provides access to Python system functions
 import traceback # used for error handling
 from datetime import datetime # for time-stamping
-
-# Script arguments to be input by user
-in_DEM = arcpy.GetParameterAsText(0) # Input digital elevation model
-z_factor = arcpy.GetParameter(1) # The number of ground x,y units in one surface z unit.
-   # Default:  1
-in_Tiles = arcpy.GetParameterAsText(2) 
-   # Polygon feature class outlining footprints of tiles to be processed
-   # Recommend using footprints covering narrow strips of constant latitude; can be long east-west
-fld_ID = arcpy.GetParameterAsText(3)
-   # A field to use as unique ID for each tile
-out_GDB1 = arcpy.GetParameterAsText(4) # File geodatabases to store the output solar radiation tiles - one per band
-out_GDB2 = arcpy.GetParameterAsText(5)
-out_GDB3 = arcpy.GetParameterAsText(6)
-#scratch_GDB = arcpy.GetParameterAsText(7)
-ProcLog = arcpy.GetParameterAsText(7) # Text file to record processing record
-DEMRast = Raster(in_DEM)
-
-# Hard-coded parameters required by Area Solar Radiation tool
-
-# in_surface_raster 
-   # Not needed here; use raster extracted in loop
-latitude = '' 
-   # No value given, so the average latitude for the extracted raster will be usedarea
-sky_size = 200 
-   # Square side length, in cells, for the viewshed, sky map, and sun map grids
-time_configuration = 'TimeSpecialDays()' 
-   # Specifies the time configuration (period) used for calculating solar radiation.
-day_interval = ''
-   # Use default
-hour_interval = ''
-   # Use default
-each_interval = 'INTERVAL'
-   # For a whole year with monthly intervals, results in 12 output radiation values for each location. 
-# z_factor
-   # Not needed here; entered by user
-slope_aspect_input_type = 'FROM_DEM'
-   # The slope and aspect grids are calculated from the input surface raster. 
-calculation_directions = 32
-   # Number of azimuth directions used when calculating the viewshed.  Default is 32.
-zenith_divisions = 16
-   # Number of divisions, relative to zenith, used to create sky sectors in the sky map.  Default is 8.
-azimuth_divisions = 16
-   # Number of divisions, relative to north, used to create sky sectors in the sky map.  Default is 8.
-diffuse_model_type = 'UNIFORM_SKY'
-   # Uniform diffuse model. The incoming diffuse radiation is the same from all sky directions. 
-diffuse_proportion = 0.3 
-   # This is the default value for generally clear sky conditions.
-transmittivity = 0.5 
-   # This is the default for a generally clear sky.
-# out_direct_radiation_raster
-   # Not needed here; use raster naming convention in loop
-# out_diffuse_radiation_raster
-   # Not needed here; use raster naming convention in loop
-# out_direct_duration_raster
-   # Not needed here; use raster naming convention in loop
-
-   
-#Extract strip number from in_Tiles fro creating unique scratch and current workspaces
-stripPath = in_Tiles
-stripFile = os.path.basename(stripPath)
-stripNo = stripFile.replace('fc_LatStrips100_grp', '')
-outPath = "E:\Defaults"
-currName = 'SolRadGrp' + stripNo    #Create temporary, unique GDBs for current and scratch
-scrName = 'ScrSolarRadGrp' + stripNo   #
-
-currGDB = arcpy.CreateFileGDB_management(outPath, currName)
-scrGDB = arcpy.CreateFileGDB_management(outPath, scrName)
-
-# Geoprocessing environment settings
-arcpy.env.snapRaster = DEMRast # Set the snap raster for alignment of outputs
-arcpy.env.overwriteOutput = True # Set overwrite option so that existing data may be overwritten
-arcpy.Delete_management("in_memory")  #Clear in_memory to avoid schema lock errors
-arcpy.env.workspace = str(currGDB)
-arcpy.env.scratchWorkspace = str(scrGDB)
-
-#scratch = scratch_GDB
-#scratch = arcpy.env.scratchGDB # Scratch workspace (default)
-
-
-
-# Initialize a list for processing records, and start processing log
-Log = open(ProcLog, 'w+') 
-timeStamp = datetime.strftime(datetime.now(), '%Y-%m-%d %H:%M:%S')
-Log.write('Solar radiation processing started %s.\n' % timeStamp)
-
-#Inform the user on the value of each input and output
-Log.write('The input DEM is: ' + in_DEM)
-Log.write('\nThe input Z-factor is: ' + str(z_factor))  
-Log.write('\nThe input Latitude strip feature class is: ' + in_Tiles)    
-Log.write('\nThe input ID field for the latitude strips is: ' + fld_ID)
-Log.write('\nThe output GDB for the winter files is: ' + out_GDB1)
-Log.write('\nThe output GDB for the equinox files is: ' + out_GDB2)
-Log.write('\nThe output GDB for the summer files is: ' + out_GDB3)
-Log.write('\nThe temporary default GDB for the intermediate files is: ' + str(currGDB))
-### Add records of tool parameters to the log, here
-Log.close()
-
-myProcList = [] # Empty list to keep track of features processed.
-listCount = -1
-Footprints = arcpy.da.SearchCursor(in_Tiles, [fld_ID, "SHAPE@"]) ### Set up the search cursor from in_Tiles here.
-
-with Footprints as cursor:
-   for fp in Footprints:
-      try:
-         listCount = listCount + 1
-         fp_ID = str(fp[0])
-         fp_geom = fp[1]
-         mem = 'in_memory'
-         arcpy.AddMessage('Working on tile %s...' % fp_ID)
-         
-         # Make a temp feature class from the single footprint - save to in_memory
-         fprint = mem + os.sep + 'tile'
-         arcpy.FeatureClassToFeatureClass_conversion(fp_geom, mem, 'tile')
-     
-         # Buffer the footprint by the sky_size - save in in_memory
-         buff_fp = mem + os.sep + 'buffertile'
-         arcpy.Buffer_analysis(fprint, buff_fp, sky_size)
-         
-         # Extract the DEM for the buffered footprint - save to memory (change to scratch if it crashes)     
-         subset_DEM = mem + os.sep + 'clipDEM' #+fp_ID      --> Possible change this if we want to keep the buffers
-         arcpy.Clip_management(DEMRast, "#", subset_DEM, buff_fp, "", "ClippingGeometry")
-    
-         # Run solar radiation - save to mem (change to scratch if it crashes)
-         solarRad_Buff = AreaSolarRadiation(subset_DEM, '', sky_size, time_configuration, day_interval, hour_interval, each_interval, z_factor, slope_aspect_input_type, calculation_directions, zenith_divisions, azimuth_divisions, diffuse_model_type, diffuse_proportion, transmittivity, '', '', '')
-         
-         # Clip output solar radiation rasters to original footprint - save to memory 
-         #solarRad_Clip = mem + os.sep + 'solarR' # + fp_ID
-         #arcpy.Clip_management(solarRad_Buff, "#", solarRad_Clip, fprint, "", "ClippingGeometry")
-         
-         #Extract each individual band and save them to the output GDBs using nametags and tile ID --> w = winter solstice, e = equinox, s = summer solstice
-         band1 = out_GDB1 + os.sep + 'solRad_w' + fp_ID
-         band2 = out_GDB2 + os.sep + 'solRad_e' + fp_ID
-         band3 = out_GDB3 + os.sep + 'solRad_s' + fp_ID
-         arcpy.MakeRasterLayer_management(solarRad_Buff, band1, '', '', '1')
-         arcpy.MakeRasterLayer_management(solarRad_Buff, band2, '', '', '2')
-         arcpy.MakeRasterLayer_management(solarRad_Buff, band3, '', '', '3')
-         
-         #Save the temporary layers to rasters
-         (Raster(band1)).save(band1)
-         (Raster(band2)).save(band2)
-         (Raster(band3)).save(band3)   
-         
-         #Delete intermediate scratch or memory data if necessary  
-         arcpy.Delete_management("in_memory")
-
-         Log = open(ProcLog, 'a+')
-         arcpy.AddMessage('Successfully processed tile %s' % fp_ID)
-         myProcList.append('\nSuccessfully processed tile %s' % fp_ID)
-         
-         Log.write(myProcList[listCount])    
-         
-         
-      except:
-         arcpy.AddMessage('Failed to process %s' % fp_ID)
-         myProcList.append('\nFailed to process %s' % fp_ID)
-         Log = open(ProcLog, 'a+')
-         Log.write(myProcList[listCount])    
-         # Error handling code swiped from "A Python Primer for ArcGIS"
-         tb = sys.exc_info()[2]
-         tbinfo = traceback.format_tb(tb)[0]
-         pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
-         msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
-
-         arcpy.AddWarning(msgs)
-         arcpy.AddWarning(pymsg)
-         arcpy.AddMessage(arcpy.GetMessages(1))
-      
-      
-# Write processing results to a log file.
-# If this log file already exists, it will be overwritten.  If it does not exist, it will be created
-Log = open(ProcLog, 'a+')
-timeStamp = datetime.strftime(datetime.now(), '%Y-%m-%d %H:%M:%S')
-Log.write('\nSolar radiation processing completed %s. Results shown above.\n' % timeStamp)
-Log.close()
-arcpy.AddMessage('Processing results can be viewed in %s' % ProcLog)
-
-#Delete temp current and scratch GDBs
-#arcpy.Delete_management(str(currGDB))         
-#arcpy.Delete_management(str(scrGDB))   
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+import RasterWindow # for reading buffered DEM windows directly into arrays
+import ProcTrace # for tracing the time and resources spent in each step
+import ProgressReport # for reporting progress and the estimated time remaining
+
+# Define function to derive solar radiation for each footprint.  Returns the list of processing records.
+# tileIDs limits the tiles processed to those listed (a list, or IDs separated by semicolons).
+# workTag is added to the names of the temporary GDBs, so that jobs running at once on one machine
+# (e.g. TileQueue slots, given "{worker}") each have their own.
+def BatchSolarRad(in_DEM, z_factor, in_Tiles, fld_ID, out_GDB1, out_GDB2, out_GDB3, ProcLog, profileSteps=None, tileIDs=None, workTag=None):
+   if isinstance(tileIDs, (str, type(u''))):
+      tileIDs = tileIDs.split(';')
+   if tileIDs is not None:
+      tileIDs = set(str(t) for t in tileIDs)
+   DEMRast = Raster(RasterWindow.SnapRaster(in_DEM))
+   DEMGrid = RasterWindow.GetRasterGrid(in_DEM) # Origin, cell size and dimensions of the DEM
+
+   # Hard-coded parameters required by Area Solar Radiation tool
+
+   # in_surface_raster 
+      # Not needed here; use raster extracted in loop
+   latitude = '' 
+      # No value given, so the average latitude for the extracted raster will be usedarea
+   sky_size = 200 
+      # Square side length, in cells, for the viewshed, sky map, and sun map grids
+   time_configuration = 'TimeSpecialDays()' 
+      # Specifies the time configuration (period) used for calculating solar radiation.
+   day_interval = ''
+      # Use default
+   hour_interval = ''
+      # Use default
+   each_interval = 'INTERVAL'
+      # For a whole year with monthly intervals, results in 12 output radiation values for each location. 
+   # z_factor
+      # Not needed here; entered by user
+   slope_aspect_input_type = 'FROM_DEM'
+      # The slope and aspect grids are calculated from the input surface raster. 
+   calculation_directions = 32
+      # Number of azimuth directions used when calculating the viewshed.  Default is 32.
+   zenith_divisions = 16
+      # Number of divisions, relative to zenith, used to create sky sectors in the sky map.  Default is 8.
+   azimuth_divisions = 16
+      # Number of divisions, relative to north, used to create sky sectors in the sky map.  Default is 8.
+   diffuse_model_type = 'UNIFORM_SKY'
+      # Uniform diffuse model. The incoming diffuse radiation is the same from all sky directions. 
+   diffuse_proportion = 0.3 
+      # This is the default value for generally clear sky conditions.
+   transmittivity = 0.5 
+      # This is the default for a generally clear sky.
+   # out_direct_radiation_raster
+      # Not needed here; use raster naming convention in loop
+   # out_diffuse_radiation_raster
+      # Not needed here; use raster naming convention in loop
+   # out_direct_duration_raster
+      # Not needed here; use raster naming convention in loop
+
+
+   #Extract strip number from in_Tiles fro creating unique scratch and current workspaces
+   stripPath = in_Tiles
+   stripFile = os.path.basename(stripPath)
+   stripNo = stripFile.replace('fc_LatStrips100_grp', '')
+   outPath = "E:\Defaults"
+   currName = 'SolRadGrp' + stripNo    #Create temporary, unique GDBs for current and scratch
+   scrName = 'ScrSolarRadGrp' + stripNo   #
+   if workTag:
+      currName += '_' + re.sub(r'\W', '_', str(workTag))
+      scrName += '_' + re.sub(r'\W', '_', str(workTag))
+
+   # The GDBs are reused if they exist, since a strip may be processed by several jobs, a few tiles at a time
+   currGDB = os.path.join(outPath, currName + '.gdb')
+   scrGDB = os.path.join(outPath, scrName + '.gdb')
+   if not arcpy.Exists(currGDB):
+      arcpy.CreateFileGDB_management(outPath, currName)
+   if not arcpy.Exists(scrGDB):
+      arcpy.CreateFileGDB_management(outPath, scrName)
+
+   # Geoprocessing environment settings
+   arcpy.env.snapRaster = DEMRast # Set the snap raster for alignment of outputs
+   arcpy.env.overwriteOutput = True # Set overwrite option so that existing data may be overwritten
+   arcpy.Delete_management("in_memory")  #Clear in_memory to avoid schema lock errors
+   arcpy.env.workspace = str(currGDB)
+   arcpy.env.scratchWorkspace = str(scrGDB)
+
+   #scratch = scratch_GDB
+   #scratch = arcpy.env.scratchGDB # Scratch workspace (default)
+
+
+
+   # Initialize a list for processing records, and start processing log
+   Log = open(ProcLog, 'w+') 
+   timeStamp = datetime.strftime(datetime.now(), '%Y-%m-%d %H:%M:%S')
+   Log.write('Solar radiation processing started %s.\n' % timeStamp)
+
+   #Inform the user on the value of each input and output
+   Log.write('The input DEM is: ' + in_DEM)
+   Log.write('\nThe input Z-factor is: ' + str(z_factor))  
+   Log.write('\nThe input Latitude strip feature class is: ' + in_Tiles)    
+   Log.write('\nThe input ID field for the latitude strips is: ' + fld_ID)
+   Log.write('\nThe output GDB for the winter files is: ' + out_GDB1)
+   Log.write('\nThe output GDB for the equinox files is: ' + out_GDB2)
+   Log.write('\nThe output GDB for the summer files is: ' + out_GDB3)
+   Log.write('\nThe temporary default GDB for the intermediate files is: ' + str(currGDB))
+   ### Add records of tool parameters to the log, here
+   Log.flush()
+
+   # Start the trace of this run
+   TraceFile = os.path.splitext(ProcLog)[0] + '_trace.jsonl'
+   ProcTrace.Start(TraceFile, profileSteps)
+   completed = False
+   try:
+      with ProcTrace.Span('BatchSolarRad', tiles=in_Tiles, dem=in_DEM):
+         # Count the tiles, and the cells of their buffered DEM windows, for reporting progress
+         tileCells = dict()
+         with arcpy.da.SearchCursor(in_Tiles, [fld_ID, "SHAPE@"]) as cursor:
+            for fp in cursor:
+               if tileIDs is not None and str(fp[0]) not in tileIDs:
+                  continue
+               window = RasterWindow.GeometryWindow(DEMGrid, fp[1], sky_size)
+               tileCells[str(fp[0])] = window[2] * window[3] if window is not None else 0
+         StatusFile = os.path.splitext(ProcLog)[0] + '_status.json'
+         Progress = ProgressReport.ProgressReporter(len(tileCells), sum(tileCells.values()), 'tile', StatusFile, arcpy.AddMessage)
+
+         myProcList = [] # Empty list to keep track of features processed.
+         listCount = -1
+         Footprints = arcpy.da.SearchCursor(in_Tiles, [fld_ID, "SHAPE@"]) ### Set up the search cursor from in_Tiles here.
+
+         with Footprints as cursor:
+            for fp in Footprints:
+               if tileIDs is not None and str(fp[0]) not in tileIDs:
+                  continue
+               TileSpan = ProcTrace.Span('tile', id=str(fp[0]))
+               TileSpan.__enter__()
+               try:
+                  listCount = listCount + 1
+                  fp_ID = str(fp[0])
+                  fp_geom = fp[1]
+                  mem = 'in_memory'
+                  arcpy.AddMessage('Working on tile %s...' % fp_ID)
+                  Progress.Begin(fp_ID)
+
+                  # Read the DEM window covering the footprint, buffered by the sky_size, straight into an array.
+                  # The window is computed from the footprint's extent and the DEM grid, so no temporary
+                  # footprint, buffer, or clipped feature classes are needed.
+                  window = RasterWindow.GeometryWindow(DEMGrid, fp_geom, sky_size)
+                  if window is None:
+                     raise ValueError('Footprint %s does not overlap the DEM' % fp_ID)
+                  TileSpan.Set(cells=window[2] * window[3])
+                  arrDEM = ProcTrace.Call('ReadWindow', RasterWindow.ReadWindow, in_DEM, DEMGrid, window)
+
+                  # Convert the window back to a raster - save to memory (change to scratch if it crashes)
+                  subset_DEM = ProcTrace.Call('WindowToRaster', RasterWindow.WindowToRaster, arrDEM, DEMGrid, window, mem + os.sep + 'clipDEM')
+                  del arrDEM
+
+                  # Run solar radiation - save to mem (change to scratch if it crashes)
+                  solarRad_Buff = ProcTrace.Call('AreaSolarRadiation', AreaSolarRadiation, subset_DEM, '', sky_size, time_configuration, day_interval, hour_interval, each_interval, z_factor, slope_aspect_input_type, calculation_directions, zenith_divisions, azimuth_divisions, diffuse_model_type, diffuse_proportion, transmittivity, '', '', '')
+
+                  # Clip output solar radiation rasters to original footprint - save to memory 
+                  #solarRad_Clip = mem + os.sep + 'solarR' # + fp_ID
+                  #arcpy.Clip_management(solarRad_Buff, "#", solarRad_Clip, fprint, "", "ClippingGeometry")
+
+                  #Extract each individual band and save them to the output GDBs using nametags and tile ID --> w = winter solstice, e = equinox, s = summer solstice
+                  band1 = out_GDB1 + os.sep + 'solRad_w' + fp_ID
+                  band2 = out_GDB2 + os.sep + 'solRad_e' + fp_ID
+                  band3 = out_GDB3 + os.sep + 'solRad_s' + fp_ID
+                  with ProcTrace.Span('SaveBands'):
+                     arcpy.MakeRasterLayer_management(solarRad_Buff, band1, '', '', '1')
+                     arcpy.MakeRasterLayer_management(solarRad_Buff, band2, '', '', '2')
+                     arcpy.MakeRasterLayer_management(solarRad_Buff, band3, '', '', '3')
+
+                     #Save the temporary layers to rasters
+                     (Raster(band1)).save(band1)
+                     (Raster(band2)).save(band2)
+                     (Raster(band3)).save(band3)   
+
+                  #Delete intermediate scratch or memory data if necessary  
+                  ProcTrace.Call('Delete', arcpy.Delete_management, "in_memory")
+                  TileSpan.__exit__(None, None, None)
+
+                  arcpy.AddMessage('Successfully processed tile %s' % fp_ID)
+                  myProcList.append('\nSuccessfully processed tile %s' % fp_ID)
+
+                  Log.write(myProcList[listCount])    
+                  Log.flush()
+                  Progress.Done(fp_ID, tileCells.get(fp_ID))
+
+               except:
+                  TileSpan.__exit__(*sys.exc_info())
+                  arcpy.AddMessage('Failed to process %s' % fp_ID)
+                  myProcList.append('\nFailed to process %s' % fp_ID)
+                  Log.write(myProcList[listCount])    
+                  Log.flush()
+                  Progress.Failed(fp_ID, tileCells.get(fp_ID))
+                  # Error handling code swiped from "A Python Primer for ArcGIS"
+                  tb = sys.exc_info()[2]
+                  tbinfo = traceback.format_tb(tb)[0]
+                  pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
+                  msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+                  arcpy.AddWarning(msgs)
+                  arcpy.AddWarning(pymsg)
+                  arcpy.AddMessage(arcpy.GetMessages(1))
+
+         Progress.Finish()
+      completed = True
+   finally:
+      # Finish the trace and the processing log, even if the run was stopped by an error.
+      # The log file was opened (and any existing file overwritten) at the start of the run, and
+      # written as each tile finished.
+      ProcTrace.Stop()
+      timeStamp = datetime.strftime(datetime.now(), '%Y-%m-%d %H:%M:%S')
+      if completed:
+         Log.write('\nSolar radiation processing completed %s. Results shown above.\n' % timeStamp)
+      else:
+         Log.write('\nSolar radiation processing stopped by an error %s. Results shown above.\n' % timeStamp)
+      Log.close()
+   arcpy.AddMessage('Processing results can be viewed in %s' % ProcLog)
+   arcpy.AddMessage('Time spent in each step can be viewed in %s' % TraceFile)
+
+   #Delete temp current and scratch GDBs
+   #arcpy.Delete_management(str(currGDB))         
+   #arcpy.Delete_management(str(scrGDB))
+   return myProcList
+
+# The script tool reads its parameters and runs the function
+if __name__ == '__main__':
+   # Script arguments to be input by user
+   in_DEM = arcpy.GetParameterAsText(0) # Input digital elevation model, or virtual mosaic or shared raster of the DEM
+   z_factor = arcpy.GetParameter(1) # The number of ground x,y units in one surface z unit.
+      # Default:  1
+   in_Tiles = arcpy.GetParameterAsText(2) 
+      # Polygon feature class outlining footprints of tiles to be processed
+      # Recommend using footprints covering narrow strips of constant latitude; can be long east-west
+   fld_ID = arcpy.GetParameterAsText(3)
+      # A field to use as unique ID for each tile
+   out_GDB1 = arcpy.GetParameterAsText(4) # File geodatabases to store the output solar radiation tiles - one per band
+   out_GDB2 = arcpy.GetParameterAsText(5)
+   out_GDB3 = arcpy.GetParameterAsText(6)
+   #scratch_GDB = arcpy.GetParameterAsText(7)
+   ProcLog = arcpy.GetParameterAsText(7) # Text file to record processing record
+   if arcpy.GetArgumentCount() > 8 and arcpy.GetParameterAsText(8):
+      profileSteps = arcpy.GetParameterAsText(8) # Steps to profile with cProfile, separated by semicolons; optional
+   else:
+      profileSteps = None
+
+   BatchSolarRad(in_DEM, z_factor, in_Tiles, fld_ID, out_GDB1, out_GDB2, out_GDB3, ProcLog, profileSteps)
@@ -2,7 +2,7 @@
 # BeersAspect.py
 # Version:  Python 2.7.5 / ArcGIS 10.2.2
 # Creation Date: 2015-06-04
-# Last Edit: 2015-09-23
+# Last Edit: 2026-10-18
 # Creator:  Kirsten R. Hazler
 #
 # Summary:
@@ -21,79 +21,92 @@
 import arcpy
 from arcpy.sa import *
 arcpy.CheckOutExtension("Spatial")
+import math # for the conversion from degrees to radians
 import os # provides access to operating system functionality such as file and directory paths
 import sys # provides access to Python system functions
 import traceback # used for error handling
 from datetime import datetime # for time-stamping
+import RasterCache # for reusing outputs computed before
+
+# Define function to derive aspect and Beers aspect from a DEM.  Returns the output rasters.
+def BeersAspect(inDEM, inSlope, outAspect, outBeers, cacheDir=None):
+   # Additional script parameters and environment settings
+   arcpy.env.overwriteOutput = True # Set overwrite option so that existing data may be overwritten
+   arcpy.env.snapRaster = inDEM
+   #CellSize = int(arcpy.GetRasterProperties_management (inDEM, 'CELLSIZEX').getOutput(0))
+   deg2rad = math.pi/180.0 # needed for conversion from degrees to radians for input to Cos function
+
+   # Look up the outputs in the cache
+   cache = RasterCache.Open(cacheDir)
+   if cache:
+      aspectKey = cache.Key('BeersAspect', {'product': 'Aspect'}, [inDEM])
+      beersKey = cache.Key('BeersAspect', {'product': 'Beers'}, [inDEM, inSlope])
 
-# Script arguments to be input by user
-inDEM = arcpy.GetParameterAsText(0) # Input DEM
-   # Default: N:\SDM\ProcessedData\NED_Products\NED_mosaics.gdb\rd_NED30m
-inSlope = arcpy.GetParameterAsText(1) # Raster representing slope in degrees
-   # Default: E:\Testing\SlopeAndCurve.gdb\rd_Slope
-outAspect = arcpy.GetParameterAsText(2) # Output aspect raster
-outBeers = arcpy.GetParameterAsText(3) # Output Beers aspect raster
-ProcLogFile = arcpy.GetParameterAsText(4) # Text file to contain processing results
-
-# Additional script parameters and environment settings
-arcpy.env.overwriteOutput = True # Set overwrite option so that existing data may be overwritten
-arcpy.env.snapRaster = inDEM
-#CellSize = int(arcpy.GetRasterProperties_management (inDEM, 'CELLSIZEX').getOutput(0))
-deg2rad = math.pi/180.0 # needed for conversion from degrees to radians for input to Cos function
-
-# Create and write to a log file.
-# If this log file already exists, it will be overwritten.  If it does not exist, it will be created.
-Log = open(ProcLogFile, 'w+') 
-FORMAT = '%Y-%m-%d %H:%M:%S'
-timestamp = datetime.now().strftime(FORMAT)
-Log.write("Process logging started %s \n\n" % timestamp)
-Log.write('Input parameters are...\n')
-Log.write('Input DEM: %s\n' % inDEM)
-Log.write('Input slope raster: %s\n' % inSlope)
-Log.write('Output aspect raster: %s\n' % outAspect)
-Log.write('Output Beers aspect raster: %s\n' % outBeers)
-
-try:
    # Create Aspect in degrees
-   rdAspect = Aspect(inDEM)
-   rdAspect.save(outAspect)
-   arcpy.AddMessage('Created aspect raster')
+   if cache and cache.Fetch(aspectKey, outAspect):
+      rdAspect = Raster(outAspect)
+      arcpy.AddMessage('Copied aspect raster from the cache')
+   else:
+      rdAspect = Aspect(inDEM)
+      rdAspect.save(outAspect)
+      if cache:
+         cache.Store(aspectKey, outAspect, 'BeersAspect')
+      arcpy.AddMessage('Created aspect raster')
 
    # Create Beers Aspect
    # Set to 1 if Slope < 3 (flat slope)
-   rdBeers = Con (Raster(inSlope) < 3, 1, (Cos((45 - rdAspect)*deg2rad) + 1))
-   rdBeers.save(outBeers)
-   arcpy.AddMessage('Created Beers Aspect raster.')
-   arcpy.AddMessage('Processing log is %s ' % ProcLogFile)
-
-except:
-   # Error handling code swiped from "A Python Primer for ArcGIS"
-   tb = sys.exc_info()[2]
-   tbinfo = traceback.format_tb(tb)[0]
-   pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
-   msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
-
-   arcpy.AddError(msgs)
-   arcpy.AddError(pymsg)
-   arcpy.AddError(arcpy.GetMessages(1))
-      
-timestamp = datetime.now().strftime(FORMAT)
-Log.write("\n\nProcess logging ended %s" % timestamp)   
-Log.close()
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+   if cache and cache.Fetch(beersKey, outBeers):
+      arcpy.AddMessage('Copied Beers Aspect raster from the cache.')
+   else:
+      rdBeers = Con (Raster(inSlope) < 3, 1, (Cos((45 - rdAspect)*deg2rad) + 1))
+      rdBeers.save(outBeers)
+      if cache:
+         cache.Store(beersKey, outBeers, 'BeersAspect')
+      arcpy.AddMessage('Created Beers Aspect raster.')
+   return (outAspect, outBeers)
+
+# The script tool reads its parameters and runs the function
+if __name__ == '__main__':
+   # Script arguments to be input by user
+   inDEM = arcpy.GetParameterAsText(0) # Input DEM
+      # Default: N:\SDM\ProcessedData\NED_Products\NED_mosaics.gdb\rd_NED30m
+   inSlope = arcpy.GetParameterAsText(1) # Raster representing slope in degrees
+      # Default: E:\Testing\SlopeAndCurve.gdb\rd_Slope
+   outAspect = arcpy.GetParameterAsText(2) # Output aspect raster
+   outBeers = arcpy.GetParameterAsText(3) # Output Beers aspect raster
+   ProcLogFile = arcpy.GetParameterAsText(4) # Text file to contain processing results
+   if arcpy.GetArgumentCount() > 5 and arcpy.GetParameterAsText(5):
+      cacheDir = arcpy.GetParameterAsText(5) # Folder holding the cache of derived rasters; optional
+   else:
+      cacheDir = None
+
+   # Create and write to a log file.
+   # If this log file already exists, it will be overwritten.  If it does not exist, it will be created.
+   Log = open(ProcLogFile, 'w+') 
+   FORMAT = '%Y-%m-%d %H:%M:%S'
+   timestamp = datetime.now().strftime(FORMAT)
+   Log.write("Process logging started %s \n\n" % timestamp)
+   Log.write('Input parameters are...\n')
+   Log.write('Input DEM: %s\n' % inDEM)
+   Log.write('Input slope raster: %s\n' % inSlope)
+   Log.write('Output aspect raster: %s\n' % outAspect)
+   Log.write('Output Beers aspect raster: %s\n' % outBeers)
+
+   try:
+      BeersAspect(inDEM, inSlope, outAspect, outBeers, cacheDir)
+      arcpy.AddMessage('Processing log is %s ' % ProcLogFile)
+
+   except:
+      # Error handling code swiped from "A Python Primer for ArcGIS"
+      tb = sys.exc_info()[2]
+      tbinfo = traceback.format_tb(tb)[0]
+      pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
+      msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+      arcpy.AddError(msgs)
+      arcpy.AddError(pymsg)
+      arcpy.AddError(arcpy.GetMessages(1))
+         
+   timestamp = datetime.now().strftime(FORMAT)
+   Log.write("\n\nProcess logging ended %s" % timestamp)   
+   Log.close()
@@ -0,0 +1,341 @@
+# ----------------------------------------------------------------------------------------
+# BenchmarkEngines.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Benchmarks the arcpy-free engines behind the SDM tools on synthetic data (see SyntheticData.py),
+#     so a change can be checked for speed before it is run on real data.  Each benchmark times one
+#     stage at one scale and records its wall time, throughput (cells or features per second) and
+#     peak memory (resident set size), and compares them against stored baselines.
+#
+#     Stages, and the tools that use each engine:
+#     mosaic_blend   BlockMosaic BLEND with seam statistics into a tiled GeoTIFF (MosaicSolarStrips)
+#     mosaic_max     BlockMosaic MAX of hydro rasters with value counts (MosaicRasterNHD)
+#     dem_windows    Buffered windows of a virtual DEM with footprint masks (BatchSolarRad, Roughness)
+#     nhd_rasterize  Rasterizing NHD-like polygons with PolygonMask (the footprint masks of all tools)
+#     tiff_deflate   DEFLATE-compressed tiled GeoTIFF with overviews and statistics (ImportNED)
+#     raster_stats   Running statistics and histogram of a DEM (TiledTiff statistics)
+#     zip_extract    Extracting a zip archive of rasters (BatchExtractZipfiles, BatchIngestZipFiles)
+#     nhd_cache      Writing and FCode-filtered reading of the NHD column cache (ExtractSeaOcean);
+#                    only if pyarrow is installed
+#
+# Usage Tips:
+#     Run from the command line with the Python that has NumPy, e.g.
+#        python BenchmarkEngines.py --scales small medium
+#        python BenchmarkEngines.py --save        (store the results as the new baselines)
+#     Each benchmark runs in its own process, so its peak memory is its own; the memory held by
+#     the synthetic inputs is reported separately.  Peak memory is not available on Windows.
+#     The steps that call arcpy geoprocessing tools (e.g. Focal Statistics in Roughness, Euclidean
+#     Distance in HydroDistance, Polygon to Raster in nhdToRaster) cannot be timed here.
+#     The exit code is 1 if any benchmark is slower than its baseline by more than the tolerance.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import argparse # for the command line
+import json # for results and baselines
+import os # provides access to operating system funtionality such as file and directory paths
+import shutil # for removing temporary folders
+import subprocess # for running each benchmark in its own process
+import sys # provides access to Python system functions
+import tempfile # for temporary output folders
+import time # for timing
+import zipfile # for the zip extraction benchmark
+import numpy
+import SyntheticData # for the synthetic inputs
+try:
+   import resource # for peak memory (not available on Windows)
+except ImportError:
+   resource = None
+
+# Scales: the number of rows (and columns) of the synthetic DEM, and the number of NHD polygons and lines
+Scales = {'small': (512, 200, 400), 'medium': (2048, 2000, 4000), 'large': (4096, 8000, 16000)}
+
+# Default baseline file, kept next to this script
+BaselinePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baselines.json')
+
+# Define function to get the peak resident set size of this process, in bytes, or None
+def PeakRss():
+   if resource is None:
+      return None
+   peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+   return peak if sys.platform == 'darwin' else peak * 1024
+
+# Define function to make a reader that reads windows of in-memory arrays, keyed by source path
+def ArrayReader(arrays):
+   def Reader(source, window):
+      row0, col0, nrows, ncols = window
+      return arrays[source.path][row0:row0 + nrows, col0:col0 + ncols]
+   return Reader
+
+# Define function to benchmark BlockMosaic's BLEND rule over DEM strips.  Each benchmark function
+# prepares its inputs, then returns a function that runs the stage and returns the units it processed.
+def BenchMosaicBlend(n, nPolys, nLines, work):
+   import BlockMosaic, TiledTiff
+   grid = SyntheticData.MakeGrid(n, n, nodata=-9999.0)
+   dem = SyntheticData.FractalDem(n, n, 1)
+   sources = list()
+   arrays = dict()
+   for i, (g, a, rings) in enumerate(SyntheticData.Strips(dem, grid, max(n // 8, 64), 16)):
+      name = 'strip%d' % i
+      arrays[name] = a + numpy.float32(i % 2) # offset alternate strips so the seams have differences
+      sources.append(BlockMosaic.MosaicSource(name, g, rings, name))
+   def Run():
+      writer = TiledTiff.TiledTiffWriter(os.path.join(work, 'blend.tif'), grid, 'float32', nodata=-9999.0, stats=True)
+      mosaic = BlockMosaic.BlockMosaic(sources, grid, writer, 'BLEND', ArrayReader(arrays), False, blendWidth=16, seams=True)
+      mosaic.Run(512, 4)
+      writer.Close()
+      return n * n
+   return Run
+
+# Define function to benchmark BlockMosaic's MAX rule over overlapping hydro tiles
+def BenchMosaicMax(n, nPolys, nLines, work):
+   import BlockMosaic, TiledTiff
+   grid = SyntheticData.MakeGrid(n, n, nodata=0, pixelType='U8')
+   hydro = SyntheticData.HydroRaster(SyntheticData.FractalDem(n, n, 2), 2)
+   sources = list()
+   arrays = dict()
+   for i, (g, a) in enumerate(SyntheticData.Tiles(hydro, grid, max(n // 4, 128), 32)):
+      name = 'hydro%d' % i
+      arrays[name] = a
+      sources.append(BlockMosaic.MosaicSource(name, g, None, name))
+   def Run():
+      writer = TiledTiff.TiledTiffWriter(os.path.join(work, 'hydro.tif'), grid, 'uint8', nodata=0, valueCounts=True)
+      mosaic = BlockMosaic.BlockMosaic(sources, grid, writer, 'MAX', ArrayReader(arrays), False)
+      mosaic.Run(512, 4)
+      writer.Close()
+      return n * n
+   return Run
+
+# Define function to benchmark reading buffered footprint windows from a virtual DEM and masking them
+def BenchDemWindows(n, nPolys, nLines, work):
+   import RasterWindow, VirtualMosaic
+   grid = SyntheticData.MakeGrid(n, n, nodata=-9999.0)
+   dem = SyntheticData.FractalDem(n, n, 3)
+   arrays = dict()
+   grids = dict()
+   for i, (g, a) in enumerate(SyntheticData.Tiles(dem, grid, max(n // 4, 128))):
+      path = os.path.join(work, 'dem%d.tif' % i)
+      arrays[path] = a
+      grids[path] = g
+   index = os.path.join(work, 'dem' + VirtualMosaic.Extension)
+   VirtualMosaic.BuildVirtualMosaic(sorted(grids), index, grids.get)
+   mosaic = VirtualMosaic.VirtualMosaic(index, ArrayReader(arrays))
+   layers = SyntheticData.NhdFeatures(grid, max(nPolys // 10, 10), 0, 4)
+   footprints = [f[0] for f in layers['NHDArea'] + layers['NHDWaterbody']]
+   buffDist = 100 * grid.cellX
+   def Run():
+      cells = 0
+      for rings in footprints:
+         xs = [x for ring in rings for x, y in ring]
+         ys = [y for ring in rings for x, y in ring]
+         window = RasterWindow.BufferedWindow(grid, min(xs), min(ys), max(xs), max(ys), buffDist)
+         if window is None:
+            continue
+         data = mosaic.ReadWindow(window)
+         mask = RasterWindow.PolygonMask(rings, grid, window)
+         data[~mask] = -9999.0
+         cells += data.size
+      return cells
+   return Run
+
+# Define function to benchmark rasterizing NHD-like polygons
+def BenchNhdRasterize(n, nPolys, nLines, work):
+   import RasterWindow
+   grid = SyntheticData.MakeGrid(n, n)
+   layers = SyntheticData.NhdFeatures(grid, nPolys, 0, 5)
+   polygons = [f[0] for f in layers['NHDArea'] + layers['NHDWaterbody']]
+   def Run():
+      out = numpy.zeros((n, n), numpy.uint8)
+      for rings in polygons:
+         xs = [x for ring in rings for x, y in ring]
+         ys = [y for ring in rings for x, y in ring]
+         window = RasterWindow.BufferedWindow(grid, min(xs), min(ys), max(xs), max(ys))
+         if window is None:
+            continue
+         r0, c0, nr, nc = window
+         out[r0:r0 + nr, c0:c0 + nc][RasterWindow.PolygonMask(rings, grid, window)] = 2
+      return len(polygons)
+   return Run
+
+# Define function to benchmark writing a DEFLATE-compressed tiled GeoTIFF with overviews and statistics
+def BenchTiffDeflate(n, nPolys, nLines, work):
+   import TiledTiff
+   grid = SyntheticData.MakeGrid(n, n, nodata=-9999.0)
+   dem = SyntheticData.FractalDem(n, n, 6)
+   def Run():
+      writer = TiledTiff.TiledTiffWriter(os.path.join(work, 'dem.tif'), grid, 'float32', nodata=-9999.0, overviews=True,
+                                         stats=True, compress='DEFLATE')
+      writer.WriteBlock(0, 0, dem)
+      writer.Close()
+      return n * n
+   return Run
+
+# Define function to benchmark accumulating running statistics of a DEM, block by block
+def BenchRasterStats(n, nPolys, nLines, work):
+   import RasterStats
+   dem = SyntheticData.FractalDem(n, n, 7)
+   def Run():
+      stats = RasterStats.RunningStats('float32')
+      for row0 in range(0, n, 512):
+         block = dem[row0:row0 + 512]
+         stats.Add(block, block > 1.0)
+      stats.Statistics()
+      stats.Histogram()
+      return n * n
+   return Run
+
+# Define function to benchmark extracting a zip archive of rasters
+def BenchZipExtract(n, nPolys, nLines, work):
+   import ZipTools
+   dem = SyntheticData.FractalDem(n, n, 8)
+   zipPath = os.path.join(work, 'tiles.zip')
+   zf = zipfile.ZipFile(zipPath, 'w', zipfile.ZIP_DEFLATED)
+   for i in range(4):
+      zf.writestr('grdtile/w001%03d.adf' % i, (dem + i).tobytes())
+   zf.writestr('info/arc.dir', b'synthetic')
+   zf.close()
+   def Run():
+      outDir = tempfile.mkdtemp(dir=work)
+      report = ZipTools.ExtractZip(zipPath, outDir)
+      shutil.rmtree(outDir, True)
+      return report.nbytes // 4 # float32 cells
+   return Run
+
+# Define function to benchmark writing NHD-like features to the column cache and reading Sea/Ocean polygons back
+def BenchNhdCache(n, nPolys, nLines, work):
+   import NhdColumnCache
+   if not NhdColumnCache.Available():
+      return None
+   grid = SyntheticData.MakeGrid(n, n)
+   layers = SyntheticData.NhdFeatures(grid, nPolys, nLines, 9)
+   def Run():
+      count = 0
+      for name, features in layers.items():
+         rows = [(f[1], f[2], f[3], f[4]) for f in features]
+         NhdColumnCache.WriteLayer(NhdColumnCache.PartPath(work, name, '0000'), rows, None)
+         count += len(rows)
+      for name in ('NHDArea', 'NHDWaterbody'):
+         for row in NhdColumnCache.Features(work, name, ['0000'], [44500, 46600, 46602]):
+            pass
+      return count
+   return Run
+
+# Benchmarks by stage name: (function, unit of throughput)
+Benchmarks = [('mosaic_blend', BenchMosaicBlend, 'cells'),
+              ('mosaic_max', BenchMosaicMax, 'cells'),
+              ('dem_windows', BenchDemWindows, 'cells'),
+              ('nhd_rasterize', BenchNhdRasterize, 'features'),
+              ('tiff_deflate', BenchTiffDeflate, 'cells'),
+              ('raster_stats', BenchRasterStats, 'cells'),
+              ('zip_extract', BenchZipExtract, 'cells'),
+              ('nhd_cache', BenchNhdCache, 'features')]
+
+# Define function to run one benchmark in this process.  The stage is run repeat times and the
+# fastest run is kept.  Returns a dictionary of results, or None if the stage cannot run here.
+def RunBenchmark(stage, scale, repeat=1):
+   func, unit = [(f, u) for s, f, u in Benchmarks if s == stage][0]
+   n, nPolys, nLines = Scales[scale]
+   work = tempfile.mkdtemp(prefix='sdmbench_')
+   try:
+      run = func(n, nPolys, nLines, work)
+      if run is None:
+         return None
+      inputRss = PeakRss()
+      best = None
+      for i in range(repeat):
+         start = time.time()
+         cpu = time.clock() if sys.version_info[0] < 3 else time.process_time()
+         units = run()
+         wall = time.time() - start
+         cpu = (time.clock() if sys.version_info[0] < 3 else time.process_time()) - cpu
+         if best is None or wall < best[0]:
+            best = (wall, cpu, units)
+      wall, cpu, units = best
+      return {'stage': stage, 'scale': scale, 'seconds': wall, 'cpuSeconds': cpu, 'units': units, 'unit': unit,
+              'rate': units / max(wall, 1e-9), 'peakRss': PeakRss(), 'inputRss': inputRss}
+   finally:
+      shutil.rmtree(work, True)
+
+# Define function to run one benchmark in its own process.  Returns its results, or None.
+def RunInChild(stage, scale, repeat):
+   cmd = [sys.executable, os.path.abspath(__file__), '--child', stage, scale, '--repeat', str(repeat)]
+   out = subprocess.check_output(cmd, cwd=os.path.dirname(os.path.abspath(__file__)))
+   lines = [l for l in out.decode('utf-8').splitlines() if l.strip()]
+   return json.loads(lines[-1]) if lines else None
+
+# Define function to compare a result with its baseline.  Returns (rate ratio, verdict).
+def Compare(result, baselines, tolerance):
+   base = baselines.get('%s/%s' % (result['stage'], result['scale']))
+   if not base:
+      return (None, 'new')
+   ratio = result['rate'] / max(base['rate'], 1e-12)
+   if ratio < 1.0 - tolerance:
+      return (ratio, 'SLOWER')
+   if ratio > 1.0 + tolerance:
+      return (ratio, 'faster')
+   return (ratio, 'same')
+
+# Define function to format a number of bytes in megabytes, or '-' if unknown
+def Megabytes(nbytes):
+   return '-' if nbytes is None else '%.0f' % (nbytes / 1048576.0)
+
+# Define function to run the benchmarks and report them against the baselines.  Returns the exit code.
+def Main(argv=None):
+   parser = argparse.ArgumentParser(description='Benchmark the arcpy-free engines of the SDM tools on synthetic data.')
+   parser.add_argument('--stages', nargs='+', choices=[s for s, f, u in Benchmarks], help='stages to run (default: all)')
+   parser.add_argument('--scales', nargs='+', choices=sorted(Scales), default=['small', 'medium'], help='scales to run')
+   parser.add_argument('--repeat', type=int, default=3, help='runs of each benchmark; the fastest is kept')
+   parser.add_argument('--baseline', default=BaselinePath, help='baseline file')
+   parser.add_argument('--save', action='store_true', help='store the results as the new baselines')
+   parser.add_argument('--tolerance', type=float, default=0.2, help='relative change in throughput to report')
+   parser.add_argument('--output', help='also write the results to this JSON file')
+   parser.add_argument('--child', nargs=2, metavar=('STAGE', 'SCALE'), help=argparse.SUPPRESS)
+   args = parser.parse_args(argv)
+
+   if args.child:
+      print(json.dumps(RunBenchmark(args.child[0], args.child[1], args.repeat)))
+      return 0
+
+   try:
+      with open(args.baseline) as f:
+         baselines = json.load(f)
+   except (IOError, OSError, ValueError):
+      baselines = dict()
+
+   results = list()
+   slower = 0
+   print('%-14s %-7s %9s %14s %9s %9s %8s  %s' % ('stage', 'scale', 'seconds', 'units/second', 'peak MB', 'input MB', 'vs base', 'verdict'))
+   for stage in args.stages or [s for s, f, u in Benchmarks]:
+      for scale in args.scales:
+         try:
+            result = RunInChild(stage, scale, args.repeat)
+         except subprocess.CalledProcessError:
+            print('%-14s %-7s (failed)' % (stage, scale))
+            slower += 1
+            continue
+         if result is None:
+            print('%-14s %-7s (not available here)' % (stage, scale))
+            continue
+         ratio, verdict = Compare(result, baselines, args.tolerance)
+         slower += verdict == 'SLOWER'
+         print('%-14s %-7s %9.3f %14.4g %9s %9s %8s  %s' % (stage, scale, result['seconds'], result['rate'],
+               Megabytes(result['peakRss']), Megabytes(result['inputRss']),
+               '-' if ratio is None else '%.2fx' % ratio, verdict))
+         sys.stdout.flush()
+         results.append(result)
+
+   if args.output:
+      with open(args.output, 'w') as f:
+         json.dump(results, f, indent=1)
+   if args.save:
+      for result in results:
+         baselines['%s/%s' % (result['stage'], result['scale'])] = result
+      with open(args.baseline, 'w') as f:
+         json.dump(baselines, f, indent=1, sort_keys=True)
+      print('Baselines saved to %s' % args.baseline)
+   return 1 if slower else 0
+
+if __name__ == '__main__':
+   sys.exit(Main())
@@ -0,0 +1,366 @@
+# ----------------------------------------------------------------------------------------
+# BlockMosaic.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Mosaics a set of rasters directly into a pre-allocated tiled GeoTIFF, without building an
+#     intermediate mosaic dataset.  The output grid is divided into square blocks; for each block,
+#     the window of every overlapping input is read, trimmed to that input's footprint polygon
+#     (if any), and composited into the block, which is then written to the output.  Blocks are
+#     disjoint, so they can be processed by several threads at once.
+#
+#     Where inputs overlap, the mosaic rule decides the output value:
+#     FIRST = the first input (in list order) with data wins
+#     MAX = the maximum of all inputs with data
+#     BLEND = a feathered blend across footprint edges: each input is weighted from 1 at
+#             blendWidth/2 cells inside its footprint down to 0 at blendWidth/2 cells outside it,
+#             using the data in its buffered margin beyond the footprint
+#
+#     Optionally, seam statistics are gathered in the same pass: wherever two inputs both have
+#     data (their overlapping buffered margins), the differences between them are summarized per
+#     pair of inputs, so disagreements along seams can be found without inspecting the output.
+#
+#     Inputs that share the output grid's cell size and alignment are copied cell for cell;
+#     others are resampled to the output grid by nearest neighbor.
+#
+# Usage Tips:
+#     Reading is done by a reader function, RasterWindow.ReadWindow by default.  Because arcpy is
+#     not thread-safe, reads are serialized with a lock unless the reader is known to be safe;
+#     compositing and writing run concurrently.
+#     Blending measures distance to the footprint edge vertically, so it suits inputs whose
+#     footprints are strips running east-west, such as the solar radiation latitude strips.
+#     blendWidth/2 should not exceed the width of the inputs' buffered margins.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import math # for snapping extents to the output grid
+import threading # for serializing reads
+from multiprocessing.pool import ThreadPool # for processing blocks concurrently
+import numpy
+import RasterWindow # for window arithmetic, reading and footprint masks
+
+# Tolerance (as a fraction of a cell) used when checking that inputs align with the output grid
+AlignTol = 1e-3
+
+# Mosaic rules for overlapping inputs
+MosaicRules = ('FIRST', 'MAX', 'BLEND')
+
+# Define class to describe one input raster of a mosaic
+class MosaicSource(object):
+   def __init__(self, path, grid, footprint=None, name=None):
+      self.path = path
+      self.grid = grid # RasterWindow.RasterGrid of the input raster
+      self.footprint = footprint # List of polygon rings limiting the cells used, or None for the whole raster
+      self.name = name or path
+
+      # Extent of the area this input has data for, and of the area it contributes to
+      self.dataExtent = (grid.xMin, grid.yMin, grid.xMax, grid.yMax)
+      if footprint:
+         xs = [x for ring in footprint for x, y in ring]
+         ys = [y for ring in footprint for x, y in ring]
+         self.extent = (max(min(xs), grid.xMin), max(min(ys), grid.yMin), min(max(xs), grid.xMax), min(max(ys), grid.yMax))
+      else:
+         self.extent = self.dataExtent
+
+# Define class to summarize the differences between two inputs where they overlap
+class SeamStats(object):
+   def __init__(self):
+      self.count = 0
+      self.sumDiff = 0.0
+      self.sumAbs = 0.0
+      self.sumSq = 0.0
+      self.maxAbs = 0.0
+
+   # Define method to add an array of differences
+   def Add(self, diff):
+      diff = diff.astype(numpy.float64)
+      self.count += diff.size
+      self.sumDiff += float(diff.sum())
+      self.sumAbs += float(numpy.abs(diff).sum())
+      self.sumSq += float(numpy.dot(diff, diff))
+      self.maxAbs = max(self.maxAbs, float(numpy.abs(diff).max()))
+
+   # Define method to get (cells, mean difference, mean absolute difference, RMS difference, max absolute difference)
+   def Summary(self):
+      n = max(self.count, 1)
+      return (self.count, self.sumDiff / n, self.sumAbs / n, (self.sumSq / n) ** 0.5, self.maxAbs)
+
+# Define function to check whether two extents (xMin, yMin, xMax, yMax) overlap
+def Overlaps(a, b):
+   return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+# Define function to build the output grid covering all inputs.
+# Cell size, alignment and spatial reference are taken from the template grid (the first input's by default).
+def UnionGrid(sources, template=None, nodata=None):
+   if template is None:
+      template = sources[0].grid
+   xMin = min(s.extent[0] for s in sources)
+   yMin = min(s.extent[1] for s in sources)
+   xMax = max(s.extent[2] for s in sources)
+   yMax = max(s.extent[3] for s in sources)
+
+   # Snap the extent outwards to the template's cell edges
+   tol = RasterWindow.SnapTol
+   col0 = int(math.floor((xMin - template.xMin) / template.cellX + tol))
+   col1 = int(math.ceil((xMax - template.xMin) / template.cellX - tol))
+   row0 = int(math.floor((template.yMax - yMax) / template.cellY + tol))
+   row1 = int(math.ceil((template.yMax - yMin) / template.cellY - tol))
+   return RasterWindow.RasterGrid(template.xMin + col0 * template.cellX, template.yMax - row0 * template.cellY,
+                                  template.cellX, template.cellY, col1 - col0, row1 - row0,
+                                  nodata, template.spatialRef, template.pixelType)
+
+# Define function to divide a grid into square blocks, in row-major (block) order
+def PlanBlocks(grid, blockSize):
+   blocks = list()
+   for row0 in range(0, grid.nrows, blockSize):
+      for col0 in range(0, grid.ncols, blockSize):
+         blocks.append((row0, col0, min(blockSize, grid.nrows - row0), min(blockSize, grid.ncols - col0)))
+   return blocks
+
+# Define function to get the mask of valid (not NoData) cells in an array
+def ValidMask(data, nodata):
+   if data.dtype.kind == 'f':
+      valid = ~numpy.isnan(data)
+      if nodata is not None:
+         valid &= data != nodata
+      return valid
+   if nodata is None:
+      return numpy.ones(data.shape, bool)
+   return data != nodata
+
+# Define function to read an input window with RasterWindow (arcpy)
+def ArcpyReader(source, window):
+   return RasterWindow.ReadWindow(source.path, source.grid, window)
+
+# Define class to mosaic a set of inputs into a tiled output, block by block
+class BlockMosaic(object):
+   def __init__(self, sources, outGrid, writer, rule='FIRST', reader=ArcpyReader, serializeReads=True,
+                blendWidth=0, seams=False, dtype=None):
+      if rule not in MosaicRules:
+         raise ValueError('Unknown mosaic rule %s' % rule)
+      if rule == 'BLEND' and blendWidth <= 0:
+         raise ValueError('The BLEND rule needs a blend width')
+      self.sources = sources
+      self.rule = rule
+      self.blendWidth = float(blendWidth) # Width (cells) of the blend zone straddling each footprint edge
+      self.seamStats = dict() if seams else None # SeamStats for each pair of overlapping inputs
+      self.seamLock = threading.Lock()
+      self.useMargins = rule == 'BLEND' or seams # Whether data beyond the footprints is read
+      self.outGrid = outGrid
+      self.writer = writer # TiledTiff.TiledTiffWriter (or anything with a WriteBlock method); None if only composing
+      self.reader = reader
+      self.readLock = threading.Lock() if serializeReads else None
+      self.dtype = numpy.dtype(dtype if dtype is not None else writer.dtype)
+      self.nodata = outGrid.nodata
+
+   # Define method to read the part of an input covering an output window.
+   # Returns (data, valid, inside, window) where valid marks cells with data, inside marks cells
+   # within the input's footprint (None if it has none), and window is the part of the output
+   # window that was read.  Returns None if the input does not overlap the output window.
+   def ReadSource(self, source, window):
+      g = self.outGrid
+      ext = RasterWindow.WindowExtent(g, window)
+      srcExt = source.dataExtent if self.useMargins else source.extent
+      if not Overlaps(ext, srcExt):
+         return None
+      clip = (max(ext[0], srcExt[0]), max(ext[1], srcExt[1]), min(ext[2], srcExt[2]), min(ext[3], srcExt[3]))
+      srcWin = RasterWindow.BufferedWindow(source.grid, *clip)
+      if srcWin is None:
+         return None
+
+      # Locate the input window on the output grid
+      x, y = RasterWindow.WindowLowerLeft(source.grid, srcWin)
+      fc = (x - g.xMin) / g.cellX
+      fr = (g.yMax - y) / g.cellY - srcWin[2]
+      col0 = int(round(fc))
+      row0 = int(round(fr))
+      aligned = (abs(fc - col0) <= AlignTol and abs(fr - row0) <= AlignTol and
+                 abs(source.grid.cellX - g.cellX) <= AlignTol * g.cellX and abs(source.grid.cellY - g.cellY) <= AlignTol * g.cellY)
+      if not aligned:
+         return self.ReadResampled(source, window, clip, srcWin)
+
+      data = self.Read(source, srcWin)
+
+      # Trim the input window to the output window, in case snapping added a partial cell
+      r0 = max(row0, window[0])
+      c0 = max(col0, window[1])
+      r1 = min(row0 + srcWin[2], window[0] + window[2])
+      c1 = min(col0 + srcWin[3], window[1] + window[3])
+      if r1 <= r0 or c1 <= c0:
+         return None
+      data = data[r0 - row0:r1 - row0, c0 - col0:c1 - col0]
+      return self.MaskSource(source, data, (r0, c0, r1 - r0, c1 - c0))
+
+   # Define method to get the data and footprint masks of an input's window
+   def MaskSource(self, source, data, win):
+      valid = ValidMask(data, source.grid.nodata)
+      inside = None
+      if source.footprint:
+         inside = RasterWindow.PolygonMask(source.footprint, self.outGrid, win)
+      return (data, valid, inside, win)
+
+   # Define method to read an input window, serializing reads if required
+   def Read(self, source, srcWin):
+      if self.readLock:
+         with self.readLock:
+            return self.reader(source, srcWin)
+      return self.reader(source, srcWin)
+
+   # Define method to read an input that is not aligned with the output grid, resampling it to
+   # the output grid by nearest neighbor.  Output cells are filled from the input cell containing
+   # their center.
+   def ReadResampled(self, source, window, clip, srcWin):
+      g = self.outGrid
+      sg = source.grid
+
+      # Output cells whose centers fall within the clipped extent
+      tol = RasterWindow.SnapTol
+      c0 = max(window[1], int(math.ceil((clip[0] - g.xMin) / g.cellX - 0.5 - tol)))
+      c1 = min(window[1] + window[3], int(math.ceil((clip[2] - g.xMin) / g.cellX - 0.5 - tol)))
+      r0 = max(window[0], int(math.ceil((g.yMax - clip[3]) / g.cellY - 0.5 - tol)))
+      r1 = min(window[0] + window[2], int(math.ceil((g.yMax - clip[1]) / g.cellY - 0.5 - tol)))
+      if r1 <= r0 or c1 <= c0:
+         return None
+      win = (r0, c0, r1 - r0, c1 - c0)
+
+      # Input cells containing the output cell centers
+      xs = g.xMin + (numpy.arange(c0, c1) + 0.5) * g.cellX
+      ys = g.yMax - (numpy.arange(r0, r1) + 0.5) * g.cellY
+      cols = numpy.floor((xs - sg.xMin) / sg.cellX).astype(int) - srcWin[1]
+      rows = numpy.floor((sg.yMax - ys) / sg.cellY).astype(int) - srcWin[0]
+      cols = numpy.clip(cols, 0, srcWin[3] - 1)
+      rows = numpy.clip(rows, 0, srcWin[2] - 1)
+
+      data = self.Read(source, srcWin)
+      data = data[rows[:, None], cols[None, :]]
+      return self.MaskSource(source, data, win)
+
+   # Define method to composite all inputs overlapping one block and write the block
+   def ProcessBlock(self, block):
+      out = self.Compose(block)
+      self.writer.WriteBlock(block[0], block[1], out)
+      return block
+
+   # Define method to composite the inputs overlapping a block (or window) of the output grid.
+   # candidates, if given, lists the indexes of the only inputs that need to be checked (e.g.
+   # from a spatial index).  Returns the block as an array.
+   def Compose(self, block, candidates=None):
+      row0, col0, nrows, ncols = block
+      out = numpy.empty((nrows, ncols), self.dtype)
+      out.fill(self.nodata if self.nodata is not None else 0)
+      if candidates is None:
+         candidates = range(len(self.sources))
+      parts = list()
+      for i in sorted(candidates):
+         source = self.sources[i]
+         part = self.ReadSource(source, block)
+         if part is not None:
+            parts.append((i, source) + part)
+      if self.seamStats is not None and len(parts) > 1:
+         self.AddSeams(parts)
+      if self.rule == 'BLEND':
+         self.Blend(block, parts, out)
+      else:
+         self.Composite(block, parts, out)
+      return out
+
+   # Define method to composite inputs by the FIRST or MAX rule, using only cells inside footprints
+   def Composite(self, block, parts, out):
+      filled = numpy.zeros(out.shape, bool)
+      for i, source, data, valid, inside, win in parts:
+         if inside is not None:
+            valid = valid & inside
+         r = win[0] - block[0]
+         c = win[1] - block[1]
+         dst = out[r:r + win[2], c:c + win[3]]
+         done = filled[r:r + win[2], c:c + win[3]]
+         if self.rule == 'MAX':
+            both = valid & done
+            dst[both] = numpy.maximum(dst[both], data[both])
+         take = valid & ~done
+         dst[take] = data[take]
+         done |= take
+
+   # Define method to composite inputs as a weighted blend, feathered across footprint edges
+   def Blend(self, block, parts, out):
+      num = numpy.zeros(out.shape)
+      den = numpy.zeros(out.shape)
+      for i, source, data, valid, inside, win in parts:
+         if inside is None:
+            weight = valid.astype(numpy.float64)
+         else:
+            dist = RasterWindow.PolygonVerticalDistance(source.footprint, self.outGrid, win)
+            dist = numpy.where(inside, dist, -dist)
+            weight = numpy.clip(0.5 + dist / self.blendWidth, 0.0, 1.0) * valid
+         r = win[0] - block[0]
+         c = win[1] - block[1]
+         num[r:r + win[2], c:c + win[3]] += weight * numpy.where(valid, data, 0)
+         den[r:r + win[2], c:c + win[3]] += weight
+      has = den > 0
+      values = num[has] / den[has]
+      if self.dtype.kind != 'f':
+         values = numpy.round(values)
+      out[has] = values.astype(self.dtype)
+
+   # Define method to add the differences between each pair of inputs where both have data
+   def AddSeams(self, parts):
+      for a in range(len(parts)):
+         ia, srcA, dataA, validA, insideA, winA = parts[a]
+         for b in range(a + 1, len(parts)):
+            ib, srcB, dataB, validB, insideB, winB = parts[b]
+            r0 = max(winA[0], winB[0])
+            c0 = max(winA[1], winB[1])
+            r1 = min(winA[0] + winA[2], winB[0] + winB[2])
+            c1 = min(winA[1] + winA[3], winB[1] + winB[3])
+            if r1 <= r0 or c1 <= c0:
+               continue
+            sa = (slice(r0 - winA[0], r1 - winA[0]), slice(c0 - winA[1], c1 - winA[1]))
+            sb = (slice(r0 - winB[0], r1 - winB[0]), slice(c0 - winB[1], c1 - winB[1]))
+            both = validA[sa] & validB[sb]
+            if not both.any():
+               continue
+            diff = dataA[sa][both].astype(numpy.float64) - dataB[sb][both]
+            key = (ia, ib)
+            with self.seamLock:
+               if key not in self.seamStats:
+                  self.seamStats[key] = SeamStats()
+               self.seamStats[key].Add(diff)
+
+   # Define method to get the seam statistics as a list of
+   # (nameA, nameB, cells, mean difference, mean absolute difference, RMS difference, max absolute difference),
+   # worst (largest RMS difference) first
+   def SeamSummary(self):
+      rows = list()
+      for (ia, ib), stats in self.seamStats.items():
+         rows.append((self.sources[ia].name, self.sources[ib].name) + stats.Summary())
+      rows.sort(key=lambda row: -row[5])
+      return rows
+
+   # Define method to write the seam statistics to a comma-delimited text file
+   def WriteSeamReport(self, path):
+      with open(path, 'w') as f:
+         f.write('RasterA,RasterB,Cells,MeanDiff,MeanAbsDiff,RMSDiff,MaxAbsDiff\n')
+         for row in self.SeamSummary():
+            f.write('%s,%s,%d,%.6g,%.6g,%.6g,%.6g\n' % row)
+
+   # Define method to process all blocks, optionally reporting progress as progress(done, total)
+   def Run(self, blockSize=1024, threads=1, progress=None):
+      blocks = PlanBlocks(self.outGrid, blockSize)
+      total = len(blocks)
+      if threads <= 1:
+         for i, block in enumerate(blocks):
+            self.ProcessBlock(block)
+            if progress:
+               progress(i + 1, total)
+         return total
+      pool = ThreadPool(threads)
+      try:
+         for i, block in enumerate(pool.imap_unordered(self.ProcessBlock, blocks)):
+            if progress:
+               progress(i + 1, total)
+      finally:
+         pool.close()
+         pool.join()
+      return total
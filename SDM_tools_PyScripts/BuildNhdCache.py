@@ -0,0 +1,67 @@
+# ----------------------------------------------------------------------------------------
+# BuildNhdCache.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Copies the NHDArea, NHDWaterbody and NHDFlowline features of the NHD geodatabases in a
+#     workspace into a columnar cache of GeoParquet files, partitioned by HUC4 (see NhdColumnCache.py).
+#     NHD tools given the cache folder then read just the columns and FCodes they need from it,
+#     rather than opening the geodatabases.
+#
+# Usage Tips:
+#     Requires the pyarrow package.
+#     The work is done by the BuildNhdCache function, which can also be imported and called from Python.
+#     Only watersheds whose geodatabases have changed since they were cached are copied again, so
+#     the tool can be rerun whenever new geodatabases are added to the workspace.
+#
+# Syntax:
+# BuildNhdCache (nhdWorkspace, cacheDir, {inHUC})
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import arcpy
+import sys # provides access to Python system functions
+import traceback # used for error handling
+import NhdColumnCache # for writing the cache
+
+# Define function to cache the NHD geodatabases in a workspace.  Returns the number of watersheds cached.
+def BuildNhdCache(nhdWorkspace, cacheDir, inHUCList=None):
+   NhdColumnCache.RequirePyarrow()
+   written = 0
+   for huc4, rows, error in NhdColumnCache.BuildCache(nhdWorkspace, cacheDir, inHUCList):
+      if error:
+         arcpy.AddWarning('Failed to cache watershed %s: %s' % (huc4, error))
+      elif rows is None:
+         arcpy.AddMessage('Watershed %s is already cached.' % huc4)
+      else:
+         arcpy.AddMessage('Cached watershed %s: %s features' % (huc4, rows))
+         written += 1
+   arcpy.AddMessage('%s watersheds cached in %s' % (written, cacheDir))
+   return written
+
+# The script tool reads its parameters and runs the function
+if __name__ == '__main__':
+   # Script arguments to be input by user
+   nhdWorkspace = arcpy.GetParameterAsText(0) # Workspace containing subfolders with NHD geodatabases
+   cacheDir = arcpy.GetParameterAsText(1) # Folder to hold the cache
+   if arcpy.GetArgumentCount() > 2 and arcpy.GetParameterAsText(2):
+      inHUCList = [h.strip() for h in arcpy.GetParameterAsText(2).split(';') if h.strip()] # 4-digit HUCs to cache; optional
+   else:
+      inHUCList = None
+
+   try:
+      if not NhdColumnCache.Available():
+         arcpy.AddError('The NHD cache requires the pyarrow package, which is not installed.')
+      else:
+         BuildNhdCache(nhdWorkspace, cacheDir, inHUCList)
+   except:
+      # Error handling code swiped from "A Python Primer for ArcGIS"
+      tb = sys.exc_info()[2]
+      tbinfo = traceback.format_tb(tb)[0]
+      pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
+      msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+      arcpy.AddError(msgs)
+      arcpy.AddError(pymsg)
@@ -0,0 +1,60 @@
+# ----------------------------------------------------------------------------------------
+# BuildVirtualDEM.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Builds a virtual mosaic index (<name>.vmos.json) over a set of DEM tiles, such as the NED tiles
+#     imported by ImportNED.  The index can be given as the input DEM to tools that read buffered
+#     windows of the DEM (BatchSolarRad, Roughness), which then read each window from just the
+#     tiles it overlaps, so no merged DEM needs to be built first.  See VirtualMosaic.py.
+#
+# Usage Tips:
+#     The tiles must share a cell size and spatial reference.  Where tiles overlap, the first tile
+#     (in name order) is used.
+#     Rebuild the index if tiles are added, removed, or replaced.
+#     The work is done by the BuildVirtualDEM function, which can also be imported and called from Python.
+#
+# Syntax:
+# BuildVirtualDEM (inWorkspace, outIndex, {wildcard})
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import arcpy
+import os # provides access to operating system functionality such as file and directory paths
+import sys # provides access to Python system functions
+import traceback # used for error handling
+import VirtualMosaic # for writing the index
+
+# Define function to build a virtual mosaic index over the DEM tiles in a workspace.  Returns the
+# grid of the virtual DEM.
+def BuildVirtualDEM(inWorkspace, outIndex, wildcard='*'):
+   arcpy.env.workspace = inWorkspace
+   tiles = sorted(inWorkspace + os.sep + r for r in arcpy.ListRasters(wildcard))
+   arcpy.AddMessage('Indexing %s tiles...' % len(tiles))
+   grid = VirtualMosaic.BuildVirtualMosaic(tiles, outIndex)
+   arcpy.AddMessage('Virtual DEM of %s columns by %s rows written to %s' % (grid.ncols, grid.nrows, outIndex))
+   return grid
+
+# The script tool reads its parameters and runs the function
+if __name__ == '__main__':
+   # Script arguments to be input by user
+   inWorkspace = arcpy.GetParameterAsText(0) # Folder or geodatabase containing the DEM tiles
+   outIndex = arcpy.GetParameterAsText(1) # Output virtual mosaic index file (.vmos.json)
+   if arcpy.GetArgumentCount() > 2 and arcpy.GetParameterAsText(2):
+      wildcard = arcpy.GetParameterAsText(2) # Wildcard limiting the tiles to include; optional
+   else:
+      wildcard = '*'
+
+   try:
+      BuildVirtualDEM(inWorkspace, outIndex, wildcard)
+   except:
+      # Error handling code swiped from "A Python Primer for ArcGIS"
+      tb = sys.exc_info()[2]
+      tbinfo = traceback.format_tb(tb)[0]
+      pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
+      msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+      arcpy.AddError(msgs)
+      arcpy.AddError(pymsg)
@@ -0,0 +1,491 @@
+# ----------------------------------------------------------------------------------------
+# DownloadEngine.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Downloads a set of files from an FTP site or an HTTP(S) server concurrently.  Connections
+#     are kept in a bounded pool and reused from one file to the next, so the cost of connecting
+#     and logging in is paid once per connection rather than once per file, and the transfer
+#     time of the whole set approaches that of its slowest few files rather than the sum of all.
+#
+#     Downloads are restartable and verified.  Each file is written to <name>.part; if a transfer
+#     drops, the next attempt (or the next run) resumes from the end of the partial file using an
+#     FTP REST or HTTP Range offset.  The finished file is checked against the size reported by the
+#     server (and, for HTTP servers that publish one, the MD5 checksum) before being renamed into
+#     place.  Verified files are recorded in a manifest (download_manifest.json) in the output
+#     directory, and files that are present, unchanged, and match the server are skipped.
+#
+# Usage Tips:
+#     The host may be given as 'ftp.example.gov', 'ftp.example.gov:2121', 'ftp://ftp.example.gov',
+#     or 'http(s)://www.example.gov[:port]'; the scheme selects the backend (FTP if none is given).
+#     The directory is appended to the host for HTTP, and changed to after login for FTP.
+#     Because the host can include a port, the engine can be tested against local stand-in
+#     servers (e.g. pyftpdlib or http.server) without any changes.
+#     Keep the number of threads modest (4-8); public servers may refuse too many connections.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import ftplib # for FTP connections
+import base64 # for decoding Content-MD5 headers
+import binascii # for formatting checksums
+import hashlib # for verifying checksums
+import json # for the download manifest
+import re # for recognizing MD5 checksums
+import threading # for guarding the connection pools
+import time # for timing transfers
+import os # provides access to operating system funtionality such as file and directory paths
+from multiprocessing.pool import ThreadPool # for downloading concurrently
+import SdmPipeline # for moving finished files into place in one step
+try:
+   import httplib # Python 2
+   from urlparse import urlsplit, urljoin
+   from Queue import Queue, Empty
+except ImportError:
+   import http.client as httplib # Python 3
+   from urllib.parse import urlsplit, urljoin
+   from queue import Queue, Empty
+
+# Size of the chunks copied from the network to disk
+ChunkSize = 1024 * 1024
+
+# Seconds to wait on an unresponsive server
+Timeout = 120
+
+# HTTP status codes that redirect to another location
+Redirects = (301, 302, 303, 307, 308)
+
+# Suffix of files still being downloaded
+PartSuffix = '.part'
+
+# Name of the manifest of verified downloads kept in the output directory
+ManifestName = 'download_manifest.json'
+
+# Define class for errors that retrying will not fix, such as a missing file
+class PermanentError(IOError):
+   pass
+
+# Define class to hold a bounded pool of reusable connections.
+# Subclasses define Connect (open a new connection) and Close (close one).
+class ConnectionPool(object):
+   def __init__(self, size):
+      self.size = size
+      self.idle = Queue()
+      self.slots = threading.BoundedSemaphore(size) # limits the number of open connections
+      self.lock = threading.Lock()
+      self.opened = 0 # Number of connections opened, for reporting
+
+   # Define method to get a connection, reusing an idle one if possible
+   def Get(self):
+      try:
+         return self.idle.get_nowait()
+      except Empty:
+         pass
+      self.slots.acquire()
+      try:
+         conn = self.Connect()
+      except:
+         self.slots.release()
+         raise
+      with self.lock:
+         self.opened += 1
+      return conn
+
+   # Define method to return a healthy connection to the pool
+   def Put(self, conn):
+      self.idle.put(conn)
+
+   # Define method to drop a broken connection, freeing its slot
+   def Discard(self, conn):
+      try:
+         self.Close(conn)
+      except Exception:
+         pass
+      self.slots.release()
+
+   # Define method to close all idle connections
+   def CloseAll(self):
+      while True:
+         try:
+            conn = self.idle.get_nowait()
+         except Empty:
+            return
+         self.Discard(conn)
+
+# Define class to hold a pool of logged-in FTP connections, each already in the download directory
+class FtpPool(ConnectionPool):
+   def __init__(self, host, directory='', size=4, port=21, user='', passwd='', timeout=Timeout):
+      ConnectionPool.__init__(self, size)
+      self.host = host
+      self.port = port
+      self.directory = directory
+      self.user = user
+      self.passwd = passwd
+      self.timeout = timeout
+
+   # Define method to open, log in, and change to the download directory
+   def Connect(self):
+      ftp = ftplib.FTP(timeout=self.timeout)
+      ftp.connect(self.host, self.port)
+      try:
+         if self.user:
+            ftp.login(self.user, self.passwd)
+         else:
+            ftp.login()
+         if self.directory:
+            ftp.cwd(self.directory)
+      except:
+         ftp.close()
+         raise
+      return ftp
+
+   # Define method to close a connection
+   def Close(self, ftp):
+      try:
+         ftp.quit()
+      except Exception:
+         ftp.close()
+
+   # Define method to get the (size, stamp, md5) of a file on the server, where stamp is the
+   # modification time reported by the server.  Items the server does not report are None.
+   # A refused SIZE (e.g. 502 not implemented, or 550 for a file it will not size) does not mean
+   # the file is missing: the size is then None, and RETR decides.
+   def Remote(self, ftp, fileName):
+      ftp.voidcmd('TYPE I')
+      try:
+         size = ftp.size(fileName)
+      except ftplib.error_perm:
+         size = None
+      try:
+         stamp = ftp.sendcmd('MDTM ' + fileName)[4:].strip()
+      except ftplib.error_perm:
+         stamp = None
+      return (size, stamp, None)
+
+   # Define method to download one file into an open binary file object, starting at an offset
+   # (the file object must already be positioned there).  Returns the number of bytes written.
+   def Fetch(self, ftp, fileName, outFile, offset=0):
+      written = [0]
+      def Write(data):
+         outFile.write(data)
+         written[0] += len(data)
+      ftp.retrbinary('RETR ' + fileName, Write, ChunkSize, offset or None)
+      return written[0]
+
+   # Define method to describe the source
+   def Url(self, fileName=''):
+      return 'ftp://%s:%s/%s' % (self.host, self.port, '/'.join(p for p in (self.directory.strip('/'), fileName) if p))
+
+# Define class to hold a pool of persistent (keep-alive) HTTP(S) connections to one server
+class HttpPool(ConnectionPool):
+   def __init__(self, host, directory='', size=4, port=None, https=False, timeout=Timeout):
+      ConnectionPool.__init__(self, size)
+      self.host = host
+      self.https = https
+      self.port = port or (443 if https else 80)
+      self.directory = directory.strip('/')
+      self.timeout = timeout
+
+   # Define method to open a connection
+   def Connect(self):
+      if self.https:
+         return httplib.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+      return httplib.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+   # Define method to close a connection
+   def Close(self, conn):
+      conn.close()
+
+   # Define method to get the path of a file on the server
+   def Path(self, fileName):
+      return '/' + '/'.join(p for p in (self.directory, fileName) if p)
+
+   # Define method to send a request for a file, following redirects to other servers with
+   # one-off connections, and pass the response to a handler, which must read its body.
+   # Returns the handler's result; error statuses raise an exception.  A one-off connection is
+   # closed as soon as its response is read (or the handler fails), so none are left open.
+   def Request(self, conn, method, fileName, handler, headers=None):
+      headers = dict(headers or {})
+      headers['Connection'] = 'keep-alive'
+      conn.request(method, self.Path(fileName), headers=headers)
+      resp = conn.getresponse()
+      url = self.Url(fileName)
+      other = None # One-off connection to the server redirected to
+      try:
+         hops = 0
+         while resp.status in Redirects and hops < 5:
+            location = resp.getheader('Location')
+            resp.read() # drain the body so the pooled connection can be reused
+            if other is not None:
+               other.close()
+            url = urljoin(url, location)
+            parts = urlsplit(url)
+            if parts.scheme == 'https':
+               other = httplib.HTTPSConnection(parts.hostname, parts.port or 443, timeout=self.timeout)
+            else:
+               other = httplib.HTTPConnection(parts.hostname, parts.port or 80, timeout=self.timeout)
+            other.request(method, parts.path + ('?' + parts.query if parts.query else ''), headers=headers)
+            resp = other.getresponse()
+            hops += 1
+         if resp.status not in (200, 206):
+            resp.read()
+            msg = 'HTTP %s %s for %s' % (resp.status, resp.reason, fileName)
+            if 400 <= resp.status < 500 and resp.status != 416:
+               raise PermanentError(msg)
+            raise IOError(msg)
+         return handler(resp)
+      finally:
+         if other is not None:
+            other.close()
+
+   # Define method to get the (size, stamp, md5) of a file on the server, where stamp is the
+   # ETag or modification time, and md5 is taken from a Content-MD5 header or an ETag that is a
+   # plain MD5 checksum (as on Amazon S3).  Items the server does not report are None.
+   def Remote(self, conn, fileName):
+      return self.Request(conn, 'HEAD', fileName, self.RemoteInfo)
+
+   # Define method to get the (size, stamp, md5) of a file from the response to a HEAD request
+   def RemoteInfo(self, resp):
+      resp.read()
+      size = resp.getheader('Content-Length')
+      size = int(size) if size is not None else None
+      etag = (resp.getheader('ETag') or '').strip('"')
+      stamp = etag or resp.getheader('Last-Modified')
+      md5 = None
+      if resp.getheader('Content-MD5'):
+         md5 = binascii.hexlify(base64.b64decode(resp.getheader('Content-MD5'))).decode('ascii')
+      elif re.match('^[0-9a-fA-F]{32}$', etag):
+         md5 = etag.lower()
+      return (size, stamp, md5)
+
+   # Define method to download one file into an open binary file object, starting at an offset
+   # (the file object must already be positioned there).  If the server ignores the range and
+   # sends the whole file, the file object is rewound and truncated first.
+   # Returns the number of bytes written.
+   def Fetch(self, conn, fileName, outFile, offset=0):
+      headers = {'Range': 'bytes=%d-' % offset} if offset else None
+      def Save(resp):
+         if offset and resp.status == 200:
+            outFile.seek(0)
+            outFile.truncate()
+         written = 0
+         while True:
+            data = resp.read(ChunkSize)
+            if not data:
+               break
+            outFile.write(data)
+            written += len(data)
+         return written
+      return self.Request(conn, 'GET', fileName, Save, headers)
+
+   # Define method to describe the source
+   def Url(self, fileName=''):
+      return '%s://%s:%s%s' % ('https' if self.https else 'http', self.host, self.port, self.Path(fileName))
+
+# Define function to open a connection pool for a host and directory.
+# The scheme of the host (ftp://, http://, https://, or none for FTP) selects the backend.
+def OpenPool(host, directory='', size=4, timeout=Timeout):
+   if '://' not in host:
+      host = 'ftp://' + host
+   parts = urlsplit(host)
+   directory = '/'.join(p for p in (parts.path.strip('/'), directory.strip('/')) if p)
+   if parts.scheme == 'ftp':
+      return FtpPool(parts.hostname, directory, size, parts.port or 21, parts.username or '',
+                     parts.password or '', timeout)
+   if parts.scheme in ('http', 'https'):
+      return HttpPool(parts.hostname, directory, size, parts.port, parts.scheme == 'https', timeout)
+   raise ValueError('Unsupported scheme %s' % parts.scheme)
+
+# Define function to compute the MD5 checksum of a file, as a hexadecimal string
+def FileMd5(path):
+   md5 = hashlib.md5()
+   with open(path, 'rb') as f:
+      while True:
+         data = f.read(ChunkSize)
+         if not data:
+            break
+         md5.update(data)
+   return md5.hexdigest()
+
+# Define class to hold the manifest of verified downloads in an output directory.
+# Each entry records the server's (size, stamp, md5) for a file and the local file's size and
+# modification time when it was verified, so an unchanged file need not be checked again.
+class Manifest(object):
+   def __init__(self, outDir):
+      self.path = os.path.join(outDir, ManifestName)
+      self.lock = threading.Lock()
+      self.entries = dict()
+      if os.path.exists(self.path):
+         try:
+            with open(self.path) as f:
+               self.entries = json.load(f)
+         except ValueError:
+            self.entries = dict() # unreadable manifest; files will be verified again
+
+   # Define method to check whether a local file is a verified copy of the server's current file
+   def IsCurrent(self, fileName, path, remote):
+      entry = self.entries.get(fileName)
+      if entry is None or not os.path.exists(path):
+         return False
+      size, stamp, md5 = remote
+      st = os.stat(path)
+      if st.st_size != entry['localSize'] or abs(st.st_mtime - entry['localTime']) > 1:
+         return False
+      if size is not None and size != entry['size']:
+         return False
+      if stamp is not None and stamp != entry['stamp']:
+         return False
+      if md5 is not None and md5 != entry['md5']:
+         return False
+      return True
+
+   # Define method to record a verified file and save the manifest
+   def Record(self, fileName, path, remote, md5=None):
+      st = os.stat(path)
+      entry = {'size': remote[0], 'stamp': remote[1], 'md5': md5 or remote[2],
+               'localSize': st.st_size, 'localTime': st.st_mtime}
+      with self.lock:
+         self.entries[fileName] = entry
+         tmp = self.path + '.tmp'
+         with open(tmp, 'w') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+         SdmPipeline.ReplaceFile(tmp, self.path)
+
+# Define class to hold the outcome of one download
+class DownloadResult(object):
+   def __init__(self, fileName, path, ok, nbytes=0, seconds=0.0, message='', skipped=False, resumedAt=0):
+      self.fileName = fileName
+      self.path = path # Local path of the downloaded file
+      self.ok = ok
+      self.nbytes = nbytes # Bytes transferred in this run
+      self.seconds = seconds
+      self.message = message
+      self.skipped = skipped # True if the file was already present and verified
+      self.resumedAt = resumedAt # Offset a partial download was resumed from, if any
+
+   def __repr__(self):
+      return 'DownloadResult(%r, ok=%r, nbytes=%r, skipped=%r)' % (self.fileName, self.ok, self.nbytes, self.skipped)
+
+# Define class to download files concurrently through a connection pool
+class Downloader(object):
+   def __init__(self, pool, outDir, retries=2, verifyMd5=True):
+      self.pool = pool
+      self.outDir = outDir
+      self.retries = retries # Extra attempts per file, each on a fresh connection, resuming where the last stopped
+      self.verifyMd5 = verifyMd5 # Whether to check MD5 checksums published by the server
+      self.manifest = None
+
+   # Define method to verify a file that is present but not in the manifest (e.g. downloaded
+   # before the manifest was kept), recording it if it matches the server.
+   def Adopt(self, fileName, path, remote):
+      size, stamp, md5 = remote
+      if fileName in self.manifest.entries or not os.path.exists(path) or size is None:
+         return False
+      if os.path.getsize(path) != size:
+         return False
+      local = None
+      if md5 is not None:
+         local = FileMd5(path)
+         if local != md5:
+            return False
+      self.manifest.Record(fileName, path, remote, local)
+      return True
+
+   # Define method to download one file, or skip it if it is already present and verified.
+   # Connection failures discard the connection and retry, resuming from the partial file.
+   # The partial file is kept if all attempts fail, so a later run can resume it.
+   def Download(self, fileName):
+      path = os.path.join(self.outDir, fileName)
+      part = path + PartSuffix
+      start = time.time()
+      message = ''
+      nbytes = 0
+      resumedAt = 0
+      for attempt in range(self.retries + 1):
+         try:
+            conn = self.pool.Get()
+         except Exception as e:
+            message = 'Cannot connect to %s: %s' % (self.pool.Url(), e)
+            continue
+         try:
+            remote = self.pool.Remote(conn, fileName)
+            if self.manifest.IsCurrent(fileName, path, remote) or self.Adopt(fileName, path, remote):
+               self.pool.Put(conn)
+               return DownloadResult(fileName, path, True, 0, time.time() - start, 'already downloaded', True)
+
+            # Resume from the end of any partial file that is not larger than the server's file
+            size = remote[0]
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            if size is not None and offset > size:
+               offset = 0
+            if offset and not resumedAt:
+               resumedAt = offset
+            # A partial file as large as the server's needs no fetch (a range request starting at its
+            # end would be refused), only verifying
+            if not offset or size is None or offset < size:
+               with open(part, 'r+b' if offset else 'wb') as outFile:
+                  outFile.seek(offset)
+                  outFile.truncate()
+                  nbytes += self.pool.Fetch(conn, fileName, outFile, offset)
+         except (ftplib.error_perm, PermanentError) as e:
+            # Permanent errors (e.g. no such file) leave the connection usable; do not retry
+            self.pool.Put(conn)
+            message = str(e).strip()
+            break
+         except Exception as e:
+            self.pool.Discard(conn)
+            message = str(e).strip() or e.__class__.__name__
+            continue
+         self.pool.Put(conn)
+
+         # Verify the finished file before moving it into place
+         got = os.path.getsize(part)
+         if size is not None and got != size:
+            message = 'size %s does not match server size %s' % (got, size)
+            if got > size:
+               os.remove(part)
+            continue
+         md5 = None
+         if self.verifyMd5 and remote[2] is not None:
+            md5 = FileMd5(part)
+            if md5 != remote[2]:
+               message = 'MD5 checksum does not match the server'
+               os.remove(part)
+               continue
+         SdmPipeline.ReplaceFile(part, path)
+         self.manifest.Record(fileName, path, remote, md5)
+         return DownloadResult(fileName, path, True, nbytes, time.time() - start, '', False, resumedAt)
+      return DownloadResult(fileName, path, False, nbytes, time.time() - start, message, False, resumedAt)
+
+   # Define method to create the output directory and load its manifest.  Run does this; call it
+   # directly before calling Download from other threads (e.g. from a pipeline stage).
+   def Prepare(self):
+      if not os.path.isdir(self.outDir):
+         os.makedirs(self.outDir)
+      self.manifest = Manifest(self.outDir)
+
+   # Define method to download a list of files using up to nThreads connections at once.
+   # progress, if given, is called with each DownloadResult as it completes.
+   # Returns the DownloadResults in the order of the input list.
+   def Run(self, fileNames, nThreads=4, progress=None):
+      self.Prepare()
+      pool = ThreadPool(max(1, min(nThreads, self.pool.size)))
+      try:
+         results = list()
+         for result in pool.imap_unordered(self.Download, fileNames):
+            results.append(result)
+            if progress:
+               progress(result)
+      finally:
+         pool.close()
+         pool.join()
+         self.pool.CloseAll()
+      order = dict((name, i) for i, name in enumerate(fileNames))
+      results.sort(key=lambda r: order[r.fileName])
+      return results
+
+# Define function to download a list of files from a host and directory into an output directory
+def DownloadFiles(host, directory, fileNames, outDir, nThreads=4, progress=None):
+   pool = OpenPool(host, directory, nThreads)
+   return Downloader(pool, outDir).Run(fileNames, nThreads, progress)
@@ -1,12 +1,22 @@
 # ExtractSeaOcean.py
 # Version:  Python 2.7.5
 # Creation Date: 2015-08-01
-# Last Edit: 2016-08-02
+# Last Edit: 2026-10-18
 # Creator:  Roy Gilb
 #
 # Summary: Extracts Sea/Ocean Polygons from NHD geodatabases identified in a list of watershed codes supplied by the user. These are watersheds that have sea/ocean polygons that extend inland, with parts that should be classified as something other than Sea/Ocean.
+# The Sea/Ocean polygons of all the watersheds are written to one feature class (SeaOcean) in a single pass, projected as they are read, with the watershed code (HUC4) and the ysnSea flag (1) filled in; no intermediate datasets are written.
+# The geodatabase of each watershed is looked up in a catalogue of the NHD workspace (see NhdCatalog.py), which is built on the first run and rebuilt only when the workspace changes, and several watersheds are processed at once.
+# Watersheds with no Sea/Ocean polygons (according to the catalogue's FCode statistics of NHDArea, gathered by the worker processes on the first run) are skipped without being read.
+# If an NHD column cache (see BuildNhdCache.py) is given, watersheds cached from their current geodatabases are read from it instead.
+
+# Usage Tips:
+# The NHD geodatabases may be anywhere within the NHD workspace (e.g. in the SDM_north, SDM_south and Virginia subfolders).
+# Scripts run by a process pool are imported by the worker processes, so processing is kept under "if __name__ == '__main__':".
+# The work is done by the ExtractSeaOcean function, which can also be imported and called from Python (under "if __name__ == '__main__':").
 
 # Syntax:
+# ExtractSeaOcean(nhdWorkspace, inHUC, spatRef, outGDB, {nProcs}, {cacheDir})
 # ----------------------------------------------------------------------------------------
 # Import required modules
 import arcpy
@@ -17,53 +27,129 @@ import os # provides access to operating system funtionality such as file and di
 import sys # provides access to Python system functions
 import traceback # used for error handling
 from datetime import datetime # for time-stamping
+import NhdCatalog # for finding the NHD geodatabase of each watershed
+import ProcessPool # for processing several watersheds at once
+import NhdColumnCache # for reading watersheds from the NHD column cache
 
-# User-specified parameters
-nhdWorkspace = arcpy.GetParameterAsText(0) # Workspace containing subfolders with NHD geodatabases
-inHUC = arcpy.GetParameterAsText(1) # List of the 4-digit HUCs identifying the affected watersheds to process
-spatRef = arcpy.GetParameterAsText(2) # Raster (nhd_Hydro) to use as the reference coordinate system for the projection
-outGDB = arcpy.GetParameterAsText(3) # Output workspace to store the new SeaOcean polygons for review
-
-# Additional parameters
-inHUCList = inHUC.split(";")       # Convert the input semicolon separated string to a list
-outCS = arcpy.Describe(spatRef).spatialReference
-
-arcpy.env.workspace = nhdWorkspace # Set current workspace
-arcpy.env.overwriteOutput = True
-
-#Set up some variables to use later
-sdmNorth = nhdWorkspace + os.sep + 'SDM_north'
-sdmSouth = nhdWorkspace + os.sep + 'SDM_south'
-sdmVA =  nhdWorkspace + os.sep + 'Virginia' 
-subdirsList = [sdmNorth, sdmSouth, sdmVA]
-field = 'FType' #Field 
+# Name of the output feature class holding the Sea/Ocean polygons of all the watersheds
 seaOcean = 'SeaOcean'
 
+# Fields copied from NHDArea to the output
+copyFields = ['FType', 'FCode']
 
-arcpy.AddMessage('All GDBs: ')
+# Define function to read the Sea/Ocean polygons of one watershed from the NHD column cache, reading
+# only the rows of the given FCodes, and projecting each polygon
+def ReadCachedHuc(cacheDir, huc4, fcodes, sr):
+   rows = list()
+   srcSR = arcpy.SpatialReference()
+   srcSR.loadFromString(NhdColumnCache.LayerSpatialRef(cacheDir, 'NHDArea', huc4))
+   for wkb, ftype, fcode in NhdColumnCache.Features(cacheDir, 'NHDArea', [huc4], fcodes, ['geometry'] + copyFields):
+      shape = arcpy.FromWKB(bytearray(wkb), srcSR).projectAs(sr)
+      rows.append((bytearray(shape.WKB), ftype, fcode))
+   return rows
 
-for dir in subdirsList:
+# Define function to read the Sea/Ocean polygons of one watershed, run in a worker process.
+# Watersheds with no Sea/Ocean polygons, according to the catalogue's FCode statistics for NHDArea
+# (gathered here if they are not catalogued yet), are not read.
+# Polygons are selected by the cursor's where clause and projected by the cursor as they are read, so
+# nothing is written to disk.  Arguments are passed as one tuple of (HUC, geodatabase, spatial reference as text,
+# cache folder or None).
+# Returns (HUC, list of (polygon as WKB, FType, FCode) or None if skipped, error message or None,
+# catalogue statistics for the main process to save).
+def ReadHuc(args):
+   huc4, gdb, outCS, cacheDir = args
+   rows = list()
+   stats = None
    try:
-      arcpy.env.workspace = dir #Set the current workspace to the subdirectory so ListWorkspaces will work
-      gdbs = arcpy.ListWorkspaces('*', 'FileGDB') #Get the list of GDBs within each subdirectory
-      for gdb in gdbs:        
-         huc4 = os.path.basename(gdb)[4:8] #Extract the 4 digit HUC from each GDB, for comparing with the input list
-         nhdArea = gdb + os.sep + 'Hydrography' + os.sep + 'NHDArea' #NHD Area feature class for the current HUC
-         arcpy.AddMessage(gdb)
-         arcpy.AddMessage(huc4)
-         
-         for code in inHUCList: #Iterate through the input HUC numbers to make comparisons to the GDB codes
-            if code == huc4: #Compare input huc codes with the codes in the directory, and if it's a match, continue with the extraction and projection         
-               arcpy.AddMessage('Working on watershed %s...' % huc4)
-               outPolys = outGDB + os.sep + 'SeaOcean' + huc4
-               arcpy.Select_analysis(nhdArea, outPolys + '_gcs', 'FType = 445') #Select the SeaOcean features and output with unique name --> 445 is the Long code for SeaOean
-               arcpy.Project_management(outPolys + '_gcs', outPolys, outCS) #Project the new polys to the input spatial reference, overwrite old file
-               arcpy.AddField_management(outPolys, "ysnSea", "Short") #Add binary field
-               arcpy.Delete_management(outPolys + '_gcs') #Delete pre-projected file
-      
+      stats = NhdCatalog.GetStats(gdb, ['NHDArea'], save=False)
+      fcodes = [f for f in NhdCatalog.StatsFCodes(stats, ['NHDArea']) if f // 100 == 445]
+      if not fcodes:
+         return (huc4, None, None, stats)
+      sr = arcpy.SpatialReference()
+      sr.loadFromString(outCS)
+      if cacheDir and NhdColumnCache.IsCached(cacheDir, huc4, gdb):
+         return (huc4, ReadCachedHuc(cacheDir, huc4, fcodes, sr), None, stats)
+      nhdArea = gdb + os.sep + 'Hydrography' + os.sep + 'NHDArea' #NHD Area feature class for the current HUC
+      with arcpy.da.SearchCursor(nhdArea, ['SHAPE@WKB'] + copyFields, 'FType = 445', sr) as cursor: # 445 is the Long code for SeaOcean
+         for row in cursor:
+            if row[0] is not None:
+               rows.append((bytearray(row[0]),) + tuple(row[1:]))
+      return (huc4, rows, None, stats)
    except:
-      arcpy.AddWarning('Failed to process watershed %s.') # % huc4)
-      
+      tb = sys.exc_info()[2]
+      tbinfo = traceback.format_tb(tb)[0]
+      pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
+      msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+      return (huc4, None, msgs + pymsg, stats)
+
+# Define function to create the output feature class, with its fields, before any polygons are written
+def CreateOutput(outGDB, outCS):
+   outPolys = outGDB + os.sep + seaOcean
+   if arcpy.Exists(outPolys):
+      arcpy.Delete_management(outPolys)
+   arcpy.CreateFeatureclass_management(outGDB, seaOcean, 'POLYGON', spatial_reference=outCS)
+   arcpy.AddField_management(outPolys, 'FType', 'LONG')
+   arcpy.AddField_management(outPolys, 'FCode', 'LONG')
+   arcpy.AddField_management(outPolys, 'HUC4', 'TEXT', field_length=4)
+   arcpy.AddField_management(outPolys, 'ysnSea', 'SHORT') #Binary field, set to 1 as polygons are written
+   return outPolys
+
+# Define function to extract the Sea/Ocean polygons of a list of watersheds.  Returns the output feature
+# class, or None if no watershed has Sea/Ocean polygons.
+def ExtractSeaOcean(nhdWorkspace, inHUC, spatRef, outGDB, nProcs=4, cacheDir=None):
+   # Additional parameters
+   inHUCList = [h.strip() for h in inHUC.split(";") if h.strip()] # Convert the input semicolon separated string to a list
+   outCS = arcpy.Describe(spatRef).spatialReference
+
+   arcpy.env.workspace = nhdWorkspace # Set current workspace
+   arcpy.env.overwriteOutput = True
+
+   outPolys = None
+   try:
+      # Look up the geodatabase of each requested HUC in the workspace's catalogue
+      gdbs, missing = NhdCatalog.FindGdbs(nhdWorkspace, inHUCList)
+      for huc4 in missing:
+         arcpy.AddWarning('No NHD geodatabase found for watershed %s.' % huc4)
+      tasks = list()
+      for huc4 in inHUCList:
+         if huc4 in gdbs:
+            arcpy.AddMessage('Watershed %s: %s' % (huc4, gdbs[huc4]))
+            tasks.append((huc4, gdbs[huc4], outCS.exportToString(), cacheDir))
+
+      # Read the watersheds several at once, writing the polygons of each to the output as they
+      # arrive.  The output is created when the first watershed with Sea/Ocean polygons arrives.
+      if tasks:
+         arcpy.AddMessage('Working on %s watersheds, %s at a time...' % (len(tasks), nProcs))
+         pool = ProcessPool.OpenProcessPool(max(1, min(nProcs, len(tasks))))
+         cursor = None
+         try:
+            for huc4, rows, error, stats in pool.imap_unordered(ReadHuc, tasks):
+               if stats is not None:
+                  NhdCatalog.SaveStats(stats)
+               if error:
+                  arcpy.AddWarning('Failed to process watershed %s.' % huc4)
+                  arcpy.AddWarning(error)
+                  continue
+               if rows is None:
+                  arcpy.AddMessage('Watershed %s has no Sea/Ocean polygons; skipped.' % huc4)
+                  continue
+               if cursor is None:
+                  outPolys = CreateOutput(outGDB, outCS)
+                  cursor = arcpy.da.InsertCursor(outPolys, ['SHAPE@'] + copyFields + ['HUC4', 'ysnSea'])
+               for row in rows:
+                  cursor.insertRow((arcpy.FromWKB(row[0], outCS),) + tuple(row[1:]) + (huc4, 1))
+               arcpy.AddMessage('Completed watershed %s: %s Sea/Ocean polygons' % (huc4, len(rows)))
+         finally:
+            if cursor is not None:
+               del cursor
+            pool.close()
+            pool.join()
+         if outPolys is not None:
+            arcpy.AddMessage('The Sea/Ocean polygons are in %s' % outPolys)
+
+   except:
+      arcpy.AddWarning('Failed to process watersheds.')
+
       # Error handling code swiped from "A Python Primer for ArcGIS"
       tb = sys.exc_info()[2]
       tbinfo = traceback.format_tb(tb)[0]
@@ -72,4 +158,25 @@ for dir in subdirsList:
 
       arcpy.AddWarning(msgs)
       arcpy.AddWarning(pymsg)
-      arcpy.AddMessage(arcpy.GetMessages(1)) 
\ No newline at end of file
+      arcpy.AddMessage(arcpy.GetMessages(1))
+
+   return outPolys
+
+# The script tool reads its parameters and runs the function.  The worker processes import this
+# script, so processing must only happen when it is run
+if __name__ == '__main__':
+   # User-specified parameters
+   nhdWorkspace = arcpy.GetParameterAsText(0) # Workspace containing subfolders with NHD geodatabases
+   inHUC = arcpy.GetParameterAsText(1) # List of the 4-digit HUCs identifying the affected watersheds to process
+   spatRef = arcpy.GetParameterAsText(2) # Raster (nhd_Hydro) to use as the reference coordinate system for the projection
+   outGDB = arcpy.GetParameterAsText(3) # Output workspace to store the new SeaOcean feature class for review
+   if arcpy.GetArgumentCount() > 4 and arcpy.GetParameterAsText(4):
+      nProcs = int(arcpy.GetParameterAsText(4)) # Number of watersheds to process at once
+   else:
+      nProcs = 4
+   if arcpy.GetArgumentCount() > 5 and arcpy.GetParameterAsText(5):
+      cacheDir = arcpy.GetParameterAsText(5) # NHD column cache folder; optional
+   else:
+      cacheDir = None
+
+   ExtractSeaOcean(nhdWorkspace, inHUC, spatRef, outGDB, nProcs, cacheDir)
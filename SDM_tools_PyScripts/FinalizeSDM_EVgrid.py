@@ -2,7 +2,7 @@
 # FinalizeSDM_EVgrid.py
 # Version:  Python 2.7.5 / ArcGIS 10.2.2
 # Creation Date: 2015-10-30
-# Last Edit: 2015-10-30
+# Last Edit: 2026-10-18
 # Creator:  Kirsten R. Hazler
 #
 # Summary:
@@ -10,6 +10,11 @@
 # is used to finalize environmental variables (EV) rasters in preparation for input to Random Forest 
 # Species Distribution Models (SDM).
 #
+# Usage Tips:
+#     If a cache folder is given, the output is kept in the cache (see RasterCache.py), and a rerun
+# with the same input raster and multiplier copies it from the cache rather than recomputing it.
+#     The work is done by the FinalizeGrid function, which can also be imported and called from Python.
+#
 # -------------------------------------------------------------------------------------------------------
 
 # Import required modules
@@ -20,16 +25,21 @@ import os # provides access to operating system functionality such as file and d
 import sys # provides access to Python system functions
 import traceback # used for error handling
 from datetime import datetime # for time-stamping
+import RasterCache # for reusing outputs computed before
 
-# Script arguments to be input by user
-inRaster = arcpy.GetParameterAsText(0) # Input raster
-Multiplier = arcpy.GetParameter(1) # Multiplier used to preserve precision in integer output
-outRaster = arcpy.GetParameterAsText(2) # Output raster
+# Define function to multiply a raster and convert it to integer.  Returns the output raster.
+def FinalizeGrid(inRaster, Multiplier, outRaster, cacheDir=None):
+   # Additional script parameters and environment settings
+   arcpy.env.overwriteOutput = True # Set overwrite option so that existing data may be overwritten
 
-# Additional script parameters and environment settings
-arcpy.env.overwriteOutput = True # Set overwrite option so that existing data may be overwritten
+   # Copy the output from the cache if it was computed before from the same input
+   cache = RasterCache.Open(cacheDir)
+   if cache:
+      key = cache.Key('FinalizeSDM_EVgrid', {'Multiplier': Multiplier}, [inRaster])
+   if cache and cache.Fetch(key, outRaster):
+      arcpy.AddMessage('Copied %s from the cache' % outRaster)
+      return outRaster
 
-try:
    if Multiplier == 1:
       # Simply convert to integer
       outRast = Int(0.5 + Raster(inRaster))
@@ -38,23 +48,30 @@ try:
       outRast = Int(0.5 + (Multiplier * Raster(inRaster)))
    
    outRast.save(outRaster)
-   
-
-except:
-   # Error handling code swiped from "A Python Primer for ArcGIS"
-   tb = sys.exc_info()[2]
-   tbinfo = traceback.format_tb(tb)[0]
-   pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
-   msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
-
-   arcpy.AddError(msgs)
-   arcpy.AddError(pymsg)
-   arcpy.AddError(arcpy.GetMessages(1))
-      
-
-
-
-
+   if cache:
+      cache.Store(key, outRaster, 'FinalizeSDM_EVgrid')
+   return outRaster
 
+# The script tool reads its parameters and runs the function
+if __name__ == '__main__':
+   # Script arguments to be input by user
+   inRaster = arcpy.GetParameterAsText(0) # Input raster
+   Multiplier = arcpy.GetParameter(1) # Multiplier used to preserve precision in integer output
+   outRaster = arcpy.GetParameterAsText(2) # Output raster
+   if arcpy.GetArgumentCount() > 3 and arcpy.GetParameterAsText(3):
+      cacheDir = arcpy.GetParameterAsText(3) # Folder holding the cache of derived rasters; optional
+   else:
+      cacheDir = None
 
+   try:
+      FinalizeGrid(inRaster, Multiplier, outRaster, cacheDir)
+   except:
+      # Error handling code swiped from "A Python Primer for ArcGIS"
+      tb = sys.exc_info()[2]
+      tbinfo = traceback.format_tb(tb)[0]
+      pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
+      msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
 
+      arcpy.AddError(msgs)
+      arcpy.AddError(pymsg)
+      arcpy.AddError(arcpy.GetMessages(1))
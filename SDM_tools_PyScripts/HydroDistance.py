@@ -2,14 +2,16 @@
 # HydroDistance.py
 # Version:  Python 2.7.5
 # Creation Date: 2016-07-15
-# Last Edit: 2016-07-18
+# Last Edit: 2026-10-18
 # Creator:  Kirsten Hazler
 #
 # Summary: 
 # Generates Euclidean distance rasters from various hydrologic types in a classified hydro raster
+# The work is done by the HydroDistance function, which can also be imported and called from Python.
+# If a cache folder is given, each distance raster is kept in the cache (see RasterCache.py), and a rerun with the same hydro raster and mask copies it from the cache rather than recomputing it.
 
 # Syntax: 
-# HydroDistance (inHydro, procMask, outGDB)
+# HydroDistance (inHydro, procMask, outGDB, {cacheDir})
 # ----------------------------------------------------------------------------------------
 
 # Import arcpy and other modules
@@ -21,61 +23,73 @@ import sys # provides access to Python system functions
 import traceback # used for error handling
 import gc # garbage collection 
 from datetime import datetime # for time-stamping
-
-# Script arguments to be input by user
-inHydro = arcpy.GetParameterAsText(0) # Input classified hydro raster
-procMask = arcpy.GetParameterAsText(1) # Mask to determine processing area
-outGDB = arcpy.GetParameterAsText(2) # Output geodatabase to store final products
-
-# Set processing mask
-arcpy.env.mask = procMask
-
-# Set up Remap tables for creating binary rasters
-rmpMarEst = RemapValue([[1,'NODATA'],[2,'NODATA'],[3,1],[4,1]])
-rmpMarine = RemapValue([[1,'NODATA'],[2,'NODATA'],[3,'NODATA'],[4,1]])
-rmpEstuary = RemapValue([[1,'NODATA'],[2,'NODATA'],[3,1],[4,'NODATA']])
-rmpInland = RemapValue([[1,1],[2,1],[3,'NODATA'],[4,'NODATA']])
-rmpStreams = RemapValue([[1,1],[2,'NODATA'],[3,'NODATA'],[4,'NODATA']])
-rmpLakesRivers = RemapValue([[1,'NODATA'],[2,1],[3,'NODATA'],[4,'NODATA']])
-
-# Set up output names for euclidean distance rasters
-edMarEst = outGDB + os.sep + 'edMarEst'
-edMarine = outGDB + os.sep + 'edMarine'
-edEstuary = outGDB + os.sep + 'edEstuary'
-edInland = outGDB + os.sep + 'edInland'
-edStreams = outGDB + os.sep + 'edStreams'
-edLakesRivers = outGDB + os.sep + 'edLakesRivers'
+import RasterCache # for reusing outputs computed before
 
 # Define function to do binary reclassification followed by Euclidean distance
-def BinEucl(Remap, outDistRaster):
+def BinEucl(inHydro, procMask, Remap, outDistRaster, cache=None):
+   # Copy the output from the cache if it was computed before from the same inputs
+   if cache:
+      key = cache.Key('HydroDistance', {'Remap': Remap.remapTable}, [inHydro, procMask])
+      if cache.Fetch(key, outDistRaster):
+         arcpy.AddMessage('Copied %s from the cache' % outDistRaster)
+         return outDistRaster
    arcpy.AddMessage('Creating binary raster')
    outBinary = Reclassify(inHydro, "Value", Remap)
    arcpy.AddMessage('Creating Euclidean distance raster')
    outEucl = EucDistance (outBinary)
    outEucl.save(outDistRaster)
    arcpy.AddMessage('Saved final raster to %s' % outDistRaster)
+   if cache:
+      cache.Store(key, outDistRaster, 'HydroDistance')
    return outDistRaster
-   
-# Set up processing list
-ProcList = [(rmpMarEst, edMarEst),
-            (rmpMarine, edMarine),
-            (rmpEstuary, edEstuary),
-            (rmpInland, edInland),
-            (rmpStreams, edStreams),
-            (rmpLakesRivers, edLakesRivers)]
-
-# Carry out the function for each hydro type
-for item in ProcList:
-   BinEucl(item[0], item[1])
-
-
-
-
-
-
-
-
-
-
-
 
+# Define function to generate the Euclidean distance rasters from each hydrologic type.
+# Returns the list of output rasters.
+def HydroDistance(inHydro, procMask, outGDB, cacheDir=None):
+   cache = RasterCache.Open(cacheDir)
+
+   # Set processing mask
+   arcpy.env.mask = procMask
+
+   # Set up Remap tables for creating binary rasters
+   rmpMarEst = RemapValue([[1,'NODATA'],[2,'NODATA'],[3,1],[4,1]])
+   rmpMarine = RemapValue([[1,'NODATA'],[2,'NODATA'],[3,'NODATA'],[4,1]])
+   rmpEstuary = RemapValue([[1,'NODATA'],[2,'NODATA'],[3,1],[4,'NODATA']])
+   rmpInland = RemapValue([[1,1],[2,1],[3,'NODATA'],[4,'NODATA']])
+   rmpStreams = RemapValue([[1,1],[2,'NODATA'],[3,'NODATA'],[4,'NODATA']])
+   rmpLakesRivers = RemapValue([[1,'NODATA'],[2,1],[3,'NODATA'],[4,'NODATA']])
+
+   # Set up output names for euclidean distance rasters
+   edMarEst = outGDB + os.sep + 'edMarEst'
+   edMarine = outGDB + os.sep + 'edMarine'
+   edEstuary = outGDB + os.sep + 'edEstuary'
+   edInland = outGDB + os.sep + 'edInland'
+   edStreams = outGDB + os.sep + 'edStreams'
+   edLakesRivers = outGDB + os.sep + 'edLakesRivers'
+      
+   # Set up processing list
+   ProcList = [(rmpMarEst, edMarEst),
+               (rmpMarine, edMarine),
+               (rmpEstuary, edEstuary),
+               (rmpInland, edInland),
+               (rmpStreams, edStreams),
+               (rmpLakesRivers, edLakesRivers)]
+
+   # Carry out the function for each hydro type
+   outputs = list()
+   for item in ProcList:
+      outputs.append(BinEucl(inHydro, procMask, item[0], item[1], cache))
+   return outputs
+
+# The script tool reads its parameters and runs the function
+if __name__ == '__main__':
+   # Script arguments to be input by user
+   inHydro = arcpy.GetParameterAsText(0) # Input classified hydro raster
+   procMask = arcpy.GetParameterAsText(1) # Mask to determine processing area
+   outGDB = arcpy.GetParameterAsText(2) # Output geodatabase to store final products
+   if arcpy.GetArgumentCount() > 3 and arcpy.GetParameterAsText(3):
+      cacheDir = arcpy.GetParameterAsText(3) # Folder holding the cache of derived rasters; optional
+   else:
+      cacheDir = None
+
+   HydroDistance(inHydro, procMask, outGDB, cacheDir)
@@ -2,15 +2,16 @@
 # ImportNED.py
 # Version:  Python 2.7.5
 # Creation Date: 2015-04-15
-# Last Edit: 2015-05-04
+# Last Edit: 2026-10-18
 # Creator:  Kirsten R. Hazler
 #
 # Summary:
-#     Imports GRID-format National Elevation Dataset (NED) into a file geodatabase, in preparation for 
-#     adding them to a mosaic dataset.   
+#     Imports GRID-format National Elevation Dataset (NED) into a file geodatabase or a folder of GeoTIFFs, in preparation for
+#     adding them to a mosaic dataset.
 #     The following processes are performed:
 #     - Gets the list of GRID format rasters in the NED directory.  This is the list to process.
-#     - Imports the rasters to the specified geodatabase.
+#     - Imports the rasters to the specified geodatabase or folder as tiled, compressed rasters with overviews
+#       (pyramids) and statistics, converting several at once.
 #     - Deletes the source data after successful import of each raster
 #     - Write processing results to a log file.
 #
@@ -18,10 +19,20 @@
 #     This tool is intended for use with NED grids that have already been extracted from downloaded zipfiles.
 #     If this tool does not function as expected, it may be that NED file structure and/or naming conventions
 #     have changed since this script was written.
+#     If the output workspace is a folder, each tile is written directly as a DEFLATE-compressed GeoTIFF (see TiledTiff.py).
+#     If it is a file geodatabase, the tiles are converted to GeoTIFFs, several at once, in a staging folder beside it
+#     (<name>_stage), and copied in one at a time, with LZ77 compression, pyramids and statistics; a file geodatabase
+#     must not be written by several processes at once.
+#     The ancillary files of all tiles are found with a single scan of the NED directory, indexed by tile tag.
+#     The work is done by the ImportNED function, which can also be imported and called from Python (under
+#     "if __name__ == '__main__':", see ProcessPool.py).
 #
 # Required Arguments:
 # nedDir: Directory in which the original NED grids reside
-# nedGDB: File geodatabase to store NED data
+# nedGDB: File geodatabase (or folder) to store NED data
+#
+# Optional Arguments:
+# nProcs: Number of tiles to import at once (default: 4)
 # -------------------------------------------------------------------------------------------------------
 
 # Import required modules
@@ -32,89 +43,185 @@ import xml.etree.ElementTree as ET # enables manipulation of XML metadata files
 import os # provides access to operating system funtionality such as file and directory paths
 from os import listdir
 from os.path import isfile, join
+import re # for finding tile tags in file names
 import sys # provides access to Python system functions
 import traceback # used for error handling
 import gc # garbage collection
 from datetime import datetime # for time-stamping
+import RasterWindow # for reading the NED grids
+import TiledTiff # for writing compressed GeoTIFFs
+import ProcessPool # for importing several tiles at once
+
+# Pattern of the NED tile tags (e.g. n38w078_1) found in file names
+TagPattern = re.compile(r'[ns]\d{2}[ew]\d{3}(?:_\d+)?')
+
+# Define function to index the files in a directory by the tile tag they contain, from a single
+# scan of the directory.  Tags that do not follow the usual pattern are matched as substrings.
+def IndexByTag(directory, tags):
+   index = dict((t, list()) for t in tags)
+   odd = [t for t in tags if TagPattern.findall(t) != [t]]
+   for f in os.listdir(directory):
+      for m in TagPattern.finditer(f):
+         if m.group(0) in index:
+            index[m.group(0)].append(directory + os.sep + f)
+      for t in odd:
+         if t in f:
+            index[t].append(directory + os.sep + f)
+   return index
+
+# Define function to convert one NED grid to a GeoTIFF, run in a worker process.  Arguments are
+# passed as one tuple of (input grid, output GeoTIFF, whether the GeoTIFF is only staged for a
+# geodatabase).  A final GeoTIFF is compressed, with overviews and statistics; a staged one is
+# written plainly, since it is loaded into the geodatabase and deleted.
+# Returns (input grid, error message or None).
+def ImportTile(args):
+   inNED, outTif, staged = args
+   try:
+      grid = RasterWindow.GetRasterGrid(inNED)
+      nodata = grid.nodata
+      if nodata is None:
+         nodata = -3.4028234663852886e+38 # ArcGIS default NoData for 32-bit float rasters
+      array = RasterWindow.ReadWindow(inNED, grid, (0, 0, grid.nrows, grid.ncols), nodata)
+      if staged:
+         writer = TiledTiff.TiledTiffWriter(outTif, grid, array.dtype, nodata=nodata)
+      else:
+         writer = TiledTiff.TiledTiffWriter(outTif, grid, array.dtype, nodata=nodata, overviews=True,
+                                            resampling='AVERAGE', stats=True, compress='DEFLATE')
+      writer.WriteBlock(0, 0, array)
+      del array
+      writer.Close()
+      arcpy.DefineProjection_management(outTif, grid.spatialRef)
+      return (inNED, None)
+   except:
+      return (inNED, '%s\n%s' % (str(sys.exc_info()[1]), arcpy.GetMessages(2)))
 
-# Script arguments to be input by user
-nedDir = arcpy.GetParameterAsText(0) # Directory in which the original NED grids reside
-nedGDB = arcpy.GetParameterAsText(1) # File geodatabase to store processed NED data
+# Define function to import the NED grids in a directory.  Returns the list of processing records.
+def ImportNED(nedDir, nedGDB, nProcs=4):
+   # Additional script parameters
+   scratch = arcpy.env.scratchGDB
+   myLogFile = nedDir + os.sep + 'ProcLog.txt'
+   toTiff = not nedGDB.lower().endswith('.gdb')
 
-# Additional script parameters
-scratch = arcpy.env.scratchGDB
-myLogFile = nedDir + os.sep + 'ProcLog.txt'
+   arcpy.env.overwriteOutput = True # Set overwrite option so that existing data may be overwritten
 
-arcpy.env.overwriteOutput = True # Set overwrite option so that existing data may be overwritten
+   # Get the list of GRID-format rasters in the NED directory
+   arcpy.env.workspace = nedDir
+   nedGRIDs = arcpy.ListRasters("*", "GRID")
 
-# Get the list of GRID-format rasters in the NED directory
-arcpy.env.workspace = nedDir
-nedGRIDs = arcpy.ListRasters("*", "GRID")
+   # Index the related files of each tile, with one scan of the NED directory
+   tags = dict((gname, gname[3:]) for gname in nedGRIDs)
+   tagFiles = IndexByTag(nedDir, list(tags.values()))
 
-# Initialize a list for processing records
-myProcList = list()
+   # Initialize a list for processing records
+   myProcList = list()
 
-for gname in nedGRIDs:
+   # Convert the tiles several at once.  For a geodatabase output, the tiles are converted to
+   # GeoTIFFs in a staging folder beside the geodatabase, and loaded into the geodatabase here, one
+   # at a time, because a file geodatabase must not be written by several processes at once.
+   # Source data are deleted here, one tile at a time, because deleting GRIDs changes the
+   # workspace's shared info folder.
+   # The raster settings of the geodatabase copies are restored when done.
+   if toTiff:
+      stageDir = nedGDB
+   else:
+      stageDir = os.path.splitext(nedGDB.rstrip('\\/'))[0] + '_stage'
+   if not os.path.isdir(stageDir):
+      os.makedirs(stageDir)
+   envNames = ['compression', 'tileSize', 'pyramid', 'rasterStatistics']
+   oldEnv = dict((name, getattr(arcpy.env, name)) for name in envNames)
+   tasks = list()
+   for gname in nedGRIDs:
+      tasks.append((nedDir + os.sep + gname, stageDir + os.sep + gname + '.tif', not toTiff))
+   arcpy.AddMessage('Importing %s tiles, %s at a time...' % (len(tasks), nProcs))
+   pool = ProcessPool.OpenProcessPool(max(1, min(nProcs, len(tasks))))
    try:
-      arcpy.AddMessage('Working on %s...' % gname)
-      
-      inNED = nedDir + os.sep + gname
-      outNED = nedGDB + os.sep + gname
-      nedTag = gname[3:]
-      
-      arcpy.CopyRaster_management (inNED, outNED)
-      arcpy.AddMessage('- Added %s to geodatabase' % gname)
-      myProcList.append('\nAdded %s to geodatabase' % gname)
-            
-      # Delete the source data
-      try: 
-         arcpy.AddMessage('- Deleting source NED for %s' % gname)
-         arcpy.Delete_management(inNED)
-      except:
-         arcpy.AddMessage('Unable to delete source NED for %s' % gname)
-         myProcList.append('Unable to delete source NED for %s' % gname)
-      
-      # Get the list of files remaining
-      flist = os.listdir (nedDir) # Get a list of all items in the input directory
-      dfiles = [nedDir + os.sep + f for f in flist if nedTag in f] # This limits the list to related files
-      arcpy.AddMessage('Files to delete: %s' % dfiles)
-      delfails = 0
-      for d in dfiles:
+      if not toTiff:
+         arcpy.env.compression = 'LZ77'
+         arcpy.env.tileSize = '256 256'
+         arcpy.env.pyramid = 'PYRAMIDS -1 BILINEAR'
+         arcpy.env.rasterStatistics = 'STATISTICS'
+      for inNED, error in pool.imap_unordered(ImportTile, tasks):
+         gname = os.path.basename(inNED)
+         if not error and not toTiff:
+            tif = stageDir + os.sep + gname + '.tif'
+            try:
+               arcpy.CopyRaster_management(tif, nedGDB + os.sep + gname)
+               arcpy.Delete_management(tif)
+            except:
+               error = '%s\n%s' % (str(sys.exc_info()[1]), arcpy.GetMessages(2))
+         if error:
+            arcpy.AddWarning('Failed to process %s: %s' % (gname, error))
+            myProcList.append('\nFailed to process %s: %s' % (gname, error))
+            continue
          try:
-            os.remove(d)
-         except:
-            delfails += 1
-      if delfails == 0:
-         arcpy.AddMessage('Successfully cleaned up ancillary files for %s' % gname)
-         myProcList.append('Successfully cleaned up ancillary files for %s' % gname)
-      else:
-         arcpy.AddMessage('Unable to delete all ancillary files for %s' % gname)
-         myProcList.append('Unable to delete all ancillary files for %s' % gname)
-         
-   except:
-      arcpy.AddMessage('Failed to process %s' % gname)
-      myProcList.append('\nFailed to process %s' % gname)
-      # Error handling code swiped from "A Python Primer for ArcGIS"
-      tb = sys.exc_info()[2]
-      tbinfo = traceback.format_tb(tb)[0]
-      pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
-      msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+            arcpy.AddMessage('- Added %s to %s' % (gname, nedGDB))
+            myProcList.append('\nAdded %s to %s' % (gname, nedGDB))
+
+            # Delete the source data
+            try:
+               arcpy.AddMessage('- Deleting source NED for %s' % gname)
+               arcpy.Delete_management(inNED)
+            except:
+               arcpy.AddMessage('Unable to delete source NED for %s' % gname)
+               myProcList.append('Unable to delete source NED for %s' % gname)
 
-      arcpy.AddWarning(msgs)
-      arcpy.AddWarning(pymsg)
-      arcpy.AddMessage(arcpy.GetMessages(1))
+            # Delete the related files remaining, from the index
+            dfiles = [d for d in tagFiles[tags[gname]] if os.path.exists(d)]
+            arcpy.AddMessage('Files to delete: %s' % dfiles)
+            delfails = 0
+            for d in dfiles:
+               try:
+                  os.remove(d)
+               except:
+                  delfails += 1
+            if delfails == 0:
+               arcpy.AddMessage('Successfully cleaned up ancillary files for %s' % gname)
+               myProcList.append('Successfully cleaned up ancillary files for %s' % gname)
+            else:
+               arcpy.AddMessage('Unable to delete all ancillary files for %s' % gname)
+               myProcList.append('Unable to delete all ancillary files for %s' % gname)
 
-# Write processing results to a log file.
-# If this log file already exists, it will be overwritten.  If it does not exist, it will be created.
-Log = open(myLogFile, 'w+') 
-timeStamp = datetime.strftime(datetime.now(), '%Y-%m-%d %H:%M:%S')
-Log.write('NED processing completed %s.  Results below.\n' % timeStamp)
-for item in myProcList:
-   Log.write("%s\n" % item)
-Log.close()
-arcpy.AddMessage('Processing results can be viewed in %s' % myLogFile)
+         except:
+            arcpy.AddMessage('Failed to process %s' % gname)
+            myProcList.append('\nFailed to process %s' % gname)
+            # Error handling code swiped from "A Python Primer for ArcGIS"
+            tb = sys.exc_info()[2]
+            tbinfo = traceback.format_tb(tb)[0]
+            pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
+            msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
 
+            arcpy.AddWarning(msgs)
+            arcpy.AddWarning(pymsg)
+            arcpy.AddMessage(arcpy.GetMessages(1))
+   finally:
+      for name in envNames:
+         setattr(arcpy.env, name, oldEnv[name])
+      pool.close()
+      pool.join()
+      if not toTiff and not os.listdir(stageDir):
+         os.rmdir(stageDir)
 
+   # Write processing results to a log file.
+   # If this log file already exists, it will be overwritten.  If it does not exist, it will be created.
+   Log = open(myLogFile, 'w+')
+   timeStamp = datetime.strftime(datetime.now(), '%Y-%m-%d %H:%M:%S')
+   Log.write('NED processing completed %s.  Results below.\n' % timeStamp)
+   for item in myProcList:
+      Log.write("%s\n" % item)
+   Log.close()
+   arcpy.AddMessage('Processing results can be viewed in %s' % myLogFile)
 
+   return myProcList
 
+# The script tool reads its parameters and runs the function.  The import processes import this
+# script, so processing must only happen when it is run
+if __name__ == '__main__':
+   # Script arguments to be input by user
+   nedDir = arcpy.GetParameterAsText(0) # Directory in which the original NED grids reside
+   nedGDB = arcpy.GetParameterAsText(1) # File geodatabase (or folder) to store processed NED data
+   if arcpy.GetArgumentCount() > 2 and arcpy.GetParameterAsText(2):
+      nProcs = int(arcpy.GetParameterAsText(2)) # Number of tiles to import at once
+   else:
+      nProcs = 4
 
+   ImportNED(nedDir, nedGDB, nProcs)
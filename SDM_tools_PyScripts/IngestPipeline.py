@@ -0,0 +1,159 @@
+# ----------------------------------------------------------------------------------------
+# IngestPipeline.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Runs a sequence of processing stages (e.g. download, extract) over a list of items as a
+#     pipeline.  Each stage has its own worker threads and passes its results to the next stage
+#     through a bounded queue, so item N+1 can be in an earlier stage while item N is in a later
+#     one.  Total time then approaches that of the slowest stage rather than the sum of all stages,
+#     and the bounded queues keep a fast stage from running far ahead of a slow one (and, for
+#     downloads, from filling the disk).
+#
+#     The results of the last stage are handed back to the caller as they complete, so a final
+#     stage that must run in the main thread (such as arcpy geoprocessing) can be done there,
+#     overlapping with the threaded stages before it.
+#
+# Usage Tips:
+#     A stage function takes the value produced by the previous stage and returns the value for
+#     the next.  If it raises an exception, the item is passed straight through to the caller
+#     marked as failed, and skips the remaining stages.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import threading # for the stage workers
+import time # for timing stages
+try:
+   from Queue import Queue, Empty, Full # Python 2
+except ImportError:
+   from queue import Queue, Empty, Full # Python 3
+
+# Marker that tells a worker there are no more items
+Done = object()
+
+# Define class to hold one item as it moves through the pipeline
+class Job(object):
+   def __init__(self, key, value):
+      self.key = key # The original item
+      self.value = value # The value produced by the last stage completed
+      self.error = None # Error message, if a stage failed
+      self.stage = None # Name of the stage that failed
+      self.seconds = dict() # Seconds spent in each stage
+
+   @property
+   def ok(self):
+      return self.error is None
+
+   def __repr__(self):
+      return 'Job(%r, ok=%r)' % (self.key, self.ok)
+
+# Define class to hold one stage of a pipeline
+class Stage(object):
+   def __init__(self, name, func, workers=1, queueSize=2):
+      self.name = name
+      self.func = func
+      self.workers = workers # Number of threads running this stage
+      self.queueSize = queueSize # Number of items that may wait for this stage
+      self.busy = 0.0 # Total seconds spent working, summed over workers
+      self.count = 0 # Number of items processed
+      self.lock = threading.Lock()
+
+# Define class to run items through a sequence of stages
+class Pipeline(object):
+   def __init__(self, stages):
+      self.stages = stages
+      self.stop = threading.Event()
+
+   # Define method to put an item on a queue, giving up if the pipeline is stopped while the
+   # queue is full.  Returns False if the pipeline was stopped.
+   def Put(self, queue, item):
+      while True:
+         try:
+            queue.put(item, timeout=0.1)
+            return True
+         except Full:
+            if self.stop.is_set():
+               return False
+
+   # Define method to take an item from a queue, giving up (returning Done) if the pipeline is
+   # stopped while the queue is empty
+   def Get(self, queue):
+      while True:
+         try:
+            return queue.get(timeout=0.1)
+         except Empty:
+            if self.stop.is_set():
+               return Done
+
+   # Define method to run one stage's worker: take jobs from its queue, process them, and pass
+   # them on.  The last worker of a stage to finish passes end markers on to the next stage,
+   # one for each of its workers.
+   def Work(self, stage, inQueue, outQueue, remaining, nextWorkers):
+      while True:
+         job = self.Get(inQueue)
+         if job is Done:
+            break
+         if job.ok and not self.stop.is_set():
+            start = time.time()
+            try:
+               job.value = stage.func(job.value)
+            except Exception as e:
+               job.error = str(e).strip() or e.__class__.__name__
+               job.stage = stage.name
+            elapsed = time.time() - start
+            job.seconds[stage.name] = elapsed
+            with stage.lock:
+               stage.busy += elapsed
+               stage.count += 1
+         if not self.Put(outQueue, job):
+            return
+      with stage.lock:
+         remaining[0] -= 1
+         last = remaining[0] == 0
+      if last:
+         for i in range(nextWorkers):
+            self.Put(outQueue, Done)
+
+   # Define method to feed the items into the first stage
+   def Feed(self, items, queue):
+      for item in items:
+         if self.stop.is_set():
+            break
+         if not self.Put(queue, Job(item, item)):
+            return
+      for i in range(self.stages[0].workers):
+         self.Put(queue, Done)
+
+   # Define method to run the pipeline.  Yields each Job as it leaves the last stage, in order of
+   # completion.  The caller can do further work on each job before taking the next; the stages
+   # keep working meanwhile, up to the limits of their queues.
+   def Run(self, items):
+      queues = [Queue(stage.queueSize) for stage in self.stages] + [Queue(self.stages[-1].queueSize)]
+      threads = [threading.Thread(target=self.Feed, args=(items, queues[0]))]
+      for i, stage in enumerate(self.stages):
+         remaining = [stage.workers]
+         nextWorkers = self.stages[i + 1].workers if i + 1 < len(self.stages) else 1
+         outQueue = queues[i + 1]
+         for w in range(stage.workers):
+            threads.append(threading.Thread(target=self.Work, args=(stage, queues[i], outQueue, remaining, nextWorkers)))
+      for t in threads:
+         t.daemon = True
+         t.start()
+      try:
+         while True:
+            job = queues[-1].get()
+            if job is Done:
+               break
+            yield job
+      finally:
+         # If the caller stops early, the workers finish their current items and exit
+         self.stop.set()
+         for t in threads:
+            t.join()
+
+   # Define method to summarize the time spent in each stage, as a list of
+   # (stage name, items processed, busy seconds per worker)
+   def Summary(self):
+      return [(s.name, s.count, s.busy / s.workers) for s in self.stages]
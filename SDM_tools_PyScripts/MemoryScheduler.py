@@ -0,0 +1,330 @@
+# ----------------------------------------------------------------------------------------
+# MemoryScheduler.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Runs jobs in child processes, as many at once as fit in a memory budget, rather than a fixed
+#     number at once.  The jobs of the tools vary a lot in size (buffered solar strips, roughness
+#     units with their focal buffers, whole-watershed hydro rasters), so a fixed number of processes
+#     either leaves cores idle on small jobs or runs out of memory on large ones.
+#     Each job's peak memory is estimated from the cells of its window, their data type and the
+#     operation it runs: a base for the process (Python, arcpy and Spatial Analyst) plus a number of
+#     copies of the window ("factor") for the operation.  A job is started when its estimate fits in
+#     what the running jobs leave of the budget, and the largest jobs are started first, so that no
+#     large job is left running alone at the end.  Each job's estimated and observed peak memory is
+#     written to a log, from which the factors can be calibrated.
+#
+# Usage Tips:
+#     A job is a call of a function defined at the top level of a module in the scripts folder
+#     (e.g. BatchSolarRad.BatchSolarRad with one tile's ID), as for WorkerDaemon.py:
+#        scheduler = MemoryScheduler.MemoryScheduler(budget=48 * 2**30, logPath='D:/logs/memory.jsonl')
+#        scheduler.Add('T101', 'BatchSolarRad', 'BatchSolarRad', args, {'tileIDs': 'T101'},
+#                      cells=9000000, dtype='float32', operator='AreaSolarRadiation')
+#        for key, ok, result in scheduler.Run():
+#           ...
+#     TileQueue.py workers use the scheduler when given a memory budget ("work --memory-gb").
+#     The budget defaults to 80% of the machine's physical memory.  A job estimated to need more
+#     than the whole budget is run alone.
+#     Every job runs in a new process, so the cost of starting Python and importing arcpy is paid
+#     for each job: give the scheduler jobs that take minutes, not seconds.
+#     Observed peak memory is the child process's peak working set (resident set size elsewhere);
+#     a process that dies without reporting (e.g. killed when memory ran out) is logged with none.
+#     Run "python MemoryScheduler.py <log.jsonl>" to compare the estimates with the observed peaks
+#     for each operation, and "--save factors.json" to save calibrated factors, which are used in
+#     place of the defaults when given as factorsPath (or "work --factors").  Jobs whose peak was
+#     no more than the base memory tell nothing about the factor, and are left out of the
+#     calibration; a factor is saved only if at least MinSamples jobs remain (see "--min-jobs"),
+#     and is never saved below MinFactor.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import argparse # for the command line
+import json # for the log and the factors file
+import multiprocessing # for the child processes
+import os # provides access to operating system funtionality such as file and directory paths
+import sys # provides access to Python system functions
+import threading # for guarding the log
+import time # for timing jobs
+import traceback # used for error handling
+from datetime import datetime # for time-stamping
+import ProcessPool # to run the child processes with the Python installed with ArcGIS
+import ProcTrace # for the peak memory of a process
+
+# Folder holding the tools' scripts, from which job modules are imported
+ScriptDir = os.path.dirname(os.path.abspath(__file__))
+
+# Memory of a child process before it holds any data: Python, arcpy and Spatial Analyst (bytes)
+BaseMemory = 400 * 2**20
+
+# Copies of the window held at the peak of each operation, by default
+OperatorFactors = {'ReadWindow': 1.0,             # a window read into an array
+                   'AreaSolarRadiation': 3.0,     # elevation, viewsheds and radiation of a strip
+                   'FocalStatistics': 4.0,        # elevation and the statistics of each radius (Roughness)
+                   'PolygonToRaster': 2.0,        # hydro rasters of a watershed
+                   'EucDistance': 3.0,            # distance and allocation of a watershed
+                   'Mosaic': 2.0}                 # blocks of mosaicked rasters
+
+# Copies of the window assumed for an operation not in the table
+DefaultFactor = 4.0
+
+# Least factor a calibration saves, so a log of small jobs cannot leave the window out of the estimates
+MinFactor = 0.5
+
+# Least number of jobs (peaking above the base memory) a calibration needs to save an operation's factor
+MinSamples = 5
+
+# Bytes per cell of each data type
+ItemSizes = {'uint8': 1, 'int8': 1, 'uint16': 2, 'int16': 2, 'uint32': 4, 'int32': 4,
+             'float32': 4, 'uint64': 8, 'int64': 8, 'float64': 8}
+
+# Seconds between checks on the running jobs
+PollInterval = 0.5
+
+# Define function to show a time-stamped message
+def Print(msg):
+   sys.stdout.write('%s  %s\n' % (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), msg))
+   sys.stdout.flush()
+
+# Define function to get the physical memory of the machine, in bytes, or None if unknown
+def TotalMemory():
+   if sys.platform == 'win32':
+      import ctypes
+      class MemoryStatus(ctypes.Structure):
+         _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                     ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                     ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                     ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                     ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+      status = MemoryStatus()
+      status.dwLength = ctypes.sizeof(status)
+      if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+         return int(status.ullTotalPhys)
+      return None
+   try:
+      return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+   except (AttributeError, ValueError, OSError):
+      return None
+
+# Define function to get the default budget: 80% of the physical memory (8 GB if unknown)
+def DefaultBudget():
+   total = TotalMemory()
+   return int(total * 0.8) if total else 8 * 2**30
+
+# Define function to load calibrated factors from a file, over the defaults
+def LoadFactors(path=None):
+   factors = dict(OperatorFactors)
+   if path:
+      with open(path) as f:
+         factors.update(json.load(f))
+   return factors
+
+# Define function to estimate the peak memory of a job (bytes) from the cells of its window, their
+# data type and the operation it runs
+def Estimate(cells, dtype='float32', operator=None, factors=None):
+   factor = (factors or OperatorFactors).get(operator, DefaultFactor)
+   return int(BaseMemory + cells * ItemSizes.get(str(dtype), 8) * factor)
+
+# Define function to run a job in a child process and send back (ok, result or error text, peak memory)
+def RunChild(conn, moduleName, funcName, args, kwargs):
+   try:
+      if ScriptDir not in sys.path:
+         sys.path.insert(0, ScriptDir)
+      __import__(moduleName)
+      result = (True, getattr(sys.modules[moduleName], funcName)(*args, **kwargs))
+   except:
+      result = (False, traceback.format_exc())
+   try:
+      conn.send(result + (ProcTrace.PeakMemory(),))
+   except Exception:
+      # The result could not be pickled
+      conn.send((False, traceback.format_exc(), ProcTrace.PeakMemory()))
+   conn.close()
+
+# Define class to hold a job: its call, its window and its estimated peak memory
+class MemoryJob(object):
+   def __init__(self, key, moduleName, funcName, args=(), kwargs=None, cells=0, dtype='float32', operator=None, factors=None):
+      self.key = key
+      self.moduleName = moduleName
+      self.funcName = funcName
+      self.args = tuple(args)
+      self.kwargs = dict(kwargs or dict())
+      self.cells = int(cells or 0)
+      self.dtype = dtype
+      self.operator = operator
+      self.estimate = Estimate(self.cells, dtype, operator, factors)
+      self.process = None
+      self.conn = None
+      self.start = None
+
+# Define class to run jobs in child processes within a memory budget
+class MemoryScheduler(object):
+   def __init__(self, budget=None, maxJobs=None, logPath=None, factors=None):
+      self.budget = int(budget or DefaultBudget())
+      self.maxJobs = maxJobs or multiprocessing.cpu_count()
+      self.logPath = logPath
+      self.factors = factors or OperatorFactors
+      self.pending = list()
+      self.running = list()
+      self.logLock = threading.Lock()
+
+   # Define method to make a job, with its estimate from the scheduler's factors
+   def Job(self, key, moduleName, funcName, args=(), kwargs=None, cells=0, dtype='float32', operator=None):
+      return MemoryJob(key, moduleName, funcName, args, kwargs, cells, dtype, operator, self.factors)
+
+   # Define method to add a job to be run by Run
+   def Add(self, key, moduleName, funcName, args=(), kwargs=None, cells=0, dtype='float32', operator=None):
+      job = self.Job(key, moduleName, funcName, args, kwargs, cells, dtype, operator)
+      self.pending.append(job)
+      return job
+
+   # Define method to get the memory the running jobs are estimated to need
+   def InUse(self):
+      return sum(job.estimate for job in self.running)
+
+   # Define method to check whether a job of an estimated size could be started now.  With nothing
+   # running, any job can start, so that a job larger than the budget still runs (alone).
+   def Fits(self, estimate):
+      if not self.running:
+         return True
+      return len(self.running) < self.maxJobs and self.InUse() + estimate <= self.budget
+
+   # Define method to start a job in a child process
+   def Start(self, job):
+      if job.estimate > self.budget:
+         Print('Job %s is estimated to need %.1f GB, more than the budget of %.1f GB; running it alone'
+               % (job.key, job.estimate / 2.0**30, self.budget / 2.0**30))
+      ProcessPool.UseArcGISPython()
+      parentConn, childConn = multiprocessing.Pipe(False)
+      job.conn = parentConn
+      job.process = multiprocessing.Process(target=RunChild, args=(childConn, job.moduleName, job.funcName, job.args, job.kwargs))
+      job.process.daemon = True
+      job.start = time.time()
+      job.process.start()
+      childConn.close()
+      self.running.append(job)
+
+   # Define method to write a job's estimated and observed peak memory to the log
+   def Log(self, job, ok, observed):
+      if not self.logPath:
+         return
+      record = {'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'key': str(job.key),
+                'function': '%s.%s' % (job.moduleName, job.funcName), 'operator': job.operator,
+                'dtype': str(job.dtype), 'cells': job.cells, 'base': BaseMemory, 'estimate': job.estimate, 'observed': observed,
+                'ratio': round(float(observed) / job.estimate, 3) if observed else None,
+                'seconds': round(time.time() - job.start, 1), 'ok': ok}
+      with self.logLock:
+         with open(self.logPath, 'a') as f:
+            f.write(json.dumps(record, sort_keys=True) + '\n')
+
+   # Define method to wait until at least one running job has ended, or the timeout (seconds) has
+   # passed.  Returns a list of (job, ok, result or error text) for the jobs that ended.
+   def Wait(self, timeout=None):
+      deadline = None if timeout is None else time.time() + timeout
+      while True:
+         ended = list()
+         for job in list(self.running):
+            reply = None
+            if job.conn.poll():
+               try:
+                  reply = job.conn.recv()
+               except (EOFError, IOError, OSError):
+                  pass
+            elif job.process.is_alive():
+               continue
+            job.process.join()
+            job.conn.close()
+            self.running.remove(job)
+            if reply is None:
+               reply = (False, 'The job\'s process ended with exit code %s without reporting' % job.process.exitcode, None)
+            ok, value, observed = reply
+            self.Log(job, ok, observed)
+            ended.append((job, ok, value))
+         if ended or not self.running or (deadline is not None and time.time() >= deadline):
+            return ended
+         time.sleep(PollInterval)
+
+   # Define method to run the added jobs, largest first, starting each as soon as it fits.  A smaller
+   # job is started ahead of a larger one that does not fit yet.  Yields (key, True, result) or
+   # (key, False, error text) as jobs end.
+   def Run(self):
+      self.pending.sort(key=lambda job: -job.estimate)
+      while self.pending or self.running:
+         for job in list(self.pending):
+            if self.Fits(job.estimate):
+               self.pending.remove(job)
+               self.Start(job)
+         for job, ok, value in self.Wait():
+            yield (job.key, ok, value)
+
+# Define function to read the records of a log
+def ReadLog(path):
+   records = list()
+   with open(path) as f:
+      for line in f:
+         line = line.strip()
+         if line:
+            records.append(json.loads(line))
+   return records
+
+# Define function to get a quantile of a list of numbers
+def Quantile(values, q):
+   values = sorted(values)
+   return values[min(int(q * len(values)), len(values) - 1)]
+
+# Define function to calibrate the factor of each operation from a log: the factor that would
+# have covered a quantile of the jobs that ran, from their observed peak memory above the base.
+# Jobs that peaked at or below the base memory are counted, but left out of the factor.  The
+# calibrated factor is at least MinFactor, or None if no job peaked above the base.
+# Returns {operator: (jobs, jobs at or below the base, factor, calibrated factor, median observed / estimated)}.
+def Calibrate(path, quantile=0.9, factors=None):
+   factors = factors or OperatorFactors
+   samples = dict()
+   for r in ReadLog(path):
+      if r.get('observed') and r.get('cells'):
+         windowBytes = r['cells'] * ItemSizes.get(r.get('dtype'), 8)
+         base = r.get('base', BaseMemory)
+         above = r['observed'] - base
+         samples.setdefault(r.get('operator'), list()).append((above / float(windowBytes) if above > 0 else None, r['ratio']))
+   table = dict()
+   for operator, pairs in samples.items():
+      fits = [p[0] for p in pairs if p[0] is not None]
+      calibrated = round(max(Quantile(fits, quantile), MinFactor), 2) if fits else None
+      table[operator] = (len(pairs), len(pairs) - len(fits), factors.get(operator, DefaultFactor),
+                         calibrated, Quantile([p[1] for p in pairs], 0.5))
+   return table
+
+# Define function to show the calibration of a log from the command line.  Returns the exit code.
+def Main(argv=None):
+   parser = argparse.ArgumentParser(description='Compare estimated and observed peak memory of scheduled jobs.')
+   parser.add_argument('log', help='log written by the scheduler (JSON lines)')
+   parser.add_argument('--quantile', type=float, default=0.9, help='share of jobs the calibrated factors should cover')
+   parser.add_argument('--factors', help='factors file used for the estimates (default: the built-in factors)')
+   parser.add_argument('--save', help='file to save the calibrated factors to (JSON)')
+   parser.add_argument('--min-jobs', type=int, default=MinSamples,
+                       help='jobs peaking above the base memory needed to save an operation\'s factor (default %d)' % MinSamples)
+   args = parser.parse_args(argv)
+
+   table = Calibrate(args.log, args.quantile, LoadFactors(args.factors))
+   print('%-20s %6s %11s %8s %11s %16s' % ('operator', 'jobs', 'below base', 'factor', 'calibrated', 'observed/est.'))
+   for operator in sorted(table, key=str):
+      jobs, below, factor, calibrated, ratio = table[operator]
+      print('%-20s %6d %11d %8.2f %11s %16.2f' % (operator, jobs, below, factor,
+                                                   '%.2f' % calibrated if calibrated is not None else '-', ratio))
+   if args.save:
+      saved = LoadFactors(args.factors)
+      for operator, (jobs, below, factor, calibrated, ratio) in table.items():
+         if operator is None:
+            continue
+         if calibrated is None or jobs - below < args.min_jobs:
+            Print('Kept the factor of %s: only %d jobs peaked above the base memory' % (operator, jobs - below))
+            continue
+         saved[operator] = calibrated
+      with open(args.save, 'w') as f:
+         json.dump(saved, f, indent=1, sort_keys=True)
+      Print('Saved the factors to %s' % args.save)
+   return 0
+
+if __name__ == '__main__':
+   sys.exit(Main())
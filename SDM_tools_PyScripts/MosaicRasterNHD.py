@@ -2,14 +2,17 @@
 # MosaicRasterNHD.py
 # Version:  Python 2.7.5
 # Creation Date: 2016-06-15
-# Last Edit: 2016-07-15
+# Last Edit: 2026-10-18
 # Creator:  Roy Gilb/Kirsten Hazler
 #
 # Summary: 
 # Mosaics rasters derived from NHD features, in multiple watersheds, into a single raster.  
+# Overlapping cells take the maximum value.  The rasters are written block by block into a tiled GeoTIFF snapped to the snap raster, with the raster attribute table, overviews (pyramids) and statistics built in the same pass; no intermediate mosaic dataset is built.
+# The GeoTIFF (<output folder>\<mosaicName>.tif, with its .vat.dbf and .aux.xml sidecars) is the final output, ready to display and use with no further pass over it.  Give a folder as the output workspace.  If a file geodatabase is given, which cannot be written directly, the GeoTIFF is written to the folder containing it, with a warning; copying it into a geodatabase (e.g. with Copy Raster) would take a full extra pass and lose the attribute table, overviews and statistics, which ArcGIS would then have to build again.
+# The work is done by the MosaicRasterNHD function, which can also be imported and called from Python.
 
 # Syntax: 
-# MosaicRasterNHD (inGDB, inSnap, mosaicName, scratchGDB, outGDB, ProcLog)
+# MosaicRasterNHD (inGDB, inSnap, mosaicName, scratchGDB, outGDB, ProcLog, {nThreads})
 # ----------------------------------------------------------------------------------------
 
 # Import arcpy and other modules
@@ -21,65 +24,104 @@ import sys # provides access to Python system functions
 import traceback # used for error handling
 import gc # garbage collection 
 from datetime import datetime # for time-stamping
-
-# Script arguments to be input by user
-inGDB = arcpy.GetParameterAsText(0) # Input GDBs containing the rasters to mosaic
-inSnap = arcpy.GetParameterAsText(1) # Snap raster to set cell size and alignment
-mosaicName = arcpy.GetParameterAsText(2) # Name for output mosaic
-scratchGDB = arcpy.GetParameterAsText(3) # Scratch GDB to store the mosaic dataset
-outGDB = arcpy.GetParameterAsText(4) # Output GDB to store the final raster dataset
-procLog = arcpy.GetParameterAsText(5) #Log to store information on the mosaicking progress
-
-# Open processing log.
-Log = open(procLog, 'w+') 
-timeStamp = datetime.strftime(datetime.now(), '%Y-%m-%d %H:%M:%S')
-Log.write('Hydro mosaic creation started %s.\n' % timeStamp)
-
-# Local variables:
-coordSys = arcpy.Describe(inSnap).spatialReference
-
-# Process: Create Mosaic Dataset
-# This creates the blank (empty) mosaic dataset
-arcpy.AddMessage('Creating empty mosaic dataset...')
-md = 'md_' + mosaicName
-hydroMosaic = arcpy.CreateMosaicDataset_management(scratchGDB, md, coordSys)  
-md = scratchGDB + os.sep + md
-
-# Loop through the geodatabases and add rasters to the mosaic dataset
-for gdb in inGDB.split(';'):
+import RasterWindow # for reading raster grids
+import BlockMosaic # for mosaicking the rasters block by block
+import TiledTiff # for writing the tiled output
+
+# Define function to mosaic the NHD-derived rasters.  Returns the output raster.
+def MosaicRasterNHD(inGDB, inSnap, mosaicName, scratchGDB, outGDB, procLog, nThreads=4):
+   # Additional script parameters
+   blockSize = 1024 # Side length, in cells, of the blocks processed by each thread
+
+   # Open processing log.
+   Log = open(procLog, 'w+') 
+   timeStamp = datetime.strftime(datetime.now(), '%Y-%m-%d %H:%M:%S')
+   Log.write('Hydro mosaic creation started %s.\n' % timeStamp)
+
+   # Local variables:
+   coordSys = arcpy.Describe(inSnap).spatialReference
+   snapGrid = RasterWindow.GetRasterGrid(inSnap)
+
+   # Loop through the geodatabases and collect the rasters to mosaic
+   sources = list()
+   for gdb in inGDB.split(';'):
+      try:
+         arcpy.AddMessage('Adding rasters from %s to mosaic...' %gdb)
+         arcpy.env.workspace = gdb
+         for rName in arcpy.ListRasters():
+            grid = RasterWindow.GetRasterGrid(gdb + os.sep + rName)
+            sources.append(BlockMosaic.MosaicSource(gdb + os.sep + rName, grid, None, rName))
+         Log.write('Successfully added rasters from %s to mosaic. \n' %gdb)
+      except:
+         arcpy.AddWarning('Failed to add rasters from %s.' %gdb)
+         Log.write('Failed to add rasters from %s to mosaic. \n' %gdb)
+
+   # Process: Mosaic the rasters, block by block, straight into a tiled GeoTIFF.
+   # The output grid is snapped to the snap raster; overlapping cells take the MAXIMUM value, and
+   # inputs that are not aligned with the snap raster are resampled by nearest neighbor.  Cell counts
+   # per value are gathered as blocks are written and saved as the raster attribute table, and
+   # overviews (nearest neighbor, since the values are classes) and statistics are built in the
+   # same pass.
+   # The GeoTIFF is the final output.  A file geodatabase cannot be written directly, so if one is
+   # given the GeoTIFF is written to the folder containing it.
+   outDir = outGDB
+   if outGDB.lower().endswith('.gdb'):
+      outDir = os.path.dirname(outGDB)
+      arcpy.AddWarning('The mosaic is written as a GeoTIFF to %s, not into %s; a geodatabase copy would take a full extra pass.' % (outDir, outGDB))
+   if not os.path.isdir(outDir):
+      os.makedirs(outDir)
+   rd = outDir + os.sep + mosaicName + '.tif'
+   tif = rd
    try:
-      # Process: Add Rasters To Mosaic Dataset
-      arcpy.AddMessage('Adding rasters from %s to mosaic dataset...' %gdb)
-      arcpy.AddRastersToMosaicDataset_management(hydroMosaic, "Raster Dataset", gdb, "UPDATE_CELL_SIZES", "UPDATE_BOUNDARY", "NO_OVERVIEWS", "", "0", "1500", "", "", "SUBFOLDERS", "OVERWRITE_DUPLICATES", "NO_PYRAMIDS", "NO_STATISTICS", "NO_THUMBNAILS", "", "NO_FORCE_SPATIAL_REFERENCE") 
-      Log.write('Successfully added rasters from %s to mosaic dataset. \n' %gdb)
+      arcpy.AddMessage('Mosaicking %s rasters...' % len(sources))
+      nodata = sources[0].grid.nodata
+      if nodata is None:
+         nodata = 0 # Hydro classes start at 1
+      outGrid = BlockMosaic.UnionGrid(sources, snapGrid, nodata)
+      writer = TiledTiff.TiledTiffWriter(tif, outGrid, RasterWindow.GridDtype(sources[0].grid), nodata=nodata, valueCounts=True,
+                                         overviews=True, resampling='NEAREST', blockSize=blockSize, stats=True)
+      mosaic = BlockMosaic.BlockMosaic(sources, outGrid, writer, 'MAX')
+
+      # Report progress about every 5 percent
+      def Progress(done, total):
+         if done == total or done % max(total // 20, 1) == 0:
+            arcpy.AddMessage('Mosaicked %s of %s blocks' % (done, total))
+      mosaic.Run(blockSize, nThreads, Progress)
+      writer.Close()
+      arcpy.DefineProjection_management(tif, coordSys)
+      Log.write('Mosaicked %s rasters into %s. \n' % (len(sources), rd))
    except:
-      arcpy.AddWarning('Failed to add rasters from %s.' %gdb)
-      Log.write('Failed to add rasters from %s to mosaic dataset. \n' %gdb)
-
-# Process: Set mosaic properties
-arcpy.SetMosaicDatasetProperties_management (md, '', '', '', '', '', '', 'NEAREST', 'NOT_CLIP', 'FOOTPRINTS_DO_NOT_CONTAIN_NODATA', '', '', '', '', '', '', '', '', '', 'MAX') 
-
-# Process: Copy final output raster dataset and build raster attribute table
-try:
-   arcpy.AddMessage('Exporting final raster dataset.  This may take awhile...')
-   rd = outGDB + os.sep + mosaicName
-   arcpy.CopyRaster_management(hydroMosaic, rd)
-   arcpy.BuildRasterAttributeTable_management (rd, 'OVERWRITE')
-except:
-   arcpy.AddWarning('Unable to export raster dataset.')
-   Log.write('Unable to export to %s' %rd)
-
-# Close processing log.
-timeStamp = datetime.strftime(datetime.now(), '%Y-%m-%d %H:%M:%S')
-Log.write('Processing finished %s.\n' % timeStamp)
-Log.write('Mosaic dataset stored here: %s.\n' % scratchGDB)
-Log.write('Final raster output is %s.\n' % rd )
-Log.close()
-
-
-
-
-
-
-
-
+      arcpy.AddWarning('Unable to export raster dataset.')
+      Log.write('Unable to export to %s' %rd)
+      # Error handling code swiped from "A Python Primer for ArcGIS"
+      tb = sys.exc_info()[2]
+      tbinfo = traceback.format_tb(tb)[0]
+      pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
+      msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+      arcpy.AddWarning(msgs)
+      arcpy.AddWarning(pymsg)
+
+   # Close processing log.
+   timeStamp = datetime.strftime(datetime.now(), '%Y-%m-%d %H:%M:%S')
+   Log.write('Processing finished %s.\n' % timeStamp)
+   Log.write('Final raster output is %s.\n' % rd )
+   Log.close()
+
+   return rd
+
+# The script tool reads its parameters and runs the function
+if __name__ == '__main__':
+   # Script arguments to be input by user
+   inGDB = arcpy.GetParameterAsText(0) # Input GDBs containing the rasters to mosaic
+   inSnap = arcpy.GetParameterAsText(1) # Snap raster to set cell size and alignment
+   mosaicName = arcpy.GetParameterAsText(2) # Name for output mosaic
+   scratchGDB = arcpy.GetParameterAsText(3) # Scratch GDB; no longer used, kept so existing tool settings still work
+   outGDB = arcpy.GetParameterAsText(4) # Output folder to store the final GeoTIFF (a GDB is replaced by the folder containing it)
+   procLog = arcpy.GetParameterAsText(5) #Log to store information on the mosaicking progress
+   if arcpy.GetArgumentCount() > 6 and arcpy.GetParameterAsText(6):
+      nThreads = int(arcpy.GetParameterAsText(6)) # Number of threads compositing and writing blocks
+   else:
+      nThreads = 4
+
+   MosaicRasterNHD(inGDB, inSnap, mosaicName, scratchGDB, outGDB, procLog, nThreads)
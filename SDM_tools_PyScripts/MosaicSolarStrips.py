@@ -2,14 +2,23 @@
 # MosaicSolarStrips.py
 # Version:  Python 2.7.5
 # Creation Date: 2016-06-15
-# Last Edit: 2016-07-12
+# Last Edit: 2026-10-18
 # Creator:  Roy Gilb/Kirsten Hazler
 #
 # Summary: 
 # Mosaics the SDM Solar Radiation strips into a single raster dataset. Must be run three times, once for equinox, once for summer, and once for winter.  
+# Each strip is trimmed to its footprint and written block by block into a tiled GeoTIFF; no intermediate mosaic dataset is built.
+# Overviews (pyramids) and statistics are built as the blocks are written, so the output needs no post-processing before display.
+# Where strips overlap (their buffered margins beyond the footprints), the differences between them are summarized per pair of strips and written
+# to a seam report (<ProcLog name>_seams.csv) beside the processing log, so that disagreements along the strip seams can be checked without inspecting the mosaic.
+# Optionally, the strips can be feather-blended across the seams over a band blendWidth cells wide, instead of being cut hard at the footprint edges.
+# blendWidth/2 should not exceed the buffer (sky size) used when the strips were computed.
+# Progress, throughput and the estimated time remaining are reported as blocks are written, and written every minute to <ProcLog name>_status.json, which can be watched from another shell with "python ProgressReport.py <status file>".
+# The GeoTIFF (<output folder>\<mosaicName>.tif, with its .aux.xml sidecar) is the final output, ready to display and use with no further pass over it.  Give a folder as the output workspace.  If a file geodatabase is given, which cannot be written directly, the GeoTIFF is written to the folder containing it, with a warning; copying it into a geodatabase (e.g. with Copy Raster) would take a full extra pass and lose the overviews and statistics, which ArcGIS would then have to build again.
+# The work is done by the MosaicSolarStrips function, which can also be imported and called from Python.
 
 # Syntax: 
-# MosaicSolarStrips (inGDB, inFprints, joinFld, mosaicName, scratchGDB, outGDB, ProcLog)
+# MosaicSolarStrips (inGDB, inFprints, joinFld, mosaicName, scratchGDB, outGDB, ProcLog, {nThreads}, {blendWidth})
 # ----------------------------------------------------------------------------------------
 
 # Import arcpy and other modules
@@ -21,76 +30,135 @@ import sys # provides access to Python system functions
 import traceback # used for error handling
 import gc # garbage collection 
 from datetime import datetime # for time-stamping
-
-# Script arguments to be input by user
-inGDB = arcpy.GetParameterAsText(0) # Input GDBs containing the raster strips to mosaic
-inFprints = arcpy.GetParameterAsText(1) # Input footprint polygons
-   # example: fc_LatStrips100
-joinFld= arcpy.GetParameterAsText(2) # Join field relating raster names to footprints
-   # example:  rName_equ
-mosaicName = arcpy.GetParameterAsText(3) # Name for output mosaic
-scratchGDB = arcpy.GetParameterAsText(4) # Scratch GDB to store the mosaic dataset
-outGDB = arcpy.GetParameterAsText(5) # Output GDB to store the final raster dataset
-procLog = arcpy.GetParameterAsText(6) #Log to store data on the mosaicking progress
-
-# Open processing log.
-Log = open(procLog, 'w+') 
-timeStamp = datetime.strftime(datetime.now(), '%Y-%m-%d %H:%M:%S')
-Log.write('Solar radiation mosaic creation started %s.\n' % timeStamp)
-
-# Local variables:
-coordSys = arcpy.Describe(inFprints).spatialReference
-
-# Process: Create Mosaic Dataset
-# This creates the blank (empty) mosaic dataset
-arcpy.AddMessage('Creating empty mosaic dataset...')
-md = 'md_' + mosaicName
-solarMosaic = arcpy.CreateMosaicDataset_management(scratchGDB, md, coordSys)  
-
-# Loop through the geodatabases and add rasters to the mosaic dataset
-for gdb in inGDB.split(';'):
+import RasterWindow # for reading raster grids and footprint geometry
+import BlockMosaic # for mosaicking the strips block by block
+import TiledTiff # for writing the tiled output
+import ProgressReport # for reporting progress and the estimated time remaining
+
+# Define function to mosaic the solar radiation strips.  Returns the output raster.
+def MosaicSolarStrips(inGDB, inFprints, joinFld, mosaicName, scratchGDB, outGDB, procLog, nThreads=4, blendWidth=0):
+   # Additional script parameters
+   seamReport = os.path.splitext(procLog)[0] + '_seams.csv' # Seam statistics report
+   statusFile = os.path.splitext(procLog)[0] + '_status.json' # Progress status file
+   blockSize = 1024 # Side length, in cells, of the blocks processed by each thread
+
+   # Open processing log.
+   Log = open(procLog, 'w+') 
+   timeStamp = datetime.strftime(datetime.now(), '%Y-%m-%d %H:%M:%S')
+   Log.write('Solar radiation mosaic creation started %s.\n' % timeStamp)
+
+   # Local variables:
+   coordSys = arcpy.Describe(inFprints).spatialReference
+
+   # Read the footprint polygons, keyed by the raster names in the join field
+   arcpy.AddMessage('Reading footprint geometry...')
+   fprints = dict()
+   with arcpy.da.SearchCursor(inFprints, [joinFld, 'SHAPE@']) as cursor:
+      for row in cursor:
+         fprints[str(row[0])] = RasterWindow.GeometryRings(row[1])
+
+   # Loop through the geodatabases and collect the raster strips to mosaic
+   sources = list()
+   for gdb in inGDB.split(';'):
+      try:
+         arcpy.AddMessage('Adding rasters from %s to mosaic...' %gdb)
+         arcpy.env.workspace = gdb
+         for rName in arcpy.ListRasters():
+            grid = RasterWindow.GetRasterGrid(gdb + os.sep + rName)
+            footprint = fprints.get(rName)
+            if footprint is None:
+               arcpy.AddWarning('No footprint found for %s; using its full extent.' %rName)
+               Log.write('No footprint found for %s; using its full extent. \n' %rName)
+            sources.append(BlockMosaic.MosaicSource(gdb + os.sep + rName, grid, footprint, rName))
+         Log.write('Successfully added rasters from %s to mosaic. \n' %gdb)
+      except:
+         arcpy.AddWarning('Failed to add rasters from %s.' %gdb)
+         Log.write('Failed to add rasters from %s to mosaic. \n' %gdb)
+
+   # Process: Mosaic the strips, block by block, straight into a tiled GeoTIFF.
+   # Each strip contributes only the cells inside its footprint.  Overviews (averaged) and
+   # statistics are built from each block as it is written.
+   # The GeoTIFF is the final output.  A file geodatabase cannot be written directly, so if one is
+   # given the GeoTIFF is written to the folder containing it.
+   outDir = outGDB
+   if outGDB.lower().endswith('.gdb'):
+      outDir = os.path.dirname(outGDB)
+      arcpy.AddWarning('The mosaic is written as a GeoTIFF to %s, not into %s; a geodatabase copy would take a full extra pass.' % (outDir, outGDB))
+   if not os.path.isdir(outDir):
+      os.makedirs(outDir)
+   rd = outDir + os.sep + mosaicName + '.tif'
+   tif = rd
    try:
-      # Process: Add Rasters To Mosaic Dataset
-      arcpy.AddMessage('Adding rasters from %s to mosaic dataset...' %gdb)
-      arcpy.AddRastersToMosaicDataset_management(solarMosaic, "Raster Dataset", gdb, "UPDATE_CELL_SIZES", "UPDATE_BOUNDARY", "NO_OVERVIEWS", "", "0", "1500", "", "", "SUBFOLDERS", "OVERWRITE_DUPLICATES", "NO_PYRAMIDS", "NO_STATISTICS", "NO_THUMBNAILS", "", "NO_FORCE_SPATIAL_REFERENCE") 
-      Log.write('Successfully added rasters from %s to mosaic dataset. \n' %gdb)
+      arcpy.AddMessage('Mosaicking %s strips...' % len(sources))
+      template = sources[0].grid
+      nodata = template.nodata
+      if nodata is None:
+         nodata = -3.4028234663852886e+38 # ArcGIS default NoData for 32-bit float rasters
+      outGrid = BlockMosaic.UnionGrid(sources, template, nodata)
+      writer = TiledTiff.TiledTiffWriter(tif, outGrid, RasterWindow.GridDtype(template), nodata=nodata,
+                                         overviews=True, resampling='AVERAGE', blockSize=blockSize, stats=True)
+      rule = 'BLEND' if blendWidth > 0 else 'FIRST'
+      mosaic = BlockMosaic.BlockMosaic(sources, outGrid, writer, rule, blendWidth=blendWidth, seams=True)
+
+      # Report progress about every 5 percent
+      nBlocks = len(BlockMosaic.PlanBlocks(outGrid, blockSize))
+      nCells = outGrid.nrows * outGrid.ncols
+      reporter = ProgressReport.ProgressReporter(nBlocks, nCells, 'block', statusFile, arcpy.AddMessage, every=max(nBlocks // 20, 1))
+      def Progress(done, total):
+         reporter.Done(done, nCells * 1.0 / total)
+      mosaic.Run(blockSize, nThreads, Progress)
+      reporter.Finish()
+      writer.Close()
+
+      # Report the seam statistics, worst seams first
+      mosaic.WriteSeamReport(seamReport)
+      seams = mosaic.SeamSummary()
+      Log.write('Seam statistics for %s pairs of overlapping strips written to %s. \n' % (len(seams), seamReport))
+      for seam in seams[:5]:
+         msg = 'Seam %s / %s: %s cells, mean difference %.4g, RMS difference %.4g, max absolute difference %.4g' % (seam[0], seam[1], seam[2], seam[3], seam[5], seam[6])
+         arcpy.AddMessage(msg)
+         Log.write(msg + ' \n')
+      arcpy.DefineProjection_management(tif, coordSys)
+      Log.write('Mosaicked %s strips into %s. \n' % (len(sources), rd))
    except:
-      arcpy.AddWarning('Failed to add rasters from %s.' %gdb)
-      Log.write('Failed to add rasters from %s to mosaic dataset. \n' %gdb)
-
-# Process: Import Mosaic Dataset Geometry
-arcpy.AddMessage('Importing footprint geometry...')
-arcpy.ImportMosaicDatasetGeometry_management(solarMosaic, "FOOTPRINT", "Name", inFprints, joinFld)
-
-# Process: Copy final output raster dataset
-try:
-   arcpy.AddMessage('Exporting final raster dataset.  This may take awhile...')
-   rd = outGDB + os.sep + mosaicName
-   arcpy.CopyRaster_management(solarMosaic, rd)
-except:
-   arcpy.AddWarning('Unable to export raster dataset.')
-   Log.write('Unable to export to %s' %rd)
-
-# Close processing log.
-timeStamp = datetime.strftime(datetime.now(), '%Y-%m-%d %H:%M:%S')
-Log.write('Processing finished %s.\n' % timeStamp)
-Log.write('Mosaic dataset stored here: %s.\n' % scratchGDB)
-Log.write('Final raster output is %s.\n' % rd )
-Log.close()
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+      arcpy.AddWarning('Unable to export raster dataset.')
+      Log.write('Unable to export to %s' %rd)
+      # Error handling code swiped from "A Python Primer for ArcGIS"
+      tb = sys.exc_info()[2]
+      tbinfo = traceback.format_tb(tb)[0]
+      pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
+      msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+      arcpy.AddWarning(msgs)
+      arcpy.AddWarning(pymsg)
+
+   # Close processing log.
+   timeStamp = datetime.strftime(datetime.now(), '%Y-%m-%d %H:%M:%S')
+   Log.write('Processing finished %s.\n' % timeStamp)
+   Log.write('Final raster output is %s.\n' % rd )
+   Log.close()
+
+   return rd
+
+# The script tool reads its parameters and runs the function
+if __name__ == '__main__':
+   # Script arguments to be input by user
+   inGDB = arcpy.GetParameterAsText(0) # Input GDBs containing the raster strips to mosaic
+   inFprints = arcpy.GetParameterAsText(1) # Input footprint polygons
+      # example: fc_LatStrips100
+   joinFld= arcpy.GetParameterAsText(2) # Join field relating raster names to footprints
+      # example:  rName_equ
+   mosaicName = arcpy.GetParameterAsText(3) # Name for output mosaic
+   scratchGDB = arcpy.GetParameterAsText(4) # Scratch GDB; no longer used, kept so existing tool settings still work
+   outGDB = arcpy.GetParameterAsText(5) # Output folder to store the final GeoTIFF (a GDB is replaced by the folder containing it)
+   procLog = arcpy.GetParameterAsText(6) #Log to store data on the mosaicking progress
+   if arcpy.GetArgumentCount() > 7 and arcpy.GetParameterAsText(7):
+      nThreads = int(arcpy.GetParameterAsText(7)) # Number of threads compositing and writing blocks
+   else:
+      nThreads = 4
+   if arcpy.GetArgumentCount() > 8 and arcpy.GetParameterAsText(8):
+      blendWidth = int(arcpy.GetParameterAsText(8)) # Width, in cells, of the blend zone across seams; 0 = no blending
+   else:
+      blendWidth = 0
+
+   MosaicSolarStrips(inGDB, inFprints, joinFld, mosaicName, scratchGDB, outGDB, procLog, nThreads, blendWidth)
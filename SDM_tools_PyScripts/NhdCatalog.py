@@ -0,0 +1,354 @@
+# ----------------------------------------------------------------------------------------
+# NhdCatalog.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     A persistent catalogue of the National Hydrography Dataset (NHD) geodatabases in a
+#     workspace, mapping each 4-digit HUC (subregion) to its geodatabase.  The catalogue is
+#     saved as a JSON file (nhd_catalog.json) in the workspace.  It is built once, by a single
+#     walk of the workspace and its subfolders, and is rebuilt only when one of the folders
+#     it was built from has been modified (i.e. geodatabases have been added, removed or renamed).
+#     Tools can then go straight to the geodatabases of the HUCs they need, rather than listing
+#     every geodatabase and comparing it against every requested HUC.
+#     The catalogue also records statistics of each geodatabase's NHDArea, NHDWaterbody and
+#     NHDFlowline feature classes: the extent of the geodatabase and of each layer, and the number
+#     and extent of the features of each FCode.  Tools can use these to skip watersheds or layers
+#     with nothing they need (e.g. no marine polygons) without selecting from them.
+#
+# Usage Tips:
+#     NHD geodatabases are recognized by name: the 4-digit HUC follows a 4-character prefix
+#     (e.g. NHDH0208.gdb).  If the same HUC is found in more than one folder, the most recently
+#     modified geodatabase is used.
+#     Paths are stored relative to the workspace, so the workspace can be moved with its catalogue.
+#     Geodatabases are not searched for other geodatabases.
+#     Statistics of a layer are gathered (with arcpy, reading only its FCode field) the first time
+#     they are asked for, and gathered again only when a file in the geodatabase (other than a lock
+#     file) has been modified.  Only the layers asked for are gathered.  The extent of the features
+#     of an FCode is found (reading only the geometries of that FCode) the first time it is asked
+#     for, and kept with the statistics of its layer.  Extents are in the coordinate system of the
+#     NHD data, as [xMin, yMin, xMax, yMax].
+#     Statistics of a geodatabase are kept in the catalogue of the nearest folder above it that
+#     has one, or else of the folder holding it.  Only one process should write the catalogue
+#     file: worker processes of a pool gather statistics with GetStats(..., save=False) and return
+#     them, and the main process saves them with SaveStats.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import json # for the catalogue file
+import os # provides access to operating system funtionality such as file and directory paths
+import re # for recognizing NHD geodatabase names
+import threading # for guarding the cache of loaded catalogues
+import SdmPipeline # for the stamps of geodatabases
+
+# Name of the catalogue file in the workspace
+CatalogName = 'nhd_catalog.json'
+
+# Version of the catalogue file format; catalogues of other versions are rebuilt
+CatalogVersion = 4
+
+# Feature dataset and feature classes of an NHD geodatabase for which statistics are kept
+Dataset = 'Hydrography'
+Layers = ['NHDArea', 'NHDWaterbody', 'NHDFlowline']
+
+# Pattern of NHD geodatabase names, capturing the 4-digit HUC
+GdbPattern = re.compile(r'^\w{4}(\d{4})\w*\.gdb$', re.IGNORECASE)
+
+# Define function to get the 4-digit HUC of an NHD geodatabase from its path, or None
+def GdbHuc(gdb):
+   m = GdbPattern.match(os.path.basename(gdb.rstrip('\\/')))
+   if m:
+      return m.group(1)
+   return None
+
+# Define function to get the path of a workspace's catalogue file
+def CatalogPath(workspace):
+   return os.path.join(workspace, CatalogName)
+
+# Define function to build a catalogue by walking a workspace and its subfolders.
+# Statistics in an old catalogue are kept; they are checked when they are used.
+# Returns the catalogue as a dictionary.
+def BuildCatalog(workspace, old=None):
+   workspace = os.path.abspath(workspace)
+   folders = dict()
+   hucs = dict()
+   for root, dirs, files in os.walk(workspace):
+      rel = os.path.relpath(root, workspace)
+      folders[rel] = os.path.getmtime(root)
+      gdbs = [d for d in dirs if d.lower().endswith('.gdb')]
+      for d in gdbs:
+         dirs.remove(d) # do not walk into geodatabases
+         huc4 = GdbHuc(d)
+         if huc4 is None:
+            continue
+         path = os.path.join(root, d)
+         mtime = os.path.getmtime(path)
+         if huc4 in hucs and hucs[huc4]['mtime'] >= mtime:
+            continue
+         hucs[huc4] = {'path': os.path.relpath(path, workspace), 'mtime': mtime}
+   stats = dict()
+   if old and old.get('version') == CatalogVersion:
+      stats = old.get('stats', stats)
+   return {'version': CatalogVersion, 'folders': folders, 'hucs': hucs, 'stats': stats}
+
+# Define function to check whether a catalogue is current, i.e. none of the folders it was
+# built from has been modified or removed since
+def IsCurrent(catalog, workspace):
+   if catalog.get('version') != CatalogVersion:
+      return False
+   for rel, mtime in catalog['folders'].items():
+      try:
+         if os.path.getmtime(os.path.join(workspace, rel)) != mtime:
+            return False
+      except OSError:
+         return False
+   return True
+
+# Define function to save a catalogue to its workspace.
+# The file is written in place: creating it modifies the workspace folder, but rewriting it does not.
+def SaveCatalog(catalog, workspace):
+   with open(CatalogPath(workspace), 'w') as f:
+      json.dump(catalog, f, indent=1, sort_keys=True)
+
+# Define function to load a workspace's catalogue file, or None if there is none (or it cannot be read)
+def LoadCatalog(workspace):
+   try:
+      with open(CatalogPath(workspace)) as f:
+         return json.load(f)
+   except (IOError, OSError, ValueError):
+      return None # missing, or being written by another run
+
+# Cache of loaded catalogues, keyed by workspace
+Cache = dict()
+CacheLock = threading.Lock()
+
+# Define function to get the catalogue of a workspace, loading it from its file, and building
+# and saving it if there is none or it is out of date.  The workspace folder is itself one of
+# the folders checked, so its time is taken again once the catalogue file exists.
+def GetCatalog(workspace):
+   workspace = os.path.abspath(workspace)
+   with CacheLock:
+      catalog = Cache.get(workspace)
+      if catalog is None or not IsCurrent(catalog, workspace):
+         old = LoadCatalog(workspace)
+         catalog = old
+         if catalog is None or not IsCurrent(catalog, workspace):
+            catalog = BuildCatalog(workspace, old)
+            try:
+               SaveCatalog(catalog, workspace)
+               catalog['folders']['.'] = os.path.getmtime(workspace)
+               SaveCatalog(catalog, workspace)
+            except (IOError, OSError):
+               pass # a read-only workspace can still be used; the catalogue is just rebuilt next time
+         Cache[workspace] = catalog
+   return catalog
+
+# Define function to get the geodatabase of each of a list of HUCs.
+# Returns a dictionary of HUC to geodatabase path, and a list of the HUCs not found.
+def FindGdbs(workspace, hucList):
+   workspace = os.path.abspath(workspace)
+   hucs = GetCatalog(workspace)['hucs']
+   found = dict()
+   missing = list()
+   for huc4 in hucList:
+      entry = hucs.get(huc4)
+      if entry is None:
+         missing.append(huc4)
+      else:
+         found[huc4] = os.path.join(workspace, entry['path'])
+   return found, missing
+
+# Define function to get the geodatabases of all the HUCs in a workspace, as a dictionary of HUC to path
+def AllGdbs(workspace):
+   workspace = os.path.abspath(workspace)
+   hucs = GetCatalog(workspace)['hucs']
+   return dict((huc4, os.path.join(workspace, entry['path'])) for huc4, entry in hucs.items())
+
+# Define function to get the stamp of a geodatabase: the number, size and latest modification time
+# of its files.  The lock files that readers create and remove (and with them the modification
+# time of the geodatabase folder) are ignored, so reading a geodatabase does not change its stamp.
+def GdbStamp(gdb):
+   return SdmPipeline.Stamp(gdb)
+
+# Define function to widen an extent to take in another; either may be None
+def UnionExtent(a, b):
+   if a is None:
+      return b
+   if b is None:
+      return a
+   return [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+
+# Define function to get the extent of a feature class from its description, or None if it has no features
+def LayerExtent(fc):
+   import arcpy
+   e = arcpy.Describe(fc).extent
+   if e is None or e.XMin != e.XMin: # an empty feature class has no extent (NaN)
+      return None
+   return [e.XMin, e.YMin, e.XMax, e.YMax]
+
+# Define function to gather the statistics of a feature class: its feature count and extent, and the
+# count of the features of each FCode.  Only the FCode field is read, and the extent is taken from the
+# feature class's description, so no geometries are read; the extents of the FCodes (fcodeExtents) are
+# found later, when they are asked for (see FCodeExtent).  FCodes are dictionary keys, so they are
+# stored as text.
+def LayerStats(fc):
+   import arcpy
+   fcodes = dict()
+   with arcpy.da.SearchCursor(fc, ['FCode']) as cursor:
+      for (fcode,) in cursor:
+         fcodes[str(fcode)] = fcodes.get(str(fcode), 0) + 1
+   count = sum(fcodes.values())
+   return {'count': count, 'extent': LayerExtent(fc) if count else None, 'fcodes': fcodes, 'fcodeExtents': dict()}
+
+# Define function to find the extent of the features of each of a list of FCodes (as text) in a feature
+# class, reading the geometries of those features only.  Returns {FCode: extent}.
+def ReadFCodeExtents(fc, fcodes):
+   import arcpy
+   extents = dict((fcode, None) for fcode in fcodes)
+   where = '%s IN (%s)' % (arcpy.AddFieldDelimiters(fc, 'FCode'), ', '.join(str(int(fcode)) for fcode in fcodes))
+   with arcpy.da.SearchCursor(fc, ['FCode', 'SHAPE@'], where) as cursor:
+      for fcode, shape in cursor:
+         if shape is not None:
+            e = shape.extent
+            extents[str(fcode)] = UnionExtent(extents[str(fcode)], [e.XMin, e.YMin, e.XMax, e.YMax])
+   return extents
+
+# Define function to gather the statistics of some of the NHD layers of a geodatabase.
+# Layers the geodatabase does not have are recorded with no features.
+def GatherLayers(gdb, layers=Layers):
+   import arcpy
+   stats = dict()
+   for name in layers:
+      fc = os.path.join(gdb, Dataset, name)
+      if arcpy.Exists(fc):
+         stats[name] = LayerStats(fc)
+      else:
+         stats[name] = {'count': 0, 'extent': None, 'fcodes': dict(), 'fcodeExtents': dict()}
+   return stats
+
+# Define function to find the workspace whose catalogue keeps the statistics of a geodatabase: the nearest
+# folder above it with a catalogue file, or else the folder holding it
+def WorkspaceOf(gdb):
+   gdb = os.path.abspath(gdb.rstrip('\\/'))
+   folder = os.path.dirname(gdb)
+   while True:
+      if os.path.isfile(CatalogPath(folder)):
+         return folder
+      parent = os.path.dirname(folder)
+      if parent == folder:
+         return os.path.dirname(gdb)
+      folder = parent
+
+# Define function to get the statistics of the NHD layers of a geodatabase, for at least the given
+# layers: from the catalogue where they are up to date, gathering the others.  The statistics are
+# {'huc4', 'path', 'stamp', 'extent', 'layers': {layer: {'count', 'extent', 'fcodes', 'fcodeExtents'}},
+# 'gathered': [layers gathered now], 'changed': whether anything was found now}.  The extent of the
+# geodatabase (see GdbExtent) is found with its first statistics.  With save, anything found is saved
+# in the catalogue; worker processes should not save, but return the statistics for the main process
+# to save with SaveStats.
+def GetStats(gdb, layers=Layers, save=True):
+   gdb = os.path.abspath(gdb.rstrip('\\/'))
+   workspace = WorkspaceOf(gdb)
+   key = os.path.relpath(gdb, workspace)
+   stamp = GdbStamp(gdb)
+   known = GetCatalog(workspace)['stats'].get(key)
+   changed = False
+   if known is None or known['stamp'] != stamp:
+      known = {'huc4': GdbHuc(gdb), 'stamp': stamp, 'extent': DescribeExtent(gdb), 'layers': dict()}
+      changed = True
+   missing = [name for name in layers if name not in known['layers']]
+   stats = {'huc4': known['huc4'], 'path': gdb, 'stamp': stamp, 'extent': known['extent'],
+            'layers': dict(known['layers']), 'gathered': missing, 'changed': changed or bool(missing)}
+   if missing:
+      stats['layers'].update(GatherLayers(gdb, missing))
+   if save:
+      SaveStats(stats)
+   return stats
+
+# Define function to save statistics from GetStats or FCodeExtent (e.g. found in a worker process) in
+# the catalogue, if anything was found.  Layers and FCode extents already catalogued for the same
+# stamp are kept.
+def SaveStats(stats):
+   if not stats.get('changed'):
+      return
+   workspace = WorkspaceOf(stats['path'])
+   key = os.path.relpath(stats['path'], workspace)
+   catalog = GetCatalog(workspace)
+   with CacheLock:
+      known = catalog['stats'].get(key)
+      if known is None or known['stamp'] != stats['stamp']:
+         known = {'huc4': stats['huc4'], 'stamp': stats['stamp'], 'extent': stats['extent'], 'layers': dict()}
+      for name, layer in stats['layers'].items():
+         if name in stats['gathered'] or name not in known['layers']:
+            known['layers'][name] = layer
+         else:
+            known['layers'][name]['fcodeExtents'].update(layer['fcodeExtents'])
+      catalog['stats'][key] = known
+      try:
+         SaveCatalog(catalog, workspace)
+      except (IOError, OSError):
+         pass
+
+# Define function to get the FCodes present in some layers of a geodatabase's statistics, as a set of integers
+def StatsFCodes(stats, layers):
+   present = set()
+   for name in layers:
+      present.update(int(fcode) for fcode in stats['layers'][name]['fcodes'] if fcode != 'None')
+   return present
+
+# Define function to count the features of a geodatabase with any of a list of FCodes, in a list of layers
+def CountFCodes(gdb, layers, fcodes):
+   stats = GetStats(gdb, layers)['layers']
+   count = 0
+   for name in layers:
+      entries = stats[name]['fcodes']
+      for fcode in fcodes:
+         count += entries.get(str(fcode), 0)
+   return count
+
+# Define function to get the FCodes present in the layers of a geodatabase, as a set of integers
+def PresentFCodes(gdb, layers=Layers):
+   return StatsFCodes(GetStats(gdb, layers), layers)
+
+# Define function to find the extent of the NHD layers of a geodatabase from their descriptions, or
+# None if they have no features
+def DescribeExtent(gdb):
+   import arcpy
+   extent = None
+   for name in Layers:
+      fc = os.path.join(gdb, Dataset, name)
+      if arcpy.Exists(fc):
+         extent = UnionExtent(extent, LayerExtent(fc))
+   return extent
+
+# Define function to get the extent of the NHD layers of a geodatabase, from the catalogue if it is up
+# to date (no layer statistics are gathered), or None if they have no features
+def GdbExtent(gdb, save=True):
+   return GetStats(gdb, [], save)['extent']
+
+# Define function to get the extent of the features of a geodatabase with any of a list of FCodes, in a
+# list of layers, or None if there are none.  The extents of FCodes not yet catalogued are found by
+# reading the geometries of their features only; FCodes a layer does not have are not read.  With
+# stats (from GetStats, e.g. in a worker process), the extents found are added to them, for SaveStats,
+# and not saved here.
+def FCodeExtent(gdb, layers, fcodes, stats=None):
+   save = stats is None
+   if save:
+      stats = GetStats(gdb, layers, save=False)
+   extent = None
+   for name in layers:
+      layer = stats['layers'][name]
+      wanted = [str(fcode) for fcode in fcodes if str(fcode) in layer['fcodes']]
+      unread = [fcode for fcode in wanted if fcode not in layer['fcodeExtents']]
+      if unread:
+         layer = dict(layer)
+         layer['fcodeExtents'] = dict(layer['fcodeExtents'])
+         layer['fcodeExtents'].update(ReadFCodeExtents(os.path.join(stats['path'], Dataset, name), unread))
+         stats['layers'][name] = layer
+         stats['changed'] = True
+      for fcode in wanted:
+         extent = UnionExtent(extent, layer['fcodeExtents'][fcode])
+   if save:
+      SaveStats(stats)
+   return extent
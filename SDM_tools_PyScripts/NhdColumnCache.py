@@ -0,0 +1,219 @@
+# ----------------------------------------------------------------------------------------
+# NhdColumnCache.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     An optional columnar cache of National Hydrography Dataset (NHD) features.  The NHDArea,
+#     NHDWaterbody and NHDFlowline feature classes of each NHD geodatabase are copied once into
+#     GeoParquet files holding only the columns the SDM tools use: the geometry (as WKB), FCode,
+#     FType and the area of each feature.  The files are partitioned by layer and HUC4
+#     (<cache>/<layer>/huc4=<HUC4>/part.parquet).  Later runs read only the columns, watersheds and
+#     FCodes they need, from memory-mapped files, rather than opening the geodatabases with arcpy.
+#
+# Usage Tips:
+#     Requires the pyarrow package, which is not installed with ArcGIS; without it the cache is
+#     simply not available (see Available) and tools read the geodatabases as before.
+#     Rows are sorted by FCode and written in row groups, so a read limited to a few FCodes skips
+#     the row groups (and pages) holding other FCodes, using the statistics stored in the file.
+#     Geometries are stored in the coordinate system of the NHD data, unless another is given when
+#     the cache is built; the coordinate system (as WKT) is kept in the file's metadata.  Areas are
+#     in the units of that coordinate system (0 for lines).
+#     A manifest (nhd_cache.json) records the stamp of each geodatabase when it was cached (the
+#     number, size and latest modification time of its files, ignoring the lock files of readers;
+#     see NhdCatalog.GdbStamp), so a watershed is copied again only when its geodatabase has changed.
+#     A watershed whose geodatabase changes while it is being cached is reported as an error, since
+#     its cache would not be current; cache it again.
+#     Arcpy is needed only to build the cache; reading it needs only pyarrow.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import json # for the manifest and GeoParquet metadata
+import os # provides access to operating system funtionality such as file and directory paths
+import threading # for guarding the manifest
+import NhdCatalog # for finding NHD geodatabases and their modification times
+import SdmPipeline # for replacing files in one step
+try:
+   import pyarrow
+   import pyarrow.parquet
+except ImportError:
+   pyarrow = None # the cache is optional
+
+# Name of the manifest file in the cache folder
+ManifestName = 'nhd_cache.json'
+
+# Layers copied into the cache
+Layers = NhdCatalog.Layers
+
+# Columns of the cache files, and the number of rows in each row group
+Columns = ['geometry', 'FCode', 'FType', 'Area']
+RowGroupSize = 16384
+
+# Define function to check whether the cache can be used, i.e. whether pyarrow is installed
+def Available():
+   return pyarrow is not None
+
+# Define function to raise an error if the cache cannot be used
+def RequirePyarrow():
+   if pyarrow is None:
+      raise ImportError('The NHD column cache requires the pyarrow package.')
+
+# Define function to get the path of the file holding a layer of a watershed
+def PartPath(cacheDir, layer, huc4):
+   return os.path.join(cacheDir, layer, 'huc4=%s' % huc4, 'part.parquet')
+
+# Define class to hold the manifest of a cache: the geodatabase and modification time each
+# watershed was cached from
+class Manifest(object):
+   def __init__(self, cacheDir):
+      self.path = os.path.join(cacheDir, ManifestName)
+      self.lock = threading.Lock()
+      try:
+         with open(self.path) as f:
+            self.entries = json.load(f)
+      except (IOError, OSError, ValueError):
+         self.entries = dict()
+
+   # Define method to check whether a watershed's cache files are up to date with its geodatabase
+   def IsCurrent(self, huc4, gdb, spatialRef=None):
+      entry = self.entries.get(huc4)
+      if entry is None or entry.get('spatialRef') != spatialRef:
+         return False
+      try:
+         return entry['stamp'] == NhdCatalog.GdbStamp(gdb)
+      except OSError:
+         return False
+
+   # Define method to record a cached watershed and save the manifest
+   def Record(self, huc4, gdb, stamp, rows, spatialRef=None):
+      with self.lock:
+         self.entries[huc4] = {'gdb': os.path.abspath(gdb), 'stamp': stamp, 'rows': rows, 'spatialRef': spatialRef}
+         tmp = self.path + '.tmp'
+         with open(tmp, 'w') as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+         SdmPipeline.ReplaceFile(tmp, self.path)
+
+# Define function to build the GeoParquet metadata of a cache file
+def GeoMetadata(spatialRefText):
+   geo = {'version': '1.0.0', 'primary_column': 'geometry',
+          'columns': {'geometry': {'encoding': 'WKB', 'geometry_types': [], 'crs': None}}}
+   return {b'geo': json.dumps(geo).encode('utf-8'),
+           b'nhd_spatial_ref': (spatialRefText or '').encode('utf-8')}
+
+# Define function to write the rows of one layer of one watershed to its cache file.
+# Rows are (WKB, FCode, FType, area) and are sorted by FCode before writing.
+def WriteLayer(path, rows, spatialRefText):
+   RequirePyarrow()
+   rows = sorted(rows, key=lambda r: (r[1] is None, r[1]))
+   schema = pyarrow.schema([('geometry', pyarrow.binary()), ('FCode', pyarrow.int32()),
+                            ('FType', pyarrow.int32()), ('Area', pyarrow.float64())])
+   schema = schema.with_metadata(GeoMetadata(spatialRefText))
+   arrays = [pyarrow.array([bytes(r[0]) if r[0] is not None else None for r in rows], pyarrow.binary()),
+             pyarrow.array([r[1] for r in rows], pyarrow.int32()),
+             pyarrow.array([r[2] for r in rows], pyarrow.int32()),
+             pyarrow.array([r[3] for r in rows], pyarrow.float64())]
+   table = pyarrow.Table.from_arrays(arrays, schema=schema)
+   folder = os.path.dirname(path)
+   if not os.path.isdir(folder):
+      os.makedirs(folder)
+   tmp = path + '.tmp'
+   pyarrow.parquet.write_table(table, tmp, row_group_size=RowGroupSize, compression='snappy')
+   SdmPipeline.ReplaceFile(tmp, path)
+
+# Define function to read the rows of one layer of a geodatabase with arcpy, projecting to a
+# spatial reference if one is given.  Returns the rows and the spatial reference's WKT.
+def ReadGdbLayer(gdb, layer, spatialRef=None):
+   import arcpy
+   fc = os.path.join(gdb, NhdCatalog.Dataset, layer)
+   if not arcpy.Exists(fc):
+      return list(), None
+   if spatialRef is None:
+      spatialRef = arcpy.Describe(fc).spatialReference
+   rows = list()
+   with arcpy.da.SearchCursor(fc, ['SHAPE@WKB', 'FCode', 'FType', 'SHAPE@AREA'], spatial_reference=spatialRef) as cursor:
+      for wkb, fcode, ftype, area in cursor:
+         if wkb is not None:
+            rows.append((bytearray(wkb), fcode, ftype, area or 0.0))
+   return rows, spatialRef.exportToString()
+
+# Define function to copy the NHD layers of a geodatabase into the cache, unless they are
+# already there and up to date.  spatialRef is an arcpy spatial reference to project to, or None
+# to keep the coordinate system of the NHD data.
+# Returns the number of rows written, or None if the cache was already up to date.
+def CacheGdb(cacheDir, gdb, manifest=None, spatialRef=None):
+   RequirePyarrow()
+   huc4 = NhdCatalog.GdbHuc(gdb)
+   if huc4 is None:
+      raise ValueError('%s is not named like an NHD geodatabase' % gdb)
+   if manifest is None:
+      manifest = Manifest(cacheDir)
+   srText = spatialRef.exportToString() if spatialRef is not None else None
+   if manifest.IsCurrent(huc4, gdb, srText):
+      return None
+   stamp = NhdCatalog.GdbStamp(gdb)
+   total = 0
+   for layer in Layers:
+      rows, wkt = ReadGdbLayer(gdb, layer, spatialRef)
+      WriteLayer(PartPath(cacheDir, layer, huc4), rows, wkt)
+      total += len(rows)
+   manifest.Record(huc4, gdb, stamp, total, srText)
+   # The cache must be current as soon as it is built; it is not if the geodatabase changed while
+   # it was being read (or if its stamp is not stable, which would make every run copy it again)
+   if not manifest.IsCurrent(huc4, gdb, srText):
+      raise RuntimeError('%s changed while it was being cached; cache it again' % gdb)
+   return total
+
+# Define function to copy the NHD geodatabases of a workspace into the cache.  hucList limits
+# the watersheds copied.  Yields (HUC, rows written or None if already current, error or None).
+def BuildCache(workspace, cacheDir, hucList=None, spatialRef=None):
+   RequirePyarrow()
+   if hucList:
+      gdbs, missing = NhdCatalog.FindGdbs(workspace, hucList)
+      for huc4 in missing:
+         yield (huc4, None, 'no NHD geodatabase found')
+   else:
+      gdbs = NhdCatalog.AllGdbs(workspace)
+   manifest = Manifest(cacheDir)
+   for huc4 in sorted(gdbs):
+      try:
+         yield (huc4, CacheGdb(cacheDir, gdbs[huc4], manifest, spatialRef), None)
+      except Exception as e:
+         yield (huc4, None, '%s: %s' % (e.__class__.__name__, e))
+
+# Define function to check whether a watershed is in the cache and up to date with a geodatabase
+def IsCached(cacheDir, huc4, gdb=None, spatialRef=None):
+   if pyarrow is None:
+      return False
+   manifest = Manifest(cacheDir)
+   entry = manifest.entries.get(huc4)
+   if entry is None:
+      return False
+   return manifest.IsCurrent(huc4, gdb or entry['gdb'], spatialRef)
+
+# Define function to read a layer of a watershed from the cache, as a pyarrow table.  Only the
+# given columns (all by default) and the rows with the given FCodes (all by default) are read;
+# row groups with none of the FCodes are skipped.
+def ReadLayer(cacheDir, layer, huc4, fcodes=None, columns=None):
+   RequirePyarrow()
+   path = PartPath(cacheDir, layer, huc4)
+   filters = None
+   if fcodes is not None:
+      filters = [('FCode', 'in', set(int(c) for c in fcodes))]
+   return pyarrow.parquet.read_table(path, columns=columns, filters=filters, memory_map=True)
+
+# Define function to get the coordinate system (as WKT) of a layer of a watershed in the cache
+def LayerSpatialRef(cacheDir, layer, huc4):
+   RequirePyarrow()
+   meta = pyarrow.parquet.read_schema(PartPath(cacheDir, layer, huc4), memory_map=True).metadata or dict()
+   return meta.get(b'nhd_spatial_ref', b'').decode('utf-8') or None
+
+# Define function to read the features of a layer of several watersheds from the cache, as
+# rows of the given columns (WKB geometry, FCode, FType and area by default).
+def Features(cacheDir, layer, hucList, fcodes=None, columns=None):
+   columns = columns or Columns
+   for huc4 in hucList:
+      table = ReadLayer(cacheDir, layer, huc4, fcodes, columns)
+      data = [table.column(c).to_pylist() for c in columns]
+      for row in zip(*data):
+         yield row
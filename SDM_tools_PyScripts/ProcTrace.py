@@ -0,0 +1,276 @@
+# ----------------------------------------------------------------------------------------
+# ProcTrace.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Records the time and resources spent in each part of a tool's run as nested spans
+#     (e.g. tool > tile or watershed > step such as Clip, AreaSolarRadiation or Erase), written
+#     to a trace file with one JSON record per line.  Each span records:
+#     - wall time and CPU time (user + system) of the process
+#     - peak memory (the process's peak working set or resident set size) at the end of the span,
+#       and how much it rose during the span
+#     - bytes read and written by the process during the span
+#     - whether the span succeeded, and the error if not
+#     Spans of chosen steps can also be profiled with cProfile (one .prof file per span), to see
+#     which Python or arcpy calls dominate them.
+#
+# Usage Tips:
+#     Start a trace with Start(path), wrap work in "with Span('name', key=value):", or time a
+#     single call with Call('name', func, args...), and finish with Stop().  With no trace
+#     started, spans cost next to nothing and nothing is written.
+#     Records are written as spans end, and flushed, so the trace of a run still in progress can
+#     be read; a span's children are written before it.
+#     Run "python ProcTrace.py <trace.jsonl>" for the total time spent in each step.
+#     Memory and I/O figures are for the whole process (including arcpy's work), so spans running
+#     in other threads at the same time are counted too.  Peak memory and I/O are read with
+#     Windows API calls on Windows and from /proc or resource elsewhere, and are None if unavailable.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import fnmatch # for matching the names of steps to profile
+import json # for the trace records
+import os # provides access to operating system funtionality such as file and directory paths
+import sys # provides access to Python system functions
+import threading # for the span stack of each thread and for guarding the trace file
+import time # for wall time
+
+# Define function to get the CPU time (user + system) of the process, in seconds
+def CpuTime():
+   t = os.times()
+   return t[0] + t[1]
+
+# Define functions to get the peak memory (bytes) and I/O counts (bytes read, bytes written) of
+# the process, for the platform
+if sys.platform == 'win32':
+   import ctypes
+   from ctypes import wintypes
+
+   class ProcessMemoryCounters(ctypes.Structure):
+      _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                  ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                  ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                  ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                  ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+   class IoCounters(ctypes.Structure):
+      _fields_ = [('ReadOperationCount', ctypes.c_ulonglong), ('WriteOperationCount', ctypes.c_ulonglong),
+                  ('OtherOperationCount', ctypes.c_ulonglong), ('ReadTransferCount', ctypes.c_ulonglong),
+                  ('WriteTransferCount', ctypes.c_ulonglong), ('OtherTransferCount', ctypes.c_ulonglong)]
+
+   def PeakMemory():
+      try:
+         counters = ProcessMemoryCounters()
+         counters.cb = ctypes.sizeof(counters)
+         handle = ctypes.windll.kernel32.GetCurrentProcess()
+         if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return int(counters.PeakWorkingSetSize)
+      except Exception:
+         pass
+      return None
+
+   def IoBytes():
+      try:
+         counters = IoCounters()
+         handle = ctypes.windll.kernel32.GetCurrentProcess()
+         if ctypes.windll.kernel32.GetProcessIoCounters(handle, ctypes.byref(counters)):
+            return (int(counters.ReadTransferCount), int(counters.WriteTransferCount))
+      except Exception:
+         pass
+      return (None, None)
+else:
+   try:
+      import resource
+   except ImportError:
+      resource = None
+
+   def PeakMemory():
+      if resource is None:
+         return None
+      peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+      return peak if sys.platform == 'darwin' else peak * 1024
+
+   def IoBytes():
+      try:
+         counts = dict()
+         with open('/proc/self/io') as f:
+            for line in f:
+               key, value = line.split(':')
+               counts[key] = int(value)
+         return (counts['rchar'], counts['wchar'])
+      except (IOError, OSError, KeyError, ValueError):
+         return (None, None)
+
+# Define function to get the difference of two counts, either of which may be None
+def Delta(end, start):
+   if end is None or start is None:
+      return None
+   return end - start
+
+# Define class to write spans to a trace file
+class Tracer(object):
+   def __init__(self, path, profile=None, profileDir=None):
+      self.path = path
+      self.file = open(path, 'a')
+      self.lock = threading.Lock()
+      self.local = threading.local()
+      self.nextId = 0
+      if isinstance(profile, (list, tuple)):
+         self.profile = list(profile)
+      else:
+         self.profile = [p.strip() for p in (profile or '').split(';') if p.strip()]
+      self.profileDir = profileDir or os.path.splitext(path)[0] + '_profiles'
+
+   # Define method to get the stack of open spans of the current thread
+   def Stack(self):
+      stack = getattr(self.local, 'stack', None)
+      if stack is None:
+         stack = self.local.stack = list()
+      return stack
+
+   # Define method to get a new span ID
+   def NewId(self):
+      with self.lock:
+         self.nextId += 1
+         return self.nextId
+
+   # Define method to check whether a step is to be profiled
+   def Profiled(self, name):
+      return any(fnmatch.fnmatch(name, p) for p in self.profile)
+
+   # Define method to write a record to the trace
+   def Write(self, record):
+      line = json.dumps(record, sort_keys=True)
+      with self.lock:
+         if self.file:
+            self.file.write(line + '\n')
+            self.file.flush()
+
+   # Define method to close the trace file
+   def Close(self):
+      with self.lock:
+         if self.file:
+            self.file.close()
+            self.file = None
+
+# The trace being recorded, or None
+Current = None
+
+# Define function to start recording a trace to a file (appending to it if it exists).
+# profile is a semicolon-delimited list (or a list) of step names or wildcards to profile with cProfile.
+def Start(path, profile=None, profileDir=None):
+   global Current
+   Stop()
+   Current = Tracer(path, profile, profileDir)
+   return Current
+
+# Define function to stop recording the trace
+def Stop():
+   global Current
+   if Current is not None:
+      Current.Close()
+      Current = None
+
+# Define class for one span; use it with "with".  Keyword arguments are recorded with the span
+# (e.g. the tile or watershed ID); more can be added with Set while the span is open.
+class Span(object):
+   def __init__(self, name, **attrs):
+      self.name = name
+      self.attrs = attrs
+      self.tracer = Current
+
+   # Define method to record more attributes of the span
+   def Set(self, **attrs):
+      self.attrs.update(attrs)
+
+   def __enter__(self):
+      tracer = self.tracer
+      if tracer is None:
+         return self
+      stack = tracer.Stack()
+      self.id = tracer.NewId()
+      self.parent = stack[-1].id if stack else None
+      stack.append(self)
+      self.profiler = None
+      if tracer.Profiled(self.name):
+         import cProfile
+         self.profiler = cProfile.Profile()
+      self.startTime = time.time()
+      self.startCpu = CpuTime()
+      self.startPeak = PeakMemory()
+      self.startIo = IoBytes()
+      if self.profiler:
+         self.profiler.enable()
+      return self
+
+   def __exit__(self, excType, excValue, tb):
+      tracer = self.tracer
+      if tracer is None:
+         return False
+      if self.profiler:
+         self.profiler.disable()
+      wall = time.time() - self.startTime
+      cpu = CpuTime() - self.startCpu
+      peak = PeakMemory()
+      io = IoBytes()
+      stack = tracer.Stack()
+      if stack and stack[-1] is self:
+         stack.pop()
+      record = {'id': self.id, 'parent': self.parent, 'name': self.name, 'attrs': self.attrs,
+                'start': self.startTime, 'wall': wall, 'cpu': cpu,
+                'peakMemory': peak, 'peakGrowth': Delta(peak, self.startPeak),
+                'readBytes': Delta(io[0], self.startIo[0]), 'writeBytes': Delta(io[1], self.startIo[1]),
+                'pid': os.getpid(), 'thread': threading.current_thread().name, 'ok': excType is None}
+      if excType is not None:
+         record['error'] = '%s: %s' % (excType.__name__, excValue)
+      if self.profiler:
+         try:
+            if not os.path.isdir(tracer.profileDir):
+               os.makedirs(tracer.profileDir)
+            profPath = os.path.join(tracer.profileDir, '%s_%d.prof' % (self.name, self.id))
+            self.profiler.dump_stats(profPath)
+            record['profile'] = profPath
+         except (IOError, OSError):
+            pass
+      tracer.Write(record)
+      return False # errors are recorded, not handled
+
+# Define function to run one call as a span, returning its result
+def Call(name, func, *args, **kwargs):
+   with Span(name):
+      return func(*args, **kwargs)
+
+# Define function to read the records of a trace file
+def ReadTrace(path):
+   records = list()
+   with open(path) as f:
+      for line in f:
+         line = line.strip()
+         if line:
+            try:
+               records.append(json.loads(line))
+            except ValueError:
+               pass # a line being written
+   return records
+
+# Define function to total the spans of a trace by name.
+# Returns a list of (name, count, failures, wall seconds, CPU seconds, bytes read, bytes written),
+# with the most time-consuming first.
+def Summarize(path):
+   totals = dict()
+   for r in ReadTrace(path):
+      t = totals.setdefault(r['name'], [0, 0, 0.0, 0.0, 0, 0])
+      t[0] += 1
+      t[1] += not r.get('ok', True)
+      t[2] += r.get('wall') or 0.0
+      t[3] += r.get('cpu') or 0.0
+      t[4] += r.get('readBytes') or 0
+      t[5] += r.get('writeBytes') or 0
+   rows = [(name,) + tuple(t) for name, t in totals.items()]
+   return sorted(rows, key=lambda row: -row[3])
+
+if __name__ == '__main__':
+   print('%-30s %7s %6s %12s %12s %10s %10s' % ('span', 'count', 'failed', 'wall (s)', 'CPU (s)', 'read MB', 'write MB'))
+   for name, count, failed, wall, cpu, nread, nwrite in Summarize(sys.argv[1]):
+      print('%-30s %7d %6d %12.1f %12.1f %10.1f %10.1f' % (name, count, failed, wall, cpu, nread / 1048576.0, nwrite / 1048576.0))
@@ -0,0 +1,34 @@
+# ----------------------------------------------------------------------------------------
+# ProcessPool.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Opens a pool of worker processes that also works when the calling script is run as a
+#     script tool inside ArcGIS.
+#
+# Usage Tips:
+#     Inside ArcGIS (e.g. ArcMap running a script tool in process), sys.executable is the ArcGIS
+#     application, which cannot run worker processes, so the Python interpreter installed with
+#     ArcGIS is used instead.  Worker processes import the calling script, so scripts that use a
+#     pool must keep their processing under "if __name__ == '__main__':", and the functions the
+#     workers run must be defined at the top level of a module.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import multiprocessing # for the worker processes
+import os # provides access to operating system funtionality such as file and directory paths
+import sys # provides access to Python system functions
+
+# Define function to make worker processes run the Python interpreter installed with ArcGIS when
+# the calling script runs inside an ArcGIS application
+def UseArcGISPython():
+   exe = os.path.join(sys.exec_prefix, 'pythonw.exe')
+   if os.path.exists(exe) and not os.path.basename(sys.executable).lower().startswith('python'):
+      multiprocessing.set_executable(exe)
+
+# Define function to open a pool of worker processes
+def OpenProcessPool(processes):
+   UseArcGISPython()
+   return multiprocessing.Pool(processes)
@@ -0,0 +1,232 @@
+# ----------------------------------------------------------------------------------------
+# ProgressReport.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Reports the progress of long-running batch tools that work through a known number of units
+#     (tiles, watersheds, strips or blocks).  As each unit finishes, a message gives the units and
+#     cells completed, the rolling throughput over the last few units, and the estimated time
+#     remaining.  A status file (JSON) is also rewritten every minute or so, so a run can be
+#     watched from another shell: it holds the counts, throughput and ETA, the units being worked
+#     on and how long each has been running, and the slowest units finished so far.
+#
+# Usage Tips:
+#     Create a ProgressReporter with the number of units (and, if known, the number of cells),
+#     call Begin(unitID) when starting a unit and Done(unitID, cells) or Failed(unitID) when it
+#     ends (Skipped(unitID) for units with nothing to do), and Finish() at the end.  Units may
+#     run in several threads at once.
+#     The ETA is based on cells if the total number of cells is known, otherwise on units.
+#     Run "python ProgressReport.py <status.json>" to print a run's status; a run whose status
+#     file has not been updated for several intervals has probably died, and a unit running much
+#     longer than the slowest finished units has probably stalled.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import collections # for the rolling window of finished units
+import json # for the status file
+import os # provides access to operating system funtionality such as file and directory paths
+import sys # provides access to Python system functions
+import threading # for the status file heartbeat and for guarding the counts
+import time # for timing units
+from datetime import datetime # for time-stamping
+import SdmPipeline # for replacing files in one step
+
+# Define function to format a number of seconds as hours, minutes and seconds
+def FormatSeconds(seconds):
+   if seconds is None:
+      return 'unknown'
+   seconds = int(round(seconds))
+   return '%d:%02d:%02d' % (seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+# Define function to format a time as a timestamp
+def FormatTime(t):
+   if t is None:
+      return None
+   return datetime.fromtimestamp(t).strftime('%Y-%m-%d %H:%M:%S')
+
+# Define function to write a JSON file so that a reader never sees it half-written
+def WriteJson(path, data):
+   tmp = path + '.tmp'
+   with open(tmp, 'w') as f:
+      json.dump(data, f, indent=1, sort_keys=True)
+   SdmPipeline.ReplaceFile(tmp, path)
+
+# Define function to compose the progress message for a status
+def ProgressMessage(status):
+   finished = status['total'] - status['remaining']
+   msg = 'Finished %s of %s %ss' % (finished, status['total'], status['unitName'])
+   if status['total']:
+      msg += ' (%.1f%%)' % (100.0 * finished / status['total'])
+   if status['failed']:
+      msg += ', %s failed' % status['failed']
+   if status['unitsPerHour']:
+      msg += '; %.1f %ss/hour' % (status['unitsPerHour'], status['unitName'])
+   if status['cellsPerSecond']:
+      msg += ', %.3g cells/second' % status['cellsPerSecond']
+   if status['remaining']:
+      msg += '; about %s remaining' % FormatSeconds(status['eta'])
+      if status['expectedFinish']:
+         msg += ' (finishing %s)' % status['expectedFinish']
+   return msg
+
+# Define class to track and report the progress of a batch of units
+class ProgressReporter(object):
+   # total: number of units; totalCells: number of cells in all units, or None if not known
+   # unitName: what a unit is called in messages (e.g. 'tile'); statusFile: path of the status file, or None
+   # report: function to show messages (e.g. arcpy.AddMessage); interval: seconds between status file updates
+   # window: number of recently finished units the throughput is computed from
+   # every: report a message every this many units (the status file is always kept up to date)
+   def __init__(self, total, totalCells=None, unitName='unit', statusFile=None, report=None, interval=60, window=10, every=1):
+      self.total = total
+      self.totalCells = totalCells
+      self.unitName = unitName
+      self.statusFile = statusFile
+      self.report = report or self.Print
+      self.interval = interval
+      self.every = max(int(every), 1)
+      self.lock = threading.Lock()
+      self.startTime = time.time()
+      self.done = 0
+      self.failed = 0
+      self.skipped = 0
+      self.cells = 0
+      self.running = dict() # unit ID: start time
+      self.slowest = list() # (seconds, unit ID), slowest first
+      self.recent = collections.deque([(self.startTime, 0, 0)], window + 1) # (time, units finished, cells finished)
+      self.finished = False
+      self.stop = threading.Event()
+      self.heartbeat = None
+      if statusFile:
+         self.WriteStatus()
+         self.heartbeat = threading.Thread(target=self.Heartbeat)
+         self.heartbeat.daemon = True
+         self.heartbeat.start()
+
+   # Define method to show a message on the console when no report function is given
+   def Print(self, msg):
+      sys.stdout.write(msg + '\n')
+      sys.stdout.flush()
+
+   # Define method to rewrite the status file every interval until the run finishes
+   def Heartbeat(self):
+      while not self.stop.wait(self.interval):
+         try:
+            self.WriteStatus()
+         except (IOError, OSError):
+            pass # try again next time
+
+   # Define method to record the start of a unit
+   def Begin(self, unitID):
+      with self.lock:
+         self.running[str(unitID)] = time.time()
+
+   # Define method to record the end of a unit, and report progress
+   def End(self, unitID, cells, state):
+      now = time.time()
+      unitID = str(unitID)
+      with self.lock:
+         start = self.running.pop(unitID, None)
+         if state == 'failed':
+            self.failed += 1
+         elif state == 'skipped':
+            self.skipped += 1
+         else:
+            self.done += 1
+         self.cells += cells or 0
+         if state != 'skipped':
+            self.recent.append((now, self.done + self.failed, self.cells))
+            if start is not None:
+               self.slowest.append((now - start, unitID))
+               self.slowest.sort(reverse=True)
+               del self.slowest[5:]
+         status = self.Status(now)
+      finished = status['total'] - status['remaining']
+      if finished % self.every == 0 or status['remaining'] == 0:
+         self.report(ProgressMessage(status))
+
+   # Define method to record a unit that finished, with the number of cells it covered
+   def Done(self, unitID, cells=None):
+      self.End(unitID, cells, 'done')
+
+   # Define method to record a unit that failed
+   def Failed(self, unitID, cells=None):
+      self.End(unitID, cells, 'failed')
+
+   # Define method to record a unit that was skipped because it had nothing to do
+   def Skipped(self, unitID):
+      self.End(unitID, None, 'skipped')
+
+   # Define method to compute the current status; the lock must be held
+   def Status(self, now=None):
+      now = now or time.time()
+      finished = self.done + self.failed + self.skipped
+      first = self.recent[0]
+      last = self.recent[-1]
+      span = now - first[0]
+      unitRate = (last[1] - first[1]) / span if span > 0 and last[1] > first[1] else None
+      cellRate = (last[2] - first[2]) / span if span > 0 and last[2] > first[2] else None
+      remaining = max(self.total - finished, 0)
+      eta = None
+      if remaining == 0:
+         eta = 0.0
+      elif self.totalCells and cellRate:
+         eta = max(self.totalCells - self.cells, 0) / cellRate
+      elif unitRate:
+         eta = remaining / unitRate
+      return {'unitName': self.unitName, 'total': self.total, 'done': self.done, 'failed': self.failed,
+              'skipped': self.skipped, 'remaining': remaining, 'cells': self.cells, 'totalCells': self.totalCells,
+              'started': FormatTime(self.startTime), 'updated': FormatTime(now), 'elapsed': now - self.startTime,
+              'unitsPerHour': unitRate * 3600 if unitRate else None, 'cellsPerSecond': cellRate,
+              'eta': eta, 'expectedFinish': FormatTime(now + eta) if eta is not None else None,
+              'running': dict((u, now - t) for u, t in self.running.items()),
+              'slowest': [{'unit': u, 'seconds': s} for s, u in self.slowest],
+              'finished': self.finished, 'pid': os.getpid(), 'interval': self.interval}
+
+   # Define method to write the status file
+   def WriteStatus(self):
+      if not self.statusFile:
+         return
+      with self.lock:
+         status = self.Status()
+      WriteJson(self.statusFile, status)
+
+   # Define method to end reporting: stops the heartbeat and writes the final status
+   def Finish(self):
+      self.stop.set()
+      if self.heartbeat is not None:
+         self.heartbeat.join()
+      with self.lock:
+         self.finished = True
+         status = self.Status()
+      if self.statusFile:
+         WriteJson(self.statusFile, status)
+      self.report('Finished %s %ss in %s: %s completed, %s failed, %s skipped' % (status['total'], self.unitName,
+                  FormatSeconds(status['elapsed']), status['done'], status['failed'], status['skipped']))
+      return status
+
+# Define function to read a status file and describe it, for watching a run from another shell
+def DescribeStatus(path):
+   with open(path) as f:
+      status = json.load(f)
+   lines = [ProgressMessage(status)]
+   age = time.time() - os.path.getmtime(path)
+   if status['finished']:
+      lines.append('Run finished %s' % status['updated'])
+   elif age > 3 * status['interval']:
+      lines.append('WARNING: status not updated for %s; the run (process %s) may have died' % (FormatSeconds(age), status['pid']))
+   else:
+      lines.append('Running since %s (%s elapsed)' % (status['started'], FormatSeconds(status['elapsed'])))
+   slowest = max([s['seconds'] for s in status['slowest']] or [None])
+   for unit, seconds in sorted(status['running'].items(), key=lambda item: -item[1]):
+      note = ''
+      if slowest and seconds > 2 * slowest:
+         note = '  <- slower than any finished %s; may be stalled' % status['unitName']
+      lines.append('   running %s %s for %s%s' % (status['unitName'], unit, FormatSeconds(seconds), note))
+   for s in status['slowest']:
+      lines.append('   slowest finished %s %s: %s' % (status['unitName'], s['unit'], FormatSeconds(s['seconds'])))
+   return '\n'.join(lines)
+
+if __name__ == '__main__':
+   print(DescribeStatus(sys.argv[1]))
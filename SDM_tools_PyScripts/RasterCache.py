@@ -0,0 +1,287 @@
+# ----------------------------------------------------------------------------------------
+# RasterCache.py
+# Version:  Python 2.7.5 / ArcGIS 10.2.2
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     A cache of derived rasters (e.g. roughness, Beers aspect, Euclidean distance and finalized EV
+#     grids), stored under a key computed from everything the product depends on: the tool, its
+#     parameters, and the contents of its inputs.  When a tool is rerun with the same inputs and
+#     parameters, the product is copied from the cache instead of being computed again.
+#     Inputs are identified by their content, not their names or dates: the key of a raster input
+#     is a hash of its georeferencing, NoData value and pixel type, and of its cell values read
+#     block by block.  Arrays already in memory (e.g. a DEM window) can be hashed directly.
+#     The cache is limited in size; when it is full, the products used least recently are removed.
+#
+# Usage Tips:
+#     cache = RasterCache.Open(cacheDir)
+#     key = cache.Key('Tool', {'param': value}, [inRaster])
+#     if not cache.Fetch(key, outRaster):
+#        ... compute outRaster ...
+#        cache.Store(key, outRaster, 'Tool')
+#     Products are kept as GeoTIFFs in the cache folder, with an index (raster_cache.json).  The
+#     size limit (50 GB by default) is kept in the index and can be changed by opening the cache
+#     with a new limit.
+#     Hashing a large input raster takes a read of the whole raster, so the hash of each input is
+#     remembered with the size and modification time of the file (or geodatabase) holding it, and
+#     is only computed again when they change.
+#     Inputs that are not rasters (e.g. a feature class mask) are identified by the size and
+#     modification time of their files or geodatabase.
+#     Several processes may share a cache.  Each change to the index is made under a lock on a
+#     lock file (raster_cache.lock) beside it, on the index as read again under the lock, and the
+#     index is replaced in one step, so no process loses another's changes or reads a missing index.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import contextlib # for updating the index under a lock
+import hashlib # for the cache keys
+import json # for the index
+import os # provides access to operating system funtionality such as file and directory paths
+import shutil # for copying GeoTIFFs
+import threading # for guarding the index
+import time # for the time each product was last used
+import numpy
+import RasterWindow # for reading rasters block by block
+import SdmPipeline # for the stamps of files and geodatabases
+try:
+   import fcntl # for locking the index
+except ImportError:
+   fcntl = None # Windows
+try:
+   import msvcrt # for locking the index on Windows
+except ImportError:
+   msvcrt = None
+
+# Names of the index file and its lock file in the cache folder
+IndexName = 'raster_cache.json'
+LockName = 'raster_cache.lock'
+
+# Default size limit of a cache, in gigabytes
+DefaultMaxGB = 50
+
+# Number of rows read at once when hashing a raster
+HashRows = 1024
+
+# Files that may accompany a GeoTIFF
+TiffSidecars = ['', '.aux.xml', '.ovr', '.vat.dbf']
+
+# Define function to add an array's contents, shape and type to a hash
+def UpdateArrayHash(h, array):
+   array = numpy.ascontiguousarray(array)
+   h.update(('%s %s;' % (array.dtype.str, array.shape)).encode('utf-8'))
+   h.update(array)
+
+# Define function to get the hash of an array, with the georeferencing of the window it covers
+def ArrayDigest(array, grid=None, window=None):
+   h = hashlib.sha1()
+   if grid is not None:
+      h.update(GridText(grid, window).encode('utf-8'))
+   UpdateArrayHash(h, array)
+   return h.hexdigest()
+
+# Define function to describe the georeferencing of a grid (or a window of it) as text
+def GridText(grid, window=None):
+   if window is None:
+      window = (0, 0, grid.nrows, grid.ncols)
+   x, y = RasterWindow.WindowLowerLeft(grid, window)
+   sr = grid.spatialRef
+   if hasattr(sr, 'exportToString'):
+      sr = sr.exportToString()
+   return '%r %r %r %r %r %r %r %r %s;' % (x, y, grid.cellX, grid.cellY, window[3], window[2], grid.nodata, grid.pixelType, sr)
+
+# Define function to hash a raster's georeferencing and cell values, reading it block by block
+def RasterDigest(inRaster):
+   grid = RasterWindow.GetRasterGrid(inRaster)
+   h = hashlib.sha1()
+   h.update(GridText(grid).encode('utf-8'))
+   for row0 in range(0, grid.nrows, HashRows):
+      window = (row0, 0, min(HashRows, grid.nrows - row0), grid.ncols)
+      UpdateArrayHash(h, RasterWindow.ReadWindow(inRaster, grid, window))
+   return h.hexdigest()
+
+# Define function to check whether a dataset is a raster
+def IsRaster(inData):
+   if RasterWindow.IsVirtual(inData) or RasterWindow.IsShared(inData):
+      return True
+   import arcpy
+   return arcpy.Describe(inData).dataType in ('RasterDataset', 'RasterBand', 'RasterLayer', 'MosaicDataset')
+
+# Define function to copy a GeoTIFF and the files that accompany it
+def CopyTiff(src, dst):
+   for suffix in TiffSidecars:
+      if os.path.exists(src + suffix):
+         shutil.copyfile(src + suffix, dst + suffix)
+      elif os.path.exists(dst + suffix):
+         os.remove(dst + suffix)
+
+# Define class to hold an exclusive lock on a file, shared by all processes, while in a with
+# block.  The lock is released by the operating system if the process dies holding it.
+class FileLock(object):
+   def __init__(self, path):
+      self.path = path
+      self.fd = None
+
+   def __enter__(self):
+      self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+      if fcntl is not None:
+         fcntl.flock(self.fd, fcntl.LOCK_EX)
+      elif msvcrt is not None:
+         while True:
+            try:
+               os.lseek(self.fd, 0, 0)
+               msvcrt.locking(self.fd, msvcrt.LK_NBLCK, 1)
+               break
+            except (IOError, OSError):
+               time.sleep(0.05)
+      return self
+
+   def __exit__(self, excType, excValue, tb):
+      try:
+         if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+         elif msvcrt is not None:
+            os.lseek(self.fd, 0, 0)
+            msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+      finally:
+         os.close(self.fd)
+         self.fd = None
+
+# Define function to check whether a raster path is a GeoTIFF outside a geodatabase
+def IsTiff(path):
+   return path.lower().endswith(('.tif', '.tiff')) and not os.path.dirname(path).lower().endswith('.gdb')
+
+# Define class to hold a cache of derived rasters
+class RasterCache(object):
+   def __init__(self, cacheDir, maxGB=None):
+      self.cacheDir = cacheDir
+      if not os.path.isdir(cacheDir):
+         os.makedirs(cacheDir)
+      self.indexPath = os.path.join(cacheDir, IndexName)
+      self.lockPath = os.path.join(cacheDir, LockName)
+      self.lock = threading.Lock()
+      self.index = self.LoadIndex()
+      if maxGB is not None:
+         with self.Updating() as index:
+            index['maxBytes'] = int(maxGB * 1024 ** 3)
+
+   # Define method to read the index, which another process may have updated
+   def LoadIndex(self):
+      try:
+         with open(self.indexPath) as f:
+            index = json.load(f)
+      except (IOError, OSError, ValueError):
+         index = dict()
+      index.setdefault('maxBytes', DefaultMaxGB * 1024 ** 3)
+      index.setdefault('entries', dict())
+      index.setdefault('digests', dict())
+      return index
+
+   # Define method to write the index; the lock on the index must be held (see Updating)
+   def SaveIndex(self):
+      tmp = '%s.%s.tmp' % (self.indexPath, os.getpid())
+      with open(tmp, 'w') as f:
+         json.dump(self.index, f, indent=1, sort_keys=True)
+      SdmPipeline.ReplaceFile(tmp, self.indexPath)
+
+   # Define method to change the index, in a with block, with other threads and processes kept
+   # out until it is saved.  The index is read again first, since another process may have
+   # changed it; it is saved only if the block finishes without an error.
+   @contextlib.contextmanager
+   def Updating(self):
+      with self.lock:
+         with FileLock(self.lockPath):
+            self.index = self.LoadIndex()
+            yield self.index
+            self.SaveIndex()
+
+   # Define method to get the digest of an input dataset, reusing the one computed before if the
+   # files holding the dataset have not changed since
+   def InputDigest(self, inData):
+      path = os.path.abspath(inData)
+      stamp = SdmPipeline.Stamp(path)
+      with self.lock:
+         known = self.index['digests'].get(path)
+      if known is not None and stamp is not None and known['stamp'] == stamp:
+         return known['digest']
+      if IsRaster(inData):
+         digest = RasterDigest(inData)
+      else:
+         digest = hashlib.sha1(json.dumps([path, stamp]).encode('utf-8')).hexdigest()
+      if stamp is not None:
+         with self.Updating() as index:
+            index['digests'][path] = {'stamp': stamp, 'digest': digest}
+      return digest
+
+   # Define method to compute the key of a product from the tool, its parameters, its input
+   # datasets, and the digests of any arrays (see ArrayDigest) it is computed from
+   def Key(self, tool, params, inputs=(), digests=()):
+      data = {'tool': tool, 'params': dict((str(k), str(v)) for k, v in params.items()),
+              'inputs': [self.InputDigest(p) for p in inputs], 'digests': list(digests)}
+      return hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+   # Define method to get the path of a cached product
+   def ProductPath(self, key):
+      return os.path.join(self.cacheDir, key + '.tif')
+
+   # Define method to copy a cached product to an output raster.  Returns False if the product is
+   # not in the cache.
+   def Fetch(self, key, outRaster):
+      with self.lock:
+         self.index = self.LoadIndex()
+         entry = self.index['entries'].get(key)
+      cached = self.ProductPath(key)
+      if entry is None or not os.path.exists(cached):
+         return False
+      if IsTiff(outRaster):
+         CopyTiff(cached, outRaster)
+      else:
+         import arcpy
+         if arcpy.Exists(outRaster):
+            arcpy.Delete_management(outRaster)
+         arcpy.CopyRaster_management(cached, outRaster)
+      with self.Updating() as index:
+         if key in index['entries']:
+            index['entries'][key]['used'] = time.time()
+      return True
+
+   # Define method to add a product to the cache, then remove the least recently used products
+   # if the cache is over its size limit
+   def Store(self, key, outRaster, label=''):
+      cached = self.ProductPath(key)
+      tmp = os.path.join(self.cacheDir, 'tmp_%s_%s.tif' % (os.getpid(), key))
+      if IsTiff(outRaster):
+         CopyTiff(outRaster, tmp)
+      else:
+         import arcpy
+         arcpy.CopyRaster_management(outRaster, tmp)
+      for suffix in TiffSidecars:
+         if os.path.exists(tmp + suffix):
+            SdmPipeline.ReplaceFile(tmp + suffix, cached + suffix)
+      size = sum(os.path.getsize(cached + s) for s in TiffSidecars if os.path.exists(cached + s))
+      now = time.time()
+      with self.Updating() as index:
+         index['entries'][key] = {'label': label, 'source': outRaster, 'size': size, 'created': now, 'used': now}
+         self.Evict(keep=key)
+
+   # Define method to remove the least recently used products until the cache is within its
+   # size limit; the lock on the index must be held (see Updating)
+   def Evict(self, keep=None):
+      entries = self.index['entries']
+      total = sum(e['size'] for e in entries.values())
+      for key in sorted(entries, key=lambda k: entries[k]['used']):
+         if total <= self.index['maxBytes']:
+            break
+         if key == keep:
+            continue
+         for suffix in TiffSidecars:
+            path = self.ProductPath(key) + suffix
+            if os.path.exists(path):
+               os.remove(path)
+         total -= entries.pop(key)['size']
+
+# Define function to open a cache, or return None if no cache folder is given
+def Open(cacheDir, maxGB=None):
+   if not cacheDir:
+      return None
+   return RasterCache(cacheDir, maxGB)
@@ -0,0 +1,244 @@
+# ----------------------------------------------------------------------------------------
+# RasterStats.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Accumulates raster summaries block by block while a raster is being written, so that no
+#     separate pass over the finished raster is needed, and writes them to the sidecar files
+#     read by ArcGIS.
+#     - ValueCounts: cell counts per value of an integer raster, written as a value attribute
+#       table (<raster>.vat.dbf), in place of Build Raster Attribute Table.
+#     - RunningStats: minimum, maximum, mean, standard deviation and histogram of the valid cells,
+#       written to the band section of the PAM sidecar (<raster>.aux.xml), in place of
+#       Calculate Statistics.
+#
+# Usage Tips:
+#     Accumulators are thread-safe; blocks may be added from several threads in any order.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import struct # for packing dBASE records
+import threading # for merging block results from several threads
+from datetime import datetime # for the dBASE header date
+import numpy
+
+# Largest value range counted with a bincount; wider ranges are counted by sorting
+MaxBincountRange = 2**20
+
+# Number of histogram bins
+HistBins = 256
+
+# Number of fine bins of a running histogram per bin of the final histogram
+FineFactor = 256
+
+# Define function to count the cells of each value in an array of integers.
+# Returns (values, counts) arrays.
+def CountValues(values):
+   if values.size == 0:
+      return (numpy.zeros(0, numpy.int64), numpy.zeros(0, numpy.int64))
+   lo = int(values.min())
+   hi = int(values.max())
+   if hi - lo < MaxBincountRange:
+      counts = numpy.bincount((values.astype(numpy.int64) - lo).ravel())
+      present = numpy.nonzero(counts)[0]
+      return (present + lo, counts[present])
+   v = numpy.sort(values.ravel())
+   starts = numpy.concatenate(([0], numpy.nonzero(numpy.diff(v))[0] + 1))
+   counts = numpy.diff(numpy.concatenate((starts, [v.size])))
+   return (v[starts].astype(numpy.int64), counts)
+
+# Define class to accumulate cell counts per value of an integer raster
+class ValueCounts(object):
+   def __init__(self):
+      self.counts = dict()
+      self.lock = threading.Lock()
+
+   # Define method to add the valid cells of a block
+   def Add(self, data, valid=None):
+      if valid is not None:
+         data = data[valid]
+      values, counts = CountValues(data)
+      with self.lock:
+         for v, c in zip(values.tolist(), counts.tolist()):
+            self.counts[v] = self.counts.get(v, 0) + c
+
+   # Define method to write the counts as a value attribute table beside a raster
+   def WriteVat(self, rasterPath):
+      WriteDbf(rasterPath + '.vat.dbf', [('Value', 11), ('Count', 19)],
+               [(v, self.counts[v]) for v in sorted(self.counts)])
+
+# Define function to write a dBASE III table of integer fields.
+# Fields are (name, width) pairs; records are tuples of integers.
+def WriteDbf(path, fields, records):
+   now = datetime.now()
+   headLen = 32 + 32 * len(fields) + 1
+   recLen = 1 + sum(width for name, width in fields)
+   with open(path, 'wb') as f:
+      f.write(struct.pack('<BBBBIHH20x', 3, now.year - 1900, now.month, now.day, len(records), headLen, recLen))
+      for name, width in fields:
+         f.write(struct.pack('<11sc4xBB14x', name.encode('ascii'), b'N', width, 0))
+      f.write(b'\r')
+      for rec in records:
+         f.write(b' ' + b''.join(str(int(v)).rjust(width).encode('ascii') for v, (name, width) in zip(rec, fields)))
+      f.write(b'\x1a')
+
+# Define class to accumulate a histogram of values whose range is not known in advance.
+# Values are counted in fine bins (FineFactor times as many as the final histogram has); when a
+# value falls outside the current range, the fine bin width is doubled (merging pairs of bins) and
+# the range extended towards it, so counts are never lost.  The final histogram spans the minimum
+# and maximum of all the values added, whatever the range of the first values, and is made by
+# merging the fine bins, each into the final bin holding its center.  Since the fine range is at
+# most about four times the final one, a value near an edge between final bins is counted in the
+# wrong one only if it is within about 1/64 of a bin of the edge.
+class RunningHistogram(object):
+   def __init__(self, nbins=HistBins, fineFactor=FineFactor):
+      self.nbins = nbins
+      self.nfine = nbins * fineFactor
+      self.lo = None # Lower edge of the first fine bin
+      self.width = None # Fine bin width
+      self.min = None
+      self.max = None
+      self.counts = numpy.zeros(self.nfine, numpy.int64)
+
+   # Define method to double the bin width, extending the range downwards or upwards
+   def Grow(self, down):
+      half = self.counts.reshape(self.nfine // 2, 2).sum(1)
+      pad = numpy.zeros(self.nfine // 2, numpy.int64)
+      if down:
+         self.lo -= self.width * self.nfine
+         self.counts = numpy.concatenate((pad, half))
+      else:
+         self.counts = numpy.concatenate((half, pad))
+      self.width *= 2
+
+   # Define method to add an array of values (already limited to valid cells)
+   def Add(self, values):
+      if values.size == 0:
+         return
+      vmin = float(values.min())
+      vmax = float(values.max())
+      if self.lo is None:
+         self.lo = vmin
+         self.width = max(vmax - vmin, abs(vmin) * 1e-6, 1e-6) / self.nfine * (1 + 1e-9)
+      self.min = vmin if self.min is None else min(self.min, vmin)
+      self.max = vmax if self.max is None else max(self.max, vmax)
+      while vmin < self.lo:
+         self.Grow(True)
+      while vmax >= self.lo + self.width * self.nfine:
+         self.Grow(False)
+      idx = ((values.astype(numpy.float64) - self.lo) / self.width).astype(numpy.int64)
+      self.counts += numpy.bincount(numpy.clip(idx, 0, self.nfine - 1).ravel(), minlength=self.nfine)
+
+   # Define method to get the histogram as (histMin, histMax, counts), spanning the minimum and
+   # maximum of the values added
+   def Histogram(self):
+      if self.lo is None:
+         return None
+      lo = self.min
+      hi = self.max if self.max > self.min else self.min + self.width
+      centers = self.lo + self.width * (numpy.arange(self.nfine) + 0.5)
+      idx = numpy.clip(((centers - lo) / (hi - lo) * self.nbins).astype(numpy.int64), 0, self.nbins - 1)
+      return (lo, hi, numpy.bincount(idx, self.counts, self.nbins).astype(numpy.int64))
+
+# Define class to accumulate band statistics and a histogram of the valid cells of a raster
+class RunningStats(object):
+   def __init__(self, dtype, valueCounts=None):
+      self.dtype = numpy.dtype(dtype)
+      self.count = 0
+      self.min = None
+      self.max = None
+      self.sum = 0.0
+      self.sumSq = 0.0
+      self.lock = threading.Lock()
+
+      # Integer rasters get an exact histogram from value counts (shared with the attribute
+      # table, if one is being built); floating point rasters get a running histogram
+      if self.dtype.kind == 'f':
+         self.valueCounts = None
+         self.hist = RunningHistogram()
+      else:
+         self.valueCounts = valueCounts
+         self.ownCounts = valueCounts is None
+         if self.ownCounts:
+            self.valueCounts = ValueCounts()
+         self.hist = None
+
+   # Define method to add the valid cells of a block
+   def Add(self, data, valid=None):
+      values = data[valid] if valid is not None else data.ravel()
+      if values.size == 0:
+         return
+      v = values.astype(numpy.float64)
+      bMin = float(v.min())
+      bMax = float(v.max())
+      bSum = float(v.sum())
+      bSumSq = float(numpy.dot(v, v))
+      if self.valueCounts is not None and self.ownCounts:
+         self.valueCounts.Add(values)
+      with self.lock:
+         self.count += values.size
+         self.sum += bSum
+         self.sumSq += bSumSq
+         self.min = bMin if self.min is None else min(self.min, bMin)
+         self.max = bMax if self.max is None else max(self.max, bMax)
+         if self.hist is not None:
+            self.hist.Add(values)
+
+   # Define method to get (min, max, mean, stdDev), or None if no valid cells were added
+   def Statistics(self):
+      if not self.count:
+         return None
+      mean = self.sum / self.count
+      var = max(self.sumSq / self.count - mean * mean, 0.0)
+      return (self.min, self.max, mean, var ** 0.5)
+
+   # Define method to get the histogram as (histMin, histMax, counts)
+   def Histogram(self):
+      if self.hist is not None:
+         return self.hist.Histogram()
+      if not self.valueCounts.counts:
+         return None
+
+      # One bin per value when the range is small, otherwise HistBins bins across the range
+      values = numpy.array(sorted(self.valueCounts.counts), numpy.int64)
+      counts = numpy.array([self.valueCounts.counts[v] for v in values.tolist()], numpy.int64)
+      lo = float(values[0]) - 0.5
+      hi = float(values[-1]) + 0.5
+      nbins = int(hi - lo) if hi - lo <= HistBins else HistBins
+      idx = numpy.minimum(((values - lo) / (hi - lo) * nbins).astype(numpy.int64), nbins - 1)
+      return (lo, hi, numpy.bincount(idx, counts, nbins).astype(numpy.int64))
+
+   # Define method to format the statistics and histogram as a PAM band element.  cells is the
+   # number of cells of the raster (rows x columns), for the percentage of valid cells.
+   def PamBandXml(self, band=1, nodata=None, cells=None):
+      lines = ['  <PAMRasterBand band="%d">' % band]
+      if nodata is not None:
+         lines.append('    <NoDataValue>%r</NoDataValue>' % float(nodata))
+      hist = self.Histogram()
+      if hist is not None:
+         lo, hi, counts = hist
+         lines += ['    <Histograms>',
+                   '      <HistItem>',
+                   '        <HistMin>%r</HistMin>' % lo,
+                   '        <HistMax>%r</HistMax>' % hi,
+                   '        <BucketCount>%d</BucketCount>' % len(counts),
+                   '        <IncludeOutOfRange>0</IncludeOutOfRange>',
+                   '        <Approximate>0</Approximate>',
+                   '        <HistCounts>%s</HistCounts>' % '|'.join(str(c) for c in counts.tolist()),
+                   '      </HistItem>',
+                   '    </Histograms>']
+      stats = self.Statistics()
+      if stats is not None:
+         lines += ['    <Metadata>',
+                   '      <MDI key="STATISTICS_MINIMUM">%r</MDI>' % stats[0],
+                   '      <MDI key="STATISTICS_MAXIMUM">%r</MDI>' % stats[1],
+                   '      <MDI key="STATISTICS_MEAN">%r</MDI>' % stats[2],
+                   '      <MDI key="STATISTICS_STDDEV">%r</MDI>' % stats[3],
+                   '      <MDI key="STATISTICS_VALID_PERCENT">%r</MDI>' % (100.0 * self.count / cells if cells else 100.0),
+                   '      <MDI key="STATISTICS_SKIPFACTORX">1</MDI>',
+                   '      <MDI key="STATISTICS_SKIPFACTORY">1</MDI>',
+                   '    </Metadata>']
+      lines.append('  </PAMRasterBand>')
+      return '\n'.join(lines)
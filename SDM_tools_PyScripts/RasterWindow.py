@@ -0,0 +1,264 @@
+# ----------------------------------------------------------------------------------------
+# RasterWindow.py
+# Version:  Python 2.7.5 / ArcGIS 10.2.2
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Helper functions for reading rectangular windows of a raster directly into NumPy arrays.
+#     The window for a footprint is computed arithmetically from the footprint's extent, the
+#     buffer distance, and the raster's origin and cell size, so no temporary footprint, buffer,
+#     or clipped feature classes are needed.
+#
+# Usage Tips:
+#     Windows are expressed as (row0, col0, nrows, ncols) tuples relative to the upper left
+#     corner of the raster grid.  The window arithmetic does not need arcpy; arcpy is only
+#     imported by the functions that actually read or write raster data.
+#     A virtual mosaic index (<name>.vmos.json, see VirtualMosaic.py) can be given in place of a
+#     raster to GetRasterGrid and ReadWindow; windows are then read from the mosaic's tiles.
+#     So can a shared raster (<name>.shared.json, see SharedRaster.py); windows are then read-only
+#     views of its memory-mapped array.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import math # for rounding window edges to whole cells
+
+# Tolerance (as a fraction of a cell) used when snapping coordinates to cell edges
+SnapTol = 1e-6
+
+# Define class to hold the georeferencing of a raster grid
+class RasterGrid(object):
+   def __init__(self, xMin, yMax, cellX, cellY, ncols, nrows, nodata=None, spatialRef=None, pixelType=None):
+      self.xMin = float(xMin) # X coordinate of the left edge of the grid
+      self.yMax = float(yMax) # Y coordinate of the top edge of the grid
+      self.cellX = float(cellX) # Cell width
+      self.cellY = float(cellY) # Cell height
+      self.ncols = int(ncols)
+      self.nrows = int(nrows)
+      self.nodata = nodata # NoData value of the raster, if any
+      self.spatialRef = spatialRef # Spatial reference object (or WKT string) of the raster
+      self.pixelType = pixelType # arcpy pixel type code, e.g. 'F32' or 'U8'
+
+   @property
+   def xMax(self):
+      return self.xMin + self.ncols * self.cellX
+
+   @property
+   def yMin(self):
+      return self.yMax - self.nrows * self.cellY
+
+   def __repr__(self):
+      return 'RasterGrid(%s, %s, %s, %s, %s, %s)' % (self.xMin, self.yMax, self.cellX, self.cellY, self.ncols, self.nrows)
+
+# Define function to check whether a raster path names a virtual mosaic index
+def IsVirtual(inRaster):
+   return str(inRaster).lower().endswith('.vmos.json')
+
+# Define function to check whether a raster path names a shared raster sidecar
+def IsShared(inRaster):
+   return str(inRaster).lower().endswith('.shared.json')
+
+# Define function to get the grid of an existing raster
+def GetRasterGrid(inRaster):
+   if IsShared(inRaster):
+      import SharedRaster
+      return SharedRaster.Open(inRaster).grid
+   if IsVirtual(inRaster):
+      import VirtualMosaic
+      return VirtualMosaic.Open(inRaster).grid
+   import arcpy
+   r = arcpy.Raster(inRaster)
+   ext = r.extent
+   return RasterGrid(ext.XMin, ext.YMax, r.meanCellWidth, r.meanCellHeight, r.width, r.height,
+                     r.noDataValue, r.spatialReference, r.pixelType)
+
+# Define function to get a raster to use as the snap raster for outputs aligned with a raster.
+# For a virtual mosaic this is its first tile, whose alignment the mosaic takes, and for a shared
+# raster it is the snap raster of the raster it was made from.
+def SnapRaster(inRaster):
+   if IsShared(inRaster):
+      import SharedRaster
+      return SnapRaster(SharedRaster.Open(inRaster).source)
+   if IsVirtual(inRaster):
+      import VirtualMosaic
+      return VirtualMosaic.Open(inRaster).sources[0].path
+   return inRaster
+
+# Define function to compute the window of cells covering an extent, expanded by a buffer distance.
+# The buffer distance is in map units, and is rounded up to whole cells.  The window is clipped
+# to the grid; None is returned if the buffered extent does not overlap the grid at all.
+def BufferedWindow(grid, xMin, yMin, xMax, yMax, buffDist=0):
+   col0 = int(math.floor((xMin - buffDist - grid.xMin) / grid.cellX + SnapTol))
+   col1 = int(math.ceil((xMax + buffDist - grid.xMin) / grid.cellX - SnapTol))
+   row0 = int(math.floor((grid.yMax - yMax - buffDist) / grid.cellY + SnapTol))
+   row1 = int(math.ceil((grid.yMax - yMin + buffDist) / grid.cellY - SnapTol))
+   col0 = max(col0, 0)
+   row0 = max(row0, 0)
+   col1 = min(col1, grid.ncols)
+   row1 = min(row1, grid.nrows)
+   if col1 <= col0 or row1 <= row0:
+      return None
+   return (row0, col0, row1 - row0, col1 - col0)
+
+# Define function to compute the window of cells covering a geometry's extent, plus a buffer
+def GeometryWindow(grid, geom, buffDist=0):
+   ext = geom.extent
+   return BufferedWindow(grid, ext.XMin, ext.YMin, ext.XMax, ext.YMax, buffDist)
+
+# Define function to get the lower left corner (x, y) of a window, in map units
+def WindowLowerLeft(grid, window):
+   row0, col0, nrows, ncols = window
+   return (grid.xMin + col0 * grid.cellX, grid.yMax - (row0 + nrows) * grid.cellY)
+
+# Define function to get the extent (xMin, yMin, xMax, yMax) of a window, in map units
+def WindowExtent(grid, window):
+   row0, col0, nrows, ncols = window
+   x, y = WindowLowerLeft(grid, window)
+   return (x, y, x + ncols * grid.cellX, y + nrows * grid.cellY)
+
+# Define function to read a window of a raster into a NumPy array.
+# NoData cells are set to the nodata value (the raster's own NoData value by default).
+def ReadWindow(inRaster, grid, window, nodata=None):
+   if IsShared(inRaster):
+      import SharedRaster
+      return SharedRaster.Open(inRaster).ReadWindow(window, nodata)
+   if IsVirtual(inRaster):
+      import VirtualMosaic
+      return VirtualMosaic.Open(inRaster).ReadWindow(window, nodata)
+   import arcpy
+   if nodata is None:
+      nodata = grid.nodata
+   row0, col0, nrows, ncols = window
+   x, y = WindowLowerLeft(grid, window)
+   if nodata is None:
+      return arcpy.RasterToNumPyArray(inRaster, arcpy.Point(x, y), ncols, nrows)
+   return arcpy.RasterToNumPyArray(inRaster, arcpy.Point(x, y), ncols, nrows, nodata)
+
+# Define function to convert a window array back to a georeferenced raster.
+# If outRaster is given, the raster is saved there and assigned the grid's spatial reference.
+def WindowToRaster(array, grid, window, outRaster=None, nodata=None):
+   import arcpy
+   import numpy
+   array = numpy.ascontiguousarray(array) # a window of a shared raster is a view into a larger array
+   if nodata is None:
+      nodata = grid.nodata
+   x, y = WindowLowerLeft(grid, window)
+   if nodata is None:
+      ras = arcpy.NumPyArrayToRaster(array, arcpy.Point(x, y), grid.cellX, grid.cellY)
+   else:
+      ras = arcpy.NumPyArrayToRaster(array, arcpy.Point(x, y), grid.cellX, grid.cellY, nodata)
+   if outRaster:
+      ras.save(outRaster)
+      if grid.spatialRef is not None:
+         arcpy.DefineProjection_management(outRaster, grid.spatialRef)
+      return outRaster
+   return ras
+
+# Define function to get the rings of a polygon geometry as lists of (x, y) tuples.
+# Interior rings (holes) are returned as separate rings; the even-odd fill in PolygonMask
+# takes care of them.
+def GeometryRings(geom):
+   rings = list()
+   for part in geom:
+      ring = list()
+      for pnt in part:
+         if pnt is None: # separator between exterior and interior rings
+            if ring:
+               rings.append(ring)
+            ring = list()
+         else:
+            ring.append((pnt.X, pnt.Y))
+      if ring:
+         rings.append(ring)
+   return rings
+
+# Define function to rasterize polygon rings onto a window of a grid.
+# Returns a boolean array that is True for cells whose centers fall inside the polygon.
+def PolygonMask(rings, grid, window):
+   import numpy
+   row0, col0, nrows, ncols = window
+   mask = numpy.zeros((nrows, ncols), bool)
+
+   # Gather all ring edges as arrays of start and end coordinates
+   x0 = list()
+   y0 = list()
+   x1 = list()
+   y1 = list()
+   for ring in rings:
+      n = len(ring)
+      for i in range(n):
+         xa, ya = ring[i]
+         xb, yb = ring[(i + 1) % n]
+         if ya != yb: # horizontal edges never cross a scan line
+            x0.append(xa)
+            y0.append(ya)
+            x1.append(xb)
+            y1.append(yb)
+   if not x0:
+      return mask
+   x0 = numpy.array(x0)
+   y0 = numpy.array(y0)
+   x1 = numpy.array(x1)
+   y1 = numpy.array(y1)
+
+   # Scan each row of cell centers, filling between pairs of edge crossings
+   xCenter0 = grid.xMin + (col0 + 0.5) * grid.cellX
+   for r in range(nrows):
+      y = grid.yMax - (row0 + r + 0.5) * grid.cellY
+      cross = (y0 <= y) != (y1 <= y)
+      if not cross.any():
+         continue
+      ya = y0[cross]
+      xs = x0[cross] + (y - ya) * (x1[cross] - x0[cross]) / (y1[cross] - ya)
+      xs.sort()
+      cols = numpy.ceil((xs - xCenter0) / grid.cellX).astype(int)
+      cols = numpy.clip(cols, 0, ncols)
+      for c0, c1 in zip(cols[0::2], cols[1::2]):
+         mask[r, c0:c1] = True
+   return mask
+
+# Map arcpy pixel type codes to NumPy data type names
+PixelTypes = {'U1': 'uint8', 'U2': 'uint8', 'U4': 'uint8', 'U8': 'uint8', 'S8': 'int8',
+              'U16': 'uint16', 'S16': 'int16', 'U32': 'uint32', 'S32': 'int32',
+              'F32': 'float32', 'F64': 'float64'}
+
+# Define function to get the NumPy data type name of a grid's pixel type (float32 if unknown)
+def GridDtype(grid):
+   return PixelTypes.get(grid.pixelType, 'float32')
+
+# Define function to measure, for each cell of a window, the vertical distance (in cells) from the
+# cell center to the nearest polygon boundary crossing in the same column.  Cells in columns that
+# the polygon does not span get infinity.  For polygons elongated east-west, such as latitude
+# strips, this is the distance to the nearest north or south edge.
+def PolygonVerticalDistance(rings, grid, window):
+   import numpy
+   row0, col0, nrows, ncols = window
+   dist = numpy.empty((nrows, ncols))
+   dist.fill(numpy.inf)
+
+   # Gather the non-vertical edges that span some part of the window's columns
+   xLo = grid.xMin + col0 * grid.cellX
+   xHi = xLo + ncols * grid.cellX
+   edges = list()
+   for ring in rings:
+      n = len(ring)
+      for i in range(n):
+         xa, ya = ring[i]
+         xb, yb = ring[(i + 1) % n]
+         if xa != xb and max(xa, xb) >= xLo and min(xa, xb) <= xHi:
+            edges.append((xa, ya, xb, yb))
+   if not edges:
+      return dist
+   x0, y0, x1, y1 = [numpy.array(e) for e in zip(*edges)]
+
+   # Scan each column of cell centers for the edge crossings
+   ys = grid.yMax - (row0 + numpy.arange(nrows) + 0.5) * grid.cellY
+   for c in range(ncols):
+      x = xLo + (c + 0.5) * grid.cellX
+      cross = (x0 <= x) != (x1 <= x)
+      if not cross.any():
+         continue
+      xa = x0[cross]
+      yc = y0[cross] + (x - xa) * (y1[cross] - y0[cross]) / (x1[cross] - xa)
+      dist[:, c] = numpy.abs(ys[:, None] - yc[None, :]).min(1) / grid.cellY
+   return dist
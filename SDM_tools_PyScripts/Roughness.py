@@ -2,13 +2,21 @@
 # Roughness.py
 # Version:  Python 2.7.5 / ArcGIS 10.2.2
 # Creation Date: 2015-07-25
-# Last Edit: 2015-07-25
+# Last Edit: 2026-10-18
 # Creator:  Kirsten R. Hazler
 #
 # Summary:
 #     Uses an input Digital Elevation Model (DEM) to derive terrain roughness indices at three different scales. "Roughness" is defined as the standard deviation of elevation values within a specified neighborhood.  Scale is determined by the neighborhood radii (in units of raster cells) input by the user. Each neighborhood is defined as a circle with radius r, unless r = 1, in which case a square 3x3 neighborhood is used.
 
 # Processing is done by USGS quads or by other units defined by a polygon feature class. Thus, the output for each defined scale (neighborhood) is a set of rasters which will need to be mosaicked together later.
+
+# The work is done by the Roughness function, which can also be imported and called from Python.  Given a list of unit IDs, it processes only those units, so the units can be spread over several machines (see TileQueue.py).  When several processes on a machine run units of the same DEM, the DEM may be given as a shared raster (<name>.shared.json, see SharedRaster.py), decoded once and read by all of them as memory-mapped views.
+
+# If a cache folder is given, each output is kept in the cache (see RasterCache.py), keyed by the cells of the unit's DEM window, the unit's shape and the radius, so a rerun copies unchanged outputs from the cache rather than recomputing them.
+
+# Progress, throughput and the estimated time remaining are reported as each unit finishes, and written every minute to <ProcLogFile>_status.json, which can be watched from another shell with "python ProgressReport.py <status file>".
+
+# The time, CPU, memory and I/O of each unit and step are traced to <ProcLogFile>_trace.jsonl (see ProcTrace.py); run "python ProcTrace.py <trace>" to see which steps dominate.  Steps named in the optional profile parameter (e.g. 'FocalStatistics') are also profiled with cProfile.
 # -----------------------------------------------------------------------------------------
 
 # Import required modules
@@ -20,141 +28,187 @@ import sys # provides access to Python system functions
 import traceback # used for error handling
 import gc # garbage collection
 from datetime import datetime # for time-stamping
-
-# Script arguments to be input by user
-inDEM = arcpy.GetParameterAsText(0) # Input DEM
-   # Default: N:\SDM\ProcessedData\NED_Products\NED_mosaics.gdb\rd_NED30m
-inProcUnits = arcpy.GetParameterAsText(1) # Polygon feature class determining units to be processed
-   # Default : N:\SDM\ProcessedData\SDM_ReferenceLayers.gdb\fc_ned_1arcsec_g
-inFld = arcpy.GetParameterAsText(2) # Field containing the unit ID
-   # Default: FILE_ID
-R1 = arcpy.GetParameter(3) # Radius 1 (in raster cells)
-   # Default:  1
-R2 = arcpy.GetParameter(4) # Radius 2 (in raster cells)
-   # Default: 10
-R3 = arcpy.GetParameter(5) # Radius 3 (in raster cells)   
-   # Default: 100
-outGDB1 = arcpy.GetParameterAsText(6) # Geodatabase to hold final products for neighborhood 1
-outGDB2 = arcpy.GetParameterAsText(7) # Geodatabase to hold final products for neighborhood 2
-outGDB3 = arcpy.GetParameterAsText(8) # Geodatabase to hold final products for neighborhood 3
-scratchGDB = arcpy.GetParameterAsText(9) # Geodatabase to hold intermediate products
-ProcLogFile = arcpy.GetParameterAsText(10) # Text file to contain processing results
-
-# Additional script parameters and environment settings
-arcpy.env.overwriteOutput = True # Set overwrite option so that existing data may be overwritten
-arcpy.env.snapRaster = inDEM
-CellSize = int(arcpy.GetRasterProperties_management (inDEM, 'CELLSIZEX').getOutput(0))
-FailList = list() # List to keep track of units where processing failed
-maxRad = max(R1, R2, R3)
-
-# Create and open a log file.
-# If this log file already exists, it will be overwritten.  If it does not exist, it will be created.
-Log = open(ProcLogFile, 'w+') 
-FORMAT = '%Y-%m-%d %H:%M:%S'
-timestamp = datetime.now().strftime(FORMAT)
-Log.write("Process logging started %s \n" % timestamp)
-
-ProcUnits = arcpy.da.SearchCursor(inProcUnits, [inFld])
-
-for Unit in ProcUnits:
+import RasterWindow # for reading buffered DEM windows directly into arrays
+import ProgressReport # for reporting progress and the estimated time remaining
+import ProcTrace # for tracing the time and resources spent in each step
+import RasterCache # for reusing outputs computed before
+
+# Define function to derive the roughness rasters for each unit.  Returns the list of units where processing failed.
+# unitIDs limits the units processed to those listed (a list, or IDs separated by semicolons).
+# profileSteps names the steps to profile with cProfile (a list, or names separated by semicolons).
+def Roughness(inDEM, inProcUnits, inFld, R1, R2, R3, outGDB1, outGDB2, outGDB3, scratchGDB, ProcLogFile, cacheDir=None, unitIDs=None, profileSteps=None):
+   # Additional script parameters and environment settings
+   arcpy.env.overwriteOutput = True # Set overwrite option so that existing data may be overwritten
+   arcpy.env.snapRaster = RasterWindow.SnapRaster(inDEM)
+   DEMGrid = RasterWindow.GetRasterGrid(inDEM) # Origin, cell size and dimensions of the DEM
+   CellSize = DEMGrid.cellX
+   FailList = list() # List to keep track of units where processing failed
+   maxRad = max(R1, R2, R3)
+   cache = RasterCache.Open(cacheDir)
+   if isinstance(unitIDs, (str, type(u''))):
+      unitIDs = unitIDs.split(';')
+   if unitIDs is not None:
+      unitIDs = set(str(u) for u in unitIDs)
+
+   # Create and open a log file.
+   # If this log file already exists, it will be overwritten.  If it does not exist, it will be created.
+   Log = open(ProcLogFile, 'w+') 
+   FORMAT = '%Y-%m-%d %H:%M:%S'
+   timestamp = datetime.now().strftime(FORMAT)
+   Log.write("Process logging started %s \n" % timestamp)
+
+   # Start the trace of this run
+   TraceFile = os.path.splitext(ProcLogFile)[0] + '_trace.jsonl'
+   ProcTrace.Start(TraceFile, profileSteps)
    try:
-      UnitID = Unit[0]
-      arcpy.AddMessage('Working on unit %s...' % UnitID)
-        
-      # Make a feature class with the single unit's shape, then buffer it
-      # arcpy.AddMessage('Selecting feature...')
-      where_clause = "%s = '%s'" %(inFld, UnitID) # Create the feature selection expression
-      arcpy.MakeFeatureLayer_management (inProcUnits, 'selectFC', where_clause) 
-      
-      # arcpy.AddMessage('Buffering feature...')
-      buffFC = scratchGDB + os.sep + 'buffFC' + UnitID
-      buffDist = CellSize * maxRad
-      arcpy.Buffer_analysis ('selectFC', buffFC, buffDist)
-      
-      # Clip the DEM to the above feature
-      # arcpy.AddMessage('Clipping DEM to feature...')
-      clipDEM = scratchGDB + os.sep + 'clipDEM'
-      extent = arcpy.Describe(buffFC).extent
-      XMin = extent.XMin
-      YMin = extent.YMin
-      XMax = extent.XMax
-      YMax = extent.YMax
-      rectangle = '%s %s %s %s' %(XMin, YMin, XMax, YMax) 
-      arcpy.Clip_management (inDEM, rectangle, clipDEM, buffFC, '', 'ClippingGeometry', 'NO_MAINTAIN_EXTENT')
-      
-      # Set processing mask
-      arcpy.env.mask = clipDEM 
-   
-      # Loop through the focal statistics process for each radius
-      r = 1
-      for item in ((R1, outGDB1), (R2, outGDB2), (R3, outGDB3)):
-         # Define neighborhood
-         radius = item[0]
-         if radius == 1:
-            neighborhood = NbrRectangle(3, 3, "CELL")
-         else:
-            neighborhood = NbrCircle(radius, "CELL")
-            
-         # Specify output
-         gdb = item[1]
-         outRoughness = gdb + os.sep + "rough_" + UnitID + "_" + str(r)
-         
-         # Run focal statistics
-         arcpy.AddMessage('Calculating roughness for radius %s...' % r)
-         roughness = FocalStatistics (clipDEM, neighborhood, "STD", "DATA")
-         
-         # Clip to original unit shape
-         extent = arcpy.Describe('selectFC').extent
-         XMin = extent.XMin
-         YMin = extent.YMin
-         XMax = extent.XMax
-         YMax = extent.YMax
-         rectangle = '%s %s %s %s' %(XMin, YMin, XMax, YMax) 
-         arcpy.AddMessage('Clipping output for radius %s...' % r)
-         arcpy.Clip_management (roughness, rectangle, outRoughness, 'selectFC', '', 'ClippingGeometry', 'NO_MAINTAIN_EXTENT')
-         r += 1
-      
-   except:
-      # Error handling code swiped from "A Python Primer for ArcGIS"
-      tb = sys.exc_info()[2]
-      tbinfo = traceback.format_tb(tb)[0]
-      pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
-      msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
-
-      arcpy.AddWarning('Unable to process unit %s' % UnitID)
-      FailList.append(UnitID)
-      arcpy.AddWarning(msgs)
-      arcpy.AddWarning(pymsg)
-      arcpy.AddMessage(arcpy.GetMessages(1))
-      
-# List the units where processing failed
-if FailList:
-   msg = '\nProcessing failed for some units: \n'
-   Log.write(msg)
-   arcpy.AddMessage('%s See the processing log, %s' % (msg, ProcLogFile))
-   for unit in FailList:
-      Log.write('\n   -%s' % unit)
-      arcpy.AddMessage(unit) 
-      
-timestamp = datetime.now().strftime(FORMAT)
-Log.write("\nProcess logging ended %s" % timestamp)   
-Log.close()
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+      with ProcTrace.Span('Roughness', units=inProcUnits, dem=inDEM):
+         # Count the units, and the cells of their buffered DEM windows, for reporting progress
+         unitCells = dict()
+         with arcpy.da.SearchCursor(inProcUnits, [inFld, 'SHAPE@']) as cursor:
+            for Unit in cursor:
+               if unitIDs is not None and str(Unit[0]) not in unitIDs:
+                  continue
+               window = RasterWindow.GeometryWindow(DEMGrid, Unit[1], CellSize * maxRad)
+               unitCells[Unit[0]] = window[2] * window[3] if window is not None else 0
+         StatusFile = os.path.splitext(ProcLogFile)[0] + '_status.json'
+         Progress = ProgressReport.ProgressReporter(len(unitCells), sum(unitCells.values()), 'unit', StatusFile, arcpy.AddMessage)
+
+         ProcUnits = arcpy.da.SearchCursor(inProcUnits, [inFld, 'SHAPE@'])
+
+         for Unit in ProcUnits:
+            if unitIDs is not None and str(Unit[0]) not in unitIDs:
+               continue
+            UnitSpan = ProcTrace.Span('unit', id=str(Unit[0]))
+            UnitSpan.__enter__()
+            try:
+               UnitID = Unit[0]
+               UnitGeom = Unit[1]
+               arcpy.AddMessage('Working on unit %s...' % UnitID)
+               Progress.Begin(UnitID)
+
+               # Make a feature layer with the single unit's shape, for clipping the final outputs
+               # arcpy.AddMessage('Selecting feature...')
+               where_clause = "%s = '%s'" %(inFld, UnitID) # Create the feature selection expression
+               arcpy.MakeFeatureLayer_management (inProcUnits, 'selectFC', where_clause) 
+
+               # Read the DEM window covering the unit, buffered by the largest radius, straight into an array
+               # arcpy.AddMessage('Clipping DEM to feature...')
+               buffDist = CellSize * maxRad
+               window = RasterWindow.GeometryWindow(DEMGrid, UnitGeom, buffDist)
+               if window is None:
+                  raise ValueError('Unit %s does not overlap the DEM' % UnitID)
+               UnitSpan.Set(cells=window[2] * window[3])
+               arrDEM = ProcTrace.Call('ReadWindow', RasterWindow.ReadWindow, inDEM, DEMGrid, window)
+               if cache:
+                  demDigest = RasterCache.ArrayDigest(arrDEM, DEMGrid, window)
+               clipDEM = scratchGDB + os.sep + 'clipDEM'
+               ProcTrace.Call('WindowToRaster', RasterWindow.WindowToRaster, arrDEM, DEMGrid, window, clipDEM)
+               del arrDEM
+
+               # Set processing mask
+               arcpy.env.mask = clipDEM 
+
+               # Loop through the focal statistics process for each radius
+               r = 1
+               for item in ((R1, outGDB1), (R2, outGDB2), (R3, outGDB3)):
+                  # Define neighborhood
+                  radius = item[0]
+                  if radius == 1:
+                     neighborhood = NbrRectangle(3, 3, "CELL")
+                  else:
+                     neighborhood = NbrCircle(radius, "CELL")
+
+                  # Specify output
+                  gdb = item[1]
+                  outRoughness = gdb + os.sep + "rough_" + UnitID + "_" + str(r)
+
+                  # Copy the output from the cache if it was computed before from the same DEM cells
+                  if cache:
+                     key = cache.Key('Roughness', {'radius': radius, 'unit': UnitGeom.JSON}, digests=[demDigest])
+                     if ProcTrace.Call('CacheFetch', cache.Fetch, key, outRoughness):
+                        arcpy.AddMessage('Copied roughness for radius %s from the cache' % r)
+                        r += 1
+                        continue
+
+                  # Run focal statistics
+                  arcpy.AddMessage('Calculating roughness for radius %s...' % r)
+                  roughness = ProcTrace.Call('FocalStatistics', FocalStatistics, clipDEM, neighborhood, "STD", "DATA")
+
+                  # Clip to original unit shape
+                  extent = arcpy.Describe('selectFC').extent
+                  XMin = extent.XMin
+                  YMin = extent.YMin
+                  XMax = extent.XMax
+                  YMax = extent.YMax
+                  rectangle = '%s %s %s %s' %(XMin, YMin, XMax, YMax) 
+                  arcpy.AddMessage('Clipping output for radius %s...' % r)
+                  ProcTrace.Call('Clip', arcpy.Clip_management, roughness, rectangle, outRoughness, 'selectFC', '', 'ClippingGeometry', 'NO_MAINTAIN_EXTENT')
+                  if cache:
+                     ProcTrace.Call('CacheStore', cache.Store, key, outRoughness, 'Roughness')
+                  r += 1
+               UnitSpan.__exit__(None, None, None)
+               Progress.Done(UnitID, unitCells.get(UnitID))
+
+            except:
+               UnitSpan.__exit__(*sys.exc_info())
+               # Error handling code swiped from "A Python Primer for ArcGIS"
+               tb = sys.exc_info()[2]
+               tbinfo = traceback.format_tb(tb)[0]
+               pymsg = "PYTHON ERRORS:\nTraceback Info:\n" + tbinfo + "\nError Info:\n " + str(sys.exc_info()[1])
+               msgs = "ARCPY ERRORS:\n" + arcpy.GetMessages(2) + "\n"
+
+               arcpy.AddWarning('Unable to process unit %s' % UnitID)
+               FailList.append(UnitID)
+               arcpy.AddWarning(msgs)
+               arcpy.AddWarning(pymsg)
+               arcpy.AddMessage(arcpy.GetMessages(1))
+               Progress.Failed(UnitID, unitCells.get(UnitID))
+
+         Progress.Finish()
+
+         # List the units where processing failed
+         if FailList:
+            msg = '\nProcessing failed for some units: \n'
+            Log.write(msg)
+            arcpy.AddMessage('%s See the processing log, %s' % (msg, ProcLogFile))
+            for unit in FailList:
+               Log.write('\n   -%s' % unit)
+               arcpy.AddMessage(unit) 
+   finally:
+      # Finish the trace and the processing log, even if the run was stopped by an error
+      ProcTrace.Stop()
+      timestamp = datetime.now().strftime(FORMAT)
+      Log.write("\nProcess logging ended %s" % timestamp)   
+      Log.close()
+   return FailList
+
+# The script tool reads its parameters and runs the function
+if __name__ == '__main__':
+   # Script arguments to be input by user
+   inDEM = arcpy.GetParameterAsText(0) # Input DEM, or virtual mosaic of DEM tiles (<name>.vmos.json, see BuildVirtualDEM) or shared raster (see SharedRaster)
+      # Default: N:\SDM\ProcessedData\NED_Products\NED_mosaics.gdb\rd_NED30m
+   inProcUnits = arcpy.GetParameterAsText(1) # Polygon feature class determining units to be processed
+      # Default : N:\SDM\ProcessedData\SDM_ReferenceLayers.gdb\fc_ned_1arcsec_g
+   inFld = arcpy.GetParameterAsText(2) # Field containing the unit ID
+      # Default: FILE_ID
+   R1 = arcpy.GetParameter(3) # Radius 1 (in raster cells)
+      # Default:  1
+   R2 = arcpy.GetParameter(4) # Radius 2 (in raster cells)
+      # Default: 10
+   R3 = arcpy.GetParameter(5) # Radius 3 (in raster cells)   
+      # Default: 100
+   outGDB1 = arcpy.GetParameterAsText(6) # Geodatabase to hold final products for neighborhood 1
+   outGDB2 = arcpy.GetParameterAsText(7) # Geodatabase to hold final products for neighborhood 2
+   outGDB3 = arcpy.GetParameterAsText(8) # Geodatabase to hold final products for neighborhood 3
+   scratchGDB = arcpy.GetParameterAsText(9) # Geodatabase to hold intermediate products
+   ProcLogFile = arcpy.GetParameterAsText(10) # Text file to contain processing results
+   if arcpy.GetArgumentCount() > 11 and arcpy.GetParameterAsText(11):
+      cacheDir = arcpy.GetParameterAsText(11) # Folder holding the cache of derived rasters; optional
+   else:
+      cacheDir = None
+   if arcpy.GetArgumentCount() > 12 and arcpy.GetParameterAsText(12):
+      profileSteps = arcpy.GetParameterAsText(12) # Steps to profile with cProfile, separated by semicolons; optional
+   else:
+      profileSteps = None
+
+   Roughness(inDEM, inProcUnits, inFld, R1, R2, R3, outGDB1, outGDB2, outGDB3, scratchGDB, ProcLogFile, cacheDir, profileSteps=profileSteps)
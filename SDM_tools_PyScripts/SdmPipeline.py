@@ -0,0 +1,447 @@
+# ----------------------------------------------------------------------------------------
+# SdmPipeline.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Runs the build of the SDM environmental variables as a pipeline of the tools' scripts,
+#     described in a JSON file.  The runner knows the parameters of each tool and which of them are
+#     inputs and outputs, so it works out the order of the stages from their paths: a stage that
+#     reads what another stage writes runs after it.  Independent branches (e.g. the solar radiation
+#     chain BatchDownloadZipFiles > BatchExtractZipfiles > ImportNED > BatchSolarRad >
+#     MosaicSolarStrips > FinalizeSDM_EVgrid, and the hydro chain nhdToRaster > MosaicRasterNHD >
+#     HydroDistance) run at the same time, each stage in its own Python process.
+#
+#     A stage is skipped if it has run before with the same script, the same parameters and the
+#     same inputs (compared by size and modification time), and its outputs have not changed since.
+#     So a rerun after a failure, or after new input data arrives, runs only what is needed.
+#
+# Usage Tips:
+#     Run from the command line with the Python installed with ArcGIS, e.g.
+#        python SdmPipeline.py ev_build.json --dry-run     (show what would run)
+#        python SdmPipeline.py ev_build.json --jobs 3
+#        python SdmPipeline.py ev_build.json --target hydroDist --force nhdRaster
+#     The pipeline file names each stage, its tool and its parameters (by the names used in the
+#     tool's script); "{name}" in a value is replaced by the entry of "vars" of that name:
+#        {"vars": {"root": "N:/SDM"},
+#         "stages": {
+#            "nhdRaster": {"tool": "nhdToRaster", "params": {"inGDB": "{root}/NHD/NHDH0204.gdb;...",
+#                          "inFCodes": "{root}/ref.gdb/tb_nhdFCodes", ..., "outGDB": "{root}/nhd_rasters.gdb"}},
+#            "hydroMosaic": {"tool": "MosaicRasterNHD", "params": {"inGDB": "{root}/nhd_rasters.gdb", "outGDB": "{root}/mosaics", ...}},
+#            ...}}
+#     A stage may also list extra "inputs", "outputs", and stages to run "after".  A tool may be
+#     used by several stages (e.g. MosaicSolarStrips once per season).
+#     The state of each stage is kept in <pipeline file>.state.json, and the output of each stage's
+#     script in <pipeline file>_logs/<stage>.log.
+#     The scripts report most errors as messages rather than failing, so a stage is also treated as
+#     failed if any of its outputs is missing when it finishes.  Stages after a failed stage are not run.
+#     Paths inside a file geodatabase are stamped by the geodatabase as a whole, so a change to one
+#     dataset in a geodatabase makes the stages reading any dataset in it run again.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import argparse # for the command line
+import hashlib # for the fingerprint of each stage
+import json # for the pipeline and state files
+import os # provides access to operating system funtionality such as file and directory paths
+import re # for substituting variables
+import subprocess # for running the stages' scripts
+import sys # provides access to Python system functions
+import threading # for running stages at the same time
+import time # for timing stages
+from datetime import datetime # for time-stamping
+try:
+   from Queue import Queue # Python 2
+except ImportError:
+   from queue import Queue # Python 3
+
+# Folder holding the tools' scripts
+ScriptDir = os.path.dirname(os.path.abspath(__file__))
+
+# Define class to describe a tool: its script, the names of its parameters in order, the
+# parameters that are inputs, and its outputs.  An output is the name of a parameter, or a
+# (folder, name) pair of parameters for a GeoTIFF (<name>.tif) written by the mosaic tools into a
+# folder, or into the folder containing a geodatabase if one is given.
+class Tool(object):
+   def __init__(self, script, params, inputs, outputs):
+      self.script = script
+      self.params = params
+      self.inputs = inputs
+      self.outputs = outputs
+
+# The tools of the environmental variable build
+Tools = {
+   'BatchDownloadZipFiles': Tool('BatchDownloadZipFiles.py', ['in_tab', 'in_fld', 'pre', 'suf', 'out_dir', 'ftpHOST', 'ftpDIR', 'nThreads'],
+                                 ['in_tab'], ['out_dir']),
+   'BatchExtractZipfiles': Tool('BatchExtractZipfiles.py', ['ZipDir', 'OutDir', 'Include', 'Exclude', 'nProcs'],
+                                ['ZipDir'], ['OutDir']),
+   'ImportNED': Tool('ImportNED.py', ['nedDir', 'nedGDB', 'nProcs'],
+                     ['nedDir'], ['nedGDB']),
+   'BatchSolarRad': Tool('BatchSolarRad.py', ['in_DEM', 'z_factor', 'in_Tiles', 'fld_ID', 'out_GDB1', 'out_GDB2', 'out_GDB3', 'ProcLog', 'profileSteps'],
+                         ['in_DEM', 'in_Tiles'], ['out_GDB1', 'out_GDB2', 'out_GDB3']),
+   'MosaicSolarStrips': Tool('MosaicSolarStrips.py', ['inGDB', 'inFprints', 'joinFld', 'mosaicName', 'scratchGDB', 'outGDB', 'ProcLog', 'nThreads', 'blendWidth'],
+                             ['inGDB', 'inFprints'], [('outGDB', 'mosaicName')]),
+   'FinalizeSDM_EVgrid': Tool('FinalizeSDM_EVgrid.py', ['inRaster', 'Multiplier', 'outRaster', 'cacheDir'],
+                              ['inRaster'], ['outRaster']),
+   'nhdToRaster': Tool('nhdToRaster.py', ['inGDB', 'inFCodes', 'fldMarine', 'fldEstuary', 'fldInland', 'inSnap', 'outGDB', 'scratchGDB', 'statusFile'],
+                       ['inGDB', 'inFCodes', 'inSnap'], ['outGDB']),
+   'MosaicRasterNHD': Tool('MosaicRasterNHD.py', ['inGDB', 'inSnap', 'mosaicName', 'scratchGDB', 'outGDB', 'ProcLog', 'nThreads'],
+                           ['inGDB', 'inSnap'], [('outGDB', 'mosaicName')]),
+   'HydroDistance': Tool('HydroDistance.py', ['inHydro', 'procMask', 'outGDB', 'cacheDir'],
+                         ['inHydro', 'procMask'], ['outGDB']),
+}
+
+# Define function to normalize a path for comparison
+def NormPath(path):
+   return os.path.normcase(os.path.normpath(os.path.abspath(path)))
+
+# Define function to check whether a path is the same as, or inside, another
+def IsWithin(path, folder):
+   return path == folder or path.startswith(folder.rstrip(os.sep) + os.sep)
+
+# Define function to get the path on disk that holds a dataset: the dataset itself if it exists,
+# otherwise the file geodatabase it is in.  Returns None if neither exists.
+def DiskPath(path):
+   if os.path.exists(path):
+      return path
+   parent = path
+   while True:
+      parent, child = os.path.split(parent)
+      if not child:
+         return None
+      if parent.lower().endswith('.gdb'):
+         return parent if os.path.isdir(parent) else None
+
+# Define function to get the stamp of a dataset: [files, bytes, latest modification time] of the
+# file or of all files in the folder, or None if it does not exist.  Lock files are ignored, as
+# readers create them.
+def Stamp(path):
+   disk = DiskPath(path)
+   if disk is None:
+      return None
+   if os.path.isfile(disk):
+      st = os.stat(disk)
+      return [1, st.st_size, int(st.st_mtime)]
+   files = 0
+   size = 0
+   latest = int(os.stat(disk).st_mtime) if not disk.lower().endswith('.gdb') else 0
+   for root, dirs, names in os.walk(disk):
+      for name in names:
+         if name.lower().endswith('.lock'):
+            continue
+         try:
+            st = os.stat(os.path.join(root, name))
+         except OSError:
+            continue # removed while walking
+         files += 1
+         size += st.st_size
+         latest = max(latest, int(st.st_mtime))
+   return [files, size, latest]
+
+# Define function to move a file into place, replacing any existing file in one step, so that
+# other processes see either the old file or the new one, never neither
+def ReplaceFile(src, dst):
+   if hasattr(os, 'replace'):
+      os.replace(src, dst) # Python 3
+   elif os.name == 'nt':
+      # Python 2 on Windows, where os.rename cannot replace a file
+      import ctypes
+      enc = sys.getfilesystemencoding()
+      src = src.decode(enc) if isinstance(src, bytes) else src
+      dst = dst.decode(enc) if isinstance(dst, bytes) else dst
+      if not ctypes.windll.kernel32.MoveFileExW(src, dst, 0x1 | 0x8): # MOVEFILE_REPLACE_EXISTING | MOVEFILE_WRITE_THROUGH
+         raise ctypes.WinError()
+   else:
+      os.rename(src, dst)
+
+# Define function to hash the contents of a file
+def FileHash(path):
+   h = hashlib.sha1()
+   with open(path, 'rb') as f:
+      for chunk in iter(lambda: f.read(1 << 20), b''):
+         h.update(chunk)
+   return h.hexdigest()
+
+# Define function to get the Python to run the scripts with: inside ArcGIS, sys.executable is the
+# ArcGIS application, so the Python installed with ArcGIS is used instead
+def PythonExecutable():
+   if os.path.basename(sys.executable).lower().startswith('python'):
+      return sys.executable
+   exe = os.path.join(sys.exec_prefix, 'python.exe')
+   return exe if os.path.exists(exe) else sys.executable
+
+# Define function to substitute "{name}" variables in a value
+def Substitute(value, variables):
+   if not isinstance(value, (str, type(u''))):
+      return value
+   return re.sub(r'\{(\w+)\}', lambda m: str(variables.get(m.group(1), m.group(0))), value)
+
+# Define class to hold one stage of a pipeline
+class Stage(object):
+   def __init__(self, name, spec, variables):
+      self.name = name
+      toolName = spec.get('tool', name)
+      if toolName not in Tools:
+         raise ValueError('Stage %s: unknown tool %s' % (name, toolName))
+      self.tool = Tools[toolName]
+      params = dict((k, Substitute(v, variables)) for k, v in spec.get('params', dict()).items())
+      unknown = set(params) - set(self.tool.params)
+      if unknown:
+         raise ValueError('Stage %s: unknown parameters of %s: %s' % (name, toolName, ', '.join(sorted(unknown))))
+      self.params = params
+      self.inputs = list()
+      for p in self.tool.inputs:
+         self.inputs.extend(v for v in params.get(p, '').split(';') if v)
+      self.inputs.extend(Substitute(v, variables) for v in spec.get('inputs', list()))
+      self.outputs = list()
+      for p in self.tool.outputs:
+         if isinstance(p, tuple):
+            folder, rName = params.get(p[0]), params.get(p[1])
+            if folder and rName:
+               if folder.lower().endswith('.gdb'):
+                  folder = os.path.dirname(folder)
+               self.outputs.append(os.path.join(folder, rName + '.tif'))
+         elif params.get(p):
+            self.outputs.append(params[p])
+      self.outputs.extend(Substitute(v, variables) for v in spec.get('outputs', list()))
+      self.after = set(spec.get('after', list()))
+
+   # Define method to get the script's arguments, in order; skipped optional parameters are passed as '#'
+   def Arguments(self):
+      given = [i for i, p in enumerate(self.tool.params) if p in self.params]
+      last = max(given) if given else -1
+      return [str(self.params.get(p, '#')) for p in self.tool.params[:last + 1]]
+
+   # Define method to compute the fingerprint of the stage's script, arguments and inputs
+   def Fingerprint(self):
+      data = {'script': FileHash(os.path.join(ScriptDir, self.tool.script)), 'args': self.Arguments(),
+              'inputs': [(p, Stamp(p)) for p in sorted(self.inputs)]}
+      return hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+   # Define method to get the current stamps of the stage's outputs
+   def OutputStamps(self):
+      return dict((p, Stamp(p)) for p in self.outputs)
+
+# Define class to hold a pipeline of stages and the state of its earlier runs
+class Pipeline(object):
+   def __init__(self, path):
+      self.path = path
+      with open(path) as f:
+         spec = json.load(f)
+      variables = spec.get('vars', dict())
+      self.stages = dict((name, Stage(name, s, variables)) for name, s in spec['stages'].items())
+      self.python = spec.get('python') or PythonExecutable()
+      base = os.path.splitext(path)[0]
+      self.statePath = base + '.state.json'
+      self.logDir = base + '_logs'
+      try:
+         with open(self.statePath) as f:
+            self.state = json.load(f)
+      except (IOError, OSError, ValueError):
+         self.state = dict()
+      self.lock = threading.Lock()
+      self.deps = self.Dependencies()
+      self.order = self.Order()
+
+   # Define method to work out which stages each stage must follow, from their paths
+   def Dependencies(self):
+      deps = dict()
+      for name, stage in self.stages.items():
+         deps[name] = set(stage.after)
+         missing = stage.after - set(self.stages)
+         if missing:
+            raise ValueError('Stage %s follows unknown stages: %s' % (name, ', '.join(sorted(missing))))
+         inputs = [NormPath(p) for p in stage.inputs]
+         for other, upstream in self.stages.items():
+            if other == name:
+               continue
+            for out in [NormPath(p) for p in upstream.outputs]:
+               if any(IsWithin(i, out) or IsWithin(out, i) for i in inputs):
+                  deps[name].add(other)
+                  break
+      return deps
+
+   # Define method to put the stages in an order that respects their dependencies
+   def Order(self):
+      order = list()
+      done = set()
+      while len(order) < len(self.stages):
+         ready = sorted(n for n in self.stages if n not in done and self.deps[n] <= done)
+         if not ready:
+            raise ValueError('The stages depend on each other in a cycle: %s' % ', '.join(sorted(set(self.stages) - done)))
+         order.extend(ready)
+         done.update(ready)
+      return order
+
+   # Define method to get the stages needed for some targets (the targets and all stages before them)
+   def Needed(self, targets):
+      needed = set()
+      todo = list(targets)
+      while todo:
+         name = todo.pop()
+         if name not in self.stages:
+            raise ValueError('Unknown stage %s' % name)
+         if name not in needed:
+            needed.add(name)
+            todo.extend(self.deps[name])
+      return needed
+
+   # Define method to check whether a stage is up to date with its script, parameters and inputs
+   def IsCurrent(self, stage):
+      entry = self.state.get(stage.name)
+      if not entry or not entry.get('ok'):
+         return False
+      if entry.get('fingerprint') != stage.Fingerprint():
+         return False
+      stamps = stage.OutputStamps()
+      for p in stage.outputs:
+         if stamps[p] is None:
+            return False
+         # A dataset inside a geodatabase is stamped by the whole geodatabase, which other stages
+         # may also write to, so only its geodatabase's existence is checked
+         if DiskPath(p) == p and stamps[p] != entry['outputs'].get(p):
+            return False
+      return True
+
+   # Define method to save the state file
+   def SaveState(self):
+      with self.lock:
+         tmp = self.statePath + '.tmp'
+         with open(tmp, 'w') as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+         ReplaceFile(tmp, self.statePath)
+
+   # Define method to run a stage's script.  Returns (ok, message).
+   def RunStage(self, stage):
+      if not os.path.isdir(self.logDir):
+         os.makedirs(self.logDir)
+      logPath = os.path.join(self.logDir, stage.name + '.log')
+      fingerprint = stage.Fingerprint()
+      cmd = [self.python, os.path.join(ScriptDir, stage.tool.script)] + stage.Arguments()
+      start = time.time()
+      with open(logPath, 'w') as log:
+         log.write('%s\n\n' % subprocess.list2cmdline(cmd))
+         log.flush()
+         code = subprocess.call(cmd, stdout=log, stderr=subprocess.STDOUT, cwd=ScriptDir)
+      seconds = time.time() - start
+      stamps = stage.OutputStamps()
+      missing = [p for p in stage.outputs if stamps[p] is None]
+      if code != 0:
+         ok, msg = False, 'exit code %s' % code
+      elif missing:
+         ok, msg = False, 'outputs missing: %s' % '; '.join(missing)
+      else:
+         ok, msg = True, 'completed'
+      with self.lock:
+         self.state[stage.name] = {'ok': ok, 'fingerprint': fingerprint, 'outputs': stamps, 'seconds': seconds,
+                                   'finished': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'log': logPath}
+      self.SaveState()
+      return ok, '%s in %.0f seconds (see %s)' % (msg, seconds, logPath)
+
+   # Define method to run the pipeline.  targets limits the run to some stages and those before them;
+   # force names stages to run even if up to date (the stages after them then run too, as their
+   # inputs change).  With dryRun, only reports what would run.  Returns the names of failed stages.
+   def Run(self, targets=None, force=(), jobs=2, dryRun=False, report=None):
+      if jobs < 1:
+         raise ValueError('The number of stages to run at once must be at least 1, not %s' % jobs)
+      report = report or Print
+      needed = self.Needed(targets) if targets else set(self.stages)
+      force = set(force)
+      if dryRun:
+         willRun = set()
+         for name in self.order:
+            if name not in needed:
+               continue
+            stage = self.stages[name]
+            if name in force or self.deps[name] & willRun:
+               why = 'forced' if name in force else 'after ' + ', '.join(sorted(self.deps[name] & willRun))
+            elif not self.IsCurrent(stage):
+               why = 'out of date'
+            else:
+               report('%-20s up to date' % name)
+               continue
+            willRun.add(name)
+            report('%-20s would run (%s): %s' % (name, why, stage.tool.script))
+         return list()
+
+      results = Queue()
+      pending = set(needed)
+      running = set()
+      finished = set()
+      failed = list()
+      while pending or running:
+         # Start every stage whose stages before it have all finished, up to the number of jobs
+         for name in [n for n in self.order if n in pending]:
+            deps = self.deps[name] & needed
+            if deps & set(failed):
+               pending.discard(name)
+               failed.append(name)
+               report('%s not run: a stage before it failed' % name)
+               continue
+            if not deps <= finished or len(running) >= jobs:
+               continue
+            pending.discard(name)
+            stage = self.stages[name]
+            if name not in force and self.IsCurrent(stage):
+               finished.add(name)
+               report('%s is up to date; skipped' % name)
+               continue
+            running.add(name)
+            report('Starting %s (%s)...' % (name, stage.tool.script))
+            thread = threading.Thread(target=self.RunThread, args=(stage, results))
+            thread.daemon = True
+            thread.start()
+         if not running:
+            if pending:
+               # Every stage is started in the same pass as the stages before it finish, so
+               # stages still pending with none running can never start
+               raise RuntimeError('Stages cannot start: %s' % ', '.join(n for n in self.order if n in pending))
+            continue
+         name, ok, msg = results.get()
+         running.discard(name)
+         if ok:
+            finished.add(name)
+            report('Finished %s: %s' % (name, msg))
+         else:
+            failed.append(name)
+            report('FAILED %s: %s' % (name, msg))
+      return failed
+
+   # Define method to run a stage in a thread, putting (name, ok, message) on a queue
+   def RunThread(self, stage, results):
+      try:
+         ok, msg = self.RunStage(stage)
+      except Exception as e:
+         ok, msg = False, '%s: %s' % (e.__class__.__name__, e)
+      results.put((stage.name, ok, msg))
+
+# Define function to show a time-stamped message
+def Print(msg):
+   sys.stdout.write('%s  %s\n' % (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), msg))
+   sys.stdout.flush()
+
+# Define function to run a pipeline from the command line.  Returns the exit code.
+def Main(argv=None):
+   parser = argparse.ArgumentParser(description='Run the SDM environmental variable build as a pipeline.')
+   parser.add_argument('pipeline', help='pipeline file (JSON)')
+   parser.add_argument('--target', nargs='+', help='stages to bring up to date, with the stages before them (default: all)')
+   parser.add_argument('--force', nargs='+', default=[], help='stages to run even if up to date')
+   parser.add_argument('--jobs', type=int, default=2, help='number of stages to run at once')
+   parser.add_argument('--dry-run', action='store_true', help='only show which stages would run')
+   args = parser.parse_args(argv)
+   if args.jobs < 1:
+      parser.error('--jobs must be at least 1')
+
+   pipeline = Pipeline(args.pipeline)
+   for name in pipeline.order:
+      deps = sorted(pipeline.deps[name])
+      Print('%-20s %-26s after: %s' % (name, pipeline.stages[name].tool.script, ', '.join(deps) or '-'))
+   failed = pipeline.Run(args.target, args.force, args.jobs, args.dry_run)
+   if failed:
+      Print('Failed stages: %s' % ', '.join(failed))
+      return 1
+   return 0
+
+if __name__ == '__main__':
+   sys.exit(Main())
@@ -0,0 +1,169 @@
+# ----------------------------------------------------------------------------------------
+# SharedRaster.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Exposes a raster (e.g. the DEM, or a virtual mosaic of DEM tiles) as one uncompressed array
+#     on a local disk, memory-mapped by every process that reads it.  When several processes each
+#     read their own buffered window of the same DEM (e.g. tiles of BatchSolarRad or units of
+#     Roughness run by TileQueue workers), each would otherwise read and decode the raster, and the
+#     halos of neighbouring windows again and again.  The raster is decoded once instead; windows
+#     are then NumPy views of the memory-mapped array, with no read or copy, and the pages read
+#     are kept once in the operating system's file cache for all processes on the machine.
+#     The array is a NumPy .npy file, with a small JSON sidecar (<name>.shared.json) holding the
+#     raster's grid, spatial reference and source.
+#
+# Usage Tips:
+#     Share the DEM once on each machine, with the Python installed with ArcGIS:
+#        python SharedRaster.py N:/dem.vmos.json --dir D:/shared
+#     which prints the sidecar's path (e.g. D:/shared/dem_3f0c9a1b2d.shared.json), then give that
+#     path in place of the DEM to the tools (e.g. in a TileQueue.py job file).
+#     RasterWindow.GetRasterGrid, RasterWindow.ReadWindow and RasterWindow.SnapRaster accept a
+#     shared raster as they accept a virtual mosaic.  Windows read from a shared raster are
+#     read-only views; copy one (array.copy()) before changing it.
+#     Sharing a raster again reuses the array if its source has not changed since (by the size and
+#     modification time of its files, or of a virtual mosaic's index and tiles).
+#     The array takes the raster's full uncompressed size (rows x columns x bytes per cell) on the
+#     local disk; the default folder is SDM_shared in the temporary folder.
+#     Windows of a shared raster are only shared by processes on the same machine; a shared
+#     folder on a network drive works but gives no benefit over reading the raster itself.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import argparse # for the command line
+import hashlib # for the names of shared arrays
+import json # for the sidecar
+import os # provides access to operating system funtionality such as file and directory paths
+import sys # provides access to Python system functions
+import tempfile # for the default folder
+import threading # for guarding the cache of opened rasters
+import numpy
+import RasterWindow # for raster grids and reads
+import SdmPipeline # for the stamps of files and geodatabases
+import VirtualMosaic # for converting grids to and from the sidecar
+
+# File name ending of shared raster sidecars
+Extension = '.shared.json'
+
+# Number of rows read at once when sharing a raster
+ShareRows = 1024
+
+# Define function to get the default folder for shared rasters
+def DefaultDir():
+   return os.path.join(tempfile.gettempdir(), 'SDM_shared')
+
+# Define function to get the stamp of a raster: the stamps of its files, or of a virtual mosaic's
+# index and tiles
+def SourceStamp(inRaster):
+   stamps = [SdmPipeline.Stamp(os.path.abspath(inRaster))]
+   if RasterWindow.IsVirtual(inRaster):
+      stamps.extend(SdmPipeline.Stamp(s.path) for s in VirtualMosaic.Open(inRaster).sources)
+   return stamps
+
+# Define function to get the path of the sidecar of a raster shared in a folder.  The name is the
+# raster's name with a hash of its full path, so rasters of the same name do not collide.
+def SharedPath(inRaster, sharedDir=None):
+   path = os.path.abspath(inRaster)
+   name = os.path.basename(path.rstrip('\\/'))
+   if RasterWindow.IsVirtual(name):
+      name = name[:-len(VirtualMosaic.Extension)]
+   name = os.path.splitext(name)[0]
+   digest = hashlib.sha1(os.path.normcase(path).encode('utf-8')).hexdigest()[:10]
+   return os.path.join(sharedDir or DefaultDir(), '%s_%s%s' % (name, digest, Extension))
+
+# Define function to get the path of the array of a shared raster, from its sidecar's path
+def ArrayPath(path):
+   return path[:-len(Extension)] + '.npy'
+
+# Define function to read the sidecar of a shared raster, or None if there is none or it is unreadable
+def ReadSidecar(path):
+   try:
+      with open(path) as f:
+         return json.load(f)
+   except (IOError, OSError, ValueError):
+      return None
+
+# Define function to expose a raster as a shared array in a folder, unless it is already shared
+# and its source is unchanged.  The array is written under a temporary name and renamed, and the
+# sidecar is written last, so readers never see a shared raster half written.  Returns the path
+# of the sidecar.
+def Share(inRaster, sharedDir=None, rows=ShareRows):
+   path = SharedPath(inRaster, sharedDir)
+   stamp = SourceStamp(inRaster)
+   doc = ReadSidecar(path)
+   if doc is not None and doc.get('stamp') == stamp and os.path.exists(ArrayPath(path)):
+      return path
+   if not os.path.isdir(os.path.dirname(path)):
+      os.makedirs(os.path.dirname(path))
+   grid = RasterWindow.GetRasterGrid(inRaster)
+   tmp = '%s.%s.tmp.npy' % (path[:-len(Extension)], os.getpid())
+   array = numpy.lib.format.open_memmap(tmp, mode='w+', dtype=RasterWindow.GridDtype(grid), shape=(grid.nrows, grid.ncols))
+   for row0 in range(0, grid.nrows, rows):
+      window = (row0, 0, min(rows, grid.nrows - row0), grid.ncols)
+      array[row0:row0 + window[2]] = RasterWindow.ReadWindow(inRaster, grid, window)
+   array.flush()
+   del array
+   # Remove an out-of-date sidecar and array, the sidecar first so that no reader pairs it with
+   # the new array.  On Windows this fails while another process still has the old array open.
+   for old in (path, ArrayPath(path)):
+      if os.path.exists(old):
+         os.remove(old)
+   os.rename(tmp, ArrayPath(path))
+   doc = {'source': os.path.abspath(inRaster), 'stamp': stamp, 'grid': VirtualMosaic.GridToDict(grid),
+          'spatialRef': VirtualMosaic.SpatialRefText(grid.spatialRef)}
+   with open(path + '.tmp', 'w') as f:
+      json.dump(doc, f, indent=1)
+   os.rename(path + '.tmp', path)
+   return path
+
+# Define class to read windows of a shared raster
+class SharedRaster(object):
+   def __init__(self, path):
+      self.path = path
+      doc = ReadSidecar(path)
+      if doc is None:
+         raise IOError('Cannot read shared raster %s' % path)
+      self.source = doc['source']
+      self.grid = VirtualMosaic.GridFromDict(doc['grid'], doc.get('spatialRef'))
+      self.array = numpy.load(ArrayPath(path), mmap_mode='r')
+
+   # Define method to read a window of the raster, as a read-only view of the shared array.
+   # If nodata differs from the raster's NoData value, NoData cells are set to it in a copy.
+   def ReadWindow(self, window, nodata=None):
+      row0, col0, nrows, ncols = window
+      out = self.array[row0:row0 + nrows, col0:col0 + ncols]
+      if nodata is not None and self.grid.nodata is not None and nodata != self.grid.nodata:
+         out = numpy.array(out)
+         out[out == self.grid.nodata] = nodata
+      return out
+
+# Cache of opened shared rasters, keyed by path, with the sidecar's modification time
+Cache = dict()
+CacheLock = threading.Lock()
+
+# Define function to open a shared raster, reusing one already opened if its sidecar is unchanged
+def Open(path):
+   key = os.path.abspath(path)
+   mtime = os.path.getmtime(key)
+   with CacheLock:
+      cached = Cache.get(key)
+      if cached is None or cached[0] != mtime:
+         cached = (mtime, SharedRaster(key))
+         Cache[key] = cached
+   return cached[1]
+
+# Define function to share a raster from the command line.  Returns the exit code.
+def Main(argv=None):
+   parser = argparse.ArgumentParser(description='Expose a raster as a memory-mapped array shared by the processes of this machine.')
+   parser.add_argument('raster', help='raster or virtual mosaic (<name>.vmos.json) to share')
+   parser.add_argument('--dir', help='local folder for the shared array (default: SDM_shared in the temporary folder)')
+   parser.add_argument('--rows', type=int, default=ShareRows, help='rows read at once')
+   args = parser.parse_args(argv)
+
+   print(Share(args.raster, args.dir, args.rows))
+   return 0
+
+if __name__ == '__main__':
+   sys.exit(Main())
@@ -0,0 +1,171 @@
+# ----------------------------------------------------------------------------------------
+# SyntheticData.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Generates reproducible synthetic data for benchmarking the SDM tools without real data or arcpy:
+#     - Fractal DEMs (spectral synthesis of 1/f noise), in one piece or as overlapping tiles.
+#     - Classified hydro rasters with the values of nhdToRaster's output (1 = streams, 2 = inland
+#       lakes and rivers, 3 = estuary, 4 = sea/ocean, 0 = NoData), derived from a DEM.
+#     - NHD-like polygons and lines (as WKB) with real NHD FCodes.
+#     - East-west strips with footprint polygons, like the solar radiation latitude strips.
+#     The same seed always gives the same data.
+#
+# Usage Tips:
+#     Grids use a 30-meter cell in a projected coordinate system; the spatial reference is None.
+#     Arrays are held in memory, so the largest scales need a few gigabytes.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import math # for polygon vertices
+import struct # for packing WKB
+import numpy
+import RasterWindow # for raster grids
+
+# NHD FCodes of the synthetic polygons (NHDArea / NHDWaterbody) and lines (NHDFlowline), with their relative frequencies
+PolygonFCodes = [(39004, 0.40), (43600, 0.10), (46600, 0.20), (46006, 0.15), (44500, 0.05), (46602, 0.10)]
+LineFCodes = [(46006, 0.55), (46003, 0.25), (55800, 0.15), (33600, 0.05)]
+
+# Define function to make a grid of the given size, with 30-meter cells
+def MakeGrid(nrows, ncols, cell=30.0, xMin=1000000.0, yMax=2000000.0, nodata=None, pixelType='F32'):
+   return RasterWindow.RasterGrid(xMin, yMax, cell, cell, ncols, nrows, nodata, None, pixelType)
+
+# Define function to generate a fractal DEM (elevations in meters) by spectral synthesis.
+# beta is the spectral exponent: 2 gives rough terrain, larger values smoother terrain.
+def FractalDem(nrows, ncols, seed=0, beta=2.4, relief=600.0):
+   rng = numpy.random.RandomState(seed)
+   fy = numpy.fft.fftfreq(nrows)[:, None]
+   fx = numpy.fft.rfftfreq(ncols)[None, :]
+   f = numpy.sqrt(fx * fx + fy * fy)
+   f[0, 0] = 1.0
+   amp = f ** (-beta / 2.0)
+   amp[0, 0] = 0.0
+   phase = rng.uniform(0, 2 * numpy.pi, amp.shape)
+   spec = amp * (numpy.cos(phase) + 1j * numpy.sin(phase))
+   dem = numpy.fft.irfft2(spec, (nrows, ncols))
+   dem -= dem.min()
+   dem *= relief / max(dem.max(), 1e-12)
+   return dem.astype(numpy.float32)
+
+# Define function to classify a DEM into a synthetic hydro raster (uint8, 0 = NoData).
+# The lowest cells become sea/ocean and estuary, local depressions become lakes, and
+# streams follow a set of random meandering paths.
+def HydroRaster(dem, seed=0, seaFraction=0.08, estuaryFraction=0.04, lakeFraction=0.03, streams=None):
+   rng = numpy.random.RandomState(seed)
+   nrows, ncols = dem.shape
+   out = numpy.zeros(dem.shape, numpy.uint8)
+   seaLevel = numpy.percentile(dem, 100 * seaFraction)
+   estLevel = numpy.percentile(dem, 100 * (seaFraction + estuaryFraction))
+   lakes = FractalDem(nrows, ncols, seed + 1, beta=3.0)
+   out[lakes > numpy.percentile(lakes, 100 * (1 - lakeFraction))] = 2
+   if streams is None:
+      streams = max(4, (nrows + ncols) // 64)
+   for i in range(streams):
+      r = rng.randint(nrows)
+      drift = rng.uniform(-0.5, 0.5)
+      for c in range(ncols):
+         r = int(min(max(r + drift + rng.randint(-1, 2), 0), nrows - 1))
+         if out[r, c] == 0:
+            out[r, c] = 1
+   out[dem <= estLevel] = 3
+   out[dem <= seaLevel] = 4
+   return out
+
+# Define function to cut an array into overlapping tiles.  Returns a list of (grid, array) with
+# grids placed within the given grid of the whole array.
+def Tiles(array, grid, tileSize, overlap=0):
+   tiles = list()
+   nrows, ncols = array.shape
+   for row0 in range(0, nrows, tileSize):
+      for col0 in range(0, ncols, tileSize):
+         r0 = max(row0 - overlap, 0)
+         c0 = max(col0 - overlap, 0)
+         r1 = min(row0 + tileSize + overlap, nrows)
+         c1 = min(col0 + tileSize + overlap, ncols)
+         g = RasterWindow.RasterGrid(grid.xMin + c0 * grid.cellX, grid.yMax - r0 * grid.cellY, grid.cellX, grid.cellY,
+                                     c1 - c0, r1 - r0, grid.nodata, grid.spatialRef, grid.pixelType)
+         tiles.append((g, array[r0:r1, c0:c1]))
+   return tiles
+
+# Define function to cut an array into east-west strips, each read with a buffered margin of
+# the given number of rows beyond its footprint.  Returns a list of (grid, array, footprint rings),
+# like the solar radiation strips mosaicked by MosaicSolarStrips.
+def Strips(array, grid, stripRows, margin):
+   strips = list()
+   nrows, ncols = array.shape
+   for row0 in range(0, nrows, stripRows):
+      row1 = min(row0 + stripRows, nrows)
+      r0 = max(row0 - margin, 0)
+      r1 = min(row1 + margin, nrows)
+      g = RasterWindow.RasterGrid(grid.xMin, grid.yMax - r0 * grid.cellY, grid.cellX, grid.cellY,
+                                  ncols, r1 - r0, grid.nodata, grid.spatialRef, grid.pixelType)
+      yTop = grid.yMax - row0 * grid.cellY
+      yBot = grid.yMax - row1 * grid.cellY
+      ring = [(grid.xMin, yBot), (grid.xMin, yTop), (grid.xMax, yTop), (grid.xMax, yBot)]
+      strips.append((g, array[r0:r1, :], [ring]))
+   return strips
+
+# Define function to pick FCodes at random according to their frequencies
+def PickFCodes(rng, table, n):
+   codes = [c for c, w in table]
+   weights = numpy.array([w for c, w in table], float)
+   return [codes[i] for i in rng.choice(len(codes), n, p=weights / weights.sum())]
+
+# Define function to make a random blob polygon (one ring, counter-clockwise) around a center
+def BlobRing(rng, x, y, radius, vertices):
+   angles = numpy.sort(rng.uniform(0, 2 * math.pi, vertices))
+   radii = radius * rng.uniform(0.5, 1.0, vertices)
+   ring = [(x + r * math.cos(a), y + r * math.sin(a)) for a, r in zip(angles.tolist(), radii.tolist())]
+   return ring
+
+# Define function to make a random meandering line
+def MeanderLine(rng, x, y, step, vertices):
+   heading = rng.uniform(0, 2 * math.pi)
+   line = [(x, y)]
+   for i in range(vertices - 1):
+      heading += rng.uniform(-0.6, 0.6)
+      x += step * math.cos(heading)
+      y += step * math.sin(heading)
+      line.append((x, y))
+   return line
+
+# Define function to encode a polygon (list of rings) as little-endian WKB
+def PolygonWkb(rings):
+   parts = [struct.pack('<BII', 1, 3, len(rings))]
+   for ring in rings:
+      closed = list(ring) + [ring[0]]
+      parts.append(struct.pack('<I', len(closed)))
+      parts.append(numpy.array(closed, '<f8').tobytes())
+   return b''.join(parts)
+
+# Define function to encode a line as little-endian WKB
+def LineWkb(line):
+   return struct.pack('<BII', 1, 2, len(line)) + numpy.array(line, '<f8').tobytes()
+
+# Define function to compute the area of a ring (shoelace formula)
+def RingArea(ring):
+   xy = numpy.array(ring)
+   x = xy[:, 0]
+   y = xy[:, 1]
+   return abs(float(numpy.dot(x, numpy.roll(y, -1)) - numpy.dot(y, numpy.roll(x, -1)))) / 2.0
+
+# Define function to make NHD-like features over a grid's extent.
+# Returns a dictionary of layer name to a list of (rings or line, WKB, FCode, FType, area).
+def NhdFeatures(grid, nPolygons, nLines, seed=0, vertices=24):
+   rng = numpy.random.RandomState(seed)
+   size = min(grid.xMax - grid.xMin, grid.yMax - grid.yMin)
+   layers = {'NHDArea': list(), 'NHDWaterbody': list(), 'NHDFlowline': list()}
+   for fcode in PickFCodes(rng, PolygonFCodes, nPolygons):
+      x = rng.uniform(grid.xMin, grid.xMax)
+      y = rng.uniform(grid.yMin, grid.yMax)
+      ring = BlobRing(rng, x, y, size * rng.uniform(0.002, 0.03), vertices)
+      layer = 'NHDWaterbody' if fcode // 100 in (390, 436, 466) else 'NHDArea'
+      layers[layer].append(([ring], PolygonWkb([ring]), fcode, fcode // 100, RingArea(ring)))
+   for fcode in PickFCodes(rng, LineFCodes, nLines):
+      x = rng.uniform(grid.xMin, grid.xMax)
+      y = rng.uniform(grid.yMin, grid.yMax)
+      line = MeanderLine(rng, x, y, size * 0.004, vertices)
+      layers['NHDFlowline'].append((line, LineWkb(line), fcode, fcode // 100, 0.0))
+   return layers
@@ -0,0 +1,519 @@
+# ----------------------------------------------------------------------------------------
+# TileQueue.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     A job queue for spreading the tiles of BatchSolarRad, the units of Roughness or the
+#     watersheds of nhdToRaster over several machines.  The queue is a SQLite database on a shared
+#     drive; no server is needed.  A coordinator enqueues the jobs (one tile, unit or watershed, or a
+#     small batch of them, each a call of a tool's function), and any number of workers, on any
+#     machine that can reach the database, lease jobs from it, run them and record the results.
+#     A worker renews the lease of its job (heartbeat) while the job runs.  If a worker dies, its
+#     lease expires and the job is leased again by another worker, up to a number of attempts.
+#
+# Usage Tips:
+#     Describe the jobs in a JSON file: the tool's module and function, its arguments ("args" in
+#     order and/or "kwargs" by name), the argument that takes the tile, unit or watershed IDs of
+#     each job ("keyArg"), and where the IDs come from ("keys": a list, {"table": ..., "field": ...}
+#     for the features of a table, or {"nhdWorkspace": ...} for the NHD geodatabases of a
+#     workspace, found with NhdCatalog.py), e.g.
+#        {"module": "Roughness", "function": "Roughness",
+#         "args": ["N:/dem.vmos.json", "N:/ref.gdb/fc_ned_1arcsec_g", "FILE_ID", 1, 10, 100,
+#                  "N:/rough1.gdb", "N:/rough2.gdb", "N:/rough3.gdb",
+#                  "D:/scratch/{worker}.gdb", "N:/logs/rough_{key}.txt"],
+#         "keyArg": "unitIDs", "keys": {"table": "N:/ref.gdb/fc_ned_1arcsec_g", "field": "FILE_ID"},
+#         "batch": 4, "failedIf": "nonempty"}
+#     "{key}" and "{worker}" in a text argument are replaced by the job's key and the worker's name,
+#     so each job can have its own log and each worker its own scratch geodatabase (which must exist).
+#     "failedIf" says how to tell from the function's result that a job failed, for functions that
+#     report failures rather than raising errors: "nonempty" (e.g. Roughness's list of failed units),
+#     "empty" (e.g. nhdToRaster's list of output rasters), or text found in the result (e.g.
+#     "Failed to process" in BatchSolarRad's records).
+#     Then, with the Python installed with ArcGIS:
+#        python TileQueue.py N:/queue.sqlite enqueue solar jobs.json     (on one machine)
+#        python TileQueue.py N:/queue.sqlite work solar                  (on each machine, as often as wanted)
+#        python TileQueue.py N:/queue.sqlite status                      (from anywhere)
+#        python TileQueue.py N:/queue.sqlite retry solar                 (requeue the failed jobs)
+#     Enqueueing the same keys again adds nothing, so a coordinator can be rerun.  A worker stops
+#     when no job of the queue is waiting or leased.
+#     Jobs of very different sizes are best run with a memory budget instead of one at a time:
+#        python TileQueue.py N:/queue.sqlite work solar --memory-gb 48 --memory-log D:/logs/memory.jsonl
+#     runs jobs in child processes, largest first, as many at once as fit in 48 GB (see
+#     MemoryScheduler.py).  Each job's memory is estimated from the "window" of the job file,
+#     e.g. {"raster": "N:/dem.vmos.json", "buffer": 1000, "dtype": "float32",
+#     "operator": "AreaSolarRadiation"}: the cells of the job's extent plus the buffer.
+#     The lease (15 minutes by default) must be longer than the heartbeat interval (a third of it);
+#     a job that takes longer than the lease is fine, as long as its worker is alive.
+#     SQLite relies on the file locks of the shared drive.  These work on Windows shares; on other
+#     network file systems, check that locking is supported.  The database is kept in the default
+#     (rollback journal) mode, because write-ahead logging does not work over a network.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import argparse # for the command line
+import json # for the job payloads and results
+import os # provides access to operating system funtionality such as file and directory paths
+import socket # for the name of the worker's machine
+import sqlite3 # for the queue database
+import sys # provides access to Python system functions
+import threading # for the heartbeat
+import time # for leases
+import traceback # used for error handling
+from datetime import datetime # for time-stamping
+
+# Folder holding the tools' scripts, from which job modules are imported
+ScriptDir = os.path.dirname(os.path.abspath(__file__))
+
+# Default lease of a job, in seconds
+DefaultLease = 900
+
+# Default number of times a job is tried
+DefaultAttempts = 3
+
+# Table of jobs
+Schema = '''CREATE TABLE IF NOT EXISTS jobs (
+   id INTEGER PRIMARY KEY,
+   queue TEXT NOT NULL,
+   key TEXT NOT NULL,
+   payload TEXT NOT NULL,
+   state TEXT NOT NULL DEFAULT 'pending',
+   attempts INTEGER NOT NULL DEFAULT 0,
+   maxAttempts INTEGER NOT NULL,
+   worker TEXT,
+   leaseExpires REAL,
+   result TEXT,
+   error TEXT,
+   created REAL,
+   updated REAL,
+   UNIQUE (queue, key))'''
+
+# Define function to show a time-stamped message
+def Print(msg):
+   sys.stdout.write('%s  %s\n' % (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), msg))
+   sys.stdout.flush()
+
+# Define function to get a name for this worker: its machine and process
+def WorkerName():
+   return '%s-%s' % (socket.gethostname(), os.getpid())
+
+# Define class to hold a job leased from the queue.  A job's lease is identified by its worker and
+# attempt number, so a worker whose lease has expired and been taken over cannot record a result.
+class Job(object):
+   def __init__(self, row):
+      self.id, self.queue, self.key, payload, self.attempts, self.maxAttempts, self.worker = row
+      self.payload = json.loads(payload)
+
+# Define class to hold a connection to a queue database
+class TileQueue(object):
+   def __init__(self, path, timeout=120):
+      self.path = path
+      self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+      self.conn.execute(Schema)
+      self.conn.execute('CREATE INDEX IF NOT EXISTS jobState ON jobs (queue, state)')
+
+   # Define method to run statements in one transaction, taking the write lock at once so that two
+   # workers cannot lease the same job.  Returns the result of func(cursor).
+   def Transaction(self, func):
+      cur = self.conn.cursor()
+      cur.execute('BEGIN IMMEDIATE')
+      try:
+         result = func(cur)
+      except:
+         cur.execute('ROLLBACK')
+         raise
+      cur.execute('COMMIT')
+      return result
+
+   # Define method to add jobs, given as (key, payload) pairs.  Jobs already in the queue are left
+   # as they are.  Returns the number of jobs added.
+   def Enqueue(self, queue, jobs, maxAttempts=DefaultAttempts):
+      now = time.time()
+      def Add(cur):
+         added = 0
+         for key, payload in jobs:
+            cur.execute('INSERT OR IGNORE INTO jobs (queue, key, payload, maxAttempts, created, updated) VALUES (?, ?, ?, ?, ?, ?)',
+                        (queue, str(key), json.dumps(payload, sort_keys=True), maxAttempts, now, now))
+            added += cur.rowcount
+         return added
+      return self.Transaction(Add)
+
+   # Define method to lease the next job of a queue: a waiting job, or a job whose lease has
+   # expired.  Jobs whose lease expired on their last attempt are marked failed.  If given, choose
+   # picks the job from the (id, payload) pairs of the jobs that could be leased, returning its id
+   # or None.  Returns the Job, or None if there is nothing to lease.
+   def Lease(self, queue, worker, leaseSeconds=DefaultLease, choose=None):
+      now = time.time()
+      def Take(cur):
+         cur.execute("UPDATE jobs SET state = 'failed', error = 'lease of ' || worker || ' expired', updated = ? "
+                     "WHERE queue = ? AND state = 'leased' AND leaseExpires < ? AND attempts >= maxAttempts", (now, queue, now))
+         if choose is None:
+            cur.execute("SELECT id FROM jobs WHERE queue = ? AND (state = 'pending' OR (state = 'leased' AND leaseExpires < ?)) "
+                        "ORDER BY attempts, id LIMIT 1", (queue, now))
+            row = cur.fetchone()
+            jobID = row[0] if row is not None else None
+         else:
+            cur.execute("SELECT id, payload FROM jobs WHERE queue = ? AND (state = 'pending' OR (state = 'leased' AND leaseExpires < ?)) "
+                        "ORDER BY attempts, id", (queue, now))
+            jobID = choose([(row[0], json.loads(row[1])) for row in cur.fetchall()])
+         if jobID is None:
+            return None
+         cur.execute("UPDATE jobs SET state = 'leased', worker = ?, attempts = attempts + 1, leaseExpires = ?, updated = ? WHERE id = ?",
+                     (worker, now + leaseSeconds, now, jobID))
+         cur.execute('SELECT id, queue, key, payload, attempts, maxAttempts, worker FROM jobs WHERE id = ?', (jobID,))
+         return Job(cur.fetchone())
+      return self.Transaction(Take)
+
+   # Define method to renew the lease of a job.  Returns False if the lease has been lost.
+   def Heartbeat(self, job, leaseSeconds=DefaultLease):
+      now = time.time()
+      def Renew(cur):
+         cur.execute("UPDATE jobs SET leaseExpires = ?, updated = ? WHERE id = ? AND state = 'leased' AND worker = ? AND attempts = ?",
+                     (now + leaseSeconds, now, job.id, job.worker, job.attempts))
+         return cur.rowcount == 1
+      return self.Transaction(Renew)
+
+   # Define method to record the end of a job.  A failed job waits to be tried again, unless it has
+   # been tried the maximum number of times.  Returns False if the lease had been lost, in which
+   # case nothing is recorded.
+   def Finish(self, job, ok, result=None, error=None):
+      now = time.time()
+      if ok:
+         state = 'done'
+      else:
+         state = 'failed' if job.attempts >= job.maxAttempts else 'pending'
+      def Record(cur):
+         cur.execute("UPDATE jobs SET state = ?, result = ?, error = ?, leaseExpires = NULL, updated = ? "
+                     "WHERE id = ? AND state = 'leased' AND worker = ? AND attempts = ?",
+                     (state, json.dumps(result, default=str), error, now, job.id, job.worker, job.attempts))
+         return cur.rowcount == 1
+      return self.Transaction(Record)
+
+   # Define method to put the failed jobs of a queue back in the queue, with their attempts reset.
+   # Returns the number of jobs requeued.
+   def Retry(self, queue):
+      def Requeue(cur):
+         cur.execute("UPDATE jobs SET state = 'pending', attempts = 0, error = NULL, updated = ? WHERE queue = ? AND state = 'failed'",
+                     (time.time(), queue))
+         return cur.rowcount
+      return self.Transaction(Requeue)
+
+   # Define method to count the jobs of each queue in each state: {queue: {state: count}}
+   def Counts(self):
+      counts = dict()
+      for queue, state, n in self.conn.execute('SELECT queue, state, COUNT(*) FROM jobs GROUP BY queue, state'):
+         counts.setdefault(queue, dict())[state] = n
+      return counts
+
+   # Define method to list the jobs of a queue in a state, as (key, attempts, worker, lease expiry, error) rows
+   def Jobs(self, queue, state):
+      return list(self.conn.execute('SELECT key, attempts, worker, leaseExpires, error FROM jobs WHERE queue = ? AND state = ? ORDER BY id',
+                                    (queue, state)))
+
+   # Define method to close the connection
+   def Close(self):
+      self.conn.close()
+
+# Define function to replace "{key}" and "{worker}" in the text arguments of a job
+def Substitute(value, key, worker):
+   if isinstance(value, (str, type(u''))):
+      return value.replace('{key}', key).replace('{worker}', worker)
+   return value
+
+# Define function to check whether a job's result shows that it failed (see "failedIf" above)
+def ResultFailed(result, failedIf):
+   if not failedIf:
+      return False
+   if failedIf == 'nonempty':
+      return bool(result)
+   if failedIf == 'empty':
+      return not result
+   return failedIf in json.dumps(result, default=str)
+
+# Define function to get the call of a job: the module and function named in its payload, and
+# the arguments, with the job's IDs given as the key argument
+def JobCall(job, worker):
+   payload = job.payload
+   args = [Substitute(a, job.key, worker) for a in payload.get('args', [])]
+   kwargs = dict((k, Substitute(v, job.key, worker)) for k, v in payload.get('kwargs', dict()).items())
+   if payload.get('keyArg'):
+      kwargs[payload['keyArg']] = payload['ids']
+   return payload['module'], payload['function'], args, kwargs
+
+# Define function to raise an error if a job's result shows that it failed
+def CheckResult(job, result):
+   if ResultFailed(result, job.payload.get('failedIf')):
+      raise RuntimeError('The result shows the job failed: %s' % json.dumps(result, default=str)[:2000])
+
+# Define function to run a job in this process.  Returns the result, or raises an error if the job failed.
+def RunJob(job, worker):
+   moduleName, funcName, args, kwargs = JobCall(job, worker)
+   if ScriptDir not in sys.path:
+      sys.path.insert(0, ScriptDir)
+   __import__(moduleName)
+   result = getattr(sys.modules[moduleName], funcName)(*args, **kwargs)
+   CheckResult(job, result)
+   return result
+
+# Define function to renew a job's lease every third of the lease, until stopped.  Uses its own
+# connection, since a SQLite connection belongs to the thread that opened it.
+def KeepLease(path, job, leaseSeconds, stop):
+   queue = TileQueue(path)
+   try:
+      while not stop.wait(leaseSeconds / 3.0):
+         try:
+            if not queue.Heartbeat(job, leaseSeconds):
+               Print('Lost the lease of job %s' % job.key)
+               return
+         except sqlite3.Error as e:
+            Print('Could not renew the lease of job %s: %s' % (job.key, e))
+   finally:
+      queue.Close()
+
+# Define function to start renewing a job's lease in a thread.  Returns the event that stops it, and the thread.
+def StartHeartbeat(path, job, leaseSeconds):
+   stop = threading.Event()
+   heartbeat = threading.Thread(target=KeepLease, args=(path, job, leaseSeconds, stop))
+   heartbeat.daemon = True
+   heartbeat.start()
+   return stop, heartbeat
+
+# Define function to record the end of a job in the queue, and report it
+def RecordEnd(queue, job, ok, result, error, start):
+   if not queue.Finish(job, ok, result, error):
+      Print('Job %s was taken over by another worker; result not recorded' % job.key)
+   elif ok:
+      Print('Finished job %s in %.1f s' % (job.key, time.time() - start))
+   else:
+      Print('FAILED job %s:\n%s' % (job.key, error))
+
+# Define function to check whether a queue has jobs waiting or leased
+def HasJobs(queue, queueName):
+   counts = queue.Counts().get(queueName, dict())
+   return bool(counts.get('pending') or counts.get('leased'))
+
+# Define function to work on the jobs of a queue until none is waiting or leased.  Leases of other
+# workers may still expire, so while jobs are leased the queue is checked every poll seconds.
+# With a scheduler (see MemoryScheduler.py), jobs run in child processes, as many at once as fit
+# in its memory budget (see WorkScheduled).  Returns the number of jobs run.
+def Work(path, queueName, worker=None, leaseSeconds=DefaultLease, poll=60, scheduler=None):
+   worker = worker or WorkerName()
+   if scheduler is not None:
+      return WorkScheduled(path, queueName, worker, leaseSeconds, poll, scheduler)
+   queue = TileQueue(path)
+   ran = 0
+   try:
+      while True:
+         job = queue.Lease(queueName, worker, leaseSeconds)
+         if job is None:
+            if not HasJobs(queue, queueName):
+               break
+            time.sleep(poll)
+            continue
+         Print('%s working on job %s (attempt %s of %s)' % (worker, job.key, job.attempts, job.maxAttempts))
+         stop, heartbeat = StartHeartbeat(path, job, leaseSeconds)
+         start = time.time()
+         try:
+            result = RunJob(job, worker)
+            ok, error = True, None
+         except:
+            result, ok, error = None, False, traceback.format_exc()
+         stop.set()
+         heartbeat.join()
+         ran += 1
+         RecordEnd(queue, job, ok, result, error, start)
+   finally:
+      queue.Close()
+   Print('%s finished after %s jobs' % (worker, ran))
+   return ran
+
+# Define function to get the estimated peak memory of a job from the "memory" of its payload (see MakeJobs)
+def PayloadEstimate(payload, scheduler):
+   import MemoryScheduler
+   memory = payload.get('memory', dict())
+   return MemoryScheduler.Estimate(memory.get('cells', 0), memory.get('dtype', 'float32'), memory.get('operator'), scheduler.factors)
+
+# Define function to work on the jobs of a queue with a MemoryScheduler: lease the largest job that
+# fits in what the running jobs leave of the budget, run it in a child process, and repeat.  Each
+# job running at once is leased under the worker's name and a slot number (e.g. "GIS7-1234-2"),
+# which is also its "{worker}", so each slot needs its own scratch workspace.  Returns the number
+# of jobs run.
+def WorkScheduled(path, queueName, worker, leaseSeconds, poll, scheduler):
+   if ScriptDir not in sys.path:
+      sys.path.insert(0, ScriptDir)
+   queue = TileQueue(path)
+   leased = dict()
+   ran = 0
+   def Choose(rows):
+      best = None
+      for jobID, payload in rows:
+         estimate = PayloadEstimate(payload, scheduler)
+         if scheduler.Fits(estimate) and (best is None or estimate > best[1]):
+            best = (jobID, estimate)
+      return best[0] if best is not None else None
+   try:
+      while True:
+         while len(leased) < scheduler.maxJobs:
+            used = set(entry[1] for entry in leased.values())
+            slot = min(i for i in range(1, scheduler.maxJobs + 1) if i not in used)
+            slotName = '%s-%s' % (worker, slot)
+            job = queue.Lease(queueName, slotName, leaseSeconds, Choose)
+            if job is None:
+               break
+            memory = job.payload.get('memory', dict())
+            moduleName, funcName, args, kwargs = JobCall(job, slotName)
+            run = scheduler.Job(job.key, moduleName, funcName, args, kwargs,
+                                memory.get('cells', 0), memory.get('dtype', 'float32'), memory.get('operator'))
+            Print('%s working on job %s (attempt %s of %s, estimated %.2f GB)'
+                  % (slotName, job.key, job.attempts, job.maxAttempts, run.estimate / 2.0**30))
+            leased[job.key] = (job, slot) + StartHeartbeat(path, job, leaseSeconds)
+            scheduler.Start(run)
+         if not leased:
+            if not HasJobs(queue, queueName):
+               break
+            time.sleep(poll)
+            continue
+         for run, ok, value in scheduler.Wait(poll):
+            job, slot, stop, heartbeat = leased.pop(run.key)
+            stop.set()
+            heartbeat.join()
+            ran += 1
+            result, error = (value, None) if ok else (None, value)
+            if ok:
+               try:
+                  CheckResult(job, result)
+               except RuntimeError as e:
+                  ok, error = False, str(e)
+            RecordEnd(queue, job, ok, result, error, run.start)
+   finally:
+      queue.Close()
+   Print('%s finished after %s jobs' % (worker, ran))
+   return ran
+
+# Define function to list the (key, ID) pairs of a job file's "keys": a list of IDs, the values of
+# a field of a table, or the NHD geodatabases of a workspace (keyed by HUC4)
+def ListKeys(keys):
+   if isinstance(keys, list):
+      return [(str(k), k) for k in keys]
+   if 'nhdWorkspace' in keys:
+      import NhdCatalog
+      gdbs = NhdCatalog.AllGdbs(keys['nhdWorkspace'])
+      return [(huc4, gdbs[huc4]) for huc4 in sorted(gdbs)]
+   import arcpy
+   with arcpy.da.SearchCursor(keys['table'], keys['field']) as cursor:
+      return sorted(set((str(row[0]), row[0]) for row in cursor))
+
+# Define function to count the cells of the window of each key of a job file's "keys", given its
+# "window" (see MakeJobs).  Returns {key: cells}.
+def WindowCells(keys, window):
+   import RasterWindow
+   if isinstance(keys, list):
+      raise ValueError('Windows can only be found for the keys of a table or an NHD workspace')
+   grid = RasterWindow.GetRasterGrid(window['raster'])
+   extents = dict()
+   if 'nhdWorkspace' in keys:
+      import NhdCatalog
+      for huc4, gdb in NhdCatalog.AllGdbs(keys['nhdWorkspace']).items():
+         extents[huc4] = NhdCatalog.GdbExtent(gdb)
+   else:
+      import arcpy
+      import NhdCatalog
+      with arcpy.da.SearchCursor(keys['table'], [keys['field'], 'SHAPE@']) as cursor:
+         for keyValue, shape in cursor:
+            if shape is not None:
+               e = shape.extent
+               extents[str(keyValue)] = NhdCatalog.UnionExtent(extents.get(str(keyValue)), [e.XMin, e.YMin, e.XMax, e.YMax])
+   cells = dict()
+   for key, extent in extents.items():
+      w = RasterWindow.BufferedWindow(grid, *(list(extent) + [window.get('buffer', 0)])) if extent else None
+      cells[key] = w[2] * w[3] if w is not None else 0
+   return cells
+
+# Define function to make the jobs described by a job file: one job for each batch of IDs.
+# With a "window" ({"raster": ..., "buffer": ..., "dtype": ..., "operator": ...}), each job's
+# payload also has the "memory" it needs: the cells of the largest window of its batch (each key's
+# extent plus the buffer, in the raster's cells), with the data type and the operation run on them,
+# from which a MemoryScheduler estimates its peak memory.  Returns a list of (key, payload) pairs.
+def MakeJobs(spec):
+   if ScriptDir not in sys.path:
+      sys.path.insert(0, ScriptDir)
+   pairs = ListKeys(spec['keys'])
+   batch = max(int(spec.get('batch', 1)), 1)
+   window = spec.get('window')
+   cells = WindowCells(spec['keys'], window) if window else None
+   jobs = list()
+   for i in range(0, len(pairs), batch):
+      group = pairs[i:i + batch]
+      key = group[0][0] if len(group) == 1 else '%s-%s' % (group[0][0], group[-1][0])
+      payload = dict((k, spec[k]) for k in ('module', 'function', 'args', 'kwargs', 'keyArg', 'failedIf') if k in spec)
+      payload['ids'] = ';'.join(str(p[1]) for p in group)
+      if window:
+         payload['memory'] = {'cells': max(cells.get(p[0], 0) for p in group),
+                              'dtype': window.get('dtype', 'float32'), 'operator': window.get('operator')}
+      jobs.append((key, payload))
+   return jobs
+
+# Define function to describe the jobs of a database
+def Status(path):
+   queue = TileQueue(path)
+   lines = list()
+   try:
+      now = time.time()
+      for name, counts in sorted(queue.Counts().items()):
+         lines.append('%s: %s' % (name, ', '.join('%s %s' % (counts[s], s) for s in ('done', 'leased', 'pending', 'failed') if s in counts)))
+         for key, attempts, worker, expires, error in queue.Jobs(name, 'leased'):
+            note = 'lease expired' if expires < now else 'lease ends in %d s' % (expires - now)
+            lines.append('   leased %s to %s (attempt %s, %s)' % (key, worker, attempts, note))
+         for key, attempts, worker, expires, error in queue.Jobs(name, 'failed'):
+            lines.append('   failed %s after %s attempts: %s' % (key, attempts, (error or '').strip().splitlines()[-1:]))
+   finally:
+      queue.Close()
+   return '\n'.join(lines)
+
+# Define function to run the queue from the command line.  Returns the exit code.
+def Main(argv=None):
+   parser = argparse.ArgumentParser(description='Spread tiles, units or watersheds over several machines through a shared job queue.')
+   parser.add_argument('database', help='queue database (SQLite) on a shared drive')
+   sub = parser.add_subparsers(dest='command')
+   p = sub.add_parser('enqueue', help='add the jobs described by a job file')
+   p.add_argument('queue')
+   p.add_argument('jobFile')
+   p.add_argument('--attempts', type=int, default=DefaultAttempts, help='times each job is tried')
+   p = sub.add_parser('work', help='run jobs until the queue is empty')
+   p.add_argument('queue')
+   p.add_argument('--lease', type=int, default=DefaultLease, help='lease of a job, in seconds')
+   p.add_argument('--worker', help='name of this worker (default: machine and process)')
+   p.add_argument('--memory-gb', type=float, help='run jobs in child processes, as many at once as fit in this much memory')
+   p.add_argument('--jobs', type=int, help='most jobs to run at once with --memory-gb (default: one per CPU)')
+   p.add_argument('--memory-log', help='log of estimated and observed peak memory of each job (JSON lines)')
+   p.add_argument('--factors', help='calibrated memory factors (see MemoryScheduler.py)')
+   p = sub.add_parser('retry', help='requeue the failed jobs')
+   p.add_argument('queue')
+   sub.add_parser('status', help='show the jobs of each queue')
+   args = parser.parse_args(argv)
+
+   if args.command == 'enqueue':
+      with open(args.jobFile) as f:
+         jobs = MakeJobs(json.load(f))
+      queue = TileQueue(args.database)
+      added = queue.Enqueue(args.queue, jobs, args.attempts)
+      queue.Close()
+      Print('Added %s of %s jobs to %s' % (added, len(jobs), args.queue))
+   elif args.command == 'work':
+      scheduler = None
+      if args.memory_gb:
+         import MemoryScheduler
+         scheduler = MemoryScheduler.MemoryScheduler(args.memory_gb * 2**30, args.jobs, args.memory_log,
+                                                     MemoryScheduler.LoadFactors(args.factors))
+      Work(args.database, args.queue, args.worker, args.lease, scheduler=scheduler)
+   elif args.command == 'retry':
+      queue = TileQueue(args.database)
+      Print('Requeued %s failed jobs' % queue.Retry(args.queue))
+      queue.Close()
+   else:
+      print(Status(args.database))
+   return 0
+
+if __name__ == '__main__':
+   sys.exit(Main())
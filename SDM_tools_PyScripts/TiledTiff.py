@@ -0,0 +1,498 @@
+# ----------------------------------------------------------------------------------------
+# TiledTiff.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Writes single-band, tiled GeoTIFF rasters using only NumPy.  The output file is
+#     pre-allocated when the writer is created: the image file directories (IFDs) are written
+#     up front, and the tile data area is memory-mapped, so blocks can be written in any order,
+#     from several threads at once, as long as the blocks do not overlap.
+#
+# Usage Tips:
+#     Files larger than 4 GB are written as BigTIFF, which is read by ArcGIS 10.x and GDAL.
+#     Cells that are never written read as zero, so callers should write every block of the
+#     grid (filling empty blocks with NoData).
+#     The spatial reference is written to a <file>.aux.xml sidecar; tools that create outputs
+#     for ArcGIS should also run Define Projection on the finished file.
+#     For integer rasters, cell counts per value can be accumulated as blocks are written and
+#     saved as a value attribute table (<file>.vat.dbf) when the writer is closed.
+#
+#     The writer can also build internal overviews (reduced-resolution images, each half the
+#     size of the one before) and band statistics with a histogram as blocks are written, so the
+#     finished file is ready to display without building pyramids or calculating statistics.
+#     Overview levels fine enough that a block covers whole overview cells are built from each
+#     block as it is written; this requires blocks aligned to the blockSize given to the writer.
+#     The remaining coarse levels, which are tiny, are built when the writer is closed.
+#     Overview resampling is AVERAGE (mean of the valid cells) for continuous data, or NEAREST
+#     for categorical data.  AVERAGE weights each cell by the number of valid full-resolution cells
+#     behind it, at every level: the weights of the last level built block by block are kept in
+#     memory (a 32-bit count per cell of that level), so the coarse levels built on closing are
+#     weighted means of the full-resolution cells too.
+#
+#     Compressed (DEFLATE) output is also supported.  Compressed tiles vary in size, so they
+#     cannot be written in place: the blocks are written to an uncompressed staging file
+#     (<file>.stage) beside the output, and the tiles are compressed into the output, several at
+#     a time, when the writer is closed.  A predictor (horizontal differencing, or the floating
+#     point predictor for float data) is applied before compression, as GDAL does with PREDICTOR=2/3.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import struct # for packing TIFF header and directory entries
+import os # for removing the staging file
+import zlib # for DEFLATE compression
+from multiprocessing.pool import ThreadPool # for compressing tiles concurrently
+import numpy
+import RasterStats # for value counts and statistics accumulated while writing
+
+# TIFF field types: (type code, size in bytes, struct format)
+SHORT = (3, 2, 'H')
+LONG = (4, 4, 'I')
+DOUBLE = (12, 8, 'd')
+ASCII = (2, 1, 's')
+LONG8 = (16, 8, 'Q')
+
+# Map NumPy data type kinds to TIFF SampleFormat codes
+SampleFormats = {'u': 1, 'i': 2, 'f': 3}
+
+# Alignment (bytes) of the tile data area of each image
+PageSize = 4096
+
+# Overview resampling methods
+Resampling = ('AVERAGE', 'NEAREST')
+
+# Number of full-resolution rows processed at a time when building overviews on closing
+StripRows = 2048
+
+# Compression methods, with their TIFF Compression codes
+Compressions = {None: 1, 'DEFLATE': 8}
+
+# DEFLATE compression level, and the number of threads compressing tiles
+DeflateLevel = 6
+CompressThreads = 4
+
+# Define function to round a number up to a multiple of another
+def RoundUp(x, multiple):
+   return ((x + multiple - 1) // multiple) * multiple
+
+# Define function to get the tile layout (tilesDown, tilesAcross) of an image
+def TileLayout(nrows, ncols, tileSize):
+   return (RoundUp(nrows, tileSize) // tileSize, RoundUp(ncols, tileSize) // tileSize)
+
+# Define function to copy an array into a tiled (tilesDown, tilesAcross, T, T) array at a row/column offset
+def PutTiled(tiles, row0, col0, array):
+   T = tiles.shape[2]
+   nrows, ncols = array.shape
+   for tr in range(row0 // T, (row0 + nrows - 1) // T + 1):
+      r0 = max(row0, tr * T)
+      r1 = min(row0 + nrows, (tr + 1) * T)
+      for tc in range(col0 // T, (col0 + ncols - 1) // T + 1):
+         c0 = max(col0, tc * T)
+         c1 = min(col0 + ncols, (tc + 1) * T)
+         tiles[tr, tc, r0 - tr * T:r1 - tr * T, c0 - tc * T:c1 - tc * T] = array[r0 - row0:r1 - row0, c0 - col0:c1 - col0]
+
+# Define function to copy a block out of a tiled array
+def GetTiled(tiles, row0, col0, nrows, ncols):
+   T = tiles.shape[2]
+   out = numpy.empty((nrows, ncols), tiles.dtype)
+   for tr in range(row0 // T, (row0 + nrows - 1) // T + 1):
+      r0 = max(row0, tr * T)
+      r1 = min(row0 + nrows, (tr + 1) * T)
+      for tc in range(col0 // T, (col0 + ncols - 1) // T + 1):
+         c0 = max(col0, tc * T)
+         c1 = min(col0 + ncols, (tc + 1) * T)
+         out[r0 - row0:r1 - row0, c0 - col0:c1 - col0] = tiles[tr, tc, r0 - tr * T:r1 - tr * T, c0 - tc * T:c1 - tc * T]
+   return out
+
+# Define function to pack one image file directory.
+# Entries are (tag, fieldType, values); values that do not fit in the entry are written after
+# the directory.  Returns the directory bytes, given the file offset at which they will be written
+# and the offset of the next directory (0 for the last one).
+def PackIFD(entries, offset, bigTiff, nextIFD=0):
+   if bigTiff:
+      countFmt, entryFmt, valSize, nextFmt = '<Q', '<HHQ', 8, '<Q'
+   else:
+      countFmt, entryFmt, valSize, nextFmt = '<H', '<HHI', 4, '<I'
+   entries = sorted(entries, key=lambda e: e[0])
+   head = struct.calcsize(countFmt) + len(entries) * (struct.calcsize(entryFmt) + valSize) + struct.calcsize(nextFmt)
+   dirBytes = [struct.pack(countFmt, len(entries))]
+   extBytes = []
+   extOffset = offset + head
+   for tag, fieldType, values in entries:
+      code, size, fmt = fieldType
+      if fieldType == ASCII:
+         data = values.encode('ascii') + b'\0'
+         count = len(data)
+      else:
+         count = len(values)
+         data = struct.pack('<%d%s' % (count, fmt), *values)
+      if len(data) <= valSize:
+         value = data + b'\0' * (valSize - len(data))
+      else:
+         value = struct.pack('<Q' if bigTiff else '<I', extOffset)
+         data = data + b'\0' * (len(data) % 2) # keep word alignment
+         extBytes.append(data)
+         extOffset += len(data)
+      dirBytes.append(struct.pack(entryFmt, tag, code, count) + value)
+   dirBytes.append(struct.pack(nextFmt, nextIFD))
+   return b''.join(dirBytes + extBytes)
+
+# Define function to get the dimensions of each overview level: levels are added, each half the
+# size of the previous image, until an image fits in a single tile
+def OverviewSizes(nrows, ncols, tileSize):
+   sizes = list()
+   f = 2
+   while max(nrows, ncols) > tileSize * f // 2:
+      sizes.append((RoundUp(nrows, f) // f, RoundUp(ncols, f) // f))
+      f *= 2
+   return sizes
+
+# Define function to halve the resolution of a block.
+# Takes the cell values and the weight (number of valid full-resolution cells) behind each cell,
+# and returns the same for the reduced block.  AVERAGE takes the weighted mean of each 2x2 group
+# of cells; NEAREST takes the upper left cell of each group.
+def Decimate(data, weight, resampling):
+   if resampling == 'NEAREST':
+      return (data[::2, ::2], weight[::2, ::2])
+   nrows, ncols = data.shape
+   if nrows % 2 or ncols % 2:
+      data = numpy.pad(data, ((0, nrows % 2), (0, ncols % 2)), 'edge')
+      weight = numpy.pad(weight, ((0, nrows % 2), (0, ncols % 2)), 'constant')
+   h, w = data.shape[0] // 2, data.shape[1] // 2
+   sums = (data * weight).reshape(h, 2, w, 2).sum(3).sum(1)
+   weight = weight.reshape(h, 2, w, 2).sum(3).sum(1)
+   with numpy.errstate(invalid='ignore', divide='ignore'):
+      data = numpy.where(weight > 0, sums / numpy.maximum(weight, 1e-300), 0.0)
+   return (data, weight)
+
+# Define function to apply the TIFF predictor to a tile before compression.
+# Predictor 2 replaces each integer by its difference from the value to its left; predictor 3
+# (floating point) splits each row's values into bytes, most significant first, and differences
+# those.  Returns the tile as bytes.
+def ApplyPredictor(tile, predictor):
+   if predictor == 2:
+      d = tile.copy()
+      d[:, 1:] -= tile[:, :-1]
+      return d.tobytes()
+   if predictor == 3:
+      nrows, ncols = tile.shape
+      size = tile.dtype.itemsize
+      b = numpy.ascontiguousarray(tile).view(numpy.uint8).reshape(nrows, ncols, size)[:, :, ::-1]
+      b = b.transpose(0, 2, 1).reshape(nrows, ncols * size)
+      d = b.copy()
+      d[:, 1:] -= b[:, :-1]
+      return d.tobytes()
+   return numpy.ascontiguousarray(tile).tobytes()
+
+# Define class to write a tiled GeoTIFF
+class TiledTiffWriter(object):
+   def __init__(self, path, grid, dtype, tileSize=256, nodata=None, bigTiff=None, valueCounts=False,
+                overviews=False, resampling='AVERAGE', blockSize=None, stats=False, compress=None):
+      self.path = path
+      if compress not in Compressions:
+         raise ValueError('Unknown compression %s' % compress)
+      self.compress = compress
+      self.stagePath = path + '.stage' if compress else path # File the blocks are written to
+      self.grid = grid # RasterWindow.RasterGrid giving the georeferencing and dimensions
+      self.dtype = numpy.dtype(dtype).newbyteorder('<')
+      self.tileSize = tileSize
+      self.nodata = nodata
+      if self.dtype.kind not in SampleFormats:
+         raise ValueError('Unsupported data type %s' % dtype)
+      if valueCounts and self.dtype.kind == 'f':
+         raise ValueError('Value counts need an integer data type')
+      self.valueCounts = RasterStats.ValueCounts() if valueCounts else None
+      self.stats = RasterStats.RunningStats(self.dtype, self.valueCounts) if stats else None
+      if resampling not in Resampling:
+         raise ValueError('Unknown resampling method %s' % resampling)
+      self.resampling = resampling
+      self.predictor = 3 if self.dtype.kind == 'f' else 2
+
+      # Work out the layout of the image and its overviews
+      self.images = [(grid.nrows, grid.ncols)]
+      if overviews:
+         self.images += OverviewSizes(grid.nrows, grid.ncols, tileSize)
+
+      # Overview levels that are built from each block as it is written
+      self.blockSize = blockSize
+      self.blockLevels = 0
+      if blockSize:
+         while self.blockLevels + 1 < len(self.images) and blockSize % 2**(self.blockLevels + 1) == 0:
+            self.blockLevels += 1
+
+      # Weights (numbers of valid full-resolution cells) of the last level built block by block,
+      # from which the remaining levels are built on closing
+      self.weights = None
+      if 0 < self.blockLevels < len(self.images) - 1:
+         self.weights = numpy.zeros(self.images[self.blockLevels], numpy.uint32)
+      dataBytes = sum(self.ImageBytes(i) for i in range(len(self.images)))
+      if bigTiff is None:
+         bigTiff = dataBytes > 2**32 - 2**26 # leave room for directories
+      self.bigTiff = bigTiff
+      self.Allocate()
+
+   # Define method to get the number of bytes of tile data in an image
+   def ImageBytes(self, i):
+      tilesDown, tilesAcross = TileLayout(self.images[i][0], self.images[i][1], self.tileSize)
+      return tilesDown * tilesAcross * self.tileSize * self.tileSize * self.dtype.itemsize
+
+   # Define method to get the directory entries for an image, given its tile offsets (and, for
+   # compressed images, tile sizes)
+   def Entries(self, i, tileOffsets, tileByteCounts=None):
+      nrows, ncols = self.images[i]
+      T = self.tileSize
+      tileBytes = T * T * self.dtype.itemsize
+      offType = LONG8 if self.bigTiff else LONG
+      entries = [(254, LONG, [1 if i > 0 else 0]),
+                 (256, LONG, [ncols]),
+                 (257, LONG, [nrows]),
+                 (258, SHORT, [self.dtype.itemsize * 8]),
+                 (259, SHORT, [Compressions[self.compress]]),
+                 (262, SHORT, [1]),
+                 (277, SHORT, [1]),
+                 (284, SHORT, [1]),
+                 (322, SHORT, [T]),
+                 (323, SHORT, [T]),
+                 (324, offType, tileOffsets),
+                 (325, offType, tileByteCounts or [tileBytes] * len(tileOffsets)),
+                 (339, SHORT, [SampleFormats[self.dtype.kind]])]
+      if self.compress:
+         entries.append((317, SHORT, [self.predictor]))
+      if i == 0:
+         g = self.grid
+         modelType = 2 if IsGeographic(g.spatialRef) else 1
+         entries += [(33550, DOUBLE, [g.cellX, g.cellY, 0.0]),
+                     (33922, DOUBLE, [0.0, 0.0, 0.0, g.xMin, g.yMax, 0.0]),
+                     (34735, SHORT, [1, 1, 0, 2, 1024, 0, 1, modelType, 1025, 0, 1, 1])]
+      if self.nodata is not None:
+         entries.append((42113, ASCII, FormatNoData(self.nodata, self.dtype)))
+      return entries
+
+   # Define method to write the header and directories, and map the tile data areas
+   def Allocate(self):
+      nImages = len(self.images)
+      headSize = 16 if self.bigTiff else 8
+
+      # First pass with dummy offsets to size the directories, then lay out the tile data
+      ifdSizes = []
+      for i in range(nImages):
+         tilesDown, tilesAcross = TileLayout(self.images[i][0], self.images[i][1], self.tileSize)
+         ifdSizes.append(len(PackIFD(self.Entries(i, [0] * (tilesDown * tilesAcross)), 0, self.bigTiff)))
+      ifdOffsets = []
+      pos = headSize
+      for size in ifdSizes:
+         ifdOffsets.append(pos)
+         pos += RoundUp(size, 8)
+      dataOffsets = []
+      for i in range(nImages):
+         pos = RoundUp(pos, PageSize)
+         dataOffsets.append(pos)
+         pos += self.ImageBytes(i)
+      fileSize = pos
+
+      # Second pass with the real offsets, chaining each directory to the next
+      tileBytes = self.tileSize * self.tileSize * self.dtype.itemsize
+      with open(self.stagePath, 'wb') as f:
+         if self.bigTiff:
+            f.write(b'II' + struct.pack('<HHHQ', 43, 8, 0, ifdOffsets[0]))
+         else:
+            f.write(b'II' + struct.pack('<HI', 42, ifdOffsets[0]))
+         for i in range(nImages):
+            tilesDown, tilesAcross = TileLayout(self.images[i][0], self.images[i][1], self.tileSize)
+            offsets = [dataOffsets[i] + t * tileBytes for t in range(tilesDown * tilesAcross)]
+            nextIFD = ifdOffsets[i + 1] if i + 1 < nImages else 0
+            ifd = PackIFD(self.Entries(i, offsets), ifdOffsets[i], self.bigTiff, nextIFD)
+            f.seek(ifdOffsets[i])
+            f.write(ifd)
+         f.truncate(fileSize)
+
+      # Memory-map the tile data area of each image as a (tilesDown, tilesAcross, T, T) array
+      self.tiles = []
+      for i in range(nImages):
+         tilesDown, tilesAcross = TileLayout(self.images[i][0], self.images[i][1], self.tileSize)
+         self.tiles.append(numpy.memmap(self.stagePath, self.dtype, 'r+', dataOffsets[i],
+                                        (tilesDown, tilesAcross, self.tileSize, self.tileSize)))
+
+   # Define method to write a block of cells at a row/column offset of the full-resolution image.
+   # Blocks written concurrently from different threads must not overlap.
+   def WriteBlock(self, row0, col0, array):
+      array = numpy.asarray(array, self.dtype)
+      PutTiled(self.tiles[0], row0, col0, array)
+      valid = self.ValidMask(array)
+      if self.valueCounts:
+         self.valueCounts.Add(array, valid)
+      if self.stats:
+         self.stats.Add(array, valid)
+      if self.blockLevels:
+         if row0 % self.blockSize or col0 % self.blockSize:
+            raise ValueError('Block at row %s, column %s is not aligned to the block size' % (row0, col0))
+         self.WriteOverviews(row0, col0, array, valid, 1, self.blockLevels)
+
+   # Define method to get the mask of valid cells in an array, or None if all cells are valid
+   def ValidMask(self, array):
+      if self.dtype.kind == 'f':
+         valid = ~numpy.isnan(array)
+         if self.nodata is not None:
+            valid &= array != self.nodata
+         return valid
+      if self.nodata is None:
+         return None
+      return array != self.nodata
+
+   # Define method to build overview levels first..last from a block of the level before them.
+   # The block must start at a row and column that are multiples of 2**(last - first + 1).
+   # weight is the mask of valid cells of a full-resolution block, or the number of valid
+   # full-resolution cells behind each cell of an overview block, or None if all cells are valid.
+   def WriteOverviews(self, row0, col0, array, weight, first, last):
+      if self.resampling == 'AVERAGE':
+         data = array.astype(numpy.float64)
+      else:
+         data = array
+      if weight is None:
+         weight = numpy.ones(array.shape, numpy.float64)
+      else:
+         weight = weight.astype(numpy.float64)
+      for level in range(first, last + 1):
+         data, weight = Decimate(data, weight, self.resampling)
+         shift = level - first + 1
+         PutTiled(self.tiles[level], row0 >> shift, col0 >> shift, self.ToOutput(data, weight))
+         if level == self.blockLevels and self.weights is not None:
+            r0 = row0 >> shift
+            c0 = col0 >> shift
+            self.weights[r0:r0 + weight.shape[0], c0:c0 + weight.shape[1]] = weight[:self.weights.shape[0] - r0, :self.weights.shape[1] - c0]
+
+   # Define method to convert overview values back to the output data type, with NoData where no
+   # valid cells contributed
+   def ToOutput(self, data, weight):
+      if self.dtype.kind != 'f':
+         data = numpy.round(data)
+         info = numpy.iinfo(self.dtype)
+         data = numpy.clip(data, info.min, info.max)
+      out = data.astype(self.dtype)
+      if self.nodata is not None:
+         out[weight == 0] = self.nodata
+      return out
+
+   # Define method to read back a block of cells from the full-resolution image
+   def ReadBlock(self, row0, col0, nrows, ncols):
+      return GetTiled(self.tiles[0], row0, col0, nrows, ncols)
+
+   # Define method to build the overview levels that were not built block by block, all in one
+   # pass over the last level that was, a strip of rows at a time, carrying the weights of the
+   # cells down through the levels
+   def FinishOverviews(self):
+      first = self.blockLevels + 1
+      last = len(self.images) - 1
+      if first > last:
+         return
+      nrows, ncols = self.images[first - 1]
+      stripRows = RoundUp(StripRows, 2**(last - first + 1))
+      for row0 in range(0, nrows, stripRows):
+         strip = GetTiled(self.tiles[first - 1], row0, 0, min(stripRows, nrows - row0), ncols)
+         if self.weights is None:
+            weight = self.ValidMask(strip)
+         else:
+            weight = self.weights[row0:row0 + strip.shape[0]]
+         self.WriteOverviews(row0, 0, strip, weight, first, last)
+      self.weights = None
+
+   # Define method to finish the overviews, flush the data to disk and write the sidecar files
+   def Close(self):
+      self.FinishOverviews()
+      if self.compress:
+         self.WriteCompressed()
+      else:
+         for tiles in self.tiles:
+            tiles.flush()
+      self.tiles = []
+      if self.compress:
+         os.remove(self.stagePath)
+      bands = list()
+      if self.stats:
+         bands.append(self.stats.PamBandXml(1, self.nodata, self.grid.nrows * self.grid.ncols))
+      WritePamAux(self.path, self.grid.spatialRef, bands)
+      if self.valueCounts:
+         self.valueCounts.WriteVat(self.path)
+
+   # Define method to compress a tile of an image, given (image, tile row, tile column)
+   def CompressTile(self, args):
+      i, tr, tc = args
+      return zlib.compress(ApplyPredictor(self.tiles[i][tr, tc], self.predictor), DeflateLevel)
+
+   # Define method to write the compressed output from the staging file: the tile data of each
+   # image in turn, then the directories, which are only known once the tiles are compressed
+   def WriteCompressed(self):
+      headSize = 16 if self.bigTiff else 8
+      pool = ThreadPool(CompressThreads)
+      try:
+         with open(self.path, 'wb') as f:
+            f.write(b'\0' * headSize)
+            layout = list()
+            for i in range(len(self.images)):
+               tilesDown, tilesAcross = self.tiles[i].shape[:2]
+               tasks = [(i, tr, tc) for tr in range(tilesDown) for tc in range(tilesAcross)]
+               offsets = list()
+               counts = list()
+               for data in pool.imap(self.CompressTile, tasks, 8):
+                  offsets.append(f.tell())
+                  counts.append(len(data))
+                  f.write(data)
+               layout.append((offsets, counts))
+
+            # Size the directories, then write them chained one to the next
+            pos = RoundUp(f.tell(), 8)
+            ifdOffsets = list()
+            for i, (offsets, counts) in enumerate(layout):
+               ifdOffsets.append(pos)
+               pos += RoundUp(len(PackIFD(self.Entries(i, offsets, counts), 0, self.bigTiff)), 8)
+            for i, (offsets, counts) in enumerate(layout):
+               nextIFD = ifdOffsets[i + 1] if i + 1 < len(layout) else 0
+               f.seek(ifdOffsets[i])
+               f.write(PackIFD(self.Entries(i, offsets, counts), ifdOffsets[i], self.bigTiff, nextIFD))
+            f.seek(0)
+            if self.bigTiff:
+               f.write(b'II' + struct.pack('<HHHQ', 43, 8, 0, ifdOffsets[0]))
+            else:
+               f.write(b'II' + struct.pack('<HI', 42, ifdOffsets[0]))
+      finally:
+         pool.close()
+         pool.join()
+
+# Define function to check whether a spatial reference is geographic
+def IsGeographic(spatialRef):
+   if spatialRef is None:
+      return False
+   if hasattr(spatialRef, 'type'):
+      return spatialRef.type == 'Geographic'
+   return str(spatialRef).startswith('GEOGCS')
+
+# Define function to get the WKT string of a spatial reference object (or WKT string)
+def SpatialRefWKT(spatialRef):
+   if spatialRef is None:
+      return None
+   if hasattr(spatialRef, 'exportToString'):
+      return spatialRef.exportToString().split(';')[0]
+   return str(spatialRef)
+
+# Define function to format a NoData value for the GDAL_NODATA tag
+def FormatNoData(nodata, dtype):
+   if numpy.dtype(dtype).kind == 'f':
+      return repr(float(nodata))
+   return str(int(nodata))
+
+# Define function to write a GDAL/ArcGIS PAM sidecar (<raster>.aux.xml) holding the spatial reference
+def WritePamAux(path, spatialRef, bands=None):
+   wkt = SpatialRefWKT(spatialRef)
+   lines = ['<PAMDataset>']
+   if wkt:
+      lines.append('  <SRS>%s</SRS>' % XmlEscape(wkt))
+   for band in bands or []:
+      lines.append(band)
+   lines.append('</PAMDataset>')
+   with open(path + '.aux.xml', 'w') as f:
+      f.write('\n'.join(lines) + '\n')
+
+# Define function to escape text for XML
+def XmlEscape(text):
+   return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
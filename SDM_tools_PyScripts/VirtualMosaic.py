@@ -0,0 +1,156 @@
+# ----------------------------------------------------------------------------------------
+# VirtualMosaic.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     A lightweight virtual mosaic (similar to a GDAL VRT) over a set of raster tiles, such as
+#     the NED tiles written by ImportNED.  The mosaic is a small JSON index file (<name>.vmos.json)
+#     listing each tile's path and grid; nothing is merged or copied.  Windows of the mosaic are
+#     read on the fly: a spatial index finds the tiles that intersect the window, and only those
+#     tiles are read and composited (the first tile listed wins where tiles overlap).
+#
+#     RasterWindow.GetRasterGrid and RasterWindow.ReadWindow accept a virtual mosaic in place of a
+#     raster, so tools that read buffered windows of a DEM (e.g. BatchSolarRad, Roughness) can use
+#     one without a merged DEM being built first.
+#
+# Usage Tips:
+#     Tiles must share a cell size and spatial reference; tiles not aligned with the first tile
+#     are resampled to its alignment (nearest neighbor).
+#     Tile paths are stored relative to the index file when they are below its folder, so the
+#     folder of tiles and its index can be moved together.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import json # for the index file
+import math # for spatial index bins
+import os # provides access to operating system funtionality such as file and directory paths
+import threading # for guarding the cache of opened mosaics
+import RasterWindow # for raster grids and reads
+import BlockMosaic # for compositing tiles
+
+# File name ending of virtual mosaic index files
+Extension = '.vmos.json'
+
+# Define function to convert a grid to a dictionary for the index file
+def GridToDict(grid):
+   return {'xMin': grid.xMin, 'yMax': grid.yMax, 'cellX': grid.cellX, 'cellY': grid.cellY,
+           'ncols': grid.ncols, 'nrows': grid.nrows, 'nodata': grid.nodata, 'pixelType': grid.pixelType}
+
+# Define function to convert a dictionary from the index file back to a grid
+def GridFromDict(d, spatialRef=None):
+   return RasterWindow.RasterGrid(d['xMin'], d['yMax'], d['cellX'], d['cellY'], d['ncols'], d['nrows'],
+                                  d.get('nodata'), spatialRef, d.get('pixelType'))
+
+# Define class to find the items whose extents intersect a query extent.
+# Extents are binned into a uniform grid of square bins; a query checks only the items in the
+# bins it touches.
+class SpatialIndex(object):
+   def __init__(self, extents, binSize=None):
+      self.extents = extents
+      if binSize is None:
+         sizes = sorted(max(e[2] - e[0], e[3] - e[1]) for e in extents) or [1.0]
+         binSize = sizes[len(sizes) // 2] or 1.0 # median item size
+      self.binSize = float(binSize)
+      self.bins = dict()
+      for i, ext in enumerate(extents):
+         for key in self.Keys(ext):
+            self.bins.setdefault(key, list()).append(i)
+
+   # Define method to get the bins an extent touches
+   def Keys(self, ext):
+      b = self.binSize
+      c0 = int(math.floor(ext[0] / b))
+      c1 = int(math.floor(ext[2] / b))
+      r0 = int(math.floor(ext[1] / b))
+      r1 = int(math.floor(ext[3] / b))
+      return [(c, r) for c in range(c0, c1 + 1) for r in range(r0, r1 + 1)]
+
+   # Define method to get the indexes of the items intersecting an extent
+   def Query(self, ext):
+      found = set()
+      for key in self.Keys(ext):
+         for i in self.bins.get(key, ()):
+            if i not in found and BlockMosaic.Overlaps(ext, self.extents[i]):
+               found.add(i)
+      return sorted(found)
+
+# Define class to read windows of a virtual mosaic
+class VirtualMosaic(object):
+   def __init__(self, path, reader=BlockMosaic.ArcpyReader):
+      self.path = path
+      with open(path) as f:
+         doc = json.load(f)
+      self.spatialRef = doc.get('spatialRef')
+      base = os.path.dirname(os.path.abspath(path))
+      self.sources = list()
+      for tile in doc['tiles']:
+         tilePath = tile['path']
+         if not os.path.isabs(tilePath):
+            tilePath = os.path.normpath(os.path.join(base, tilePath))
+         self.sources.append(BlockMosaic.MosaicSource(tilePath, GridFromDict(tile['grid'], self.spatialRef)))
+      self.grid = GridFromDict(doc['grid'], self.spatialRef)
+      self.index = SpatialIndex([s.extent for s in self.sources])
+      self.mosaic = BlockMosaic.BlockMosaic(self.sources, self.grid, None, 'FIRST', reader,
+                                            dtype=RasterWindow.GridDtype(self.grid))
+
+   # Define method to get the tiles intersecting a window of the mosaic
+   def Tiles(self, window):
+      return self.index.Query(RasterWindow.WindowExtent(self.grid, window))
+
+   # Define method to read a window of the mosaic, reading only the tiles that intersect it.
+   # NoData cells are set to the nodata value (the mosaic's own NoData value by default).
+   def ReadWindow(self, window, nodata=None):
+      out = self.mosaic.Compose(window, self.Tiles(window))
+      if nodata is not None and self.grid.nodata is not None and nodata != self.grid.nodata:
+         out[~BlockMosaic.ValidMask(out, self.grid.nodata)] = nodata
+      return out
+
+# Define function to write a virtual mosaic index over a list of rasters.
+# gridReader gets the grid of each raster (RasterWindow.GetRasterGrid by default).
+# Returns the grid of the mosaic.
+def BuildVirtualMosaic(rasters, outPath, gridReader=RasterWindow.GetRasterGrid):
+   if not RasterWindow.IsVirtual(outPath):
+      outPath += Extension
+   base = os.path.dirname(os.path.abspath(outPath))
+   sources = [BlockMosaic.MosaicSource(r, gridReader(r)) for r in rasters]
+   template = sources[0].grid
+   grid = BlockMosaic.UnionGrid(sources, template, template.nodata)
+   tiles = list()
+   for s in sources:
+      path = os.path.abspath(s.path)
+      try:
+         rel = os.path.relpath(path, base)
+      except ValueError:
+         rel = '..' # on another drive
+      if not rel.startswith('..'):
+         path = rel
+      tiles.append({'path': path, 'grid': GridToDict(s.grid)})
+   doc = {'grid': GridToDict(grid), 'spatialRef': SpatialRefText(template.spatialRef), 'tiles': tiles}
+   with open(outPath, 'w') as f:
+      json.dump(doc, f, indent=1)
+   return grid
+
+# Define function to get the text (WKT) of a spatial reference object
+def SpatialRefText(spatialRef):
+   if spatialRef is None:
+      return None
+   if hasattr(spatialRef, 'exportToString'):
+      return spatialRef.exportToString()
+   return str(spatialRef)
+
+# Cache of opened mosaics, keyed by path, with the index file's modification time
+Cache = dict()
+CacheLock = threading.Lock()
+
+# Define function to open a virtual mosaic, reusing one already opened if its index is unchanged
+def Open(path):
+   key = os.path.abspath(path)
+   mtime = os.path.getmtime(key)
+   with CacheLock:
+      cached = Cache.get(key)
+      if cached is None or cached[0] != mtime:
+         cached = (mtime, VirtualMosaic(key))
+         Cache[key] = cached
+   return cached[1]
@@ -0,0 +1,339 @@
+# ----------------------------------------------------------------------------------------
+# WorkerDaemon.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     A long-lived local worker process that runs jobs sent to it over a local socket, so that the
+#     cost of starting Python, importing arcpy and checking out the Spatial Analyst extension (many
+#     seconds per run) is paid once rather than for every job.  A job is a call of a function in one
+#     of the tools' modules (e.g. HydroDistance.HydroDistance, or an arcpy-free engine such as
+#     RasterStats.CountValues), with its arguments; the result of the call, or the error, is sent back.
+#     Modules are imported the first time a job needs them and stay imported, so jobs that never
+#     touch arcpy never import it.
+#
+# Usage Tips:
+#     Start a worker with the Python installed with ArcGIS:
+#        python WorkerDaemon.py --port 6010 --arcpy     (import arcpy and check out Spatial at startup)
+#     then send it jobs from Python:
+#        worker = WorkerDaemon.Client(('localhost', 6010))
+#        outputs = worker.Run('HydroDistance', 'HydroDistance', inHydro, procMask, outGDB)
+#     or spread many jobs over several workers (one per port) with RunJobs.
+#     "python WorkerDaemon.py --port 6010 --ping" shows a worker's state, and "--stop" stops it.
+#     Jobs run one at a time in each worker, on the worker's main thread, because arcpy is not
+#     thread-safe (and some of its tools must run on the main thread); connections are accepted
+#     and answered on other threads, which only pass jobs to the main thread and send back their
+#     results.  Run several workers to run jobs at once.  The arcpy environment settings are reset
+#     after each job.
+#     Arguments and results are passed by pickling, so they must be plain values (paths, numbers,
+#     lists, arrays), and the functions must be defined at the top level of a module in the
+#     scripts folder (see the tools' scripts).  A module changed while a worker is running is only
+#     picked up when the worker is restarted.
+#     Only processes on the same machine that know the key can connect.  The key is the
+#     SDM_WORKER_KEY environment variable if it is set; otherwise a random key is generated the
+#     first time it is needed and kept in .sdm_worker_key in the user's home folder, readable only
+#     by the user (on Windows the home folder is private to the user), so workers and clients run
+#     by the same user share it and other users cannot connect.
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import argparse # for the command line
+import binascii # for generating keys
+import errno # for checking errors of the key file
+import gc # garbage collection
+import os # provides access to operating system funtionality such as file and directory paths
+import sys # provides access to Python system functions
+import threading # for accepting and serving several clients
+import time # for timing jobs
+import traceback # used for error handling
+from datetime import datetime # for time-stamping
+from multiprocessing.connection import Listener, Client as Connect # for the local socket
+try:
+   from Queue import Queue, Empty # Python 2
+except ImportError:
+   from queue import Queue, Empty # Python 3
+
+# Folder holding the tools' scripts, from which job modules are imported
+ScriptDir = os.path.dirname(os.path.abspath(__file__))
+
+# Default port of a worker
+DefaultPort = 6010
+
+# Name of the file holding the generated key, in the user's home folder
+KeyName = '.sdm_worker_key'
+
+# Define function to get the path of the file holding the generated key
+def KeyPath():
+   return os.path.join(os.path.expanduser('~'), KeyName)
+
+# Define function to read the generated key, generating it first if there is none.  The file is
+# created with permissions for the user only, and never overwritten, so processes starting at the
+# same time agree on one key.
+def GeneratedKey():
+   path = KeyPath()
+   try:
+      fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+   except OSError as e:
+      if e.errno != errno.EEXIST:
+         raise
+   else:
+      with os.fdopen(fd, 'w') as f:
+         f.write(binascii.hexlify(os.urandom(32)).decode('ascii'))
+   # Wait for a key being written by another process
+   for attempt in range(50):
+      with open(path) as f:
+         key = f.read().strip()
+      if key:
+         return key
+      time.sleep(0.1)
+   raise IOError('The worker key file %s is empty; delete it to generate a new key' % path)
+
+# Define function to get the key that clients must know to connect
+def AuthKey():
+   key = os.environ.get('SDM_WORKER_KEY') or GeneratedKey()
+   if not isinstance(key, bytes):
+      key = key.encode('utf-8')
+   return key
+
+# Define function to show a time-stamped message
+def Print(msg):
+   sys.stdout.write('%s  %s\n' % (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), msg))
+   sys.stdout.flush()
+
+# Define function to import arcpy and check out the Spatial Analyst extension
+def LoadArcpy():
+   import arcpy
+   arcpy.CheckOutExtension('Spatial')
+   return arcpy
+
+# Define class to run jobs in this process, one at a time
+class Worker(object):
+   def __init__(self):
+      self.lock = threading.Lock()
+      self.startTime = time.time()
+      self.jobs = 0
+      self.failures = 0
+      self.current = None
+      if ScriptDir not in sys.path:
+         sys.path.insert(0, ScriptDir)
+
+   # Define method to get a function of a module, importing the module if it is not yet imported
+   def Function(self, moduleName, funcName):
+      __import__(moduleName)
+      return getattr(sys.modules[moduleName], funcName)
+
+   # Define method to run a job.  Returns (True, result) or (False, error text).
+   def Run(self, moduleName, funcName, args, kwargs):
+      with self.lock:
+         self.current = '%s.%s' % (moduleName, funcName)
+         start = time.time()
+         try:
+            result = (True, self.Function(moduleName, funcName)(*args, **kwargs))
+         except:
+            result = (False, traceback.format_exc())
+         self.current = None
+         self.jobs += 1
+         self.failures += not result[0]
+         # Keep the settings of one job from leaking into the next
+         if 'arcpy' in sys.modules:
+            try:
+               sys.modules['arcpy'].ResetEnvironments()
+            except Exception:
+               pass
+         gc.collect()
+         Print('%s %s.%s in %.1f s' % ('Ran' if result[0] else 'FAILED', moduleName, funcName, time.time() - start))
+         return result
+
+   # Define method to describe the state of the worker
+   def State(self):
+      return {'pid': os.getpid(), 'jobs': self.jobs, 'failures': self.failures, 'current': self.current,
+              'uptime': time.time() - self.startTime, 'arcpy': 'arcpy' in sys.modules,
+              'modules': sorted(m for m in sys.modules if os.path.dirname(getattr(sys.modules[m], '__file__', None) or '') == ScriptDir)}
+
+# Define function to answer the requests of one client until it disconnects, on a thread of its
+# own.  Requests are ('run', module, function, args, kwargs), ('ping',) and ('stop',); each gets a
+# (status, value) reply.  Jobs are put on the queue of jobs, with a queue for their result, and
+# run by the main thread (see RunDaemon); a stop request puts None on the queue of jobs.
+def Serve(worker, conn, jobs, stop):
+   try:
+      while not stop.is_set():
+         try:
+            request = conn.recv()
+         except (EOFError, IOError, OSError):
+            break
+         if request[0] == 'run':
+            reply = Queue()
+            jobs.put((request[1:], reply))
+            ok, value = reply.get()
+            try:
+               conn.send(('ok' if ok else 'error', value))
+            except Exception:
+               # The result could not be pickled
+               conn.send(('error', traceback.format_exc()))
+         elif request[0] == 'ping':
+            conn.send(('ok', worker.State()))
+         elif request[0] == 'stop':
+            conn.send(('ok', worker.State()))
+            stop.set()
+            jobs.put(None)
+         else:
+            conn.send(('error', 'Unknown request %r' % (request[0],)))
+   finally:
+      conn.close()
+
+# Define function to accept connections until the worker is asked to stop, on a thread of its own,
+# starting a thread to serve each client
+def Accept(worker, listener, jobs, stop):
+   while not stop.is_set():
+      try:
+         conn = listener.accept()
+      except Exception as e:
+         if stop.is_set():
+            break
+         Print('Refused a connection: %s' % e)
+         continue
+      # A client that stops the worker then connects again, to end the wait for a connection
+      if stop.is_set():
+         conn.close()
+         break
+      thread = threading.Thread(target=Serve, args=(worker, conn, jobs, stop))
+      thread.daemon = True
+      thread.start()
+
+# Define function to run a worker on a local port until it is asked to stop.  Connections are
+# accepted and served on other threads; jobs are run here, on the main thread, one at a time.
+def RunDaemon(port=DefaultPort, preloadArcpy=False):
+   if preloadArcpy:
+      Print('Loading arcpy...')
+      LoadArcpy()
+   worker = Worker()
+   stop = threading.Event()
+   jobs = Queue()
+   listener = Listener(('localhost', port), authkey=AuthKey())
+   Print('Worker %s listening on port %s' % (os.getpid(), port))
+   accepter = threading.Thread(target=Accept, args=(worker, listener, jobs, stop))
+   accepter.daemon = True
+   accepter.start()
+   try:
+      while True:
+         # Wait with a timeout, so that Ctrl+C is seen on Windows
+         try:
+            job = jobs.get(timeout=1.0)
+         except Empty:
+            continue
+         if job is None:
+            break
+         request, reply = job
+         reply.put(worker.Run(*request))
+   finally:
+      stop.set()
+      listener.close()
+   Print('Worker %s stopped after %s jobs' % (os.getpid(), worker.jobs))
+
+# Define class for a connection to a worker
+class Client(object):
+   def __init__(self, address=('localhost', DefaultPort)):
+      self.address = tuple(address)
+      self.conn = Connect(self.address, authkey=AuthKey())
+
+   # Define method to send a request and return the reply's value, raising an error if it failed
+   def Request(self, *request):
+      self.conn.send(request)
+      status, value = self.conn.recv()
+      if status != 'ok':
+         raise RuntimeError('Job failed in worker %s:%s:\n%s' % (self.address[0], self.address[1], value))
+      return value
+
+   # Define method to run a function of a module in the worker, returning its result
+   def Run(self, moduleName, funcName, *args, **kwargs):
+      return self.Request('run', moduleName, funcName, args, kwargs)
+
+   # Define method to get the state of the worker
+   def Ping(self):
+      return self.Request('ping')
+
+   # Define method to stop the worker
+   def Stop(self):
+      state = self.Request('stop')
+      self.Close()
+      # Wake the worker's listener so it sees the stop request
+      try:
+         Connect(self.address, authkey=AuthKey()).close()
+      except Exception:
+         pass
+      return state
+
+   # Define method to close the connection
+   def Close(self):
+      if self.conn is not None:
+         self.conn.close()
+         self.conn = None
+
+# Define function to run a set of jobs on several workers, each worker running one job at a time.
+# A job is a tuple of (module, function, args, kwargs).  Yields (job index, True, result) or
+# (job index, False, error text) as jobs finish.
+def RunJobs(addresses, jobs):
+   todo = Queue()
+   for i, job in enumerate(jobs):
+      todo.put((i, job))
+   done = Queue()
+   def Feed(address):
+      try:
+         client = Client(address)
+      except Exception as e:
+         # Leave the jobs to the other workers
+         Print('Cannot connect to worker %s:%s: %s' % (address[0], address[1], e))
+         done.put(None)
+         return
+      try:
+         while not todo.empty():
+            try:
+               i, job = todo.get_nowait()
+            except Exception:
+               break
+            moduleName, funcName, args, kwargs = (tuple(job) + ((), {})[len(job) - 2:])[:4]
+            try:
+               done.put((i, True, client.Run(moduleName, funcName, *args, **kwargs)))
+            except Exception as e:
+               done.put((i, False, str(e)))
+      finally:
+         client.Close()
+         done.put(None)
+   threads = [threading.Thread(target=Feed, args=(tuple(a),)) for a in addresses]
+   for thread in threads:
+      thread.daemon = True
+      thread.start()
+   running = len(threads)
+   while running:
+      item = done.get()
+      if item is None:
+         running -= 1
+      else:
+         yield item
+   # Jobs left because no worker could be reached
+   while not todo.empty():
+      i, job = todo.get()
+      yield (i, False, 'No worker available')
+
+# Define function to run or query a worker from the command line.  Returns the exit code.
+def Main(argv=None):
+   parser = argparse.ArgumentParser(description='Run a worker that keeps arcpy loaded between jobs.')
+   parser.add_argument('--port', type=int, default=DefaultPort, help='local port to listen on')
+   parser.add_argument('--arcpy', action='store_true', help='import arcpy and check out Spatial Analyst at startup')
+   parser.add_argument('--ping', action='store_true', help='show the state of a running worker')
+   parser.add_argument('--stop', action='store_true', help='stop a running worker')
+   args = parser.parse_args(argv)
+
+   if args.ping or args.stop:
+      client = Client(('localhost', args.port))
+      state = client.Stop() if args.stop else client.Ping()
+      client.Close()
+      for key in sorted(state):
+         Print('%s: %s' % (key, state[key]))
+      return 0
+   RunDaemon(args.port, args.arcpy)
+   return 0
+
+if __name__ == '__main__':
+   sys.exit(Main())
@@ -0,0 +1,210 @@
+# ----------------------------------------------------------------------------------------
+# ZipTools.py
+# Version:  Python 2.7.5
+# Creation Date: 2026-10-18
+# Last Edit: 2026-10-18
+#
+# Summary:
+#     Helper functions for extracting downloaded zip archives.
+#     - Members can be limited with include and exclude patterns, so only the parts of an archive
+#       that are needed are written to disk.
+#     - Members already extracted (same size and CRC as in the archive) are skipped, so an
+#       interrupted extraction can simply be run again.
+#     - Members are copied in large chunks, and each is written to a temporary name and renamed
+#       into place, so a partly written file is never mistaken for a finished one.
+#     - Several archives can be extracted at once by a pool of processes.
+#
+# Usage Tips:
+#     Patterns are file name wildcards (e.g. 'grd*', 'info', '*.pdf'), separated by semicolons.
+#     A pattern matches a member if it matches the member's path or any of the folders leading
+#     to it, so 'grdn38w078_1' selects everything in that folder.  With no include patterns,
+#     every member is included.
+#     Each archive can be extracted into its own folder (named after the archive), which keeps
+#     the 'info' folders of ArcInfo GRID archives (e.g. NED tiles) from overwriting one another.
+#     Note that a file geodatabase stores all its tables as files in one folder, so filtering
+#     cannot pick out a single feature dataset from a zipped geodatabase.
+#     Scripts that extract with a process pool must keep their processing under
+#     "if __name__ == '__main__':" (see ProcessPool.py).
+# ----------------------------------------------------------------------------------------
+
+# Import required modules
+import zipfile # for handling zipfiles
+import os # provides access to operating system funtionality such as file and directory paths
+import time # for timing extraction
+import zlib # for computing CRCs
+import fnmatch # for matching member patterns
+import shutil # for copying member data
+import ProcessPool # for extracting several archives at once
+import SdmPipeline # for replacing files in one step
+
+# Size of the chunks copied from an archive member to disk
+BufferSize = 4 * 1024 * 1024
+
+# Define function to get the folder an archive is extracted into, when each archive gets its own
+def ArchiveFolder(zipPath, outDir):
+   return os.path.join(outDir, os.path.splitext(os.path.basename(zipPath))[0])
+
+# Define function to split a semicolon-delimited list of patterns (or pass a list through)
+def SplitPatterns(patterns):
+   if not patterns:
+      return list()
+   if isinstance(patterns, (list, tuple)):
+      return list(patterns)
+   return [p.strip() for p in patterns.split(';') if p.strip()]
+
+# Define function to check whether a member path matches any of a list of patterns, either
+# itself or through one of the folders leading to it
+def MatchesAny(name, patterns):
+   parts = name.rstrip('/').split('/')
+   for i in range(len(parts)):
+      path = '/'.join(parts[:i + 1])
+      for pattern in patterns:
+         if fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(parts[i], pattern):
+            return True
+   return False
+
+# Define function to check whether a member passes the include and exclude patterns
+def Wanted(name, include, exclude):
+   if include and not MatchesAny(name, include):
+      return False
+   return not (exclude and MatchesAny(name, exclude))
+
+# Define function to get the local path of a member, refusing paths outside the output folder
+def MemberPath(outDir, name):
+   parts = [p for p in name.replace('\\', '/').split('/') if p not in ('', '.')]
+   if not parts or '..' in parts or ':' in parts[0]:
+      return None
+   return os.path.join(outDir, *parts)
+
+# Define function to compute the CRC-32 of a file, as stored in zip archives
+def FileCrc(path):
+   crc = 0
+   with open(path, 'rb') as f:
+      while True:
+         data = f.read(BufferSize)
+         if not data:
+            break
+         crc = zlib.crc32(data, crc)
+   return crc & 0xffffffff
+
+# Define function to check whether a member has already been extracted to a path
+def AlreadyExtracted(info, path):
+   if not os.path.isfile(path) or os.path.getsize(path) != info.file_size:
+      return False
+   return FileCrc(path) == info.CRC
+
+# Define function to move a finished file into place, replacing any existing file in one step.
+# Another process may be replacing the same file at the same time; the last one wins.  On Windows
+# the replacement fails while another process has the file open, so it is tried a few times.
+def ReplaceFile(src, dst):
+   for attempt in range(5):
+      try:
+         SdmPipeline.ReplaceFile(src, dst)
+         return
+      except OSError:
+         time.sleep(0.1)
+   SdmPipeline.ReplaceFile(src, dst)
+
+# Define function to make a folder if it does not exist; another process may be making it too
+def MakeFolder(folder):
+   if not os.path.isdir(folder):
+      try:
+         os.makedirs(folder)
+      except OSError:
+         if not os.path.isdir(folder):
+            raise
+
+# Define class to hold the results of extracting one archive
+class ExtractReport(object):
+   def __init__(self, zipPath):
+      self.zipPath = zipPath
+      self.extracted = 0 # Members written
+      self.skipped = 0 # Members already extracted
+      self.filtered = 0 # Members left out by the patterns
+      self.nbytes = 0 # Uncompressed bytes written
+      self.seconds = 0.0
+      self.tops = list() # Top-level items (files and folders) extracted or already present
+      self.error = None
+
+   @property
+   def ok(self):
+      return self.error is None
+
+   # Define method to get the extraction throughput in megabytes (uncompressed) per second
+   def Throughput(self):
+      return self.nbytes / 1048576.0 / max(self.seconds, 1e-6)
+
+   def __repr__(self):
+      return 'ExtractReport(%r, extracted=%r, skipped=%r, filtered=%r)' % (os.path.basename(self.zipPath), self.extracted, self.skipped, self.filtered)
+
+# Define function to extract an archive into a folder, writing only the wanted members that are
+# not already there.  Returns an ExtractReport.
+def ExtractZip(zipPath, outDir, include=None, exclude=None):
+   include = SplitPatterns(include)
+   exclude = SplitPatterns(exclude)
+   report = ExtractReport(zipPath)
+   start = time.time()
+   tops = set()
+   zf = zipfile.ZipFile(zipPath)
+   try:
+      for info in zf.infolist():
+         name = info.filename.replace('\\', '/')
+         path = MemberPath(outDir, name)
+         if path is None:
+            continue
+         if not Wanted(name, include, exclude):
+            report.filtered += 1
+            continue
+         tops.add(name.split('/')[0])
+         if name.endswith('/'):
+            MakeFolder(path)
+            continue
+         if AlreadyExtracted(info, path):
+            report.skipped += 1
+            continue
+         MakeFolder(os.path.dirname(path))
+         tmp = '%s.%d.tmp' % (path, os.getpid())
+         src = zf.open(info)
+         try:
+            with open(tmp, 'wb') as dst:
+               shutil.copyfileobj(src, dst, BufferSize)
+         finally:
+            src.close()
+         ReplaceFile(tmp, path)
+         stamp = time.mktime(info.date_time + (0, 0, -1))
+         os.utime(path, (stamp, stamp))
+         report.extracted += 1
+         report.nbytes += info.file_size
+   finally:
+      zf.close()
+   report.tops = sorted(tops)
+   report.seconds = time.time() - start
+   return report
+
+# Define function to extract one archive for a process pool; arguments are passed as one tuple,
+# and errors are returned in the report rather than raised
+def ExtractTask(args):
+   zipPath, outDir, include, exclude = args
+   try:
+      return ExtractZip(zipPath, outDir, include, exclude)
+   except Exception as e:
+      report = ExtractReport(zipPath)
+      report.error = '%s: %s' % (e.__class__.__name__, e)
+      return report
+
+# Define function to extract several archives at once with a pool of processes.
+# If perArchive is True, each archive is extracted into its own folder within outDir.
+# Yields an ExtractReport for each archive as it finishes.
+def ExtractArchives(zipPaths, outDir, include=None, exclude=None, processes=4, perArchive=False):
+   tasks = [(z, ArchiveFolder(z, outDir) if perArchive else outDir, include, exclude) for z in zipPaths]
+   if processes <= 1 or len(tasks) <= 1:
+      for task in tasks:
+         yield ExtractTask(task)
+      return
+   pool = ProcessPool.OpenProcessPool(min(processes, len(tasks)))
+   try:
+      for report in pool.imap_unordered(ExtractTask, tasks):
+         yield report
+   finally:
+      pool.close()
+      pool.join()